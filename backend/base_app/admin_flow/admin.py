@@ -13,7 +13,7 @@ from .models import (
     Course, CourseCohort, CourseMilestone, Task, CourseTask, Question,
     TaskCompletion, AdminProfile, AdminAction, ContentTemplate,
     SystemConfiguration, ContentGenerationJob, AdminNotification,
-    AdminAnalytics, BulkOperation, AdminDashboardWidget
+    AdminAnalytics, AdminAnalyticsRollup, BulkOperation, AdminDashboardWidget
 )
 
 # Check if UserOrganization is already registered and unregister if needed
@@ -249,6 +249,9 @@ class CourseAdmin(admin.ModelAdmin):
     
     inlines = [CourseMilestoneInline, CourseTaskInline]
     
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related('org').with_metrics()
+    
     def org_name(self, obj):
         return obj.org.name
     org_name.short_description = 'Organization'
@@ -270,7 +273,7 @@ class TaskAdmin(admin.ModelAdmin):
             'fields': ('org', 'title', 'description', 'type', 'status')
         }),
         ('Task Details', {
-            'fields': ('difficulty_level', 'estimated_time_minutes', 'points')
+            'fields': ('difficulty_level', 'estimated_time_minutes', 'time_limit_minutes', 'points')
         }),
         ('Content', {
             'fields': ('blocks',),
@@ -292,6 +295,9 @@ class TaskAdmin(admin.ModelAdmin):
     
     inlines = [QuestionInline]
     
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related('org').with_metrics()
+    
     def org_name(self, obj):
         return obj.org.name
     org_name.short_description = 'Organization'
@@ -447,6 +453,18 @@ class AdminAnalyticsAdmin(admin.ModelAdmin):
     )
 
 
+@admin.register(AdminAnalyticsRollup)
+class AdminAnalyticsRollupAdmin(admin.ModelAdmin):
+    list_display = [
+        'organization', 'granularity', 'period_start', 'period_end', 'days',
+        'total_users', 'new_users', 'total_sessions', 'completion_rate'
+    ]
+    list_filter = [OrganizationFilter, 'granularity']
+    search_fields = ['organization__name']
+    readonly_fields = ['updated_at']
+    date_hierarchy = 'period_start'
+
+
 @admin.register(BulkOperation)
 class BulkOperationAdmin(admin.ModelAdmin):
     list_display = [
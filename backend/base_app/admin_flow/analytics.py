@@ -0,0 +1,254 @@
+"""
+Analytics time series.
+
+Daily ``AdminAnalytics`` rows are rolled up into weekly (Monday to Sunday)
+and calendar-month ``AdminAnalyticsRollup`` rows. Flow metrics (new users,
+sessions, API calls, cost, ...) are summed over the period, gauges (total
+users, courses, storage, ...) keep the value of the period's latest day and
+rates are averaged over its days, so a rollup reads like a daily row for a
+longer period. The daily analytics job refreshes the current week and
+month; ``rollup_admin_analytics`` backfills history.
+
+``analytics_series`` reads one granularity for any number of organizations
+in a single query, picking the coarsest one that still gives a useful
+number of points for the range: a month reads daily rows, a year reads
+twelve monthly rows per organization. Periods cut by the ends of the range
+are rolled up from the daily rows inside it, so totals never count days
+outside the requested range.
+"""
+import calendar
+from collections import OrderedDict
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db.models import F, Q, Value
+
+from .models import AdminAnalytics, AdminAnalyticsRollup
+
+DAY = 'day'
+WEEK = AdminAnalyticsRollup.Granularity.WEEK
+MONTH = AdminAnalyticsRollup.Granularity.MONTH
+GRANULARITIES = [DAY, WEEK, MONTH]
+
+# Ranges longer than this many days read the next coarser granularity
+DAILY_MAX_DAYS = 45
+WEEKLY_MAX_DAYS = 180
+MAX_SERIES_POINTS = 400
+
+SUMMED_FIELDS = [
+    'new_users', 'new_courses', 'total_sessions', 'api_calls', 'error_count',
+    'content_generations', 'ai_api_calls', 'ai_cost_usd',
+]
+LATEST_FIELDS = ['total_users', 'active_users', 'total_courses', 'total_tasks', 'storage_used_gb']
+AVERAGED_FIELDS = ['avg_session_duration', 'completion_rate']
+METRIC_FIELDS = SUMMED_FIELDS + LATEST_FIELDS + AVERAGED_FIELDS
+
+CENTS = Decimal('0.01')
+
+
+# =================== PERIODS ===================
+
+def period_bounds(day, granularity):
+    """First and last date of the period containing ``day``"""
+    if granularity == WEEK:
+        start = day - timedelta(days=day.weekday())
+        return start, start + timedelta(days=6)
+    if granularity == MONTH:
+        last_day = calendar.monthrange(day.year, day.month)[1]
+        return day.replace(day=1), day.replace(day=last_day)
+    return day, day
+
+
+def choose_granularity(start, end):
+    """Coarsest granularity that still splits the range into several points"""
+    days = (end - start).days + 1
+    if days <= DAILY_MAX_DAYS:
+        return DAY
+    if days <= WEEKLY_MAX_DAYS:
+        return WEEK
+    return MONTH
+
+
+def series_points(start, end, granularity):
+    """Number of periods of ``granularity`` covering the range"""
+    days = (end - start).days + 1
+    if granularity == WEEK:
+        return days // 7 + 2
+    if granularity == MONTH:
+        return (end.year - start.year) * 12 + end.month - start.month + 1
+    return days
+
+
+# =================== ROLLUPS ===================
+
+def _new_rollup(organization_id, granularity, period_start, period_end):
+    rollup = AdminAnalyticsRollup(
+        organization_id=organization_id,
+        granularity=granularity,
+        period_start=period_start,
+        period_end=period_end,
+        days=0
+    )
+    for field in SUMMED_FIELDS + AVERAGED_FIELDS:
+        setattr(rollup, field, 0)
+    return rollup
+
+
+def build_rollups(daily_rows, granularities=(WEEK, MONTH)):
+    """Unsaved rollups for daily metric dicts ordered by organization and date"""
+    rollups = OrderedDict()
+    for row in daily_rows:
+        for granularity in granularities:
+            period_start, period_end = period_bounds(row['date'], granularity)
+            key = (row['organization_id'], granularity, period_start)
+            rollup = rollups.get(key)
+            if rollup is None:
+                rollup = rollups[key] = _new_rollup(
+                    row['organization_id'], granularity, period_start, period_end
+                )
+            rollup.days += 1
+            for field in SUMMED_FIELDS + AVERAGED_FIELDS:
+                setattr(rollup, field, getattr(rollup, field) + row[field])
+            for field in LATEST_FIELDS:
+                setattr(rollup, field, row[field])
+
+    for rollup in rollups.values():
+        for field in AVERAGED_FIELDS:
+            setattr(rollup, field, (Decimal(getattr(rollup, field)) / rollup.days).quantize(CENTS))
+    return list(rollups.values())
+
+
+def refresh_rollups(start, end, org_ids=None):
+    """Recompute the weekly and monthly rollups of every period touching [start, end].
+
+    Daily rows are read once for the widest covering periods and the
+    rollups are upserted with a single ``bulk_create``. Returns the number
+    of rollups written.
+    """
+    first = min(period_bounds(start, WEEK)[0], period_bounds(start, MONTH)[0])
+    last = max(period_bounds(end, WEEK)[1], period_bounds(end, MONTH)[1])
+    daily = AdminAnalytics.objects.filter(date__range=[first, last])
+    if org_ids is not None:
+        daily = daily.filter(organization_id__in=org_ids)
+    daily_rows = daily.order_by('organization_id', 'date').values(
+        'organization_id', 'date', *METRIC_FIELDS
+    )
+
+    rollups = [
+        rollup for rollup in build_rollups(daily_rows.iterator())
+        if rollup.period_end >= start and rollup.period_start <= end
+    ]
+    AdminAnalyticsRollup.objects.bulk_create(
+        rollups,
+        update_conflicts=True,
+        unique_fields=['organization', 'granularity', 'period_start'],
+        update_fields=['period_end', 'days', *METRIC_FIELDS, 'updated_at']
+    )
+    return len(rollups)
+
+
+# =================== SERIES ===================
+
+def _daily_rows(org_ids, dates):
+    rows = AdminAnalytics.objects.filter(dates)
+    if org_ids is not None:
+        rows = rows.filter(organization_id__in=sorted(org_ids))
+    return rows
+
+
+def _partial_period_rows(org_ids, start, end, dates, granularity):
+    """Rows for periods only partly inside [start, end], rolled up from their daily rows"""
+    daily = _daily_rows(org_ids, dates).order_by('organization_id', 'date').values(
+        'organization_id', 'date', *METRIC_FIELDS, org_name=F('organization__name')
+    )
+    daily = list(daily)
+    org_names = {row['organization_id']: row['org_name'] for row in daily}
+    rows = []
+    for rollup in build_rollups(daily, granularities=[granularity]):
+        row = {field: getattr(rollup, field) for field in ['organization_id', 'days', *METRIC_FIELDS]}
+        row.update(
+            period_start=max(rollup.period_start, start),
+            period_end=min(rollup.period_end, end),
+            org_name=org_names[rollup.organization_id]
+        )
+        rows.append(row)
+    return rows
+
+
+def analytics_series(org_ids, start, end, granularity=None):
+    """Metric rows of every organization over [start, end] at one granularity.
+
+    ``org_ids`` of None means every organization. Rows are dicts ordered by
+    period (newest first) then organization. Whole periods are read from
+    the rollups in one query; periods cut by the range are rolled up from
+    their daily rows inside it (one more query), so every row, and any
+    total over them, covers exactly [start, end].
+    """
+    granularity = granularity or choose_granularity(start, end)
+    if granularity == DAY:
+        rows = _daily_rows(org_ids, Q(date__range=[start, end])).annotate(
+            period_start=F('date'), period_end=F('date'), days=Value(1)
+        )
+        return granularity, list(rows.order_by('-period_start', 'organization_id').values(
+            'organization_id', 'period_start', 'period_end', 'days', *METRIC_FIELDS,
+            org_name=F('organization__name')
+        ))
+
+    # Whole periods inside the range
+    first_start, first_end = period_bounds(start, granularity)
+    last_start, last_end = period_bounds(end, granularity)
+    whole_start = start if first_start == start else first_end + timedelta(days=1)
+    whole_end = end if last_end == end else last_start - timedelta(days=1)
+
+    rows = []
+    if whole_start <= whole_end:
+        rollups = AdminAnalyticsRollup.objects.filter(
+            granularity=granularity, period_start__gte=whole_start, period_end__lte=whole_end
+        )
+        if org_ids is not None:
+            rollups = rollups.filter(organization_id__in=sorted(org_ids))
+        rows = list(rollups.values(
+            'organization_id', 'period_start', 'period_end', 'days', *METRIC_FIELDS,
+            org_name=F('organization__name')
+        ))
+
+    if whole_start != start or whole_end != end:
+        edges = Q(date__range=[start, end]) & (Q(date__lt=whole_start) | Q(date__gt=whole_end))
+        rows += _partial_period_rows(org_ids, start, end, edges, granularity)
+
+    rows.sort(key=lambda row: row['organization_id'])
+    rows.sort(key=lambda row: row['period_start'], reverse=True)
+    return granularity, rows
+
+
+def summarize_series(rows):
+    """Range totals of series rows: flows summed, gauges at their latest period, rates day-weighted"""
+    totals = {field: 0 for field in METRIC_FIELDS}
+    days = 0
+    latest = {}
+    for row in rows:
+        for field in SUMMED_FIELDS:
+            totals[field] += row[field]
+        for field in AVERAGED_FIELDS:
+            totals[field] += row[field] * row['days']
+        days += row['days']
+        # Rows are newest first, so the first row seen per organization is its latest
+        latest.setdefault(row['organization_id'], row)
+
+    for row in latest.values():
+        for field in LATEST_FIELDS:
+            totals[field] += row[field]
+    for field in AVERAGED_FIELDS:
+        totals[field] = (Decimal(totals[field]) / days).quantize(CENTS) if days else None
+    return totals
+
+
+def compare_organizations(rows):
+    """Totals per organization, keyed by organization id"""
+    by_organization = OrderedDict()
+    for row in rows:
+        by_organization.setdefault(row['organization_id'], (row['org_name'], []))[1].append(row)
+    return OrderedDict(
+        (org_id, {'org_name': name, 'totals': summarize_series(org_rows)})
+        for org_id, (name, org_rows) in sorted(by_organization.items())
+    )
@@ -0,0 +1,230 @@
+"""
+Buffered admin audit log.
+
+``record_action`` takes the same fields as ``AdminAction.objects.create``
+but, during a request, only appends an unsaved row to a per-request
+buffer. ``AuditBufferMiddleware`` writes the buffer with one
+``bulk_create`` once the view has returned, while the request's database
+connection is still open, or as soon as it reaches ``AUDIT_BUFFER_SIZE``;
+outside requests actions are written immediately. Security alerts for
+sensitive actions are created in the same flush, since ``bulk_create``
+does not send ``post_save``.
+
+``archive_month`` moves a month of actions into gzip-compressed NDJSON
+files under ``AUDIT_ARCHIVE_DIR`` and deletes them from the table, which
+keeps the live log small; the ``archive_admin_actions`` command runs it
+for every month past the retention window.
+"""
+import gzip
+import json
+import logging
+import os
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+
+from asgiref.local import Local
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.utils import timezone
+
+from .models import AdminAction, AdminNotification
+
+logger = logging.getLogger(__name__)
+
+ACTION_FIELDS = AdminAction._meta.concrete_fields
+AUDIT_BUFFER_SIZE = 100
+ARCHIVE_BATCH_SIZE = 1000
+ARCHIVE_RETENTION_MONTHS = 6
+
+SENSITIVE_ACTIONS = [
+    AdminAction.ActionType.DELETE,
+    AdminAction.ActionType.PERMISSION_CHANGE,
+    AdminAction.ActionType.SYSTEM_CONFIG,
+]
+
+_state = Local()
+
+
+# =================== BUFFERING ===================
+
+def _buffer():
+    return getattr(_state, 'buffer', None)
+
+
+@contextmanager
+def buffered_actions():
+    """Buffer ``record_action`` calls made in the block and write them at its end.
+
+    The final write does not raise: by then the response has been produced,
+    so a failure is logged along with the actions instead.
+    """
+    previous = _buffer()
+    _state.buffer = []
+    try:
+        yield
+    finally:
+        try:
+            flush_actions()
+        except Exception:
+            # Already logged with the lost actions by flush_actions
+            pass
+        _state.buffer = previous
+
+
+class AuditBufferMiddleware:
+    """Buffer a request's admin actions and write them once the view has returned"""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with buffered_actions():
+            return self.get_response(request)
+
+
+def record_action(**fields):
+    """Queue an ``AdminAction`` for the next flush; returns the unsaved action"""
+    fields.setdefault('created_at', timezone.now())
+    action = AdminAction(**fields)
+    buffer = _buffer()
+    if buffer is None:
+        write_actions([action])
+        return action
+
+    buffer.append(action)
+    if len(buffer) >= AUDIT_BUFFER_SIZE:
+        flush_actions()
+    return action
+
+
+def flush_actions():
+    """Write every buffered action; returns the number written"""
+    buffer = _buffer()
+    if not buffer:
+        return 0
+    actions = buffer[:]
+    buffer.clear()
+    try:
+        write_actions(actions)
+    except Exception:
+        logger.exception('Failed to write %d admin actions: %s', len(actions), [
+            _action_record({field.attname: getattr(action, field.attname) for field in ACTION_FIELDS})
+            for action in actions
+        ])
+        raise
+    return len(actions)
+
+
+def sensitive_action_alert(action):
+    """Unsaved security alert for a sensitive action"""
+    return AdminNotification(
+        recipient_id=action.admin_id,
+        notification_type=AdminNotification.Type.SECURITY_ALERT,
+        priority=AdminNotification.Priority.HIGH,
+        title='Sensitive Action Performed',
+        message=f'Sensitive action {action.action_type} was performed on {action.object_type}',
+        organization_id=action.organization_id,
+        related_object_type='AdminAction',
+        related_object_id=action.id,
+        metadata={
+            'action_type': action.action_type,
+            'object_type': action.object_type,
+            'object_name': action.object_name
+        }
+    )
+
+
+def write_actions(actions):
+    """Insert actions and their security alerts with one ``bulk_create`` each"""
+    with transaction.atomic():
+        AdminAction.objects.bulk_create(actions)
+        AdminNotification.objects.bulk_create([
+            sensitive_action_alert(action)
+            for action in actions
+            if action.action_type in SENSITIVE_ACTIONS
+        ])
+
+
+# =================== ARCHIVING ===================
+
+def archive_directory():
+    return Path(getattr(settings, 'AUDIT_ARCHIVE_DIR', Path(settings.BASE_DIR) / 'audit_archive'))
+
+
+def _month_bounds(year, month):
+    start = timezone.make_aware(datetime(year, month, 1))
+    end = timezone.make_aware(datetime(year + month // 12, month % 12 + 1, 1))
+    return start, end
+
+
+def archive_path(year, month, directory=None):
+    """Directory holding a month's archive, one file per archived batch"""
+    return Path(directory or archive_directory()) / f'admin_actions-{year:04d}-{month:02d}'
+
+
+def _action_record(values):
+    return json.dumps(values, cls=DjangoJSONEncoder, sort_keys=True)
+
+
+def _write_batch(path, rows):
+    """Write one batch file; it is fsynced and renamed into place, so it is whole or absent"""
+    batch_path = path / f'batch-{rows[0]["id"]:012d}.ndjson.gz'
+    partial_path = path / f'.{batch_path.name}.partial'
+    with open(partial_path, 'wb') as raw:
+        with gzip.GzipFile(fileobj=raw, mode='wb') as archive:
+            archive.write(''.join(_action_record(row) + '\n' for row in rows).encode())
+        raw.flush()
+        os.fsync(raw.fileno())
+    os.replace(partial_path, batch_path)
+
+
+def archive_month(year, month, directory=None, batch_size=ARCHIVE_BATCH_SIZE):
+    """Move one month of actions into compressed NDJSON files; returns rows archived.
+
+    Each batch is written to its own file before its rows are deleted from
+    the table. If the process dies in between, a re-run archives those rows
+    again into another file, and ``read_archive`` skips the duplicates.
+    """
+    start, end = _month_bounds(year, month)
+    path = archive_path(year, month, directory)
+    path.mkdir(parents=True, exist_ok=True)
+    actions = AdminAction.objects.filter(created_at__gte=start, created_at__lt=end)
+    field_names = [field.attname for field in ACTION_FIELDS]
+
+    archived = 0
+    last_id = 0
+    while True:
+        batch = list(actions.filter(id__gt=last_id).order_by('id').values(*field_names)[:batch_size])
+        if not batch:
+            break
+        _write_batch(path, batch)
+
+        last_id = batch[-1]['id']
+        AdminAction.objects.filter(id__in=[row['id'] for row in batch]).delete()
+        archived += len(batch)
+    return archived
+
+
+def read_archive(year, month, directory=None):
+    """Iterate the archived actions of a month as dicts, each action once"""
+    seen = set()
+    for batch_path in sorted(archive_path(year, month, directory).glob('batch-*.ndjson.gz')):
+        with gzip.open(batch_path, 'rt') as archive:
+            for line in archive:
+                row = json.loads(line)
+                if row['id'] not in seen:
+                    seen.add(row['id'])
+                    yield row
+
+
+def archivable_months(retention_months=ARCHIVE_RETENTION_MONTHS, now=None):
+    """``(year, month)`` of every month with actions older than the retention window"""
+    now = timezone.localtime(now or timezone.now())
+    index = now.year * 12 + now.month - 1 - retention_months
+    cutoff, _ = _month_bounds(index // 12, index % 12 + 1)
+    months = AdminAction.objects.filter(
+        created_at__lt=cutoff
+    ).dates('created_at', 'month')
+    return [(month.year, month.month) for month in months]
@@ -0,0 +1,102 @@
+"""
+Per-request authorization context.
+
+Permission classes used to run their own role queries, repeated for every
+object checked. ``request_context`` builds a user's roles once per request
+and keeps them on the request for every later check. Contexts are not
+shared across requests: with a per-process cache, a revoked role would
+stay authorized on other workers until it expired. Students build their
+own context on the same helper.
+
+``admin_context`` holds the admin_flow organization roles and admin
+profile; it costs two queries per request.
+"""
+from .models import MANAGER_ROLES, AdminProfile, Organization, UserOrganization
+
+
+def request_context(request, prefix, build):
+    """The context ``build(user_id)`` for the request's user, built once per request"""
+    http_request = getattr(request, '_request', request)
+    contexts = http_request.__dict__.setdefault('_auth_contexts', {})
+    if prefix not in contexts:
+        contexts[prefix] = build(request.user.pk)
+    return contexts[prefix]
+
+
+def object_org_id(obj):
+    """Id of the organization an object belongs to, without loading it"""
+    if isinstance(obj, Organization):
+        return obj.pk
+    for field in ('organization', 'org'):
+        if hasattr(obj, f'{field}_id'):
+            return getattr(obj, f'{field}_id')
+    return None
+
+
+# =================== ADMIN CONTEXT ===================
+
+ADMIN_CONTEXT = 'admin_flow:auth'
+
+
+class AdminAuthContext:
+    """Organization roles and admin profile of one user"""
+
+    def __init__(self, org_roles, profile_role=None, profile_active=False,
+                 profile_permissions=(), profile_org_ids=()):
+        self.org_roles = dict(org_roles)
+        self.profile_role = profile_role
+        self.profile_active = profile_active
+        self.profile_permissions = list(profile_permissions or [])
+        self.profile_org_ids = frozenset(profile_org_ids)
+        self.managed_org_ids = frozenset(
+            org_id for org_id, role in self.org_roles.items() if role in MANAGER_ROLES
+        )
+
+    @property
+    def has_admin_profile(self):
+        return self.profile_role is not None
+
+    @property
+    def is_active_admin(self):
+        return self.has_admin_profile and self.profile_active
+
+    @property
+    def is_super_admin(self):
+        return self.profile_role == AdminProfile.Role.SUPER_ADMIN
+
+    def has_active_role(self, *roles):
+        return self.is_active_admin and self.profile_role in roles
+
+    @property
+    def is_org_admin(self):
+        return bool(self.managed_org_ids)
+
+    def manages(self, org_id):
+        return org_id is not None and org_id in self.managed_org_ids
+
+    def is_owner_anywhere(self):
+        return UserOrganization.Role.OWNER in self.org_roles.values()
+
+
+def build_admin_context(user_id):
+    org_roles = UserOrganization.objects.filter(user_id=user_id).values_list('org_id', 'role')
+    profile_rows = list(AdminProfile.objects.filter(user_id=user_id).values_list(
+        'role', 'is_active', 'permissions', 'organizations'
+    ))
+    if not profile_rows:
+        return AdminAuthContext(org_roles)
+
+    role, is_active, permissions, _ = profile_rows[0]
+    return AdminAuthContext(
+        org_roles,
+        profile_role=role,
+        profile_active=is_active,
+        profile_permissions=permissions,
+        profile_org_ids=[org_id for *_, org_id in profile_rows if org_id is not None]
+    )
+
+
+def admin_context(request):
+    """The request user's ``AdminAuthContext``"""
+    return request_context(request, ADMIN_CONTEXT, build_admin_context)
+
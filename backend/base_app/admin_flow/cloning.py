@@ -0,0 +1,340 @@
+"""
+Course cloning and template instantiation.
+
+A course graph (the course, its milestones, tasks, course-task links and
+questions) is read with three queries, copied into unsaved instances whose
+foreign keys point at each other in memory, and inserted with one
+``bulk_create`` per model, so the number of queries does not grow with the
+size of the course. ``bulk_create`` sends no ``post_save``: instead of a
+"New Course Created" notification per course and an analytics refresh per
+task, ``course_graph_created`` is sent once per graph and the creator gets
+a single summary notification.
+
+Milestones belong to an organization, so they are copied as well when a
+course is cloned into another one; prerequisites point at courses of the
+source organization and are only kept within it.
+
+Content templates build the same kind of graph from ``template_data``::
+
+    {
+        "course": {"description": "...", "tags": [...], ...},
+        "milestones": [{"name": "Week 1", "tasks": [<task>, ...]}, ...],
+        "tasks": [<task>, ...],
+        "structure": {"introduction": {"type": "learning_material", "duration": 30}}
+    }
+
+where a task is ``{"title", "type", "duration" or "estimated_time_minutes",
+"points", "questions": [{"type", "title", "content", ...}], ...}``. Quiz,
+learning material and assignment templates describe a single task.
+"""
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.db.models import F
+from django.dispatch import Signal
+
+from .models import (
+    AdminNotification, ContentTemplate, Course, CourseCohort, CourseMilestone,
+    CourseTask, Milestone, Question, Task
+)
+
+# Sent once after a graph is inserted, with ``course`` (None for a lone task) and ``tasks``
+course_graph_created = Signal()
+
+TASK_TEMPLATE_FIELDS = [
+    'title', 'description', 'blocks', 'difficulty_level', 'estimated_time_minutes', 'points',
+]
+QUESTION_TEMPLATE_FIELDS = [
+    'type', 'title', 'content', 'answer', 'options', 'explanation', 'points',
+    'difficulty_level', 'max_attempts', 'is_feedback_shown', 'context',
+]
+COURSE_TEMPLATE_FIELDS = [
+    'description', 'difficulty_level', 'estimated_duration_weeks', 'learning_objectives',
+    'tags', 'thumbnail_url',
+]
+
+
+class TemplateError(ValueError):
+    """Raised for template data that cannot be turned into content"""
+
+
+def copy_instance(instance, **overrides):
+    """Unsaved copy of ``instance`` without its primary key and timestamps"""
+    meta = instance._meta
+    values = {
+        field.attname: getattr(instance, field.attname)
+        for field in meta.concrete_fields
+        if not field.primary_key and field.name not in ('created_at', 'updated_at')
+    }
+    for name in overrides:
+        values.pop(meta.get_field(name).attname, None)
+    values.update(overrides)
+    return type(instance)(**values)
+
+
+class CourseGraph:
+    """Unsaved course content whose relations are held as in-memory references"""
+
+    def __init__(self, course=None):
+        self.course = course
+        self.milestones = []
+        self.course_milestones = []
+        self.tasks = []
+        self.course_tasks = []
+        self.questions = []
+
+    @property
+    def counts(self):
+        return {
+            'milestones': len(self.course_milestones),
+            'tasks': len(self.tasks),
+            'questions': len(self.questions),
+        }
+
+    def save(self):
+        """Insert the graph with one ``bulk_create`` per model, parents first"""
+        with transaction.atomic():
+            Milestone.objects.bulk_create(self.milestones)
+            if self.course is not None:
+                Course.objects.bulk_create([self.course])
+            Task.objects.bulk_create(self.tasks)
+            CourseMilestone.objects.bulk_create(self.course_milestones)
+            CourseTask.objects.bulk_create(self.course_tasks)
+            Question.objects.bulk_create(self.questions)
+        course_graph_created.send(sender=CourseGraph, course=self.course, tasks=self.tasks)
+        return self
+
+
+def notify_created(graph, recipient, title, message, organization_id, **metadata):
+    """The single summary notification for an inserted graph"""
+    if recipient is None:
+        return None
+    course = graph.course
+    return AdminNotification.objects.create(
+        recipient=recipient,
+        notification_type=AdminNotification.Type.CONTENT_PUBLISHED,
+        priority=AdminNotification.Priority.LOW,
+        title=title,
+        message=message,
+        organization_id=organization_id,
+        related_object_type='Course' if course else 'Task',
+        related_object_id=course.id if course else graph.tasks[0].id,
+        metadata=dict(graph.counts, **metadata)
+    )
+
+
+# =================== CLONING ===================
+
+def build_course_clone(course, organization_id=None, created_by=None, name=None):
+    """Unsaved deep copy of a course graph; reads it with three queries"""
+    organization_id = organization_id or course.org_id
+    same_org = organization_id == course.org_id
+
+    course_milestones = list(CourseMilestone.objects.filter(course=course).select_related('milestone'))
+    course_tasks = list(CourseTask.objects.filter(course=course).select_related('task', 'milestone'))
+    questions = list(Question.objects.filter(
+        task_id__in={course_task.task_id for course_task in course_tasks}
+    ).order_by('task_id', 'position'))
+
+    graph = CourseGraph(copy_instance(
+        course,
+        org_id=organization_id,
+        name=name or f'{course.name} (Copy)',
+        status=Course.Status.DRAFT,
+        prerequisites=course.prerequisites if same_org else [],
+        created_by=created_by
+    ))
+
+    # Milestones are shared within an organization and copied across organizations
+    milestones = {}
+    def milestone_for(milestone):
+        if milestone is None or same_org:
+            return milestone
+        if milestone.pk not in milestones:
+            milestones[milestone.pk] = copy_instance(milestone, org_id=organization_id)
+            graph.milestones.append(milestones[milestone.pk])
+        return milestones[milestone.pk]
+
+    for course_milestone in course_milestones:
+        graph.course_milestones.append(copy_instance(
+            course_milestone, course=graph.course, milestone=milestone_for(course_milestone.milestone)
+        ))
+
+    tasks = {}
+    for course_task in course_tasks:
+        if course_task.task_id not in tasks:
+            tasks[course_task.task_id] = copy_instance(
+                course_task.task, org_id=organization_id, created_by=created_by
+            )
+            graph.tasks.append(tasks[course_task.task_id])
+        graph.course_tasks.append(copy_instance(
+            course_task,
+            course=graph.course,
+            task=tasks[course_task.task_id],
+            milestone=milestone_for(course_task.milestone)
+        ))
+
+    for question in questions:
+        graph.questions.append(copy_instance(question, task=tasks[question.task_id]))
+    return graph
+
+
+def clone_course(course, organization=None, created_by=None, name=None, cohort=None):
+    """Deep-copy a course with a fixed number of queries; returns the graph.
+
+    ``cohort`` also schedules the copy for that cohort.
+    """
+    organization_id = getattr(organization, 'pk', organization)
+    with transaction.atomic():
+        graph = build_course_clone(course, organization_id, created_by, name).save()
+        if cohort is not None:
+            CourseCohort.objects.create(course=graph.course, cohort=cohort)
+        notify_created(
+            graph, created_by,
+            title='Course Cloned',
+            message=f'Course "{graph.course.name}" was created from "{course.name}" '
+                    f'with {len(graph.tasks)} tasks and {len(graph.questions)} questions',
+            organization_id=graph.course.org_id,
+            source_course_id=course.id
+        )
+    return graph
+
+
+# =================== TEMPLATES ===================
+
+def _template_value(model, name, value, context):
+    """``value`` cleaned by the model field, so bad data fails here and not on insert"""
+    field = model._meta.get_field(name)
+    try:
+        value = field.clean(value, None)
+    except ValidationError as e:
+        raise TemplateError(f'{context} {name}: {" ".join(e.messages)}')
+    # Range validators depend on the database backend; SQLite has none
+    if field.get_internal_type().startswith('Positive') and value < 0:
+        raise TemplateError(f'{context} {name}: must not be negative')
+    return value
+
+
+def _template_fields(spec, model, names, context):
+    if not isinstance(spec, dict):
+        raise TemplateError(f'{context} must be an object')
+    return {
+        name: _template_value(model, name, spec[name], context)
+        for name in names if spec.get(name) is not None
+    }
+
+
+def _template_list(value, context):
+    if value is None:
+        return []
+    if not isinstance(value, list):
+        raise TemplateError(f'{context} must be a list')
+    return value
+
+
+def _template_task(graph, spec, organization_id, created_by, default_type=None):
+    if not isinstance(spec, dict):
+        raise TemplateError('Task must be an object')
+    spec = dict(spec)
+    # Template shorthands for task fields
+    for alias, name in (('duration', 'estimated_time_minutes'), ('time_limit', 'estimated_time_minutes'),
+                        ('default_points', 'points')):
+        if spec.get(alias) is not None:
+            spec.setdefault(name, spec[alias])
+    spec.setdefault('type', default_type)
+
+    fields = _template_fields(spec, Task, TASK_TEMPLATE_FIELDS + ['type'], 'Task')
+    if not fields.get('type'):
+        raise TemplateError('Every task needs a type')
+    if not fields.get('title'):
+        raise TemplateError('Every task needs a title')
+    task = Task(org_id=organization_id, created_by=created_by, **fields)
+    graph.tasks.append(task)
+
+    questions = spec.get('questions')
+    if not isinstance(questions, list):
+        # Question counts (e.g. "questions": 5) describe a quiz's size, not its content
+        return task
+    for position, question_spec in enumerate(questions, start=1):
+        question_fields = _template_fields(question_spec, Question, QUESTION_TEMPLATE_FIELDS, 'Question')
+        question_fields.setdefault('type', Question.Type.MULTIPLE_CHOICE)
+        question_fields.setdefault('title', f'Question {position}')
+        question_fields.setdefault('content', '')
+        graph.questions.append(Question(task=task, position=position, **question_fields))
+    return task
+
+
+def build_course_from_template(template, organization_id, created_by=None, name=None):
+    """Unsaved course graph described by a course template"""
+    data = template.template_data or {}
+    if not isinstance(data, dict):
+        raise TemplateError('Template data must be an object')
+
+    course_spec = data.get('course') or {}
+    course_fields = _template_fields(course_spec, Course, COURSE_TEMPLATE_FIELDS + ['name'], 'Course')
+    course_fields['name'] = _template_value(Course, 'name', name or course_fields.get('name') or template.name, 'Course')
+    graph = CourseGraph(Course(org_id=organization_id, created_by=created_by, **course_fields))
+
+    def add_task(spec, milestone=None):
+        task = _template_task(graph, spec, organization_id, created_by)
+        graph.course_tasks.append(CourseTask(
+            course=graph.course, task=task, milestone=milestone,
+            ordering=len(graph.course_tasks) + 1,
+            is_required=_template_value(CourseTask, 'is_required', spec.get('is_required', True), 'Task')
+        ))
+
+    for ordering, milestone_spec in enumerate(_template_list(data.get('milestones'), 'Milestones'), start=1):
+        milestone_fields = _template_fields(
+            milestone_spec, Milestone, ['name', 'description', 'color', 'estimated_hours'], 'Milestone'
+        )
+        if not milestone_fields.get('name'):
+            raise TemplateError('Every milestone needs a name')
+        milestone = Milestone(org_id=organization_id, **milestone_fields)
+        graph.milestones.append(milestone)
+        graph.course_milestones.append(CourseMilestone(
+            course=graph.course, milestone=milestone, ordering=ordering
+        ))
+        for task_spec in _template_list(milestone_spec.get('tasks'), 'Milestone tasks'):
+            add_task(task_spec, milestone)
+
+    for task_spec in _template_list(data.get('tasks'), 'Tasks'):
+        add_task(task_spec)
+
+    # Outline templates: {"structure": {"introduction": {"type": ..., "duration": ...}}}
+    structure = data.get('structure') or {}
+    if not isinstance(structure, dict):
+        raise TemplateError('Structure must be an object')
+    for key, task_spec in structure.items():
+        if not isinstance(task_spec, dict):
+            raise TemplateError(f'Structure entry {key} must be an object')
+        add_task(dict({'title': key.replace('_', ' ').title()}, **task_spec))
+    return graph
+
+
+def instantiate_template(template, organization, created_by=None, name=None):
+    """Create content from a template and count the use; returns the graph.
+
+    Course templates create a draft course; other templates create one task.
+    Raises ``TemplateError`` for unusable template data.
+    """
+    organization_id = getattr(organization, 'pk', organization)
+    if template.type == ContentTemplate.Type.COURSE:
+        graph = build_course_from_template(template, organization_id, created_by, name)
+    else:
+        if not isinstance(template.template_data or {}, dict):
+            raise TemplateError('Template data must be an object')
+        graph = CourseGraph()
+        spec = dict(template.template_data or {}, title=name or template.name)
+        _template_task(graph, spec, organization_id, created_by, default_type=template.type)
+
+    with transaction.atomic():
+        graph.save()
+        ContentTemplate.objects.filter(pk=template.pk).update(usage_count=F('usage_count') + 1)
+        created = graph.course.name if graph.course else graph.tasks[0].title
+        notify_created(
+            graph, created_by,
+            title='Template Used',
+            message=f'"{created}" was created from template "{template.name}"',
+            organization_id=organization_id,
+            template_id=template.id
+        )
+    return graph
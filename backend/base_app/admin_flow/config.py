@@ -0,0 +1,117 @@
+"""
+System configuration service.
+
+Every ``SystemConfiguration`` row is loaded once per process into an
+immutable ``ConfigSnapshot`` of already-typed values, so reading a setting
+is a dict lookup with no query or parsing. Lookups resolve the
+organization's override first, then the global value.
+
+Saves and deletes in this process drop the snapshot through signals. Other
+workers notice within ``CONFIG_CHECK_INTERVAL`` seconds: at most that
+often they compare a fingerprint of the table (row count, latest
+``updated_at`` and highest id, one small aggregate) with the one the
+snapshot was built from and reload if it moved.
+"""
+import threading
+import time
+from types import MappingProxyType
+
+from django.db.models import Count, Max
+
+from .models import SystemConfiguration
+
+CONFIG_CHECK_INTERVAL = 5
+
+
+class ConfigSnapshot:
+    """Typed configuration values keyed by ``(organization_id, key)``"""
+
+    def __init__(self, rows, fingerprint=None):
+        values = {}
+        sensitive = set()
+        for row in rows:
+            scope = (row.organization_id, row.key)
+            try:
+                values[scope] = row.get_typed_value()
+            except (TypeError, ValueError):
+                # Unparseable values are served as stored
+                values[scope] = row.value
+            if row.is_sensitive:
+                sensitive.add(scope)
+        self.values = MappingProxyType(values)
+        self.sensitive = frozenset(sensitive)
+        self.fingerprint = fingerprint
+
+    def _scope(self, key, organization_id):
+        if organization_id is not None and (organization_id, key) in self.values:
+            return (organization_id, key)
+        return (None, key)
+
+    def get(self, key, organization_id=None, default=None):
+        """Organization override of ``key`` if set, else its global value, else ``default``"""
+        return self.values.get(self._scope(key, organization_id), default)
+
+    def is_sensitive(self, key, organization_id=None):
+        return self._scope(key, organization_id) in self.sensitive
+
+    def resolved(self, organization_id=None, include_sensitive=False):
+        """Every key with its effective value for an organization"""
+        keys = {
+            key for scope_org_id, key in self.values
+            if scope_org_id is None or scope_org_id == organization_id
+        }
+        return {
+            key: self.get(key, organization_id)
+            for key in keys
+            if include_sensitive or not self.is_sensitive(key, organization_id)
+        }
+
+
+# =================== PROCESS CACHE ===================
+
+_lock = threading.Lock()
+_snapshot = None
+_checked_at = 0.0
+
+
+def table_fingerprint():
+    """Cheap summary of the table that changes on any insert, update or delete"""
+    stats = SystemConfiguration.objects.aggregate(
+        rows=Count('id'), updated=Max('updated_at'), last_id=Max('id')
+    )
+    return (stats['rows'], stats['updated'], stats['last_id'])
+
+
+def load_snapshot():
+    fingerprint = table_fingerprint()
+    return ConfigSnapshot(SystemConfiguration.objects.all(), fingerprint)
+
+
+def config_snapshot():
+    """The process's snapshot, reloaded when stale"""
+    global _snapshot, _checked_at
+    now = time.monotonic()
+    snapshot = _snapshot
+    if snapshot is not None and now - _checked_at < CONFIG_CHECK_INTERVAL:
+        return snapshot
+
+    with _lock:
+        if _snapshot is not None and now - _checked_at < CONFIG_CHECK_INTERVAL:
+            return _snapshot
+        if _snapshot is None or table_fingerprint() != _snapshot.fingerprint:
+            _snapshot = load_snapshot()
+        _checked_at = time.monotonic()
+        return _snapshot
+
+
+def invalidate_config():
+    """Drop this process's snapshot so the next read reloads it"""
+    global _snapshot
+    with _lock:
+        _snapshot = None
+
+
+def get_config(key, organization=None, default=None):
+    """Effective value of a configuration key for an organization (or globally)"""
+    organization_id = getattr(organization, 'pk', organization)
+    return config_snapshot().get(key, organization_id, default)
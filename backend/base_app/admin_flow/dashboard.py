@@ -0,0 +1,124 @@
+"""
+Admin dashboard summary cache.
+
+The aggregate part of the dashboard (user, content and cohort counts, user
+limit alerts, latest analytics) is cached per admin and managed
+organization set. ``Organization.dashboard_version`` is bumped with an
+``F()`` update by membership, course, task and cohort signals and by the
+daily analytics job; a cached summary records the versions it was built
+from and is discarded when any has moved. The versions live in the
+database rather than the cache because the default ``LocMemCache`` is per
+process: a bump in one worker or in a management command must reach every
+worker's copy, at the cost of one small query per cache hit.
+"""
+import hashlib
+
+from django.core.cache import cache
+from django.db.models import Count, F, Q
+from django.utils import timezone
+
+from .models import (
+    MANAGER_ROLES, AdminAnalytics, AdminProfile, Cohort, Course, Organization, Task, User
+)
+
+DASHBOARD_CACHE_TIMEOUT = 60 * 5
+
+
+def managed_organization_ids(user):
+    """Ids of the organizations an admin manages, in id order.
+
+    Views read the same set from the request's authorization context through
+    ``tenancy.tenant_org_id_list``; this is for code running outside requests.
+    """
+    if hasattr(user, 'admin_profile') and user.admin_profile.role == AdminProfile.Role.SUPER_ADMIN:
+        organizations = Organization.objects.all()
+    else:
+        organizations = Organization.objects.filter(
+            Q(userorganization__user=user, userorganization__role__in=MANAGER_ROLES) |
+            Q(adminprofile__user=user)
+        )
+    return list(organizations.order_by('id').values_list('id', flat=True).distinct())
+
+
+# =================== VERSIONS ===================
+
+def bump_dashboard_versions(org_ids):
+    """Invalidate every cached dashboard summary covering any of ``org_ids``"""
+    Organization.objects.filter(pk__in=org_ids).update(dashboard_version=F('dashboard_version') + 1)
+
+
+def bump_dashboard_version(org_id):
+    """Invalidate every cached dashboard summary covering an organization"""
+    bump_dashboard_versions([org_id])
+
+
+def _versions(org_ids):
+    return list(Organization.objects.filter(
+        pk__in=org_ids
+    ).order_by('id').values_list('dashboard_version', flat=True))
+
+
+def _summary_key(admin_id, org_ids, day):
+    digest = hashlib.md5(','.join(map(str, org_ids)).encode()).hexdigest()
+    return f'admin_flow:dashboard:{admin_id}:{day.isoformat()}:{digest}'
+
+
+# =================== SUMMARY ===================
+
+def build_dashboard_summary(org_ids, day=None):
+    """Compute the cacheable part of the dashboard for an organization set"""
+    from .serializers import AdminAnalyticsSerializer, OrganizationSerializer
+
+    day = day or timezone.now().date()
+    users = User.objects.filter(userorganization__org_id__in=org_ids).aggregate(
+        total=Count('id', distinct=True),
+        new_today=Count('id', distinct=True, filter=Q(created_at__date=day))
+    )
+
+    system_alerts = [
+        {
+            'type': 'warning',
+            'message': f'{name} is over user limit ({member_count}/{max_users})',
+            'organization': name
+        }
+        for name, member_count, max_users in Organization.objects.filter(
+            id__in=org_ids,
+            member_count__gt=F('max_users')
+        ).values_list('name', 'member_count', 'max_users')
+    ]
+
+    analytics_summary = AdminAnalytics.objects.filter(organization_id__in=org_ids).first()
+
+    return {
+        'organization': (
+            OrganizationSerializer(Organization.objects.get(pk=org_ids[0])).data
+            if len(org_ids) == 1 else None
+        ),
+        'total_users': users['total'],
+        'new_users_today': users['new_today'],
+        'total_courses': Course.objects.filter(org_id__in=org_ids).count(),
+        'total_tasks': Task.objects.filter(org_id__in=org_ids).count(),
+        'active_cohorts': Cohort.objects.filter(org_id__in=org_ids, is_active=True).count(),
+        'analytics_summary': AdminAnalyticsSerializer(analytics_summary).data if analytics_summary else None,
+        'system_alerts': system_alerts,
+    }
+
+
+def _store(key, versions, summary):
+    cache.set(key, {'versions': versions, 'summary': summary}, DASHBOARD_CACHE_TIMEOUT)
+
+
+def dashboard_summary(admin, org_ids):
+    """Cached dashboard summary for ``admin`` over ``org_ids``"""
+    org_ids = sorted(org_ids)
+    day = timezone.now().date()
+    key = _summary_key(admin.pk, org_ids, day)
+
+    versions = _versions(org_ids)
+    entry = cache.get(key)
+    if entry is not None and entry['versions'] == versions:
+        return entry['summary']
+
+    summary = build_dashboard_summary(org_ids, day)
+    _store(key, versions, summary)
+    return summary
@@ -0,0 +1,213 @@
+"""
+Drip-release scheduler.
+
+Each ``CourseCohort``'s unlock timeline is precomputed into ``DripUnlock``
+rows: milestones unlock one ``frequency_value``/``frequency_unit`` step apart
+from the release start (``publish_at``, else the cohort start date), tasks
+unlock with their milestone, and an explicit ``unlock_at`` on the course
+milestone or task always wins. Timelines are rebuilt when the course
+structure or schedule changes, so "what is unlocked for me now" is a single
+indexed range query, and unlock emails are queued in bulk per boundary.
+"""
+import calendar
+from collections import defaultdict
+from datetime import datetime, time, timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .models import CourseCohort, CourseMilestone, CourseTask, DripUnlock, UserCohort
+from .outbox import queue_emails
+
+NOTIFY_BATCH_SIZE = 500
+DEFAULT_FREQUENCY_UNIT = 'day'
+FREQUENCY_UNITS = {
+    'minute': timedelta(minutes=1),
+    'hour': timedelta(hours=1),
+    'day': timedelta(days=1),
+    'week': timedelta(weeks=1),
+}
+
+
+# =================== TIMELINE ===================
+
+def _add_months(value, months):
+    month = value.month - 1 + months
+    year = value.year + month // 12
+    month = month % 12 + 1
+    return value.replace(year=year, month=month, day=min(value.day, calendar.monthrange(year, month)[1]))
+
+
+def release_step(start, frequency_value, frequency_unit, steps):
+    """Time of the ``steps``-th release after ``start``"""
+    unit = (frequency_unit or DEFAULT_FREQUENCY_UNIT).lower().rstrip('s')
+    if unit == 'month':
+        return _add_months(start, frequency_value * steps)
+    return start + FREQUENCY_UNITS.get(unit, FREQUENCY_UNITS[DEFAULT_FREQUENCY_UNIT]) * frequency_value * steps
+
+
+def release_start(course_cohort):
+    """When a cohort's course content starts releasing"""
+    if course_cohort.publish_at:
+        return course_cohort.publish_at
+    if course_cohort.cohort.start_date:
+        return timezone.make_aware(datetime.combine(course_cohort.cohort.start_date, time.min))
+    return course_cohort.created_at
+
+
+def compute_timeline(course_cohort, milestones, tasks):
+    """Map ``(course_milestone_id, course_task_id)`` to its unlock time"""
+    start = release_start(course_cohort)
+    drip = course_cohort.is_drip_enabled and course_cohort.frequency_value
+
+    timeline = {}
+    milestone_unlocks = {}
+    for position, course_milestone in enumerate(sorted(milestones, key=lambda m: (m.ordering, m.id))):
+        unlock_at = course_milestone.unlock_at or (
+            release_step(start, course_cohort.frequency_value, course_cohort.frequency_unit, position)
+            if drip else start
+        )
+        milestone_unlocks[course_milestone.milestone_id] = unlock_at
+        timeline[(course_milestone.id, None)] = unlock_at
+
+    for course_task in tasks:
+        timeline[(None, course_task.id)] = (
+            course_task.unlock_at
+            or milestone_unlocks.get(course_task.milestone_id)
+            or start
+        )
+    return timeline
+
+
+def rebuild_timeline(course_cohort, milestones=None, tasks=None, now=None):
+    """Bring a cohort's ``DripUnlock`` rows in line with the course structure"""
+    now = now or timezone.now()
+    if milestones is None:
+        milestones = list(CourseMilestone.objects.filter(course_id=course_cohort.course_id))
+    if tasks is None:
+        tasks = list(CourseTask.objects.filter(course_id=course_cohort.course_id))
+
+    timeline = compute_timeline(course_cohort, milestones, tasks)
+    existing = {
+        (unlock.course_milestone_id, unlock.course_task_id): unlock
+        for unlock in DripUnlock.objects.filter(course_cohort=course_cohort)
+    }
+
+    changed = []
+    for key, unlock in existing.items():
+        unlock_at = timeline.get(key)
+        if unlock_at is not None and unlock_at != unlock.unlock_at:
+            unlock.unlock_at = unlock_at
+            if unlock_at > now:
+                # Moved into the future: announce it again when it unlocks
+                unlock.notified_at = None
+            changed.append(unlock)
+
+    with transaction.atomic():
+        stale = [unlock.pk for key, unlock in existing.items() if key not in timeline]
+        if stale:
+            DripUnlock.objects.filter(pk__in=stale).delete()
+        if changed:
+            DripUnlock.objects.bulk_update(changed, ['unlock_at', 'notified_at'])
+        DripUnlock.objects.bulk_create([
+            DripUnlock(
+                course_cohort=course_cohort,
+                cohort_id=course_cohort.cohort_id,
+                course_id=course_cohort.course_id,
+                kind=DripUnlock.Kind.MILESTONE if course_milestone_id else DripUnlock.Kind.TASK,
+                course_milestone_id=course_milestone_id,
+                course_task_id=course_task_id,
+                unlock_at=unlock_at,
+                # Content already open when first scheduled is not announced
+                notified_at=now if unlock_at <= now else None
+            )
+            for (course_milestone_id, course_task_id), unlock_at in timeline.items()
+            if (course_milestone_id, course_task_id) not in existing
+        ])
+
+
+def rebuild_course_timelines(course_id, now=None):
+    """Rebuild every cohort timeline of a course, loading its structure once"""
+    milestones = list(CourseMilestone.objects.filter(course_id=course_id))
+    tasks = list(CourseTask.objects.filter(course_id=course_id))
+    for course_cohort in CourseCohort.objects.filter(course_id=course_id).select_related('cohort'):
+        rebuild_timeline(course_cohort, milestones, tasks, now=now)
+
+
+def rebuild_cohort_timelines(cohort_id, now=None):
+    """Rebuild the timelines of every course a cohort takes"""
+    for course_cohort in CourseCohort.objects.filter(cohort_id=cohort_id).select_related('cohort'):
+        rebuild_timeline(course_cohort, now=now)
+
+
+# =================== UNLOCKED CONTENT ===================
+
+def unlocked_items(user, course_id, now=None):
+    """Course milestone and task ids unlocked for ``user`` in any of their cohorts"""
+    unlocked = {'milestones': set(), 'tasks': set()}
+    for course_milestone_id, course_task_id in DripUnlock.objects.filter(
+        cohort__usercohort__user=user,
+        course_id=course_id,
+        unlock_at__lte=now or timezone.now()
+    ).values_list('course_milestone_id', 'course_task_id'):
+        if course_milestone_id:
+            unlocked['milestones'].add(course_milestone_id)
+        else:
+            unlocked['tasks'].add(course_task_id)
+    return unlocked
+
+
+# =================== UNLOCK NOTIFICATIONS ===================
+
+def _unlock_title(unlock):
+    if unlock.course_milestone_id:
+        return unlock.course_milestone.milestone.name
+    return unlock.course_task.task.title
+
+
+def _unlock_emails(batch):
+    """One email per learner for each (cohort, course) with newly unlocked content"""
+    unlocked = defaultdict(list)
+    for unlock in batch:
+        unlocked[(unlock.cohort_id, unlock.course)].append(_unlock_title(unlock))
+
+    learners = defaultdict(list)
+    for cohort_id, email in UserCohort.objects.filter(
+        cohort_id__in={cohort_id for cohort_id, _ in unlocked},
+        role='learner',
+        status='active'
+    ).values_list('cohort_id', 'user__email'):
+        learners[cohort_id].append(email)
+
+    messages = []
+    for (cohort_id, course), titles in unlocked.items():
+        subject = f'New content unlocked in {course.name}'
+        message = 'The following content is now available:\n\n' + '\n'.join(f'- {title}' for title in titles)
+        messages.extend((subject, message, [email], None) for email in learners[cohort_id])
+    return messages
+
+
+def notify_due_unlocks(now=None, batch_size=NOTIFY_BATCH_SIZE):
+    """Queue unlock emails for boundaries that have passed; returns emails queued"""
+    now = now or timezone.now()
+    queued = 0
+
+    while True:
+        with transaction.atomic():
+            batch = list(DripUnlock.objects.select_for_update(skip_locked=True, of=('self',)).filter(
+                notified_at__isnull=True,
+                unlock_at__lte=now
+            ).select_related(
+                'course', 'course_milestone__milestone', 'course_task__task'
+            ).order_by('unlock_at', 'id')[:batch_size])
+            if not batch:
+                break
+
+            if getattr(settings, 'SEND_STUDENT_EMAILS', True):
+                messages = _unlock_emails(batch)
+                queue_emails(messages)
+                queued += len(messages)
+            DripUnlock.objects.filter(pk__in=[unlock.pk for unlock in batch]).update(notified_at=now)
+
+    return queued
@@ -0,0 +1,58 @@
+"""
+Email template rendering.
+
+Email templates come in ``<name>.txt`` / ``<name>.html`` pairs. Each pair is
+compiled once per process and reused. ``render_email_batch`` renders many
+recipients against one shared context in a single pass, and recipients with
+identical per-recipient context share the same rendered bodies (e.g. a
+course-wide announcement is rendered once, however many students get it).
+"""
+import json
+from functools import lru_cache
+
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.template import Context
+from django.template.loader import get_template
+
+
+@lru_cache(maxsize=128)
+def _compiled(template_name):
+    """Compiled ``django.template.base.Template`` for ``template_name``"""
+    return get_template(template_name).template
+
+
+@receiver(setting_changed)
+def _clear_compiled_templates(sender, setting, **kwargs):
+    if setting == 'TEMPLATES':
+        _compiled.cache_clear()
+
+
+def _dedup_key(context):
+    return json.dumps(context, sort_keys=True, default=str)
+
+
+def render_email_batch(template_base, recipient_contexts, shared_context=None):
+    """Render ``(plain, html)`` bodies for each per-recipient context.
+
+    ``shared_context`` is pushed once underneath every recipient's context.
+    Returns a list aligned with ``recipient_contexts``.
+    """
+    plain_template = _compiled(f'{template_base}.txt')
+    html_template = _compiled(f'{template_base}.html')
+    context = Context(shared_context or {})
+
+    rendered = {}
+    bodies = []
+    for recipient_context in recipient_contexts:
+        key = _dedup_key(recipient_context)
+        if key not in rendered:
+            with context.push(recipient_context):
+                rendered[key] = (plain_template.render(context), html_template.render(context))
+        bodies.append(rendered[key])
+    return bodies
+
+
+def render_email(template_base, context):
+    """Render ``(plain, html)`` bodies for a single email"""
+    return render_email_batch(template_base, [context])[0]
@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand
+
+from admin_flow.audit import (
+    archive_month, archivable_months, archive_path, ARCHIVE_BATCH_SIZE, ARCHIVE_RETENTION_MONTHS
+)
+
+
+class Command(BaseCommand):
+    help = 'Move admin actions older than the retention window into monthly NDJSON archives'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--retention-months',
+            type=int,
+            default=ARCHIVE_RETENTION_MONTHS,
+            help='Number of recent months kept in the database',
+        )
+        parser.add_argument(
+            '--directory',
+            help='Archive directory (defaults to AUDIT_ARCHIVE_DIR)',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=ARCHIVE_BATCH_SIZE,
+            help='Number of actions written and deleted per batch',
+        )
+
+    def handle(self, *args, **options):
+        total = 0
+        for year, month in archivable_months(options['retention_months']):
+            archived = archive_month(year, month, options['directory'], options['batch_size'])
+            total += archived
+            self.stdout.write(f'Archived {archived} actions to {archive_path(year, month, options["directory"])}')
+        self.stdout.write(self.style.SUCCESS(f'Archived {total} admin actions'))
@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+
+from admin_flow.outbox import deliver_pending, DELIVERY_BATCH_SIZE
+
+
+class Command(BaseCommand):
+    help = 'Deliver queued outbox emails in batches over a reused connection'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=DELIVERY_BATCH_SIZE,
+            help='Number of emails sent per connection',
+        )
+        parser.add_argument(
+            '--max-batches',
+            type=int,
+            help='Stop after this many batches (defaults to draining the outbox)',
+        )
+
+    def handle(self, *args, **options):
+        sent, failed = deliver_pending(
+            batch_size=options['batch_size'],
+            max_batches=options['max_batches']
+        )
+        self.stdout.write(self.style.SUCCESS(f'Sent {sent} emails, {failed} failed'))
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from admin_flow.membership import reconcile_member_counts
+
+
+class Command(BaseCommand):
+    help = 'Recount organization members and correct drifted member counts'
+
+    def handle(self, *args, **options):
+        corrected = reconcile_member_counts()
+        self.stdout.write(self.style.SUCCESS(f'Corrected member counts for {len(corrected)} organizations'))
@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand
+
+from admin_flow.drip import notify_due_unlocks, rebuild_timeline, NOTIFY_BATCH_SIZE
+from admin_flow.models import CourseCohort
+
+
+class Command(BaseCommand):
+    help = 'Queue notifications for drip content that has unlocked'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--rebuild',
+            action='store_true',
+            help='Recompute every cohort unlock timeline first',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=NOTIFY_BATCH_SIZE,
+            help='Number of unlocks processed per transaction',
+        )
+
+    def handle(self, *args, **options):
+        if options['rebuild']:
+            rebuilt = 0
+            for course_cohort in CourseCohort.objects.select_related('cohort').iterator():
+                rebuild_timeline(course_cohort)
+                rebuilt += 1
+            self.stdout.write(f'Rebuilt {rebuilt} unlock timelines')
+
+        queued = notify_due_unlocks(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Queued {queued} unlock notifications'))
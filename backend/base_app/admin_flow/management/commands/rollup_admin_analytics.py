@@ -0,0 +1,50 @@
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Max, Min
+from django.utils import timezone
+
+from admin_flow.analytics import refresh_rollups
+from admin_flow.models import AdminAnalytics
+
+
+def parse_date(value):
+    try:
+        return datetime.strptime(value, '%Y-%m-%d').date()
+    except ValueError:
+        raise CommandError(f'Invalid date {value!r}, expected YYYY-MM-DD')
+
+
+class Command(BaseCommand):
+    help = 'Rebuild weekly and monthly admin analytics rollups from the daily rows'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--since',
+            type=parse_date,
+            help='First date to roll up (defaults to the earliest daily analytics)',
+        )
+        parser.add_argument(
+            '--until',
+            type=parse_date,
+            help='Last date to roll up (defaults to the latest daily analytics)',
+        )
+        parser.add_argument(
+            '--organization',
+            type=int,
+            action='append',
+            help='Organization id to roll up (repeatable, defaults to all)',
+        )
+
+    def handle(self, *args, **options):
+        bounds = AdminAnalytics.objects.aggregate(first=Min('date'), last=Max('date'))
+        since = options['since'] or bounds['first']
+        until = options['until'] or bounds['last'] or timezone.now().date()
+        if since is None:
+            self.stdout.write(self.style.SUCCESS('No daily analytics to roll up'))
+            return
+        if since > until:
+            raise CommandError('--since must not be after --until')
+
+        written = refresh_rollups(since, until, options['organization'])
+        self.stdout.write(self.style.SUCCESS(f'Wrote {written} analytics rollups from {since} to {until}'))
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from admin_flow.signals import update_daily_admin_analytics
+
+
+class Command(BaseCommand):
+    help = "Update today's organization analytics and refresh cached admin dashboards"
+
+    def handle(self, *args, **options):
+        update_daily_admin_analytics()
+        self.stdout.write(self.style.SUCCESS('Updated admin analytics'))
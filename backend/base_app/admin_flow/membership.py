@@ -0,0 +1,62 @@
+"""
+Organization membership counts.
+
+``Organization.member_count`` is kept current by ``UserOrganization``
+post_save/post_delete signals with single ``F()`` updates, so reading it
+never counts rows. ``add_member`` enforces ``max_users`` by reserving the
+seat with a conditional ``UPDATE ... WHERE member_count < max_users`` in the
+same transaction as the insert, which needs no separate count query and
+cannot be overrun by concurrent joins. ``reconcile_member_counts`` repairs
+drift from writes that bypass signals (``bulk_create``, raw SQL).
+"""
+from django.db import transaction
+from django.db.models import Count, F, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from .models import Organization, UserOrganization
+
+
+class OrganizationFull(Exception):
+    """Raised when adding a member would exceed an organization's ``max_users``"""
+
+
+def increment_member_count(org_id):
+    Organization.objects.filter(pk=org_id).update(member_count=F('member_count') + 1)
+
+
+def decrement_member_count(org_id):
+    Organization.objects.filter(pk=org_id, member_count__gt=0).update(member_count=F('member_count') - 1)
+
+
+def add_member(user, org, role=UserOrganization.Role.MEMBER, **fields):
+    """Add ``user`` to ``org`` if it has a free seat; raises ``OrganizationFull``"""
+    with transaction.atomic():
+        reserved = Organization.objects.filter(
+            pk=org.pk,
+            member_count__lt=F('max_users')
+        ).update(member_count=F('member_count') + 1)
+        if not reserved:
+            raise OrganizationFull(f'{org.name} has reached its limit of {org.max_users} users')
+
+        membership = UserOrganization(user=user, org=org, role=role, **fields)
+        # The seat is already counted; skip the post_save increment
+        membership._member_counted = True
+        membership.save()
+    return membership
+
+
+def reconcile_member_counts():
+    """Reset drifted ``member_count`` values; returns the ids that were corrected"""
+    members = UserOrganization.objects.filter(
+        org=OuterRef('pk')
+    ).order_by().values('org').annotate(total=Count('id')).values('total')
+    actual = Coalesce(Subquery(members, output_field=IntegerField()), 0)
+
+    drifted = list(Organization.objects.annotate(
+        actual=actual
+    ).exclude(
+        member_count=F('actual')
+    ).values_list('id', flat=True))
+    if drifted:
+        Organization.objects.filter(id__in=drifted).update(member_count=actual)
+    return drifted
@@ -0,0 +1,32 @@
+# Generated by Django 4.2.23 on 2026-10-18 23:01
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('admin_flow', '0002_emailoutbox'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DripUnlock',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('milestone', 'Milestone'), ('task', 'Task')], max_length=20)),
+                ('unlock_at', models.DateTimeField()),
+                ('notified_at', models.DateTimeField(blank=True, null=True)),
+                ('cohort', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='drip_unlocks', to='admin_flow.cohort')),
+                ('course', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='drip_unlocks', to='admin_flow.course')),
+                ('course_cohort', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='drip_unlocks', to='admin_flow.coursecohort')),
+                ('course_milestone', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, to='admin_flow.coursemilestone')),
+                ('course_task', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, to='admin_flow.coursetask')),
+            ],
+            options={
+                'ordering': ['unlock_at', 'id'],
+                'indexes': [models.Index(fields=['cohort', 'course', 'unlock_at'], name='admin_flow__cohort__9453f6_idx'), models.Index(fields=['notified_at', 'unlock_at'], name='admin_flow__notifie_837040_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 4.2.23 on 2026-10-18 23:11
+
+from django.db import migrations, models
+from django.db.models import Count, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def backfill_member_counts(apps, schema_editor):
+    Organization = apps.get_model('admin_flow', 'Organization')
+    UserOrganization = apps.get_model('admin_flow', 'UserOrganization')
+
+    members = UserOrganization.objects.filter(
+        org=OuterRef('pk')
+    ).order_by().values('org').annotate(total=Count('id')).values('total')
+    Organization.objects.update(
+        member_count=Coalesce(Subquery(members, output_field=IntegerField()), 0)
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('admin_flow', '0003_dripunlock'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='organization',
+            name='member_count',
+            field=models.PositiveIntegerField(default=0, help_text='Maintained count of organization members'),
+        ),
+        migrations.RunPython(backfill_member_counts, migrations.RunPython.noop),
+    ]
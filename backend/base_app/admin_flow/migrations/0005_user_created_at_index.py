@@ -0,0 +1,17 @@
+# Generated by Django 4.2.23 on 2026-10-18 23:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('admin_flow', '0004_organization_member_count'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(fields=['-created_at', '-id'], name='admin_flow__created_ca7e9d_idx'),
+        ),
+    ]
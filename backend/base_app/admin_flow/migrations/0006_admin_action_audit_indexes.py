@@ -0,0 +1,31 @@
+# Generated by Django 4.2.23 on 2026-10-18 23:20
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('admin_flow', '0005_user_created_at_index'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='adminaction',
+            options={'ordering': ['-created_at', '-id']},
+        ),
+        migrations.AlterField(
+            model_name='adminaction',
+            name='created_at',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+        migrations.AddIndex(
+            model_name='adminaction',
+            index=models.Index(fields=['organization', '-created_at', '-id'], name='admin_flow__organiz_702b23_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='adminaction',
+            index=models.Index(fields=['-created_at', '-id'], name='admin_flow__created_f16729_idx'),
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 4.2.23 on 2026-10-18 23:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('admin_flow', '0006_admin_action_audit_indexes'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='systemconfiguration',
+            name='key',
+            field=models.CharField(max_length=100),
+        ),
+        migrations.AddConstraint(
+            model_name='systemconfiguration',
+            constraint=models.UniqueConstraint(fields=('key', 'organization'), name='unique_org_config_key'),
+        ),
+        migrations.AddConstraint(
+            model_name='systemconfiguration',
+            constraint=models.UniqueConstraint(condition=models.Q(('organization__isnull', True)), fields=('key',), name='unique_global_config_key'),
+        ),
+    ]
@@ -0,0 +1,48 @@
+# Generated by Django 4.2.23 on 2026-10-18 23:29
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('admin_flow', '0007_system_configuration_org_overrides'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AdminAnalyticsRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('granularity', models.CharField(choices=[('week', 'Week'), ('month', 'Month')], max_length=10)),
+                ('period_start', models.DateField()),
+                ('period_end', models.DateField()),
+                ('days', models.PositiveIntegerField(default=0, help_text='Daily rows aggregated into this period')),
+                ('total_users', models.PositiveIntegerField(default=0)),
+                ('new_users', models.PositiveIntegerField(default=0)),
+                ('active_users', models.PositiveIntegerField(default=0)),
+                ('total_courses', models.PositiveIntegerField(default=0)),
+                ('new_courses', models.PositiveIntegerField(default=0)),
+                ('total_tasks', models.PositiveIntegerField(default=0)),
+                ('total_sessions', models.PositiveIntegerField(default=0)),
+                ('avg_session_duration', models.DecimalField(decimal_places=2, default=0.0, max_digits=8)),
+                ('completion_rate', models.DecimalField(decimal_places=2, default=0.0, max_digits=5)),
+                ('api_calls', models.PositiveIntegerField(default=0)),
+                ('storage_used_gb', models.DecimalField(decimal_places=2, default=0.0, max_digits=8)),
+                ('error_count', models.PositiveIntegerField(default=0)),
+                ('content_generations', models.PositiveIntegerField(default=0)),
+                ('ai_api_calls', models.PositiveIntegerField(default=0)),
+                ('ai_cost_usd', models.DecimalField(decimal_places=2, default=0.0, max_digits=12)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('organization', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='analytics_rollups', to='admin_flow.organization')),
+            ],
+            options={
+                'ordering': ['-period_start'],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='adminanalyticsrollup',
+            constraint=models.UniqueConstraint(fields=('organization', 'granularity', 'period_start'), name='unique_analytics_rollup_period'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.23 on 2026-10-19 00:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('admin_flow', '0008_admin_analytics_rollup'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='task',
+            name='time_limit_minutes',
+            field=models.PositiveIntegerField(blank=True, help_text='Time limit for quiz attempts; blank for untimed', null=True),
+        ),
+    ]
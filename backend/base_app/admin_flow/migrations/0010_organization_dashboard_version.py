@@ -0,0 +1,18 @@
+# Generated by Django 4.2.23 on 2026-10-19 00:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('admin_flow', '0009_task_time_limit_minutes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='organization',
+            name='dashboard_version',
+            field=models.PositiveIntegerField(default=0, help_text='Bumped whenever cached dashboard summaries go stale'),
+        ),
+    ]
@@ -2,7 +2,8 @@ from django.db import models
 from django.contrib.auth.models import AbstractUser
 from django.core.validators import MinValueValidator, MaxValueValidator
 from django.utils import timezone
-from django.db.models import TextChoices
+from django.db.models import Count, OuterRef, Subquery, TextChoices
+from django.db.models.functions import Coalesce
 import uuid
 import json
 
@@ -18,6 +19,11 @@ class User(models.Model):
     default_dp_color = models.CharField(max_length=50, blank=True, null=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['-created_at', '-id']),
+        ]
+
     def __str__(self):
         return self.email
 
@@ -42,17 +48,28 @@ class Organization(models.Model):
     storage_limit_gb = models.PositiveIntegerField(default=10, help_text="Storage limit in GB")
     api_rate_limit = models.PositiveIntegerField(default=1000, help_text="API calls per hour")
     is_active = models.BooleanField(default=True)
+    member_count = models.PositiveIntegerField(default=0, help_text="Maintained count of organization members")
+    dashboard_version = models.PositiveIntegerField(default=0, help_text="Bumped whenever cached dashboard summaries go stale")
     
     def __str__(self):
         return self.name
 
+    def save(self, *args, **kwargs):
+        # Counters are maintained with F() updates; never write back a stale copy
+        if not self._state.adding and not kwargs.get('update_fields'):
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in ('member_count', 'dashboard_version')
+            ]
+        super().save(*args, **kwargs)
+
     @property
     def current_user_count(self):
-        return self.userorganization_set.count()
+        return self.member_count
 
     @property
     def is_over_user_limit(self):
-        return self.current_user_count > self.max_users
+        return self.member_count > self.max_users
 
 
 class UserOrganization(models.Model):
@@ -76,6 +93,10 @@ class UserOrganization(models.Model):
         return f"{self.user.email} - {self.org.name} ({self.role})"
 
 
+# Organization roles that manage the organization
+MANAGER_ROLES = [UserOrganization.Role.ADMIN, UserOrganization.Role.OWNER]
+
+
 class Cohort(models.Model):
     """Cohort model"""
     name = models.CharField(max_length=255)
@@ -120,6 +141,37 @@ class Milestone(models.Model):
         return self.name
 
 
+# =================== METRIC QUERYSETS ===================
+
+def _count_of(queryset, field):
+    """Correlated COUNT of ``queryset`` rows whose ``field`` is the outer row"""
+    counts = queryset.filter(
+        **{field: OuterRef('pk')}
+    ).order_by().values(field).annotate(total=Count('pk')).values('total')
+    return Coalesce(Subquery(counts, output_field=models.IntegerField()), 0)
+
+
+class CourseQuerySet(models.QuerySet):
+    def with_metrics(self):
+        """Annotate task, learner and completion counts used by the metric properties"""
+        return self.annotate(
+            metric_total_tasks=_count_of(CourseTask.objects.all(), 'course'),
+            metric_enrolled_students=_count_of(
+                UserCohort.objects.filter(role='learner'), 'cohort__coursecohort__course'
+            ),
+            metric_task_completions=_count_of(TaskCompletion.objects.all(), 'task__coursetask__course')
+        )
+
+
+class TaskQuerySet(models.QuerySet):
+    def with_metrics(self):
+        """Annotate completion and course assignment counts used by ``completion_rate``"""
+        return self.annotate(
+            metric_completions=_count_of(TaskCompletion.objects.all(), 'task'),
+            metric_assignments=_count_of(CourseTask.objects.all(), 'task')
+        )
+
+
 class Course(models.Model):
     """Course model"""
     class Status(TextChoices):
@@ -141,24 +193,35 @@ class Course(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = CourseQuerySet.as_manager()
+
     def __str__(self):
         return self.name
 
+    # Metric properties read the with_metrics() annotations when present
+
     @property
     def total_tasks(self):
+        if hasattr(self, 'metric_total_tasks'):
+            return self.metric_total_tasks
         return self.coursetask_set.count()
 
     @property
     def completion_rate(self):
         # Calculate average completion rate across all students
-        total_completions = TaskCompletion.objects.filter(
-            task__coursetask__course=self
-        ).count()
+        if hasattr(self, 'metric_task_completions'):
+            total_completions = self.metric_task_completions
+        else:
+            total_completions = TaskCompletion.objects.filter(
+                task__coursetask__course=self
+            ).count()
         total_possible = self.total_tasks * self.enrolled_students_count
         return (total_completions / total_possible * 100) if total_possible > 0 else 0
 
     @property
     def enrolled_students_count(self):
+        if hasattr(self, 'metric_enrolled_students'):
+            return self.metric_enrolled_students
         return UserCohort.objects.filter(
             cohort__coursecohort__course=self,
             role='learner'
@@ -213,6 +276,7 @@ class Task(models.Model):
     status = models.CharField(max_length=50, choices=Status.choices, default=Status.DRAFT)
     difficulty_level = models.CharField(max_length=50, default='beginner')
     estimated_time_minutes = models.PositiveIntegerField(default=30)
+    time_limit_minutes = models.PositiveIntegerField(blank=True, null=True, help_text="Time limit for quiz attempts; blank for untimed")
     points = models.PositiveIntegerField(default=10, help_text="Points awarded for completion")
     created_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True)
     created_at = models.DateTimeField(auto_now_add=True)
@@ -220,13 +284,19 @@ class Task(models.Model):
     deleted_at = models.DateTimeField(blank=True, null=True)
     scheduled_publish_at = models.DateTimeField(blank=True, null=True)
 
+    objects = TaskQuerySet.as_manager()
+
     def __str__(self):
         return self.title
 
     @property
     def completion_rate(self):
-        total_completions = self.taskcompletion_set.count()
-        total_assignments = CourseTask.objects.filter(task=self).count()
+        if hasattr(self, 'metric_completions'):
+            total_completions = self.metric_completions
+            total_assignments = self.metric_assignments
+        else:
+            total_completions = self.taskcompletion_set.count()
+            total_assignments = CourseTask.objects.filter(task=self).count()
         return (total_completions / total_assignments * 100) if total_assignments > 0 else 0
 
 
@@ -362,10 +432,15 @@ class AdminAction(models.Model):
     ip_address = models.GenericIPAddressField(null=True, blank=True)
     user_agent = models.TextField(blank=True)
     
-    created_at = models.DateTimeField(auto_now_add=True)
+    # Set when the action is recorded, not when the buffered row is written
+    created_at = models.DateTimeField(default=timezone.now)
 
     class Meta:
-        ordering = ['-created_at']
+        ordering = ['-created_at', '-id']
+        indexes = [
+            models.Index(fields=['organization', '-created_at', '-id']),
+            models.Index(fields=['-created_at', '-id']),
+        ]
 
     def __str__(self):
         return f"{self.admin.email} - {self.action_type} - {self.object_type}"
@@ -397,9 +472,9 @@ class ContentTemplate(models.Model):
 
 
 class SystemConfiguration(models.Model):
-    """System-wide configuration settings"""
+    """System-wide configuration settings, optionally overridden per organization"""
     
-    key = models.CharField(max_length=100, unique=True)
+    key = models.CharField(max_length=100)
     value = models.TextField()
     value_type = models.CharField(max_length=20, default='string')  # string, integer, boolean, json
     description = models.TextField(blank=True)
@@ -409,6 +484,16 @@ class SystemConfiguration(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['key', 'organization'], name='unique_org_config_key'),
+            models.UniqueConstraint(
+                fields=['key'],
+                condition=models.Q(organization__isnull=True),
+                name='unique_global_config_key'
+            ),
+        ]
+
     def __str__(self):
         return f"{self.key}: {self.value if not self.is_sensitive else '***'}"
 
@@ -552,6 +637,59 @@ class AdminAnalytics(models.Model):
         return f"{self.organization.name} Analytics - {self.date}"
 
 
+class AdminAnalyticsRollup(models.Model):
+    """Weekly and monthly aggregates of daily AdminAnalytics rows"""
+    
+    class Granularity(TextChoices):
+        WEEK = 'week', 'Week'
+        MONTH = 'month', 'Month'
+    
+    organization = models.ForeignKey(Organization, on_delete=models.CASCADE, related_name='analytics_rollups')
+    granularity = models.CharField(max_length=10, choices=Granularity.choices)
+    period_start = models.DateField()
+    period_end = models.DateField()
+    days = models.PositiveIntegerField(default=0, help_text="Daily rows aggregated into this period")
+    
+    # User metrics (latest day of the period, new users summed)
+    total_users = models.PositiveIntegerField(default=0)
+    new_users = models.PositiveIntegerField(default=0)
+    active_users = models.PositiveIntegerField(default=0)
+    
+    # Content metrics
+    total_courses = models.PositiveIntegerField(default=0)
+    new_courses = models.PositiveIntegerField(default=0)
+    total_tasks = models.PositiveIntegerField(default=0)
+    
+    # Engagement metrics (sessions summed, rates averaged over days)
+    total_sessions = models.PositiveIntegerField(default=0)
+    avg_session_duration = models.DecimalField(max_digits=8, decimal_places=2, default=0.00)
+    completion_rate = models.DecimalField(max_digits=5, decimal_places=2, default=0.00)
+    
+    # System metrics
+    api_calls = models.PositiveIntegerField(default=0)
+    storage_used_gb = models.DecimalField(max_digits=8, decimal_places=2, default=0.00)
+    error_count = models.PositiveIntegerField(default=0)
+    
+    # AI usage metrics
+    content_generations = models.PositiveIntegerField(default=0)
+    ai_api_calls = models.PositiveIntegerField(default=0)
+    ai_cost_usd = models.DecimalField(max_digits=12, decimal_places=2, default=0.00)
+    
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['-period_start']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['organization', 'granularity', 'period_start'],
+                name='unique_analytics_rollup_period'
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.organization.name} {self.granularity} analytics - {self.period_start}"
+
+
 class BulkOperation(models.Model):
     """Track bulk operations performed by admins"""
     
@@ -637,4 +775,68 @@ class AdminDashboardWidget(models.Model):
         ordering = ['position_y', 'position_x']
 
     def __str__(self):
-        return f"{self.title} - {self.admin.email}" 
\ No newline at end of file
+        return f"{self.title} - {self.admin.email}"
+
+
+# =================== EMAIL OUTBOX ===================
+
+class EmailOutbox(models.Model):
+    """Outgoing email queued in the sender's transaction and delivered by a worker"""
+    
+    class Status(TextChoices):
+        PENDING = 'pending', 'Pending'
+        SENT = 'sent', 'Sent'
+        FAILED = 'failed', 'Failed'
+    
+    subject = models.CharField(max_length=255)
+    body = models.TextField(blank=True)
+    html_body = models.TextField(blank=True)
+    from_email = models.CharField(max_length=255)
+    recipients = models.JSONField(default=list, help_text="List of recipient addresses")
+    
+    status = models.CharField(max_length=20, choices=Status.choices, default=Status.PENDING)
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+    
+    sent_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['next_attempt_at', 'id']
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.subject} -> {', '.join(self.recipients)} ({self.status})"
+
+
+# =================== DRIP RELEASE ===================
+
+class DripUnlock(models.Model):
+    """Precomputed time at which a course milestone or task unlocks for a cohort"""
+    
+    class Kind(TextChoices):
+        MILESTONE = 'milestone', 'Milestone'
+        TASK = 'task', 'Task'
+    
+    course_cohort = models.ForeignKey(CourseCohort, on_delete=models.CASCADE, related_name='drip_unlocks')
+    cohort = models.ForeignKey(Cohort, on_delete=models.CASCADE, related_name='drip_unlocks')
+    course = models.ForeignKey(Course, on_delete=models.CASCADE, related_name='drip_unlocks')
+    kind = models.CharField(max_length=20, choices=Kind.choices)
+    course_milestone = models.ForeignKey(CourseMilestone, on_delete=models.CASCADE, null=True, blank=True)
+    course_task = models.ForeignKey(CourseTask, on_delete=models.CASCADE, null=True, blank=True)
+    
+    unlock_at = models.DateTimeField()
+    notified_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['unlock_at', 'id']
+        indexes = [
+            models.Index(fields=['cohort', 'course', 'unlock_at']),
+            models.Index(fields=['notified_at', 'unlock_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} unlocks for {self.cohort.name} at {self.unlock_at}"
@@ -0,0 +1,155 @@
+"""
+Transactional email outbox.
+
+``queue_email`` has the same shape as ``django.core.mail.send_mail`` but
+only inserts an ``EmailOutbox`` row, so it commits or rolls back with the
+write that triggered it and adds no SMTP latency to the request.
+``deliver_pending`` drains due rows in batches over a single reused
+connection and reschedules failures with exponential backoff. Rows are
+leased in a short transaction and sent outside it, so no lock is held
+across SMTP round trips.
+"""
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.db import transaction
+from django.utils import timezone
+
+from .models import EmailOutbox
+
+logger = logging.getLogger(__name__)
+
+DELIVERY_BATCH_SIZE = 100
+MAX_DELIVERY_ATTEMPTS = 5
+RETRY_BASE_SECONDS = 60
+RETRY_MAX_SECONDS = 60 * 60 * 6
+# How long a claimed row is hidden from other workers while it is being sent
+DELIVERY_LEASE_SECONDS = 60 * 10
+
+
+def queue_email(subject, message, from_email, recipient_list, html_message=None):
+    """Queue an email for delivery by the outbox worker"""
+    return EmailOutbox.objects.create(
+        subject=subject[:255],
+        body=message or '',
+        html_body=html_message or '',
+        from_email=from_email or getattr(settings, 'DEFAULT_FROM_EMAIL', 'noreply@example.com'),
+        recipients=list(recipient_list)
+    )
+
+
+def queue_emails(messages, from_email=None):
+    """Queue many ``(subject, message, recipient_list, html_message)`` emails at once"""
+    from_email = from_email or getattr(settings, 'DEFAULT_FROM_EMAIL', 'noreply@example.com')
+    return EmailOutbox.objects.bulk_create([
+        EmailOutbox(
+            subject=subject[:255],
+            body=message or '',
+            html_body=html_message or '',
+            from_email=from_email,
+            recipients=list(recipient_list)
+        )
+        for subject, message, recipient_list, html_message in messages
+    ])
+
+
+def retry_delay(attempts):
+    """Backoff before the next delivery attempt after ``attempts`` failures"""
+    return timedelta(seconds=min(RETRY_BASE_SECONDS * 2 ** (attempts - 1), RETRY_MAX_SECONDS))
+
+
+def _build_message(email, connection):
+    message = EmailMultiAlternatives(
+        subject=email.subject,
+        body=email.body,
+        from_email=email.from_email,
+        to=email.recipients,
+        connection=connection
+    )
+    if email.html_body:
+        message.attach_alternative(email.html_body, 'text/html')
+    return message
+
+
+def _claim_batch(batch_size, now):
+    """Lease a batch of due emails to this worker in a short transaction.
+
+    The claim counts as an attempt and pushes ``next_attempt_at`` past the
+    lease, so other workers skip the rows while they are being sent and a
+    worker that dies mid-batch only delays them until the lease expires.
+    """
+    with transaction.atomic():
+        batch = list(EmailOutbox.objects.select_for_update(skip_locked=True).filter(
+            status=EmailOutbox.Status.PENDING,
+            next_attempt_at__lte=now
+        ).order_by('next_attempt_at', 'id')[:batch_size])
+        for email in batch:
+            email.attempts += 1
+            email.next_attempt_at = now + timedelta(seconds=DELIVERY_LEASE_SECONDS)
+        EmailOutbox.objects.bulk_update(batch, ['attempts', 'next_attempt_at'])
+    return batch
+
+
+def _record_failure(email, error, now):
+    email.last_error = str(error)
+    if email.attempts >= MAX_DELIVERY_ATTEMPTS:
+        email.status = EmailOutbox.Status.FAILED
+    else:
+        email.next_attempt_at = now + retry_delay(email.attempts)
+
+
+def deliver_batch(batch_size=DELIVERY_BATCH_SIZE, connection=None, now=None):
+    """Send one batch of due emails; returns ``(sent, failed)`` counts.
+
+    Rows are claimed first and sent outside any transaction; each result is
+    saved as soon as it is known, so a crash does not resend what went out.
+    """
+    now = now or timezone.now()
+    batch = _claim_batch(batch_size, now)
+    if not batch:
+        return 0, 0
+
+    connection = connection or get_connection(fail_silently=False)
+    try:
+        connection.open()
+    except Exception as e:
+        # Nothing could be sent: the whole batch failed this attempt
+        logger.warning('Outbox connection failed: %s', e)
+        for email in batch:
+            _record_failure(email, e, now)
+        EmailOutbox.objects.bulk_update(batch, ['status', 'next_attempt_at', 'last_error'])
+        return 0, len(batch)
+
+    sent = failed = 0
+    try:
+        for email in batch:
+            try:
+                connection.send_messages([_build_message(email, connection)])
+            except Exception as e:
+                failed += 1
+                _record_failure(email, e, now)
+            else:
+                sent += 1
+                email.status = EmailOutbox.Status.SENT
+                email.sent_at = timezone.now()
+                email.last_error = ''
+            email.save(update_fields=['status', 'next_attempt_at', 'last_error', 'sent_at'])
+    finally:
+        connection.close()
+
+    return sent, failed
+
+
+def deliver_pending(batch_size=DELIVERY_BATCH_SIZE, max_batches=None, connection=None):
+    """Drain every due email in batches; returns ``(sent, failed)`` totals"""
+    total_sent = total_failed = batches = 0
+    while max_batches is None or batches < max_batches:
+        sent, failed = deliver_batch(batch_size, connection=connection)
+        if not sent and not failed:
+            break
+        total_sent += sent
+        total_failed += failed
+        batches += 1
+    return total_sent, total_failed
@@ -1,6 +1,16 @@
 from rest_framework import permissions
 from django.db.models import Q
 from .models import AdminProfile, UserOrganization, Organization
+from .authorization import admin_context, object_org_id
+
+# Role checks read the request's AdminAuthContext, loaded once per request
+# (and cached briefly across requests) instead of querying per check.
+
+CONTENT_ADMIN_ROLES = [
+    AdminProfile.Role.SUPER_ADMIN,
+    AdminProfile.Role.CONTENT_ADMIN,
+    AdminProfile.Role.ORG_ADMIN,
+]
 
 
 class IsAdminUser(permissions.BasePermission):
@@ -11,7 +21,7 @@ class IsAdminUser(permissions.BasePermission):
         if not request.user.is_authenticated:
             return False
         
-        return hasattr(request.user, 'admin_profile') and request.user.admin_profile.is_active
+        return admin_context(request).is_active_admin
 
 
 class IsSuperAdmin(permissions.BasePermission):
@@ -22,11 +32,7 @@ class IsSuperAdmin(permissions.BasePermission):
         if not request.user.is_authenticated:
             return False
         
-        try:
-            profile = request.user.admin_profile
-            return profile.is_active and profile.role == AdminProfile.Role.SUPER_ADMIN
-        except AttributeError:
-            return False
+        return admin_context(request).has_active_role(AdminProfile.Role.SUPER_ADMIN)
 
 
 class IsOrgAdmin(permissions.BasePermission):
@@ -38,40 +44,14 @@ class IsOrgAdmin(permissions.BasePermission):
             return False
         
         # Check if user has admin or owner role in any organization
-        return UserOrganization.objects.filter(
-            user=request.user, 
-            role__in=['admin', 'owner']
-        ).exists()
+        return admin_context(request).is_org_admin
 
     def has_object_permission(self, request, view, obj):
         if not request.user.is_authenticated:
             return False
         
-        # For Organization objects
-        if isinstance(obj, Organization):
-            return UserOrganization.objects.filter(
-                user=request.user,
-                org=obj,
-                role__in=['admin', 'owner']
-            ).exists()
-        
-        # For objects with organization relationship
-        if hasattr(obj, 'organization'):
-            return UserOrganization.objects.filter(
-                user=request.user,
-                org=obj.organization,
-                role__in=['admin', 'owner']
-            ).exists()
-        
-        # For objects with org field
-        if hasattr(obj, 'org'):
-            return UserOrganization.objects.filter(
-                user=request.user,
-                org=obj.org,
-                role__in=['admin', 'owner']
-            ).exists()
-        
-        return False
+        # Organizations, and objects with an organization or org field
+        return admin_context(request).manages(object_org_id(obj))
 
 
 class IsContentAdmin(permissions.BasePermission):
@@ -82,21 +62,12 @@ class IsContentAdmin(permissions.BasePermission):
         if not request.user.is_authenticated:
             return False
         
-        try:
-            profile = request.user.admin_profile
-            return (profile.is_active and 
-                   profile.role in [AdminProfile.Role.SUPER_ADMIN, 
-                                  AdminProfile.Role.CONTENT_ADMIN,
-                                  AdminProfile.Role.ORG_ADMIN])
-        except AttributeError:
-            # Fallback to org admin check
-            return self._is_org_admin(request.user)
-    
-    def _is_org_admin(self, user):
-        return UserOrganization.objects.filter(
-            user=user, 
-            role__in=['admin', 'owner']
-        ).exists()
+        context = admin_context(request)
+        if context.has_admin_profile:
+            return context.has_active_role(*CONTENT_ADMIN_ROLES)
+        
+        # Fallback to org admin check
+        return context.is_org_admin
 
 
 class IsSupportAdmin(permissions.BasePermission):
@@ -107,13 +78,9 @@ class IsSupportAdmin(permissions.BasePermission):
         if not request.user.is_authenticated:
             return False
         
-        try:
-            profile = request.user.admin_profile
-            return (profile.is_active and 
-                   profile.role in [AdminProfile.Role.SUPER_ADMIN, 
-                                  AdminProfile.Role.SUPPORT_ADMIN])
-        except AttributeError:
-            return False
+        return admin_context(request).has_active_role(
+            AdminProfile.Role.SUPER_ADMIN, AdminProfile.Role.SUPPORT_ADMIN
+        )
 
 
 class CanManageOrganization(permissions.BasePermission):
@@ -127,27 +94,18 @@ class CanManageOrganization(permissions.BasePermission):
         if not request.user.is_authenticated:
             return False
         
-        user = request.user
+        context = admin_context(request)
         
         # Super admin can manage all organizations
-        try:
-            if (hasattr(user, 'admin_profile') and 
-                user.admin_profile.role == AdminProfile.Role.SUPER_ADMIN):
-                return True
-        except AttributeError:
-            pass
+        if context.is_super_admin:
+            return True
         
         # Organization must be in the admin's managed organizations
-        if hasattr(user, 'admin_profile'):
-            if obj in user.admin_profile.organizations.all():
-                return True
+        if obj.pk in context.profile_org_ids:
+            return True
         
         # Or user must be admin/owner of the organization
-        return UserOrganization.objects.filter(
-            user=user,
-            org=obj,
-            role__in=['admin', 'owner']
-        ).exists()
+        return context.manages(obj.pk)
 
 
 class CanManageUsers(permissions.BasePermission):
@@ -158,45 +116,26 @@ class CanManageUsers(permissions.BasePermission):
         if not request.user.is_authenticated:
             return False
         
-        # Super admin can manage all users
-        try:
-            if (hasattr(request.user, 'admin_profile') and 
-                request.user.admin_profile.role == AdminProfile.Role.SUPER_ADMIN):
-                return True
-        except AttributeError:
-            pass
+        context = admin_context(request)
         
-        # Org admin can manage users in their organizations
-        return UserOrganization.objects.filter(
-            user=request.user, 
-            role__in=['admin', 'owner']
-        ).exists()
+        # Super admin can manage all users; org admins users in their organizations
+        return context.is_super_admin or context.is_org_admin
 
     def has_object_permission(self, request, view, obj):
         if not request.user.is_authenticated:
             return False
         
-        user = request.user
+        context = admin_context(request)
         
         # Super admin can manage all users
-        try:
-            if (hasattr(user, 'admin_profile') and 
-                user.admin_profile.role == AdminProfile.Role.SUPER_ADMIN):
-                return True
-        except AttributeError:
-            pass
+        if context.is_super_admin:
+            return True
         
         # Can manage users in same organizations
-        user_orgs = set(UserOrganization.objects.filter(
-            user=user, 
-            role__in=['admin', 'owner']
-        ).values_list('org_id', flat=True))
-        
-        target_user_orgs = set(UserOrganization.objects.filter(
-            user=obj
-        ).values_list('org_id', flat=True))
-        
-        return bool(user_orgs.intersection(target_user_orgs))
+        return bool(context.managed_org_ids) and UserOrganization.objects.filter(
+            user=obj,
+            org_id__in=context.managed_org_ids
+        ).exists()
 
 
 class CanManageContent(permissions.BasePermission):
@@ -207,48 +146,25 @@ class CanManageContent(permissions.BasePermission):
         if not request.user.is_authenticated:
             return False
         
-        try:
-            profile = request.user.admin_profile
-            return (profile.is_active and 
-                   profile.role in [AdminProfile.Role.SUPER_ADMIN, 
-                                  AdminProfile.Role.CONTENT_ADMIN,
-                                  AdminProfile.Role.ORG_ADMIN])
-        except AttributeError:
-            # Fallback for org admins without admin profile
-            return UserOrganization.objects.filter(
-                user=request.user, 
-                role__in=['admin', 'owner']
-            ).exists()
+        context = admin_context(request)
+        if context.has_admin_profile:
+            return context.has_active_role(*CONTENT_ADMIN_ROLES)
+        
+        # Fallback for org admins without admin profile
+        return context.is_org_admin
 
     def has_object_permission(self, request, view, obj):
         if not request.user.is_authenticated:
             return False
         
-        user = request.user
+        context = admin_context(request)
         
         # Super admin can manage all content
-        try:
-            if (hasattr(user, 'admin_profile') and 
-                user.admin_profile.role == AdminProfile.Role.SUPER_ADMIN):
-                return True
-        except AttributeError:
-            pass
+        if context.is_super_admin:
+            return True
         
         # Content must belong to admin's organization
-        org_field = None
-        if hasattr(obj, 'organization'):
-            org_field = obj.organization
-        elif hasattr(obj, 'org'):
-            org_field = obj.org
-        
-        if org_field:
-            return UserOrganization.objects.filter(
-                user=user,
-                org=org_field,
-                role__in=['admin', 'owner']
-            ).exists()
-        
-        return False
+        return context.manages(object_org_id(obj))
 
 
 class CanViewAnalytics(permissions.BasePermission):
@@ -260,38 +176,20 @@ class CanViewAnalytics(permissions.BasePermission):
             return False
         
         # All admin types can view analytics
-        try:
-            return hasattr(request.user, 'admin_profile') and request.user.admin_profile.is_active
-        except AttributeError:
-            # Fallback for org admins
-            return UserOrganization.objects.filter(
-                user=request.user, 
-                role__in=['admin', 'owner']
-            ).exists()
+        return admin_context(request).is_active_admin
 
     def has_object_permission(self, request, view, obj):
         if not request.user.is_authenticated:
             return False
         
-        user = request.user
+        context = admin_context(request)
         
         # Super admin can view all analytics
-        try:
-            if (hasattr(user, 'admin_profile') and 
-                user.admin_profile.role == AdminProfile.Role.SUPER_ADMIN):
-                return True
-        except AttributeError:
-            pass
+        if context.is_super_admin:
+            return True
         
         # Analytics must be for admin's organization
-        if hasattr(obj, 'organization'):
-            return UserOrganization.objects.filter(
-                user=user,
-                org=obj.organization,
-                role__in=['admin', 'owner']
-            ).exists()
-        
-        return False
+        return context.manages(getattr(obj, 'organization_id', None))
 
 
 class CanPerformBulkOperations(permissions.BasePermission):
@@ -302,17 +200,12 @@ class CanPerformBulkOperations(permissions.BasePermission):
         if not request.user.is_authenticated:
             return False
         
-        try:
-            profile = request.user.admin_profile
-            return (profile.is_active and 
-                   profile.role in [AdminProfile.Role.SUPER_ADMIN, 
-                                  AdminProfile.Role.ORG_ADMIN])
-        except AttributeError:
-            # Fallback for org admins
-            return UserOrganization.objects.filter(
-                user=request.user, 
-                role__in=['admin', 'owner']
-            ).exists()
+        context = admin_context(request)
+        if context.has_admin_profile:
+            return context.has_active_role(AdminProfile.Role.SUPER_ADMIN, AdminProfile.Role.ORG_ADMIN)
+        
+        # Fallback for org admins
+        return context.is_org_admin
 
 
 class CanManageSystemConfig(permissions.BasePermission):
@@ -323,36 +216,20 @@ class CanManageSystemConfig(permissions.BasePermission):
         if not request.user.is_authenticated:
             return False
         
-        try:
-            profile = request.user.admin_profile
-            return (profile.is_active and 
-                   profile.role == AdminProfile.Role.SUPER_ADMIN)
-        except AttributeError:
-            return False
+        return admin_context(request).has_active_role(AdminProfile.Role.SUPER_ADMIN)
 
     def has_object_permission(self, request, view, obj):
         if not request.user.is_authenticated:
             return False
         
-        user = request.user
+        context = admin_context(request)
         
         # Super admin can manage all configs
-        try:
-            if (hasattr(user, 'admin_profile') and 
-                user.admin_profile.role == AdminProfile.Role.SUPER_ADMIN):
-                return True
-        except AttributeError:
-            pass
+        if context.is_super_admin:
+            return True
         
         # Org-specific configs can be managed by org admins
-        if hasattr(obj, 'organization') and obj.organization:
-            return UserOrganization.objects.filter(
-                user=user,
-                org=obj.organization,
-                role__in=['admin', 'owner']
-            ).exists()
-        
-        return False
+        return context.manages(getattr(obj, 'organization_id', None))
 
 
 class CanGenerateContent(permissions.BasePermission):
@@ -363,18 +240,12 @@ class CanGenerateContent(permissions.BasePermission):
         if not request.user.is_authenticated:
             return False
         
-        try:
-            profile = request.user.admin_profile
-            return (profile.is_active and 
-                   profile.role in [AdminProfile.Role.SUPER_ADMIN, 
-                                  AdminProfile.Role.CONTENT_ADMIN,
-                                  AdminProfile.Role.ORG_ADMIN])
-        except AttributeError:
-            # Fallback for org admins
-            return UserOrganization.objects.filter(
-                user=request.user, 
-                role__in=['admin', 'owner']
-            ).exists()
+        context = admin_context(request)
+        if context.has_admin_profile:
+            return context.has_active_role(*CONTENT_ADMIN_ROLES)
+        
+        # Fallback for org admins
+        return context.is_org_admin
 
 
 class CanManageNotifications(permissions.BasePermission):
@@ -389,18 +260,11 @@ class CanManageNotifications(permissions.BasePermission):
             return False
         
         # Users can manage their own notifications
-        if obj.recipient == request.user:
+        if obj.recipient_id == request.user.pk:
             return True
         
         # Super admin can manage all notifications
-        try:
-            if (hasattr(request.user, 'admin_profile') and 
-                request.user.admin_profile.role == AdminProfile.Role.SUPER_ADMIN):
-                return True
-        except AttributeError:
-            pass
-        
-        return False
+        return admin_context(request).is_super_admin
 
 
 # Compound permissions for complex scenarios
@@ -412,20 +276,10 @@ class AdminOrOrgOwner(permissions.BasePermission):
         if not request.user.is_authenticated:
             return False
         
-        user = request.user
+        context = admin_context(request)
         
-        # Check if user has admin profile
-        try:
-            if hasattr(user, 'admin_profile') and user.admin_profile.is_active:
-                return True
-        except AttributeError:
-            pass
-        
-        # Check if user is org owner
-        return UserOrganization.objects.filter(
-            user=user, 
-            role='owner'
-        ).exists()
+        # Admins with an active profile, or organization owners
+        return context.is_active_admin or context.is_owner_anywhere()
 
 
 class ReadOnlyForNonAdmins(permissions.BasePermission):
@@ -437,11 +291,8 @@ class ReadOnlyForNonAdmins(permissions.BasePermission):
             return False
         
         # Full access for admins
-        try:
-            if hasattr(request.user, 'admin_profile') and request.user.admin_profile.is_active:
-                return True
-        except AttributeError:
-            pass
+        if admin_context(request).is_active_admin:
+            return True
         
         # Read-only for others
         return request.method in permissions.SAFE_METHODS
@@ -455,24 +306,15 @@ class OrganizationScopedPermission(permissions.BasePermission):
         if not request.user.is_authenticated:
             return False
         
-        # Super admin has access to everything
-        try:
-            if (hasattr(request.user, 'admin_profile') and 
-                request.user.admin_profile.role == AdminProfile.Role.SUPER_ADMIN):
-                return True
-        except AttributeError:
-            pass
+        context = admin_context(request)
         
-        # Must be admin in at least one organization
-        return UserOrganization.objects.filter(
-            user=request.user, 
-            role__in=['admin', 'owner']
-        ).exists()
+        # Super admin has access to everything; others must be admin in at least one organization
+        return context.is_super_admin or context.is_org_admin
 
     def get_user_organizations(self, user):
         """Get organizations where user has admin privileges"""
         try:
-            if (hasattr(user, 'admin_profile') and 
+            if (hasattr(user, 'admin_profile') and
                 user.admin_profile.role == AdminProfile.Role.SUPER_ADMIN):
                 return Organization.objects.all()
         except AttributeError:
@@ -495,16 +337,13 @@ class HasSpecificPermission(permissions.BasePermission):
         if not request.user.is_authenticated:
             return False
         
-        try:
-            profile = request.user.admin_profile
-            if not profile.is_active:
-                return False
-            
-            # Super admin has all permissions
-            if profile.role == AdminProfile.Role.SUPER_ADMIN:
-                return True
-            
-            # Check specific permission
-            return self.required_permission in profile.permissions
-        except AttributeError:
-            return False 
\ No newline at end of file
+        context = admin_context(request)
+        if not context.is_active_admin:
+            return False
+        
+        # Super admin has all permissions
+        if context.is_super_admin:
+            return True
+        
+        # Check specific permission
+        return self.required_permission in context.profile_permissions
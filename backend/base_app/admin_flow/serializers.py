@@ -1,5 +1,6 @@
 from rest_framework import serializers
 from django.contrib.auth import get_user_model
+from django.db.models import Count, Prefetch, Q
 from django.utils import timezone
 from .models import (
     User, Organization, UserOrganization, Cohort, UserCohort, Milestone,
@@ -10,6 +11,42 @@ from .models import (
 )
 
 
+# =================== EAGER LOADING ===================
+
+class EagerLoadingMixin:
+    """Declare the relations and annotations a serializer reads.
+
+    ``setup_eager_loading`` applies them to a queryset so a page of objects
+    is serialized with a fixed number of queries instead of several per row.
+    """
+    select_related_fields = []
+    
+    @classmethod
+    def get_prefetches(cls):
+        return []
+    
+    @classmethod
+    def get_annotations(cls):
+        return {}
+    
+    @classmethod
+    def setup_eager_loading(cls, queryset):
+        if cls.select_related_fields:
+            queryset = queryset.select_related(*cls.select_related_fields)
+        prefetches = cls.get_prefetches()
+        if prefetches:
+            queryset = queryset.prefetch_related(*prefetches)
+        annotations = cls.get_annotations()
+        if annotations:
+            queryset = queryset.annotate(**annotations)
+        return queryset
+
+
+def prefetched(obj, attr, fallback):
+    """A ``to_attr`` prefetch result if the object was eager loaded, else ``fallback()``"""
+    return getattr(obj, attr) if hasattr(obj, attr) else fallback()
+
+
 # =================== BASE SERIALIZERS ===================
 
 class UserSerializer(serializers.ModelSerializer):
@@ -22,7 +59,7 @@ class UserSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'created_at']
 
 
-class UserDetailSerializer(UserSerializer):
+class UserDetailSerializer(EagerLoadingMixin, UserSerializer):
     organizations = serializers.SerializerMethodField()
     cohorts = serializers.SerializerMethodField()
     total_completions = serializers.SerializerMethodField()
@@ -32,6 +69,17 @@ class UserDetailSerializer(UserSerializer):
             'organizations', 'cohorts', 'total_completions'
         ]
     
+    @classmethod
+    def get_prefetches(cls):
+        return [
+            Prefetch('userorganization_set', queryset=UserOrganization.objects.select_related('org')),
+            Prefetch('usercohort_set', queryset=UserCohort.objects.select_related('cohort')),
+        ]
+    
+    @classmethod
+    def get_annotations(cls):
+        return {'completion_count': Count('taskcompletion', distinct=True)}
+    
     def get_organizations(self, obj):
         return UserOrganizationSerializer(
             obj.userorganization_set.all(), many=True
@@ -43,7 +91,7 @@ class UserDetailSerializer(UserSerializer):
         ).data
     
     def get_total_completions(self, obj):
-        return obj.taskcompletion_set.count()
+        return prefetched(obj, 'completion_count', obj.taskcompletion_set.count)
 
 
 class OrganizationSerializer(serializers.ModelSerializer):
@@ -58,7 +106,7 @@ class OrganizationSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'created_at']
 
 
-class OrganizationDetailSerializer(OrganizationSerializer):
+class OrganizationDetailSerializer(EagerLoadingMixin, OrganizationSerializer):
     members = serializers.SerializerMethodField()
     cohorts = serializers.SerializerMethodField()
     courses = serializers.SerializerMethodField()
@@ -69,23 +117,50 @@ class OrganizationDetailSerializer(OrganizationSerializer):
             'members', 'cohorts', 'courses', 'analytics'
         ]
     
+    @classmethod
+    def get_prefetches(cls):
+        return [
+            Prefetch(
+                'userorganization_set',
+                queryset=UserOrganization.objects.select_related('user').order_by('id')[:10],
+                to_attr='prefetched_members'
+            ),
+            Prefetch(
+                'cohort_set',
+                queryset=CohortSerializer.setup_eager_loading(Cohort.objects.order_by('id'))[:10],
+                to_attr='prefetched_cohorts'
+            ),
+            Prefetch(
+                'course_set',
+                queryset=CourseSerializer.setup_eager_loading(Course.objects.order_by('id'))[:10],
+                to_attr='prefetched_courses'
+            ),
+            Prefetch(
+                'adminanalytics_set',
+                queryset=AdminAnalytics.objects.order_by('-date')[:1],
+                to_attr='prefetched_analytics'
+            ),
+        ]
+    
     def get_members(self, obj):
         return UserOrganizationSerializer(
-            obj.userorganization_set.all()[:10], many=True
+            prefetched(obj, 'prefetched_members', lambda: obj.userorganization_set.all()[:10]), many=True
         ).data
     
     def get_cohorts(self, obj):
         return CohortSerializer(
-            obj.cohort_set.all()[:10], many=True
+            prefetched(obj, 'prefetched_cohorts', lambda: obj.cohort_set.all()[:10]), many=True
         ).data
     
     def get_courses(self, obj):
         return CourseSerializer(
-            obj.course_set.all()[:10], many=True
+            prefetched(obj, 'prefetched_courses', lambda: obj.course_set.all()[:10]), many=True
         ).data
     
     def get_analytics(self, obj):
-        latest_analytics = obj.adminanalytics_set.first()
+        latest_analytics = next(iter(
+            prefetched(obj, 'prefetched_analytics', lambda: obj.adminanalytics_set.all()[:1])
+        ), None)
         return AdminAnalyticsSerializer(latest_analytics).data if latest_analytics else None
 
 
@@ -101,10 +176,19 @@ class UserOrganizationSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'created_at']
 
 
-class CohortSerializer(serializers.ModelSerializer):
-    current_student_count = serializers.ReadOnlyField()
+class CohortSerializer(EagerLoadingMixin, serializers.ModelSerializer):
+    current_student_count = serializers.SerializerMethodField()
     org_name = serializers.CharField(source='org.name', read_only=True)
     
+    select_related_fields = ['org']
+    
+    @classmethod
+    def get_annotations(cls):
+        return {'learner_count': Count('usercohort', filter=Q(usercohort__role='learner'))}
+    
+    def get_current_student_count(self, obj):
+        return prefetched(obj, 'learner_count', lambda: obj.current_student_count)
+    
     class Meta:
         model = Cohort
         fields = ['id', 'name', 'org', 'org_name', 'description', 'is_active',
@@ -153,13 +237,15 @@ class MilestoneSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'created_at']
 
 
-class CourseSerializer(serializers.ModelSerializer):
+class CourseSerializer(EagerLoadingMixin, serializers.ModelSerializer):
     org_name = serializers.CharField(source='org.name', read_only=True)
     created_by_name = serializers.CharField(source='created_by.full_name', read_only=True)
     total_tasks = serializers.ReadOnlyField()
     completion_rate = serializers.ReadOnlyField()
     enrolled_students_count = serializers.ReadOnlyField()
     
+    select_related_fields = ['org', 'created_by']
+    
     class Meta:
         model = Course
         fields = ['id', 'org', 'org_name', 'name', 'description', 'status',
@@ -168,6 +254,11 @@ class CourseSerializer(serializers.ModelSerializer):
                   'created_by_name', 'total_tasks', 'completion_rate',
                   'enrolled_students_count', 'created_at', 'updated_at']
         read_only_fields = ['id', 'created_at', 'updated_at']
+    
+    @classmethod
+    def setup_eager_loading(cls, queryset):
+        # Metric properties read these annotations instead of counting per course
+        return super().setup_eager_loading(queryset).with_metrics()
 
 
 class CourseDetailSerializer(CourseSerializer):
@@ -178,6 +269,15 @@ class CourseDetailSerializer(CourseSerializer):
     class Meta(CourseSerializer.Meta):
         fields = CourseSerializer.Meta.fields + ['milestones', 'tasks', 'cohorts']
     
+    @classmethod
+    def get_prefetches(cls):
+        return [
+            Prefetch('coursemilestone_set', queryset=CourseMilestone.objects.select_related('milestone')),
+            Prefetch('coursetask_set', queryset=CourseTask.objects.select_related('task', 'milestone')),
+            'coursecohort_set',
+            Prefetch('coursecohort_set__cohort', queryset=CohortSerializer.setup_eager_loading(Cohort.objects.all())),
+        ]
+    
     def get_milestones(self, obj):
         course_milestones = obj.coursemilestone_set.all()
         return CourseMilestoneSerializer(course_milestones, many=True).data
@@ -202,18 +302,24 @@ class CourseMilestoneSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'created_at']
 
 
-class TaskSerializer(serializers.ModelSerializer):
+class TaskSerializer(EagerLoadingMixin, serializers.ModelSerializer):
     org_name = serializers.CharField(source='org.name', read_only=True)
     created_by_name = serializers.CharField(source='created_by.full_name', read_only=True)
     completion_rate = serializers.ReadOnlyField()
     
+    select_related_fields = ['org', 'created_by']
+    
     class Meta:
         model = Task
         fields = ['id', 'org', 'org_name', 'type', 'title', 'description',
-                  'status', 'difficulty_level', 'estimated_time_minutes', 'points',
-                  'created_by', 'created_by_name', 'completion_rate', 'created_at',
+                  'status', 'difficulty_level', 'estimated_time_minutes', 'time_limit_minutes',
+                  'points', 'created_by', 'created_by_name', 'completion_rate', 'created_at',
                   'updated_at', 'scheduled_publish_at']
         read_only_fields = ['id', 'created_at', 'updated_at']
+    
+    @classmethod
+    def setup_eager_loading(cls, queryset):
+        return super().setup_eager_loading(queryset).with_metrics()
 
 
 class TaskDetailSerializer(TaskSerializer):
@@ -223,6 +329,10 @@ class TaskDetailSerializer(TaskSerializer):
     class Meta(TaskSerializer.Meta):
         fields = TaskSerializer.Meta.fields + ['blocks', 'questions']
     
+    @classmethod
+    def get_prefetches(cls):
+        return ['questions']
+    
     def get_questions(self, obj):
         if obj.type == Task.Type.QUIZ:
             return QuestionSerializer(obj.questions.all(), many=True).data
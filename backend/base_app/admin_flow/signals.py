@@ -1,15 +1,24 @@
 from django.db.models.signals import post_save, post_delete, pre_save
+from django.db import transaction
 from django.dispatch import receiver
 from django.utils import timezone
-from django.core.mail import send_mail
 from django.conf import settings
 from datetime import datetime, timedelta
 
 from .models import (
     User, Organization, UserOrganization, Course, Task, TaskCompletion,
     AdminProfile, AdminAction, AdminNotification, AdminAnalytics,
-    ContentGenerationJob, BulkOperation
+    ContentGenerationJob, BulkOperation, Cohort, CourseCohort, CourseMilestone,
+    CourseTask, SystemConfiguration
 )
+from .outbox import queue_email
+from .drip import rebuild_timeline, rebuild_course_timelines, rebuild_cohort_timelines
+from .dashboard import bump_dashboard_version, bump_dashboard_versions
+from .membership import increment_member_count, decrement_member_count
+from .audit import SENSITIVE_ACTIONS, sensitive_action_alert
+from .config import invalidate_config
+from .analytics import refresh_rollups
+from .cloning import course_graph_created
 
 
 # =================== AUDIT LOGGING SIGNALS ===================
@@ -136,6 +145,21 @@ def notify_bulk_operation_status(sender, instance, created, **kwargs):
         )
 
 
+# =================== MEMBERSHIP COUNT SIGNALS ===================
+
+@receiver(post_save, sender=UserOrganization)
+def count_member_added(sender, instance, created, **kwargs):
+    """Keep Organization.member_count in step with new memberships"""
+    if created and not getattr(instance, '_member_counted', False):
+        increment_member_count(instance.org_id)
+
+
+@receiver(post_delete, sender=UserOrganization)
+def count_member_removed(sender, instance, **kwargs):
+    """Keep Organization.member_count in step with removed memberships"""
+    decrement_member_count(instance.org_id)
+
+
 # =================== ANALYTICS UPDATE SIGNALS ===================
 
 @receiver(post_save, sender=UserOrganization)
@@ -151,6 +175,27 @@ def update_user_analytics_on_removal(sender, instance, **kwargs):
     update_daily_user_analytics(instance.org)
 
 
+# =================== DASHBOARD CACHE SIGNALS ===================
+
+@receiver(post_save, sender=UserOrganization)
+@receiver(post_delete, sender=UserOrganization)
+@receiver(post_save, sender=Course)
+@receiver(post_delete, sender=Course)
+@receiver(post_save, sender=Task)
+@receiver(post_delete, sender=Task)
+@receiver(post_save, sender=Cohort)
+@receiver(post_delete, sender=Cohort)
+def invalidate_dashboard_summaries(sender, instance, **kwargs):
+    """Membership and content changes invalidate cached dashboard summaries"""
+    bump_dashboard_version(instance.org_id)
+
+
+@receiver(post_save, sender=Organization)
+def invalidate_organization_dashboards(sender, instance, **kwargs):
+    """Organization name and limit changes show up in dashboard alerts"""
+    bump_dashboard_version(instance.id)
+
+
 # =================== SYSTEM MONITORING SIGNALS ===================
 
 @receiver(post_save, sender=Organization)
@@ -289,12 +334,11 @@ def send_generation_complete_email(job):
     """
     
     try:
-        send_mail(
+        queue_email(
             subject,
             message,
             getattr(settings, 'DEFAULT_FROM_EMAIL', 'noreply@example.com'),
-            [job.started_by.email],
-            fail_silently=True
+            [job.started_by.email]
         )
     except Exception:
         # Log error but don't fail the signal
@@ -324,12 +368,11 @@ def send_system_alert_email(notification):
     """
     
     try:
-        send_mail(
+        queue_email(
             subject,
             message,
             getattr(settings, 'DEFAULT_FROM_EMAIL', 'noreply@example.com'),
-            [notification.recipient.email],
-            fail_silently=True
+            [notification.recipient.email]
         )
     except Exception:
         pass
@@ -414,6 +457,12 @@ def update_daily_admin_analytics():
         analytics.error_count = error_count
         analytics.content_generations = ai_generations_today
         analytics.save()
+    
+    # Roll today into the current week and month
+    refresh_rollups(today, today)
+    
+    # Cached dashboards embed the latest analytics
+    bump_dashboard_versions(Organization.objects.filter(is_active=True).values('pk'))
 
 
 # =================== SECURITY MONITORING ===================
@@ -439,25 +488,61 @@ def monitor_admin_profile_changes(sender, instance, created, **kwargs):
 
 @receiver(post_save, sender=AdminAction)
 def monitor_sensitive_actions(sender, instance, created, **kwargs):
-    """Monitor sensitive admin actions"""
-    if created and instance.action_type in [
-        AdminAction.ActionType.DELETE,
-        AdminAction.ActionType.PERMISSION_CHANGE,
-        AdminAction.ActionType.SYSTEM_CONFIG
-    ]:
+    """Monitor sensitive admin actions saved directly; buffered ones are alerted on flush"""
+    if created and instance.action_type in SENSITIVE_ACTIONS:
         # Create alert for sensitive actions
-        AdminNotification.objects.create(
-            recipient=instance.admin,
-            notification_type=AdminNotification.Type.SECURITY_ALERT,
-            priority=AdminNotification.Priority.HIGH,
-            title='Sensitive Action Performed',
-            message=f'Sensitive action {instance.action_type} was performed on {instance.object_type}',
-            organization=instance.organization,
-            related_object_type='AdminAction',
-            related_object_id=instance.id,
-            metadata={
-                'action_type': instance.action_type,
-                'object_type': instance.object_type,
-                'object_name': instance.object_name
-            }
-        ) 
\ No newline at end of file
+        sensitive_action_alert(instance).save()
+
+
+# =================== CONFIGURATION SIGNALS ===================
+
+@receiver(post_save, sender=SystemConfiguration)
+@receiver(post_delete, sender=SystemConfiguration)
+def reload_configuration(sender, instance, **kwargs):
+    """Drop this process's configuration snapshot once the change commits"""
+    transaction.on_commit(invalidate_config)
+
+
+# =================== CONTENT CLONING SIGNALS ===================
+
+@receiver(course_graph_created)
+def handle_course_graph_created(sender, course, tasks, **kwargs):
+    """Bulk-created courses and tasks skip post_save; refresh dashboards and analytics once"""
+    org_ids = {task.org_id for task in tasks}
+    if course is not None:
+        org_ids.add(course.org_id)
+    bump_dashboard_versions(org_ids)
+    for organization in Organization.objects.filter(pk__in=org_ids):
+        update_daily_content_analytics(organization)
+
+
+# =================== DRIP RELEASE SIGNALS ===================
+
+@receiver(post_save, sender=CourseCohort)
+def rebuild_drip_timeline(sender, instance, **kwargs):
+    """Recompute a cohort's unlock timeline when its schedule changes"""
+    rebuild_timeline(instance)
+
+
+@receiver(post_save, sender=CourseMilestone)
+@receiver(post_save, sender=CourseTask)
+def rebuild_drip_timelines_on_structure_change(sender, instance, **kwargs):
+    """Recompute unlock timelines when course content is added or moved"""
+    rebuild_course_timelines(instance.course_id)
+
+
+@receiver(post_delete, sender=CourseMilestone)
+@receiver(post_delete, sender=CourseTask)
+def rebuild_drip_timelines_on_removal(sender, instance, origin=None, **kwargs):
+    """Close the gap left by removed course content"""
+    # Deleting the course itself removes its timelines too; any other origin,
+    # such as a deleted Task or Milestone, leaves a gap to close
+    if getattr(origin, 'model', type(origin)) is not Course:
+        rebuild_course_timelines(instance.course_id)
+
+
+@receiver(post_save, sender=Cohort)
+def rebuild_drip_timelines_on_cohort_change(sender, instance, created, **kwargs):
+    """Cohort start dates anchor timelines without an explicit publish date"""
+    if not created:
+        rebuild_cohort_timelines(instance.id)
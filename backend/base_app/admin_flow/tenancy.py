@@ -0,0 +1,68 @@
+"""
+Organization tenancy for admin views.
+
+The organizations an admin manages (admin or owner memberships plus the
+organizations assigned on their admin profile) come from the request's
+authorization context, loaded once per request. Querysets are then scoped
+with ``<field>__in`` over that literal id list instead of re-running an
+organization join as a subquery for every queryset.
+
+Super admins are not restricted: their tenant set is ``None``.
+"""
+from django.db.models import Q
+
+from .authorization import admin_context
+from .models import Organization
+
+
+def tenant_org_ids(request):
+    """Ids of the organizations the request user manages, or None for every organization"""
+    context = admin_context(request)
+    if context.is_super_admin:
+        return None
+    return context.managed_org_ids | context.profile_org_ids
+
+
+def tenant_org_id_list(request):
+    """Managed organization ids in id order, resolving super admins to every organization"""
+    org_ids = tenant_org_ids(request)
+    if org_ids is None:
+        return list(Organization.objects.order_by('id').values_list('id', flat=True))
+    return sorted(org_ids)
+
+
+def scope_to_tenant(queryset, org_ids, field='org_id', include_global=False):
+    """Restrict ``queryset`` to rows whose ``field`` is one of ``org_ids``.
+
+    ``include_global`` also keeps rows with no organization.
+    """
+    if org_ids is None:
+        return queryset
+    scope = Q(**{f'{field}__in': sorted(org_ids)})
+    if include_global:
+        scope |= Q(**{f'{field}__isnull': True})
+    return queryset.filter(scope)
+
+
+class TenantScopedMixin:
+    """Scope view querysets to the organizations the request user manages"""
+    tenant_field = 'org_id'
+    tenant_include_global = False
+
+    def get_tenant_org_ids(self):
+        return tenant_org_ids(self.request)
+
+    def in_tenant(self, org_id):
+        org_ids = self.get_tenant_org_ids()
+        return org_ids is None or org_id in org_ids
+
+    def scope_to_tenant(self, queryset, field=None, include_global=None):
+        return scope_to_tenant(
+            queryset,
+            self.get_tenant_org_ids(),
+            field=field or self.tenant_field,
+            include_global=self.tenant_include_global if include_global is None else include_global
+        )
+
+    def get_queryset(self):
+        return self.scope_to_tenant(super().get_queryset())
@@ -1,4 +1,4 @@
-from django.test import TestCase
+from django.test import TestCase, override_settings
 from django.contrib.auth import get_user_model
 from django.utils import timezone
 from datetime import datetime, timedelta
@@ -11,7 +11,7 @@ from .models import (
     Organization, UserOrganization, Cohort, UserCohort, Course, Task,
     TaskCompletion, AdminProfile, AdminAction, ContentTemplate,
     SystemConfiguration, ContentGenerationJob, AdminNotification,
-    AdminAnalytics, BulkOperation, AdminDashboardWidget
+    AdminAnalytics, BulkOperation, AdminDashboardWidget, EmailOutbox
 )
 
 
@@ -662,8 +662,8 @@ class AdminSignalTests(AdminFlowTestCase):
         final_count = AdminNotification.objects.count()
         self.assertGreater(final_count, initial_count)
     
-    @patch('admin_flow.signals.send_mail')
-    def test_content_generation_email(self, mock_send_mail):
+    @patch('admin_flow.signals.queue_email')
+    def test_content_generation_email(self, mock_queue_email):
         """Test content generation completion email"""
         job = ContentGenerationJob.objects.create(
             job_type=ContentGenerationJob.JobType.COURSE_STRUCTURE,
@@ -678,8 +678,8 @@ class AdminSignalTests(AdminFlowTestCase):
         job.completed_at = timezone.now()
         job.save()
         
-        # Check if email was attempted
-        self.assertTrue(mock_send_mail.called)
+        # Check if email was queued
+        self.assertTrue(mock_queue_email.called)
 
 
 class SystemConfigurationTests(AdminFlowTestCase):
@@ -721,4 +721,1322 @@ class SystemConfigurationTests(AdminFlowTestCase):
             value_type='json',
             organization=self.org
         )
-        self.assertEqual(config_json.get_typed_value(), {"key": "value"}) 
\ No newline at end of file
+        self.assertEqual(config_json.get_typed_value(), {"key": "value"})
+
+
+# =================== EMAIL OUTBOX TESTS ===================
+
+class EmailOutboxTests(TestCase):
+    """Test the transactional email outbox and delivery worker"""
+    
+    def test_queue_email_does_not_send(self):
+        """Test queued emails wait for the worker"""
+        from django.core import mail
+        from .outbox import queue_email
+        
+        email = queue_email('Hello', 'Body', None, ['user@test.com'], html_message='<p>Body</p>')
+        
+        self.assertEqual(email.status, EmailOutbox.Status.PENDING)
+        self.assertEqual(len(mail.outbox), 0)
+    
+    def test_deliver_pending_sends_batches(self):
+        """Test the worker drains the outbox over one connection per batch"""
+        from django.core import mail
+        from .outbox import queue_email, deliver_pending
+        
+        for i in range(5):
+            queue_email(f'Email {i}', 'Body', 'admin@test.com', [f'user{i}@test.com'], html_message='<p>Body</p>')
+        
+        sent, failed = deliver_pending(batch_size=2)
+        
+        self.assertEqual((sent, failed), (5, 0))
+        self.assertEqual(len(mail.outbox), 5)
+        self.assertEqual(mail.outbox[0].alternatives, [('<p>Body</p>', 'text/html')])
+        self.assertFalse(EmailOutbox.objects.exclude(status=EmailOutbox.Status.SENT).exists())
+    
+    def test_failed_delivery_backs_off_then_gives_up(self):
+        """Test failures are retried with backoff until the attempt limit"""
+        from unittest.mock import MagicMock
+        from .outbox import queue_email, deliver_batch, retry_delay, MAX_DELIVERY_ATTEMPTS
+        
+        connection = MagicMock()
+        connection.send_messages.side_effect = ConnectionError('SMTP unavailable')
+        email = queue_email('Hello', 'Body', None, ['user@test.com'])
+        now = timezone.now()
+        
+        self.assertEqual(deliver_batch(connection=connection, now=now), (0, 1))
+        email.refresh_from_db()
+        self.assertEqual(email.status, EmailOutbox.Status.PENDING)
+        self.assertEqual(email.next_attempt_at, now + retry_delay(1))
+        self.assertEqual(email.last_error, 'SMTP unavailable')
+        
+        # Not due again until the backoff has passed
+        self.assertEqual(deliver_batch(connection=connection, now=now), (0, 0))
+        
+        for attempt in range(2, MAX_DELIVERY_ATTEMPTS + 1):
+            deliver_batch(connection=connection, now=email.next_attempt_at)
+            email.refresh_from_db()
+        
+        self.assertEqual(email.status, EmailOutbox.Status.FAILED)
+        self.assertEqual(email.attempts, MAX_DELIVERY_ATTEMPTS)
+
+    
+    def test_connection_failure_counts_as_attempt(self):
+        """Test a failed connection reschedules the whole batch with backoff"""
+        from unittest.mock import MagicMock
+        from .outbox import queue_email, deliver_batch, retry_delay
+        
+        connection = MagicMock()
+        connection.open.side_effect = ConnectionError('SMTP unavailable')
+        first = queue_email('First', 'Body', None, ['one@test.com'])
+        second = queue_email('Second', 'Body', None, ['two@test.com'])
+        now = timezone.now()
+        
+        with self.assertLogs('admin_flow.outbox', 'WARNING'):
+            self.assertEqual(deliver_batch(connection=connection, now=now), (0, 2))
+        connection.send_messages.assert_not_called()
+        for email in (first, second):
+            email.refresh_from_db()
+            self.assertEqual(email.attempts, 1)
+            self.assertEqual(email.next_attempt_at, now + retry_delay(1))
+            self.assertEqual(email.last_error, 'SMTP unavailable')
+        self.assertEqual(deliver_batch(connection=connection, now=now), (0, 0))
+    
+    def test_claimed_rows_are_leased(self):
+        """Test rows claimed by a worker that never reports back are retried after the lease"""
+        from datetime import timedelta
+        from .outbox import queue_email, _claim_batch, deliver_batch, DELIVERY_LEASE_SECONDS
+        
+        email = queue_email('Hello', 'Body', None, ['user@test.com'])
+        now = timezone.now()
+        
+        self.assertEqual(_claim_batch(10, now), [email])
+        self.assertEqual(deliver_batch(now=now), (0, 0))
+        self.assertEqual(
+            deliver_batch(now=now + timedelta(seconds=DELIVERY_LEASE_SECONDS)),
+            (1, 0)
+        )
+        email.refresh_from_db()
+        self.assertEqual(email.attempts, 2)
+        self.assertEqual(email.status, EmailOutbox.Status.SENT)
+
+# =================== EMAIL RENDERING TESTS ===================
+
+EMAIL_TEMPLATES = {
+    'emails/notice.txt': 'Hi {{ name }}, {{ course }} {{ message }}',
+    'emails/notice.html': '<p>Hi {{ name }}, {{ course }} {{ message }}</p>',
+}
+
+
+@override_settings(TEMPLATES=[{
+    'BACKEND': 'django.template.backends.django.DjangoTemplates',
+    'OPTIONS': {'loaders': [('django.template.loaders.locmem.Loader', EMAIL_TEMPLATES)]},
+}])
+class EmailRenderingTests(TestCase):
+    """Test compiled, batched email rendering"""
+    
+    def test_render_email(self):
+        """Test a single email renders both bodies with escaping"""
+        from .email_rendering import render_email
+        
+        plain, html = render_email('emails/notice', {'name': 'Ann', 'course': 'Python', 'message': '<b>'})
+        
+        self.assertEqual(plain, 'Hi Ann, Python &lt;b&gt;')
+        self.assertEqual(html, '<p>Hi Ann, Python &lt;b&gt;</p>')
+    
+    def test_batch_uses_shared_context_and_dedups(self):
+        """Test recipients share context and identical bodies are rendered once"""
+        from .email_rendering import render_email_batch
+        
+        bodies = render_email_batch(
+            'emails/notice',
+            [{'name': 'Ann'}, {'name': 'Bob'}, {'name': 'Ann'}],
+            shared_context={'course': 'Python', 'message': 'starts today'}
+        )
+        
+        self.assertEqual(bodies[0][0], 'Hi Ann, Python starts today')
+        self.assertEqual(bodies[1][0], 'Hi Bob, Python starts today')
+        self.assertIs(bodies[0], bodies[2])
+    
+    def test_templates_compiled_once(self):
+        """Test templates are loaded once and reused across renders"""
+        from .email_rendering import render_email, _compiled
+        
+        render_email('emails/notice', {'name': 'Ann'})
+        with patch('admin_flow.email_rendering.get_template') as mock_get_template:
+            render_email('emails/notice', {'name': 'Bob'})
+        
+        mock_get_template.assert_not_called()
+        self.assertGreaterEqual(_compiled.cache_info().hits, 2)
+
+
+# =================== DRIP RELEASE TESTS ===================
+
+class DripReleaseTests(TestCase):
+    """Test precomputed drip-release timelines and unlock notifications"""
+    
+    def setUp(self):
+        from .models import User, Milestone, CourseCohort, CourseMilestone, CourseTask
+        
+        self.org = Organization.objects.create(name="Drip Org", slug="drip-org")
+        self.learner = User.objects.create(email="learner@test.com")
+        self.cohort = Cohort.objects.create(name="Drip Cohort", org=self.org)
+        UserCohort.objects.create(user=self.learner, cohort=self.cohort, role='learner')
+        
+        self.course = Course.objects.create(name="Drip Course", org=self.org)
+        self.course_milestones = []
+        self.course_tasks = []
+        for position in range(3):
+            milestone = Milestone.objects.create(name=f"Week {position + 1}", org=self.org)
+            task = Task.objects.create(title=f"Lesson {position + 1}", org=self.org, type=Task.Type.LEARNING_MATERIAL)
+            self.course_milestones.append(CourseMilestone.objects.create(
+                course=self.course, milestone=milestone, ordering=position
+            ))
+            self.course_tasks.append(CourseTask.objects.create(
+                course=self.course, task=task, milestone=milestone, ordering=position
+            ))
+        
+        self.start = timezone.now() + timedelta(days=1)
+        self.course_cohort = CourseCohort.objects.create(
+            course=self.course,
+            cohort=self.cohort,
+            is_drip_enabled=True,
+            frequency_value=1,
+            frequency_unit='weeks',
+            publish_at=self.start
+        )
+    
+    def test_timeline_precomputed(self):
+        """Test milestones unlock one step apart and tasks follow their milestone"""
+        from .models import DripUnlock
+        
+        unlocks = {
+            unlock.course_task_id: unlock.unlock_at
+            for unlock in DripUnlock.objects.filter(kind=DripUnlock.Kind.TASK)
+        }
+        
+        self.assertEqual(DripUnlock.objects.filter(cohort=self.cohort).count(), 6)
+        for position, course_task in enumerate(self.course_tasks):
+            self.assertEqual(unlocks[course_task.id], self.start + timedelta(weeks=position))
+    
+    def test_unlocked_items_range(self):
+        """Test unlocked content is what the current time has passed"""
+        from .drip import unlocked_items
+        
+        self.assertEqual(unlocked_items(self.learner, self.course.id), {'milestones': set(), 'tasks': set()})
+        
+        with self.assertNumQueries(1):
+            unlocked = unlocked_items(self.learner, self.course.id, now=self.start + timedelta(days=8))
+        
+        self.assertEqual(unlocked['tasks'], {self.course_tasks[0].id, self.course_tasks[1].id})
+        self.assertEqual(len(unlocked['milestones']), 2)
+    
+    def test_explicit_unlock_and_reschedule(self):
+        """Test explicit unlock times win and schedule edits move the timeline"""
+        from .models import DripUnlock
+        
+        override = self.start + timedelta(hours=3)
+        self.course_tasks[2].unlock_at = override
+        self.course_tasks[2].save()
+        self.course_cohort.frequency_unit = 'days'
+        self.course_cohort.save()
+        
+        self.assertEqual(DripUnlock.objects.get(course_task=self.course_tasks[2]).unlock_at, override)
+        self.assertEqual(
+            DripUnlock.objects.get(course_task=self.course_tasks[1]).unlock_at,
+            self.start + timedelta(days=1)
+        )
+    
+    def test_removing_milestone_closes_gap(self):
+        """Test later milestones move up when one is removed"""
+        from .models import DripUnlock
+        
+        self.course_milestones[0].delete()
+        
+        self.assertEqual(
+            DripUnlock.objects.get(course_milestone=self.course_milestones[1]).unlock_at,
+            self.start
+        )
+    
+    def test_deleting_milestone_row_closes_gap(self):
+        """Test deleting a Milestone, which cascades to its course milestone, moves later ones up"""
+        from .models import DripUnlock
+        
+        self.course_milestones[0].milestone.delete()
+        
+        self.assertEqual(
+            DripUnlock.objects.get(course_milestone=self.course_milestones[1]).unlock_at,
+            self.start
+        )
+    
+    def test_unlocked_content_endpoint(self):
+        """Test learners get only released content and outsiders are refused"""
+        from .models import User
+        
+        self.course_cohort.publish_at = timezone.now() - timedelta(days=8)
+        self.course_cohort.save()
+        url = reverse('admin_flow:unlocked-content', args=[self.course.id])
+        client = APIClient()
+        
+        client.force_authenticate(user=self.learner)
+        response = client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [item['id'] for item in response.data['tasks']],
+            [self.course_tasks[0].id, self.course_tasks[1].id]
+        )
+        self.assertEqual(len(response.data['milestones']), 2)
+        
+        client.force_authenticate(user=User.objects.create(email="outsider@test.com"))
+        self.assertEqual(client.get(url).status_code, status.HTTP_403_FORBIDDEN)
+    
+    def test_notifications_queued_once_per_boundary(self):
+        """Test due unlocks are announced in bulk and only once"""
+        from .drip import notify_due_unlocks
+        
+        now = self.start + timedelta(days=8)
+        
+        self.assertEqual(notify_due_unlocks(now=now), 1)
+        self.assertEqual(notify_due_unlocks(now=now), 0)
+        
+        email = EmailOutbox.objects.get()
+        self.assertEqual(email.recipients, ['learner@test.com'])
+        self.assertIn('Lesson 2', email.body)
+        self.assertIn('Week 2', email.body)
+
+
+# =================== DASHBOARD CACHE TESTS ===================
+
+class DashboardSummaryCacheTests(TestCase):
+    """Test the per-admin cached dashboard summary"""
+    
+    def setUp(self):
+        from django.core.cache import cache
+        from .models import User
+        
+        cache.clear()
+        self.org = Organization.objects.create(name="Dash Org", slug="dash-org", max_users=2)
+        self.admin = User.objects.create(email="dash-admin@test.com")
+        UserOrganization.objects.create(user=self.admin, org=self.org, role='admin')
+        for i in range(2):
+            UserOrganization.objects.create(
+                user=User.objects.create(email=f"member{i}@test.com"), org=self.org
+            )
+        Course.objects.create(name="Dash Course", org=self.org)
+    
+    def test_summary_counts_and_alerts(self):
+        """Test the summary aggregates users, content and limit alerts"""
+        from .dashboard import dashboard_summary, managed_organization_ids
+        
+        org_ids = managed_organization_ids(self.admin)
+        summary = dashboard_summary(self.admin, org_ids)
+        
+        self.assertEqual(org_ids, [self.org.id])
+        self.assertEqual(summary['total_users'], 3)
+        self.assertEqual(summary['new_users_today'], 3)
+        self.assertEqual(summary['total_courses'], 1)
+        self.assertEqual(summary['organization']['id'], self.org.id)
+        self.assertEqual(len(summary['system_alerts']), 1)
+    
+    def test_summary_served_from_cache(self):
+        """Test a cached summary only reads the organization versions"""
+        from .dashboard import dashboard_summary
+        
+        dashboard_summary(self.admin, [self.org.id])
+        with self.assertNumQueries(1):
+            summary = dashboard_summary(self.admin, [self.org.id])
+        
+        self.assertEqual(summary['total_courses'], 1)
+    
+    def test_signals_invalidate_summary(self):
+        """Test membership and content changes are reflected immediately"""
+        from .models import User
+        from .dashboard import dashboard_summary
+        
+        dashboard_summary(self.admin, [self.org.id])
+        Course.objects.create(name="Second Course", org=self.org)
+        UserOrganization.objects.create(user=User.objects.create(email="late@test.com"), org=self.org)
+        
+        summary = dashboard_summary(self.admin, [self.org.id])
+        self.assertEqual(summary['total_courses'], 2)
+        self.assertEqual(summary['total_users'], 4)
+    
+    def test_analytics_job_invalidates_summaries(self):
+        """Test the daily analytics job invalidates cached summaries"""
+        from .dashboard import dashboard_summary
+        from .signals import update_daily_admin_analytics
+        
+        AdminAnalytics.objects.filter(organization=self.org).update(total_users=0)
+        self.assertEqual(dashboard_summary(self.admin, [self.org.id])['analytics_summary']['total_users'], 0)
+        update_daily_admin_analytics()
+        
+        summary = dashboard_summary(self.admin, [self.org.id])
+        self.assertEqual(summary['analytics_summary']['total_users'], 3)
+    
+    def test_version_bump_reaches_other_processes(self):
+        """Test a bump made elsewhere, with no shared cache, still invalidates the summary"""
+        from django.db.models import F
+        from .dashboard import dashboard_summary
+        
+        dashboard_summary(self.admin, [self.org.id])
+        # Another worker or a command: a bare F() update, no signal in this process
+        Course.objects.bulk_create([Course(name="Other Course", org=self.org)])
+        Organization.objects.filter(pk=self.org.pk).update(dashboard_version=F('dashboard_version') + 1)
+        
+        self.assertEqual(dashboard_summary(self.admin, [self.org.id])['total_courses'], 2)
+
+
+# =================== MEMBER COUNT TESTS ===================
+
+class OrganizationMemberCountTests(TestCase):
+    """Test the maintained organization member count"""
+    
+    def setUp(self):
+        from .models import User
+        
+        self.org = Organization.objects.create(name="Count Org", slug="count-org", max_users=2)
+        self.users = [User.objects.create(email=f"count{i}@test.com") for i in range(3)]
+    
+    def test_signals_track_membership(self):
+        """Test creating and deleting memberships updates the count"""
+        membership = UserOrganization.objects.create(user=self.users[0], org=self.org)
+        UserOrganization.objects.create(user=self.users[1], org=self.org)
+        self.org.refresh_from_db()
+        self.assertEqual(self.org.member_count, 2)
+        self.assertEqual(self.org.current_user_count, 2)
+        
+        membership.delete()
+        self.org.refresh_from_db()
+        self.assertEqual(self.org.member_count, 1)
+    
+    def test_add_member_enforces_limit(self):
+        """Test add_member refuses members beyond max_users"""
+        from .membership import add_member, OrganizationFull
+        
+        add_member(self.users[0], self.org)
+        add_member(self.users[1], self.org)
+        with self.assertRaises(OrganizationFull):
+            add_member(self.users[2], self.org)
+        
+        self.org.refresh_from_db()
+        self.assertEqual(self.org.member_count, 2)
+        self.assertEqual(UserOrganization.objects.filter(org=self.org).count(), 2)
+        self.assertFalse(self.org.is_over_user_limit)
+    
+    def test_stale_save_keeps_count(self):
+        """Test saving a stale organization does not overwrite the count"""
+        stale = Organization.objects.get(pk=self.org.pk)
+        UserOrganization.objects.create(user=self.users[0], org=self.org)
+        
+        stale.name = "Renamed Org"
+        stale.save()
+        
+        self.org.refresh_from_db()
+        self.assertEqual(self.org.member_count, 1)
+        self.assertEqual(self.org.name, "Renamed Org")
+    
+    def test_reconcile_fixes_drift(self):
+        """Test reconcile corrects counts after writes that skip signals"""
+        from .membership import reconcile_member_counts
+        
+        UserOrganization.objects.bulk_create([
+            UserOrganization(user=user, org=self.org) for user in self.users
+        ])
+        
+        self.assertEqual(reconcile_member_counts(), [self.org.id])
+        self.org.refresh_from_db()
+        self.assertEqual(self.org.member_count, 3)
+        self.assertTrue(self.org.is_over_user_limit)
+        self.assertEqual(reconcile_member_counts(), [])
+
+
+# =================== USER DIRECTORY TESTS ===================
+
+class UserDirectoryTests(TestCase):
+    """Test keyset pagination and the cached user summary"""
+    
+    def setUp(self):
+        from django.core.cache import cache
+        from .models import User
+        
+        cache.clear()
+        self.org = Organization.objects.create(name="Directory Org", slug="directory-org", max_users=50)
+        self.other_org = Organization.objects.create(name="Other Org", slug="other-org")
+        self.admin = User.objects.create(email="directory-admin@test.com")
+        UserOrganization.objects.create(user=self.admin, org=self.org, role='admin')
+        for i in range(6):
+            UserOrganization.objects.create(
+                user=User.objects.create(email=f"directory{i}@test.com"), org=self.org,
+                last_accessed=timezone.now() if i < 2 else None
+            )
+        UserOrganization.objects.create(user=User.objects.create(email="outsider@test.com"), org=self.other_org)
+    
+    def test_managed_users_scoped_to_admin_organizations(self):
+        """Test admins only see members of organizations they manage"""
+        from .user_directory import managed_users
+        
+        users = managed_users(self.admin)
+        self.assertEqual(users.count(), 7)
+        self.assertFalse(users.filter(email="outsider@test.com").exists())
+        self.assertEqual(managed_users(self.admin, search="directory5").count(), 1)
+        self.assertEqual(managed_users(self.admin, role='admin').get(), self.admin)
+    
+    def test_keyset_pages_cover_every_user_once(self):
+        """Test walking cursors returns each user once, newest first"""
+        from .pagination import keyset_page
+        from .user_directory import managed_users
+        
+        users = managed_users(self.admin)
+        seen = []
+        cursor = None
+        while True:
+            page, cursor = keyset_page(users, cursor, page_size=3)
+            seen.extend(page)
+            if cursor is None:
+                break
+        
+        self.assertEqual(len(seen), 7)
+        self.assertEqual(len({user.id for user in seen}), 7)
+        self.assertEqual(
+            [(user.created_at, user.id) for user in seen],
+            sorted(((user.created_at, user.id) for user in seen), reverse=True)
+        )
+    
+    def test_invalid_cursor_rejected(self):
+        """Test malformed cursors raise ValueError"""
+        from .pagination import keyset_page
+        from .user_directory import managed_users
+        
+        with self.assertRaises(ValueError):
+            keyset_page(managed_users(self.admin), 'not-a-cursor')
+    
+    def test_summary_single_query_and_cached(self):
+        """Test the summary counts come from one query and are then cached"""
+        from .user_directory import managed_users, user_summary
+        
+        users = managed_users(self.admin)
+        # One aggregate plus the recent signups
+        with self.assertNumQueries(2):
+            summary = user_summary(self.admin, users)
+        
+        self.assertEqual(summary['total_users'], 7)
+        self.assertEqual(summary['new_users_this_week'], 7)
+        self.assertEqual(summary['active_users'], 2)
+        self.assertEqual(summary['users_by_role'], {'admin': 1, 'member': 6})
+        self.assertEqual(len(summary['recent_signups']), 5)
+        
+        with self.assertNumQueries(0):
+            user_summary(self.admin, managed_users(self.admin))
+
+
+# =================== EAGER LOADING TESTS ===================
+
+class EagerLoadingSerializerTests(TestCase):
+    """Test detail serializers cost a constant number of queries per page"""
+    
+    def create_org(self, index, members=3):
+        from .models import User, UserCohort, AdminAnalytics
+        
+        org = Organization.objects.create(name=f"Eager Org {index}", slug=f"eager-org-{index}", max_users=50)
+        cohort = Cohort.objects.create(name=f"Eager Cohort {index}", org=org)
+        for i in range(members):
+            user = User.objects.create(email=f"eager{index}-{i}@test.com")
+            UserOrganization.objects.create(user=user, org=org)
+            UserCohort.objects.create(user=user, cohort=cohort, role='learner')
+        AdminAnalytics.objects.get_or_create(organization=org, date=timezone.now().date())
+        return org
+    
+    def serialize_users(self, limit):
+        from .models import User
+        from .serializers import UserDetailSerializer
+        
+        users = UserDetailSerializer.setup_eager_loading(User.objects.order_by('id'))[:limit]
+        return UserDetailSerializer(users, many=True).data
+    
+    def serialize_orgs(self, limit):
+        from .serializers import OrganizationDetailSerializer
+        
+        organizations = OrganizationDetailSerializer.setup_eager_loading(Organization.objects.order_by('id'))[:limit]
+        return OrganizationDetailSerializer(organizations, many=True).data
+    
+    def test_user_detail_constant_queries(self):
+        """Test serializing more users does not add queries"""
+        for index in range(3):
+            self.create_org(index)
+        
+        # Users, memberships, cohort memberships
+        with self.assertNumQueries(3):
+            data = self.serialize_users(2)
+        with self.assertNumQueries(3):
+            data = self.serialize_users(9)
+        
+        self.assertEqual(len(data), 9)
+        self.assertEqual(data[0]['organizations'][0]['org_name'], "Eager Org 0")
+        self.assertEqual(data[0]['cohorts'][0]['cohort_name'], "Eager Cohort 0")
+        self.assertEqual(data[0]['total_completions'], 0)
+    
+    def test_organization_detail_constant_queries(self):
+        """Test serializing more organizations does not add queries"""
+        for index in range(4):
+            self.create_org(index, members=12)
+        
+        # Organizations, members, cohorts, courses, analytics
+        with self.assertNumQueries(5):
+            self.serialize_orgs(1)
+        with self.assertNumQueries(5):
+            data = self.serialize_orgs(4)
+        
+        self.assertEqual(len(data), 4)
+        self.assertEqual(len(data[0]['members']), 10)
+        self.assertEqual(data[0]['members'][0]['user_email'], "eager0-0@test.com")
+        self.assertEqual(data[0]['cohorts'][0]['current_student_count'], 12)
+        self.assertIsNotNone(data[0]['analytics'])
+    
+    def test_serializers_work_without_eager_loading(self):
+        """Test plain instances still serialize through the fallbacks"""
+        from .serializers import OrganizationDetailSerializer
+        
+        org = self.create_org(0)
+        data = OrganizationDetailSerializer(org).data
+        
+        self.assertEqual(len(data['members']), 3)
+        self.assertEqual(data['cohorts'][0]['current_student_count'], 3)
+        self.assertIsNotNone(data['analytics'])
+
+
+# =================== COURSE METRICS TESTS ===================
+
+class CourseMetricsTests(TestCase):
+    """Test batch-annotated course and task metrics"""
+    
+    def setUp(self):
+        from .models import User, CourseCohort, CourseTask, TaskCompletion
+        
+        self.org = Organization.objects.create(name="Metrics Org", slug="metrics-org", max_users=50)
+        cohort = Cohort.objects.create(name="Metrics Cohort", org=self.org)
+        self.courses = []
+        for c in range(3):
+            course = Course.objects.create(name=f"Metrics Course {c}", org=self.org)
+            CourseCohort.objects.create(course=course, cohort=cohort)
+            for t in range(c + 1):
+                task = Task.objects.create(org=self.org, title=f"Metrics Task {c}-{t}", type=Task.Type.LEARNING_MATERIAL)
+                CourseTask.objects.create(course=course, task=task, ordering=t)
+            self.courses.append(course)
+        
+        learners = [User.objects.create(email=f"metrics{i}@test.com") for i in range(4)]
+        for learner in learners:
+            UserCohort.objects.create(user=learner, cohort=cohort, role='learner')
+        UserCohort.objects.create(user=User.objects.create(email="metrics-mentor@test.com"), cohort=cohort, role='mentor')
+        for learner in learners[:2]:
+            for course_task in CourseTask.objects.filter(course=self.courses[2]):
+                TaskCompletion.objects.create(user=learner, task=course_task.task)
+    
+    def test_annotations_match_properties(self):
+        """Test with_metrics gives the same values as the per-instance queries"""
+        annotated = {course.id: course for course in Course.objects.with_metrics()}
+        for course in self.courses:
+            with self.assertNumQueries(0):
+                metrics = (
+                    annotated[course.id].total_tasks,
+                    annotated[course.id].enrolled_students_count,
+                    annotated[course.id].completion_rate
+                )
+            self.assertEqual(metrics, (course.total_tasks, course.enrolled_students_count, course.completion_rate))
+        
+        self.assertEqual(annotated[self.courses[2].id].completion_rate, 50)
+        
+        tasks = Task.objects.filter(org=self.org).with_metrics()
+        for task in tasks:
+            self.assertEqual(task.completion_rate, Task.objects.get(pk=task.pk).completion_rate)
+    
+    def test_course_list_constant_queries(self):
+        """Test serializing a course page costs a fixed number of queries"""
+        from .serializers import CourseSerializer
+        
+        with self.assertNumQueries(1):
+            data = CourseSerializer(
+                CourseSerializer.setup_eager_loading(Course.objects.order_by('id')), many=True
+            ).data
+        
+        self.assertEqual([course['total_tasks'] for course in data], [1, 2, 3])
+        self.assertEqual(data[0]['enrolled_students_count'], 4)
+        self.assertEqual(data[0]['org_name'], "Metrics Org")
+    
+    def test_organization_detail_with_courses_constant_queries(self):
+        """Test organization detail pages stay constant with courses attached"""
+        from .serializers import OrganizationDetailSerializer
+        
+        # Organizations, members, cohorts, courses, analytics
+        with self.assertNumQueries(5):
+            data = OrganizationDetailSerializer(
+                OrganizationDetailSerializer.setup_eager_loading(Organization.objects.filter(pk=self.org.pk)),
+                many=True
+            ).data
+        
+        self.assertEqual(len(data[0]['courses']), 3)
+        self.assertEqual(data[0]['courses'][2]['completion_rate'], 50)
+
+
+# =================== AUDIT LOG TESTS ===================
+
+class AdminAuditTests(TestCase):
+    """Test buffered audit writes and monthly archives"""
+    
+    def setUp(self):
+        from .models import User
+        
+        self.org = Organization.objects.create(name="Audit Org", slug="audit-org")
+        self.admin = User.objects.create(email="audit-admin@test.com")
+    
+    def record(self, action_type=AdminAction.ActionType.UPDATE, **fields):
+        from .audit import record_action
+        
+        return record_action(
+            admin=self.admin, action_type=action_type, object_type='Course',
+            organization=self.org, description='Audited', **fields
+        )
+    
+    def test_actions_outside_requests_written_immediately(self):
+        """Test actions recorded outside a request are saved with their alerts"""
+        self.record(AdminAction.ActionType.DELETE)
+        
+        action = AdminAction.objects.get()
+        alert = AdminNotification.objects.get(related_object_type='AdminAction')
+        self.assertEqual(alert.related_object_id, action.id)
+        self.assertEqual(alert.notification_type, AdminNotification.Type.SECURITY_ALERT)
+    
+    def test_actions_buffered_until_request_finishes(self):
+        """Test request actions are written in one batch when the view returns"""
+        from django.http import HttpResponse
+        from django.test import RequestFactory
+        from .audit import AuditBufferMiddleware
+        
+        recorded = []
+        def view(request):
+            with self.assertNumQueries(0):
+                recorded.extend(self.record() for _ in range(3))
+                recorded.append(self.record(AdminAction.ActionType.PERMISSION_CHANGE))
+            self.assertFalse(AdminAction.objects.exists())
+            return HttpResponse()
+        
+        AuditBufferMiddleware(view)(RequestFactory().get('/'))
+        self.assertEqual(AdminAction.objects.count(), 4)
+        self.assertEqual(AdminNotification.objects.filter(related_object_type='AdminAction').count(), 1)
+        # Timestamps are taken when recorded, not when flushed
+        self.assertEqual(AdminAction.objects.order_by('id').first().created_at, recorded[0].created_at)
+    
+    def test_full_buffer_flushes_early(self):
+        """Test a full buffer is written without waiting for the request to end"""
+        from .audit import AUDIT_BUFFER_SIZE, buffered_actions
+        
+        with buffered_actions():
+            for _ in range(AUDIT_BUFFER_SIZE + 1):
+                self.record()
+            self.assertEqual(AdminAction.objects.count(), AUDIT_BUFFER_SIZE)
+        
+        self.assertEqual(AdminAction.objects.count(), AUDIT_BUFFER_SIZE + 1)
+    
+    def test_failed_flush_is_logged_not_raised(self):
+        """Test a failed end-of-request write logs the actions instead of raising"""
+        from .audit import buffered_actions
+        
+        with patch('admin_flow.audit.write_actions', side_effect=RuntimeError('database unavailable')):
+            with self.assertLogs('admin_flow.audit', 'ERROR') as logs:
+                with buffered_actions():
+                    self.record(object_name='Lost course')
+        
+        self.assertIn('Lost course', logs.output[0])
+        self.assertFalse(AdminAction.objects.exists())
+    
+    def test_archive_month_moves_actions_to_ndjson(self):
+        """Test archiving writes a month to compressed NDJSON and deletes it"""
+        import tempfile
+        from .audit import archive_month, archivable_months, read_archive
+        
+        old = timezone.make_aware(datetime(2024, 3, 15, 12, 0))
+        for i in range(5):
+            self.record(created_at=old + timedelta(hours=i), details={'index': i})
+        self.record()
+        
+        self.assertEqual(archivable_months(), [(2024, 3)])
+        with tempfile.TemporaryDirectory() as directory:
+            self.assertEqual(archive_month(2024, 3, directory, batch_size=2), 5)
+            archived = list(read_archive(2024, 3, directory))
+        
+        self.assertEqual([row['details']['index'] for row in archived], list(range(5)))
+        self.assertEqual(archived[0]['organization_id'], self.org.id)
+        self.assertEqual(AdminAction.objects.count(), 1)
+        self.assertEqual(archivable_months(), [])
+    
+    def test_rearchived_batch_read_once(self):
+        """Test rows archived again after a crash before their delete are read once"""
+        import tempfile
+        from .audit import archive_month, read_archive
+        
+        old = timezone.make_aware(datetime(2024, 3, 15, 12, 0))
+        for i in range(3):
+            self.record(created_at=old, details={'index': i})
+        
+        with tempfile.TemporaryDirectory() as directory:
+            # Simulate a crash between writing the first batch and deleting its rows
+            with patch('django.db.models.query.QuerySet.delete', side_effect=RuntimeError('crash')):
+                with self.assertRaises(RuntimeError):
+                    archive_month(2024, 3, directory, batch_size=2)
+            self.assertEqual(archive_month(2024, 3, directory, batch_size=3), 3)
+            archived = list(read_archive(2024, 3, directory))
+        
+        self.assertEqual([row['details']['index'] for row in archived], [0, 1, 2])
+
+
+# =================== CONFIGURATION SNAPSHOT TESTS ===================
+
+class ConfigurationSnapshotTests(TestCase):
+    """Test the process-wide typed configuration snapshot"""
+    
+    def setUp(self):
+        from .config import invalidate_config
+        
+        invalidate_config()
+        self.org = Organization.objects.create(name="Config Org", slug="config-org")
+        SystemConfiguration.objects.create(key='max_upload_mb', value='10', value_type='integer')
+        SystemConfiguration.objects.create(key='features', value='{"quizzes": true}', value_type='json')
+        SystemConfiguration.objects.create(key='api_secret', value='s3cret', is_sensitive=True)
+        SystemConfiguration.objects.create(
+            key='max_upload_mb', value='50', value_type='integer', organization=self.org
+        )
+    
+    def test_org_override_then_global(self):
+        """Test organization overrides win over global values"""
+        from .config import get_config
+        
+        self.assertEqual(get_config('max_upload_mb'), 10)
+        self.assertEqual(get_config('max_upload_mb', self.org), 50)
+        self.assertEqual(get_config('features', self.org), {'quizzes': True})
+        self.assertEqual(get_config('missing', self.org, default='fallback'), 'fallback')
+    
+    def test_reads_are_query_free(self):
+        """Test repeated reads within the check interval hit no database"""
+        from .config import get_config
+        
+        get_config('max_upload_mb')
+        with self.assertNumQueries(0):
+            for _ in range(10):
+                get_config('max_upload_mb', self.org.id)
+    
+    def test_save_invalidates_snapshot(self):
+        """Test saving a configuration is visible on the next read"""
+        from .config import get_config
+        
+        self.assertEqual(get_config('max_upload_mb'), 10)
+        with self.captureOnCommitCallbacks(execute=True):
+            SystemConfiguration.objects.filter(key='max_upload_mb', organization__isnull=True).update(value='20')
+            SystemConfiguration.objects.get(key='max_upload_mb', organization__isnull=True).save()
+        
+        self.assertEqual(get_config('max_upload_mb'), 20)
+    
+    def test_other_process_changes_detected(self):
+        """Test a change made without signals is picked up after the check interval"""
+        from . import config
+        
+        self.assertEqual(config.get_config('max_upload_mb'), 10)
+        SystemConfiguration.objects.filter(key='max_upload_mb', organization__isnull=True).update(
+            value='30', updated_at=timezone.now()
+        )
+        self.assertEqual(config.get_config('max_upload_mb'), 10)
+        
+        with patch.object(config, 'CONFIG_CHECK_INTERVAL', 0):
+            self.assertEqual(config.get_config('max_upload_mb'), 30)
+    
+    def test_resolved_hides_sensitive_values(self):
+        """Test the resolved view of an organization omits sensitive keys"""
+        from .config import config_snapshot
+        
+        resolved = config_snapshot().resolved(self.org.id)
+        self.assertEqual(resolved, {'max_upload_mb': 50, 'features': {'quizzes': True}})
+
+
+# =================== AUTHORIZATION CONTEXT TESTS ===================
+
+class AuthorizationContextTests(TestCase):
+    """Test the per-request authorization context behind admin permissions"""
+    
+    def setUp(self):
+        from django.core.cache import cache
+        from .models import User
+        
+        cache.clear()
+        self.org = Organization.objects.create(name="Auth Org", slug="auth-org")
+        self.other_org = Organization.objects.create(name="Other Auth Org", slug="other-auth-org")
+        self.admin = User.objects.create(email="auth-admin@test.com")
+        UserOrganization.objects.create(user=self.admin, org=self.org, role='admin')
+        AdminProfile.objects.create(user=self.admin, role=AdminProfile.Role.CONTENT_ADMIN)
+    
+    def _request(self, user):
+        from django.test import RequestFactory
+        
+        # admin_flow users stand in for the authenticated request user
+        user.is_authenticated = True
+        request = RequestFactory().get('/')
+        request.user = user
+        return request
+    
+    def test_context_roles(self):
+        """Test the context exposes organization roles and the admin profile"""
+        from .authorization import build_admin_context
+        
+        context = build_admin_context(self.admin.pk)
+        self.assertTrue(context.is_active_admin)
+        self.assertFalse(context.is_super_admin)
+        self.assertTrue(context.has_active_role(AdminProfile.Role.CONTENT_ADMIN))
+        self.assertTrue(context.manages(self.org.id))
+        self.assertFalse(context.manages(self.other_org.id))
+        self.assertFalse(context.is_owner_anywhere())
+    
+    def test_context_loaded_once(self):
+        """Test repeated checks in a request reuse the context"""
+        from .authorization import admin_context
+        from .permissions import IsContentAdmin, IsOrgAdmin
+        
+        request = self._request(self.admin)
+        with self.assertNumQueries(2):
+            admin_context(request)
+        with self.assertNumQueries(0):
+            self.assertTrue(IsContentAdmin().has_permission(request, None))
+            self.assertTrue(IsOrgAdmin().has_object_permission(request, None, self.org))
+            self.assertFalse(IsOrgAdmin().has_object_permission(request, None, self.other_org))
+        # Later requests load it again, so role changes apply on every worker at once
+        with self.assertNumQueries(2):
+            admin_context(self._request(self.admin))
+    
+    def test_membership_change_applies_to_next_request(self):
+        """Test new memberships are visible on the next request"""
+        from .authorization import admin_context
+        
+        self.assertFalse(admin_context(self._request(self.admin)).manages(self.other_org.id))
+        UserOrganization.objects.create(user=self.admin, org=self.other_org, role='owner')
+        
+        context = admin_context(self._request(self.admin))
+        self.assertTrue(context.manages(self.other_org.id))
+        self.assertTrue(context.is_owner_anywhere())
+
+
+# =================== TENANCY TESTS ===================
+
+class TenancyTests(TestCase):
+    """Test organization scoping of admin querysets"""
+    
+    def setUp(self):
+        from django.core.cache import cache
+        from .models import User
+        
+        cache.clear()
+        self.org = Organization.objects.create(name="Tenant Org", slug="tenant-org")
+        self.assigned_org = Organization.objects.create(name="Assigned Org", slug="assigned-org")
+        self.other_org = Organization.objects.create(name="Foreign Org", slug="foreign-org")
+        self.admin = User.objects.create(email="tenant-admin@test.com")
+        UserOrganization.objects.create(user=self.admin, org=self.org, role='admin')
+        self.profile = AdminProfile.objects.create(user=self.admin, role=AdminProfile.Role.ORG_ADMIN)
+        for org in (self.org, self.assigned_org, self.other_org):
+            Course.objects.create(name=f"{org.name} Course", org=org)
+        SystemConfiguration.objects.create(key='global_key', value='1')
+        SystemConfiguration.objects.create(key='org_key', value='1', organization=self.other_org)
+    
+    def _request(self, user):
+        from django.test import RequestFactory
+        
+        user.is_authenticated = True
+        request = RequestFactory().get('/')
+        request.user = user
+        return request
+    
+    def test_scope_uses_literal_ids(self):
+        """Test querysets are filtered on the cached id list without a join"""
+        from .tenancy import scope_to_tenant, tenant_org_ids
+        
+        request = self._request(self.admin)
+        org_ids = tenant_org_ids(request)
+        self.assertEqual(org_ids, {self.org.id})
+        
+        courses = scope_to_tenant(Course.objects.all(), org_ids)
+        self.assertEqual(str(courses.query).upper().count('SELECT'), 1)
+        self.assertEqual(list(courses.values_list('org_id', flat=True)), [self.org.id])
+        
+        configs = scope_to_tenant(
+            SystemConfiguration.objects.all(), org_ids, 'organization_id', include_global=True
+        )
+        self.assertEqual(list(configs.values_list('key', flat=True)), ['global_key'])
+    
+    def test_super_admin_unrestricted(self):
+        """Test super admins see every organization"""
+        from .tenancy import scope_to_tenant, tenant_org_id_list, tenant_org_ids
+        
+        self.profile.role = AdminProfile.Role.SUPER_ADMIN
+        self.profile.save()
+        request = self._request(self.admin)
+        
+        self.assertIsNone(tenant_org_ids(request))
+        self.assertEqual(scope_to_tenant(Course.objects.all(), None).count(), 3)
+        self.assertEqual(
+            tenant_org_id_list(request), [self.org.id, self.assigned_org.id, self.other_org.id]
+        )
+    
+    def test_profile_organizations_invalidate(self):
+        """Test assigning organizations on the admin profile is visible on the next request"""
+        from .tenancy import tenant_org_ids
+        
+        self.assertEqual(tenant_org_ids(self._request(self.admin)), {self.org.id})
+        self.profile.organizations.add(self.assigned_org)
+        self.assertEqual(tenant_org_ids(self._request(self.admin)), {self.org.id, self.assigned_org.id})
+        
+        self.assigned_org.adminprofile_set.clear()
+        self.assertEqual(tenant_org_ids(self._request(self.admin)), {self.org.id})
+    
+    def test_membership_removal_invalidates(self):
+        """Test losing an admin membership removes the organization from the scope"""
+        from .tenancy import tenant_org_ids
+        
+        self.assertEqual(tenant_org_ids(self._request(self.admin)), {self.org.id})
+        UserOrganization.objects.filter(user=self.admin, org=self.org).delete()
+        self.assertEqual(tenant_org_ids(self._request(self.admin)), set())
+
+
+# =================== ANALYTICS ROLLUP TESTS ===================
+
+class AnalyticsRollupTests(TestCase):
+    """Test weekly and monthly analytics rollups and granularity selection"""
+    
+    def setUp(self):
+        from datetime import date
+        
+        self.org = Organization.objects.create(name="Rollup Org", slug="rollup-org")
+        self.other_org = Organization.objects.create(name="Rollup Peer", slug="rollup-peer")
+        # Monday 2024-01-01 through Wednesday 2024-02-14
+        self.start = date(2024, 1, 1)
+        for offset in range(45):
+            day = self.start + timedelta(days=offset)
+            for org, scale in ((self.org, 1), (self.other_org, 2)):
+                AdminAnalytics.objects.update_or_create(
+                    organization=org, date=day,
+                    defaults={
+                        'total_users': (10 + offset) * scale,
+                        'new_users': scale,
+                        'total_sessions': 3 * scale,
+                        'completion_rate': 50 + offset % 2 * 10,
+                        'ai_cost_usd': '0.50',
+                    }
+                )
+    
+    def test_rollups_aggregate_periods(self):
+        """Test flows are summed, gauges keep the latest day and rates are averaged"""
+        from datetime import date
+        from decimal import Decimal
+        from .analytics import refresh_rollups
+        from .models import AdminAnalyticsRollup
+        
+        refresh_rollups(self.start, self.start + timedelta(days=44))
+        
+        january = AdminAnalyticsRollup.objects.get(
+            organization=self.org, granularity='month', period_start=date(2024, 1, 1)
+        )
+        self.assertEqual(january.period_end, date(2024, 1, 31))
+        self.assertEqual(january.days, 31)
+        self.assertEqual(january.new_users, 31)
+        self.assertEqual(january.total_users, 40)
+        self.assertEqual(january.ai_cost_usd, Decimal('15.50'))
+        self.assertEqual(january.completion_rate, Decimal('54.84'))
+        
+        first_week = AdminAnalyticsRollup.objects.get(
+            organization=self.other_org, granularity='week', period_start=date(2024, 1, 1)
+        )
+        self.assertEqual((first_week.days, first_week.total_sessions), (7, 42))
+        # 2024-02-12 week is partial
+        self.assertEqual(AdminAnalyticsRollup.objects.get(
+            organization=self.org, granularity='week', period_start=date(2024, 2, 12)
+        ).days, 3)
+        
+        # Refreshing again updates rows in place
+        refresh_rollups(self.start, self.start)
+        self.assertEqual(AdminAnalyticsRollup.objects.filter(organization=self.org, granularity='month').count(), 2)
+    
+    def test_granularity_follows_range(self):
+        """Test the series reads the coarsest granularity that fits the range"""
+        from datetime import date
+        from .analytics import analytics_series, choose_granularity, refresh_rollups
+        
+        self.assertEqual(choose_granularity(date(2024, 1, 1), date(2024, 1, 31)), 'day')
+        self.assertEqual(choose_granularity(date(2024, 1, 1), date(2024, 3, 31)), 'week')
+        self.assertEqual(choose_granularity(date(2024, 1, 1), date(2024, 12, 31)), 'month')
+        
+        refresh_rollups(self.start, self.start + timedelta(days=44))
+        with self.assertNumQueries(1):
+            granularity, rows = analytics_series(
+                {self.org.id, self.other_org.id}, date(2024, 1, 1), date(2024, 12, 31)
+            )
+        self.assertEqual(granularity, 'month')
+        self.assertEqual(len(rows), 4)
+        self.assertEqual(rows[0]['period_start'], date(2024, 2, 1))
+        self.assertEqual(rows[0]['org_name'], "Rollup Org")
+    
+    def test_totals_match_across_granularities(self):
+        """Test range totals are the same whether read daily or rolled up"""
+        from datetime import date
+        from .analytics import analytics_series, compare_organizations, refresh_rollups, summarize_series
+        
+        refresh_rollups(self.start, date(2024, 1, 31))
+        end = date(2024, 1, 31)
+        _, daily = analytics_series(None, self.start, end, 'day')
+        _, monthly = analytics_series(None, self.start, end, 'month')
+        
+        self.assertEqual(summarize_series(daily), summarize_series(monthly))
+        self.assertEqual(summarize_series(daily)['total_users'], 40 + 80)
+        
+        comparison = compare_organizations(monthly)
+        self.assertEqual(comparison[self.org.id]['totals']['new_users'], 31)
+        self.assertEqual(comparison[self.other_org.id]['totals']['new_users'], 62)
+
+    
+    def test_partial_periods_clipped_to_range(self):
+        """Test periods cut by the range only count the days inside it"""
+        from datetime import date
+        from .analytics import analytics_series, refresh_rollups, summarize_series
+        
+        refresh_rollups(self.start, self.start + timedelta(days=44))
+        start, end = date(2024, 1, 20), date(2024, 2, 7)
+        _, daily = analytics_series({self.org.id}, start, end, 'day')
+        
+        # Whole weeks come from the rollups; the range contains no whole month
+        for granularity, queries in (('week', 2), ('month', 1)):
+            with self.assertNumQueries(queries):
+                _, rows = analytics_series({self.org.id}, start, end, granularity)
+            self.assertEqual(summarize_series(rows), summarize_series(daily))
+            self.assertEqual(rows[-1]['period_start'], start)
+            self.assertEqual(rows[0]['period_end'], end)
+        self.assertEqual(summarize_series(rows)['new_users'], 19)
+
+# =================== DASHBOARD WIDGET TESTS ===================
+
+class DashboardWidgetTests(TestCase):
+    """Test the shared, cached widget data engine"""
+    
+    def setUp(self):
+        from django.core.cache import cache
+        from .models import User
+        
+        cache.clear()
+        self.org = Organization.objects.create(name="Widget Org", slug="widget-org")
+        self.first_admin = User.objects.create(email="widget-one@test.com")
+        self.second_admin = User.objects.create(email="widget-two@test.com")
+        self.calls = []
+    
+    def _widget(self, admin, data_source='counting', **fields):
+        fields.setdefault('organization', self.org)
+        fields.setdefault('configuration', {'metric': 'total_users'})
+        return AdminDashboardWidget.objects.create(
+            admin=admin, widget_type='metric', title='Widget', data_source=data_source, **fields
+        )
+    
+    def _providers(self):
+        def counting(org_ids, configuration):
+            self.calls.append((tuple(org_ids), configuration.get('metric')))
+            return {'value': len(self.calls)}
+        
+        def failing(org_ids, configuration):
+            raise RuntimeError('boom')
+        
+        return patch.dict('admin_flow.widgets.WIDGET_PROVIDERS', {'counting': counting, 'failing': failing})
+    
+    def test_data_shared_across_admins(self):
+        """Test admins with the same widget share one computation"""
+        from .widgets import resolve_widgets
+        
+        first = self._widget(self.first_admin)
+        second = self._widget(self.second_admin)
+        with self._providers():
+            first_results = resolve_widgets([first], [self.org.id])
+            second_results = resolve_widgets([second], [self.org.id])
+        
+        self.assertEqual(self.calls, [((self.org.id,), 'total_users')])
+        self.assertEqual(first_results[first.id]['data'], {'value': 1})
+        self.assertEqual(second_results[second.id]['data'], {'value': 1})
+    
+    def test_recomputed_after_refresh_interval(self):
+        """Test data is recomputed once the refresh interval has passed"""
+        import time
+        from .widgets import resolve_widgets
+        
+        widget = self._widget(self.first_admin, refresh_interval=60)
+        with self._providers():
+            resolve_widgets([widget], [self.org.id])
+            resolve_widgets([widget], [self.org.id])
+            self.assertEqual(len(self.calls), 1)
+            
+            with patch('admin_flow.widgets.time.time', return_value=time.time() + 61):
+                results = resolve_widgets([widget], [self.org.id])
+        
+        self.assertEqual(len(self.calls), 2)
+        self.assertEqual(results[widget.id]['data'], {'value': 2})
+    
+    def test_batch_resolves_each_widget(self):
+        """Test a dashboard resolves distinct widgets concurrently and reports failures per widget"""
+        from .widgets import resolve_widgets
+        
+        other_org = Organization.objects.create(name="Widget Other", slug="widget-other")
+        widgets = [
+            self._widget(self.first_admin),
+            self._widget(self.first_admin, configuration={'metric': 'active_users'}),
+            self._widget(self.first_admin, organization=None),
+            self._widget(self.first_admin, data_source='failing'),
+            self._widget(self.first_admin, data_source='missing'),
+            self._widget(self.first_admin, organization=other_org),
+        ]
+        with self._providers(), self.assertLogs('admin_flow.widgets', 'ERROR'):
+            results = resolve_widgets(widgets, [self.org.id], allowed=lambda org_id: org_id == self.org.id)
+        
+        # The organization-less widget covers the same organizations as the first
+        self.assertEqual(len(self.calls), 2)
+        self.assertEqual(results[widgets[0].id]['data'], results[widgets[2].id]['data'])
+        self.assertNotEqual(results[widgets[0].id]['data'], results[widgets[1].id]['data'])
+        self.assertEqual(results[widgets[3].id]['error'], 'Widget data unavailable')
+        self.assertEqual(results[widgets[4].id]['error'], 'Unknown data source: missing')
+        self.assertEqual(results[widgets[5].id]['error'], 'Permission denied')
+    
+    def test_locked_widget_not_computed_twice(self):
+        """Test a request waiting on another's lock gives up instead of computing"""
+        from django.core.cache import cache
+        from .widgets import resolve_widgets, widget_cache_key
+        
+        widget = self._widget(self.first_admin)
+        lock_key = f'{widget_cache_key("counting", [self.org.id], widget.configuration)}:lock'
+        cache.add(lock_key, 1)
+        with self._providers(), patch('admin_flow.widgets.WIDGET_LOCK_WAIT', 0.2), \
+                self.assertLogs('admin_flow.widgets', 'ERROR'):
+            results = resolve_widgets([widget], [self.org.id])
+        
+        self.assertEqual(self.calls, [])
+        self.assertEqual(results[widget.id]['error'], 'Widget data unavailable')
+        # The other request's lock is left alone
+        self.assertEqual(cache.get(lock_key), 1)
+    
+    def test_content_overview_provider(self):
+        """Test the built-in content overview provider"""
+        from .widgets import WIDGET_PROVIDERS
+        
+        Course.objects.create(name="Widget Course", org=self.org, status='published')
+        Task.objects.create(title="Widget Task", type='learning_material', org=self.org)
+        
+        data = WIDGET_PROVIDERS['content_overview']([self.org.id], {})
+        self.assertEqual(data['courses']['published'], 1)
+        self.assertEqual(data['total_tasks'], 1)
+
+
+# =================== COURSE CLONING TESTS ===================
+
+class CourseCloningTests(TestCase):
+    """Test bulk course cloning and template instantiation"""
+    
+    def setUp(self):
+        from .models import CourseMilestone, CourseTask, Milestone, Question, User
+        
+        self.org = Organization.objects.create(name="Clone Org", slug="clone-org")
+        self.other_org = Organization.objects.create(name="Clone Target", slug="clone-target")
+        self.admin = User.objects.create(email="clone-admin@test.com")
+        UserOrganization.objects.create(user=self.admin, org=self.org, role='admin')
+        
+        self.course = Course.objects.create(name="Source Course", org=self.org, status='published')
+        self.milestone = Milestone.objects.create(name="Week 1", org=self.org)
+        CourseMilestone.objects.create(course=self.course, milestone=self.milestone, ordering=1)
+        for t in range(20):
+            task = Task.objects.create(title=f"Clone Task {t}", type='quiz', org=self.org)
+            CourseTask.objects.create(task=task, course=self.course, milestone=self.milestone, ordering=t)
+            for position in range(2):
+                Question.objects.create(
+                    task=task, type='multiple_choice', title=f"Q{position}", content="?", position=position
+                )
+    
+    def test_clone_copies_graph_with_fixed_queries(self):
+        """Test cloning copies every row with one insert per model and one notification"""
+        from .cloning import clone_course
+        from .models import CourseMilestone, CourseTask, Question
+        
+        notifications = AdminNotification.objects.count()
+        # 3 reads, 5 inserts, one dashboard version bump, one analytics refresh,
+        # the summary notification and savepoints
+        with self.assertNumQueries(20):
+            graph = clone_course(self.course, created_by=self.admin)
+        
+        copy = graph.course
+        self.assertEqual(copy.name, "Source Course (Copy)")
+        self.assertEqual(copy.status, 'draft')
+        self.assertEqual(graph.counts, {'milestones': 1, 'tasks': 20, 'questions': 40})
+        self.assertEqual(CourseTask.objects.filter(course=copy).count(), 20)
+        self.assertFalse(CourseTask.objects.filter(course=copy, task__coursetask__course=self.course).exists())
+        self.assertEqual(Question.objects.filter(task__coursetask__course=copy).count(), 40)
+        self.assertEqual(CourseMilestone.objects.get(course=copy).milestone, self.milestone)
+        self.assertEqual(AdminNotification.objects.count(), notifications + 1)
+        self.assertEqual(AdminNotification.objects.latest('id').metadata['tasks'], 20)
+    
+    def test_clone_into_other_organization_copies_milestones(self):
+        """Test milestones are copied into the target organization"""
+        from .cloning import clone_course
+        from .models import CourseTask, Milestone
+        
+        graph = clone_course(self.course, self.other_org, name="Target Course")
+        
+        self.assertEqual(graph.course.org, self.other_org)
+        self.assertEqual(Milestone.objects.filter(org=self.other_org).count(), 1)
+        self.assertEqual(
+            set(CourseTask.objects.filter(course=graph.course).values_list('milestone__org_id', 'task__org_id')),
+            {(self.other_org.id, self.other_org.id)}
+        )
+    
+    def test_instantiate_course_template(self):
+        """Test a course template creates its outline and counts the use"""
+        from .cloning import instantiate_template
+        from .models import CourseTask
+        
+        template = ContentTemplate.objects.create(
+            name="Outline", type='course', description="Outline template",
+            template_data={
+                'course': {'tags': ['python']},
+                'milestones': [{'name': 'Basics', 'tasks': [
+                    {'title': 'Quiz', 'type': 'quiz', 'questions': [{'title': 'Q1', 'content': '?'}]}
+                ]}],
+                'structure': {'main_content': {'type': 'learning_material', 'duration': 60}},
+            }
+        )
+        graph = instantiate_template(template, self.org, created_by=self.admin)
+        
+        self.assertEqual(graph.course.name, "Outline")
+        self.assertEqual(graph.course.tags, ['python'])
+        titles = list(CourseTask.objects.filter(course=graph.course).values_list('task__title', flat=True))
+        self.assertEqual(titles, ['Quiz', 'Main Content'])
+        self.assertEqual(graph.tasks[1].estimated_time_minutes, 60)
+        self.assertEqual(graph.questions[0].task, graph.tasks[0])
+        template.refresh_from_db()
+        self.assertEqual(template.usage_count, 1)
+    
+    def test_invalid_template_rejected(self):
+        """Test unusable template data raises TemplateError and is not counted"""
+        from .cloning import TemplateError, instantiate_template
+        
+        template = ContentTemplate.objects.create(
+            name="Broken", type='course', description="Broken", template_data={'tasks': [{'type': 'quiz'}]}
+        )
+        with self.assertRaises(TemplateError):
+            instantiate_template(template, self.org)
+        template.refresh_from_db()
+        self.assertEqual(template.usage_count, 0)
+        
+        for template_data in (
+            {'tasks': [{'title': 'Quiz', 'type': 'quiz', 'points': 'ten'}]},
+            {'tasks': [{'title': 'Quiz', 'type': 'quiz', 'duration': -5}]},
+            {'tasks': [{'title': 'Quiz', 'type': 'quiz', 'questions': [{'type': 'essay_plus'}]}]},
+            {'tasks': [{'title': 'Quiz', 'type': 'quiz', 'questions': ['not an object']}]},
+            {'structure': {'introduction': 'learning_material'}},
+            {'milestones': {'name': 'Week 1'}},
+        ):
+            with self.subTest(template_data=template_data):
+                template.template_data = template_data
+                with self.assertRaises(TemplateError):
+                    instantiate_template(template, self.org)
+        self.assertFalse(Task.objects.filter(title='Quiz').exists())
@@ -17,6 +17,7 @@ urlpatterns = [
 
     # Dashboard URLs
     path('api/dashboard/', views.AdminDashboardView.as_view(), name='admin-dashboard'),
+    path('api/dashboard/widgets/', views.DashboardWidgetsView.as_view(), name='dashboard-widgets'),
 
     # Organization Management URLs
     path('api/organizations/', views.OrganizationManagementView.as_view(), name='organization-list'),
@@ -29,6 +30,10 @@ urlpatterns = [
 
     # Content Management URLs
     path('api/content/', views.ContentManagementView.as_view(), name='content-overview'),
+    path('api/templates/<int:pk>/instantiate/', views.ContentTemplateInstantiateView.as_view(), name='template-instantiate'),
+
+    # Drip Release URLs
+    path('api/learner/courses/<int:course_id>/unlocked/', views.UnlockedCourseContentView.as_view(), name='unlocked-content'),
 
     # Analytics URLs
     path('api/analytics/', views.AnalyticsView.as_view(), name='analytics'),
@@ -0,0 +1,100 @@
+"""
+Admin user directory.
+
+``managed_users`` restricts users to the admin's organizations with an
+``id IN (membership subquery)`` filter rather than a ``DISTINCT`` join, so
+filters, keyset pages and counts all work on plain user rows. The summary
+block (totals, active and new users, memberships by role) is one
+conditional-aggregate query, cached briefly per admin and filter set so
+paging through a large organization does not recompute it.
+"""
+import hashlib
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.db.models import Count, Q
+from django.utils import timezone
+
+from .models import MANAGER_ROLES, AdminProfile, User, UserOrganization
+
+USER_SUMMARY_CACHE_TIMEOUT = 60
+RECENT_SIGNUPS = 5
+
+
+def is_super_admin(user):
+    return hasattr(user, 'admin_profile') and user.admin_profile.role == AdminProfile.Role.SUPER_ADMIN
+
+
+def managed_users(admin, search='', role='', organization=None):
+    """Users visible to ``admin``, narrowed by search text, role and organization"""
+    memberships = UserOrganization.objects.all()
+    restricted = bool(role or organization)
+    if not is_super_admin(admin):
+        memberships = memberships.filter(
+            org_id__in=UserOrganization.objects.filter(
+                user=admin, role__in=MANAGER_ROLES
+            ).values('org_id')
+        )
+        restricted = True
+    if role:
+        memberships = memberships.filter(role=role)
+    if organization:
+        memberships = memberships.filter(org_id=organization)
+
+    users = User.objects.all()
+    if restricted:
+        users = users.filter(id__in=memberships.values('user_id'))
+    if search:
+        users = users.filter(
+            Q(email__icontains=search) |
+            Q(first_name__icontains=search) |
+            Q(last_name__icontains=search)
+        )
+    return users
+
+
+def build_user_summary(users):
+    """Summary counts for a user queryset in one query, plus recent signups"""
+    from .serializers import UserSerializer
+
+    now = timezone.now()
+    counts = users.aggregate(
+        total_users=Count('id', distinct=True),
+        new_users_this_week=Count('id', distinct=True, filter=Q(created_at__gte=now - timedelta(days=7))),
+        active_users=Count(
+            'userorganization',
+            filter=Q(userorganization__last_accessed__gte=now - timedelta(days=30))
+        ),
+        **{
+            f'role_{role}': Count('userorganization', filter=Q(userorganization__role=role))
+            for role in UserOrganization.Role.values
+        }
+    )
+
+    users_by_role = {}
+    for role in UserOrganization.Role.values:
+        count = counts.pop(f'role_{role}')
+        if count:
+            users_by_role[role] = count
+
+    recent_signups = users.order_by('-created_at', '-id')[:RECENT_SIGNUPS]
+    return {
+        **counts,
+        'users_by_role': users_by_role,
+        'recent_signups': UserSerializer(recent_signups, many=True).data,
+    }
+
+
+def _summary_key(admin_id, filters):
+    digest = hashlib.md5(repr(sorted(filters.items())).encode()).hexdigest()
+    return f'admin_flow:user_summary:{admin_id}:{digest}'
+
+
+def user_summary(admin, users, **filters):
+    """Cached summary of ``users``, the result of ``managed_users(admin, **filters)``"""
+    key = _summary_key(admin.pk, filters)
+    summary = cache.get(key)
+    if summary is None:
+        summary = build_user_summary(users)
+        cache.set(key, summary, USER_SUMMARY_CACHE_TIMEOUT)
+    return summary
@@ -1,11 +1,12 @@
 from rest_framework import status, permissions
-from rest_framework.decorators import api_view, permission_classes
+from rest_framework.decorators import action, api_view, permission_classes
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework.viewsets import ModelViewSet
 from rest_framework.generics import ListCreateAPIView, RetrieveUpdateDestroyAPIView
 from rest_framework.parsers import MultiPartParser, FormParser
-from django.db.models import Count, Q, Sum, Avg
+from django.db import transaction
+from django.db.models import Count
 from django.utils import timezone
 from django.shortcuts import get_object_or_404
 from django.http import HttpResponse
@@ -15,18 +16,19 @@ import json
 
 from .models import (
     User, Organization, UserOrganization, Cohort, UserCohort, Milestone,
-    Course, CourseCohort, Task, CourseTask, Question, TaskCompletion,
+    Course, CourseCohort, CourseMilestone, Task, CourseTask, Question, TaskCompletion,
     AdminProfile, AdminAction, ContentTemplate, SystemConfiguration,
-    ContentGenerationJob, AdminNotification, AdminAnalytics, BulkOperation,
+    ContentGenerationJob, AdminNotification, BulkOperation,
     AdminDashboardWidget
 )
 from .serializers import (
     UserSerializer, UserDetailSerializer, OrganizationSerializer, OrganizationDetailSerializer,
     UserOrganizationSerializer, CohortSerializer, CohortDetailSerializer,
-    CourseSerializer, CourseDetailSerializer, TaskSerializer, TaskDetailSerializer,
+    CourseSerializer, CourseDetailSerializer, CourseMilestoneSerializer, CourseTaskSerializer,
+    TaskSerializer, TaskDetailSerializer,
     QuestionSerializer, TaskCompletionSerializer, AdminProfileSerializer,
     AdminActionSerializer, ContentTemplateSerializer, SystemConfigurationSerializer,
-    ContentGenerationJobSerializer, AdminNotificationSerializer, AdminAnalyticsSerializer,
+    ContentGenerationJobSerializer, AdminNotificationSerializer,
     BulkOperationSerializer, AdminDashboardWidgetSerializer, AdminDashboardSerializer,
     UserManagementSummarySerializer, ContentManagementSummarySerializer,
     OrganizationStatsSerializer, BulkUserImportSerializer, BulkEnrollmentSerializer,
@@ -39,6 +41,33 @@ from .permissions import (
     CanPerformBulkOperations, CanManageSystemConfig, CanGenerateContent,
     CanManageNotifications, OrganizationScopedPermission
 )
+from .dashboard import dashboard_summary
+from .membership import add_member, OrganizationFull
+from .pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, keyset_page
+from .audit import record_action
+from .config import config_snapshot
+from .user_directory import managed_users, user_summary
+from .tenancy import TenantScopedMixin, tenant_org_id_list
+from .analytics import (
+    GRANULARITIES, MAX_SERIES_POINTS, analytics_series, choose_granularity,
+    compare_organizations, series_points, summarize_series
+)
+from .widgets import resolve_widgets
+from .cloning import TemplateError, clone_course, instantiate_template
+from .drip import unlocked_items
+
+
+# =================== MIXINS ===================
+
+class EagerLoadingViewMixin:
+    """Apply the serializer's declared prefetches and annotations to generic view querysets"""
+    
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        serializer_class = self.get_serializer_class()
+        if hasattr(serializer_class, 'setup_eager_loading'):
+            queryset = serializer_class.setup_eager_loading(queryset)
+        return queryset
 
 
 # =================== DASHBOARD VIEWS ===================
@@ -51,82 +80,61 @@ class AdminDashboardView(APIView):
         user = request.user
         
         # Get user's managed organizations
-        if hasattr(user, 'admin_profile') and user.admin_profile.role == AdminProfile.Role.SUPER_ADMIN:
-            organizations = Organization.objects.all()
-        else:
-            organizations = Organization.objects.filter(
-                userorganization__user=user,
-                userorganization__role__in=['admin', 'owner']
-            )
-
-        if not organizations.exists():
+        org_ids = tenant_org_id_list(request)
+        if not org_ids:
             return Response({'error': 'No organizations to manage'}, 
                           status=status.HTTP_403_FORBIDDEN)
 
-        # Get overview stats
-        total_users = User.objects.filter(
-            userorganization__org__in=organizations
-        ).distinct().count()
-
-        new_users_today = User.objects.filter(
-            userorganization__org__in=organizations,
-            created_at__date=timezone.now().date()
-        ).distinct().count()
-
-        total_courses = Course.objects.filter(org__in=organizations).count()
-        total_tasks = Task.objects.filter(org__in=organizations).count()
-        active_cohorts = Cohort.objects.filter(org__in=organizations, is_active=True).count()
+        # Cached overview stats, analytics and alerts
+        dashboard_data = dict(dashboard_summary(user, org_ids))
 
         # Recent activity
         recent_actions = AdminAction.objects.filter(
-            organization__in=organizations
-        )[:10]
+            organization_id__in=org_ids
+        ).select_related('admin', 'organization')[:10]
 
         # Pending jobs
         pending_jobs = ContentGenerationJob.objects.filter(
-            organization__in=organizations,
+            organization_id__in=org_ids,
             status__in=['pending', 'in_progress']
-        )
+        ).select_related('organization', 'course', 'started_by')
 
         # Unread notifications
         unread_notifications = AdminNotification.objects.filter(
             recipient=user,
             is_read=False,
-            organization__in=organizations
-        )[:5]
-
-        # Latest analytics
-        analytics_summary = AdminAnalytics.objects.filter(
-            organization__in=organizations
-        ).first()
-
-        # System alerts
-        system_alerts = []
-        for org in organizations:
-            if org.is_over_user_limit:
-                system_alerts.append({
-                    'type': 'warning',
-                    'message': f'{org.name} is over user limit ({org.current_user_count}/{org.max_users})',
-                    'organization': org.name
-                })
-
-        dashboard_data = {
-            'organization': OrganizationSerializer(organizations.first()).data if organizations.count() == 1 else None,
-            'total_users': total_users,
-            'new_users_today': new_users_today,
-            'total_courses': total_courses,
-            'total_tasks': total_tasks,
-            'active_cohorts': active_cohorts,
+            organization_id__in=org_ids
+        ).select_related('recipient', 'organization')[:5]
+
+        dashboard_data.update({
             'recent_actions': AdminActionSerializer(recent_actions, many=True).data,
             'pending_jobs': ContentGenerationJobSerializer(pending_jobs, many=True).data,
             'unread_notifications': AdminNotificationSerializer(unread_notifications, many=True).data,
-            'analytics_summary': AdminAnalyticsSerializer(analytics_summary).data if analytics_summary else None,
-            'system_alerts': system_alerts
-        }
+        })
 
         return Response(dashboard_data)
 
 
+class DashboardWidgetsView(TenantScopedMixin, APIView):
+    """All of the admin's dashboard widgets with their data in one call"""
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        widgets = list(AdminDashboardWidget.objects.filter(
+            admin_id=request.user.pk, is_active=True
+        ).select_related('admin', 'organization'))
+
+        # Shared, cached widget data; missing entries are computed concurrently
+        results = resolve_widgets(widgets, tenant_org_id_list(request), allowed=self.in_tenant)
+
+        return Response({
+            'widgets': [
+                dict(AdminDashboardWidgetSerializer(widget).data, **results[widget.id])
+                for widget in widgets
+            ]
+        })
+
+
 # =================== ORGANIZATION MANAGEMENT ===================
 
 class OrganizationManagementView(APIView):
@@ -150,6 +158,7 @@ class OrganizationManagementView(APIView):
             
             organizations = Organization.objects.filter(id__in=org_ids).distinct()
 
+        organizations = OrganizationDetailSerializer.setup_eager_loading(organizations)
         serializer = OrganizationDetailSerializer(organizations, many=True)
         return Response(serializer.data)
 
@@ -165,7 +174,7 @@ class OrganizationManagementView(APIView):
             organization = serializer.save()
             
             # Log action
-            AdminAction.objects.create(
+            record_action(
                 admin=request.user,
                 action_type=AdminAction.ActionType.CREATE,
                 object_type='Organization',
@@ -179,7 +188,7 @@ class OrganizationManagementView(APIView):
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
-class OrganizationDetailView(RetrieveUpdateDestroyAPIView):
+class OrganizationDetailView(EagerLoadingViewMixin, RetrieveUpdateDestroyAPIView):
     """Individual organization management"""
     serializer_class = OrganizationDetailSerializer
     permission_classes = [IsAdminUser, CanManageOrganization]
@@ -204,7 +213,7 @@ class OrganizationDetailView(RetrieveUpdateDestroyAPIView):
         org = serializer.save()
         
         # Log action
-        AdminAction.objects.create(
+        record_action(
             admin=self.request.user,
             action_type=AdminAction.ActionType.UPDATE,
             object_type='Organization',
@@ -263,76 +272,42 @@ class UserManagementView(APIView):
     permission_classes = [IsAdminUser, CanManageUsers]
 
     def get(self, request):
-        """List users with filtering and search"""
-        user = request.user
-        
-        # Get user's managed organizations
-        if hasattr(user, 'admin_profile') and user.admin_profile.role == AdminProfile.Role.SUPER_ADMIN:
-            user_qs = User.objects.all()
-        else:
-            org_ids = UserOrganization.objects.filter(
-                user=user, role__in=['admin', 'owner']
-            ).values_list('org_id', flat=True)
-            user_qs = User.objects.filter(userorganization__org_id__in=org_ids).distinct()
+        """List users with filtering and search, newest first, one keyset page at a time"""
+        filters = {
+            'search': request.query_params.get('search', ''),
+            'role': request.query_params.get('role', ''),
+            'organization': request.query_params.get('organization', ''),
+        }
+        if filters['organization'] and not filters['organization'].isdigit():
+            return Response({'error': 'organization must be an organization id'}, status=status.HTTP_400_BAD_REQUEST)
+        user_qs = managed_users(request.user, **filters)
 
-        # Apply filters
-        search = request.query_params.get('search', '')
-        if search:
-            user_qs = user_qs.filter(
-                Q(email__icontains=search) |
-                Q(first_name__icontains=search) |
-                Q(last_name__icontains=search)
+        # Keyset pagination
+        page_size = min(int(request.query_params.get('page_size', DEFAULT_PAGE_SIZE)), MAX_PAGE_SIZE)
+        try:
+            users, next_cursor = keyset_page(
+                UserDetailSerializer.setup_eager_loading(user_qs), request.query_params.get('cursor'), page_size
             )
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
-        role = request.query_params.get('role', '')
-        if role:
-            user_qs = user_qs.filter(userorganization__role=role)
+        # Summary stats, cached briefly
+        summary = user_summary(request.user, user_qs, **filters)
 
-        org_id = request.query_params.get('organization', '')
-        if org_id:
-            user_qs = user_qs.filter(userorganization__org_id=org_id)
-
-        # Pagination
-        page_size = min(int(request.query_params.get('page_size', 20)), 100)
-        page = int(request.query_params.get('page', 1))
-        start = (page - 1) * page_size
-        end = start + page_size
-
-        users = user_qs[start:end]
-        total_count = user_qs.count()
-
-        # Summary stats
-        total_users = user_qs.count()
-        # Active users based on organization access
-        active_users = UserOrganization.objects.filter(
-            user__in=user_qs,
-            last_accessed__gte=timezone.now() - timedelta(days=30)
-        ).count()
-        new_users_this_week = user_qs.filter(
-            created_at__gte=timezone.now() - timedelta(days=7)
-        ).count()
-        
-        users_by_role = dict(UserOrganization.objects.filter(
-            user__in=user_qs
-        ).values('role').annotate(count=Count('id')).values_list('role', 'count'))
-
-        recent_signups = user_qs.order_by('-created_at')[:5]
+        # The summary total may lag by the cache timeout unless an exact count is asked for
+        exact_total = request.query_params.get('total') == 'exact'
+        total_count = user_qs.count() if exact_total else summary['total_users']
 
         response_data = {
             'users': UserDetailSerializer(users, many=True).data,
             'pagination': {
-                'page': page,
                 'page_size': page_size,
+                'next_cursor': next_cursor,
+                'has_next': next_cursor is not None,
                 'total_count': total_count,
-                'total_pages': (total_count + page_size - 1) // page_size
+                'total_is_approximate': not exact_total
             },
-            'summary': {
-                'total_users': total_users,
-                'active_users': active_users,
-                'new_users_this_week': new_users_this_week,
-                'users_by_role': users_by_role,
-                'recent_signups': UserSerializer(recent_signups, many=True).data
-            }
+            'summary': summary
         }
 
         return Response(response_data)
@@ -341,25 +316,25 @@ class UserManagementView(APIView):
         """Create new user"""
         serializer = UserSerializer(data=request.data)
         if serializer.is_valid():
-            user = serializer.save()
-            
-            # Add to organization if specified
-            org_id = request.data.get('organization_id')
-            if org_id:
-                try:
-                    organization = Organization.objects.get(id=org_id)
-                    # Check if requesting user can manage this organization
-                    if self.check_org_permission(request.user, organization):
-                        UserOrganization.objects.create(
-                            user=user,
-                            org=organization,
-                            role=request.data.get('role', 'member')
-                        )
-                except Organization.DoesNotExist:
-                    pass
+            try:
+                with transaction.atomic():
+                    user = serializer.save()
+                    
+                    # Add to organization if specified
+                    org_id = request.data.get('organization_id')
+                    if org_id:
+                        try:
+                            organization = Organization.objects.get(id=org_id)
+                            # Check if requesting user can manage this organization
+                            if self.check_org_permission(request.user, organization):
+                                add_member(user, organization, role=request.data.get('role', 'member'))
+                        except Organization.DoesNotExist:
+                            pass
+            except OrganizationFull as e:
+                return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
             # Log action
-            AdminAction.objects.create(
+            record_action(
                 admin=request.user,
                 action_type=AdminAction.ActionType.CREATE,
                 object_type='User',
@@ -384,7 +359,7 @@ class UserManagementView(APIView):
         ).exists()
 
 
-class UserDetailView(RetrieveUpdateDestroyAPIView):
+class UserDetailView(EagerLoadingViewMixin, RetrieveUpdateDestroyAPIView):
     """Individual user management"""
     serializer_class = UserDetailSerializer
     permission_classes = [IsAdminUser, CanManageUsers]
@@ -404,7 +379,7 @@ class UserDetailView(RetrieveUpdateDestroyAPIView):
         user = serializer.save()
         
         # Log action
-        AdminAction.objects.create(
+        record_action(
             admin=self.request.user,
             action_type=AdminAction.ActionType.UPDATE,
             object_type='User',
@@ -417,38 +392,27 @@ class UserDetailView(RetrieveUpdateDestroyAPIView):
 
 # =================== CONTENT MANAGEMENT ===================
 
-class ContentManagementView(APIView):
+class ContentManagementView(TenantScopedMixin, APIView):
     """Content management dashboard"""
     permission_classes = [IsAdminUser, CanManageContent]
 
     def get(self, request):
         """Get content management overview"""
-        user = request.user
-        
-        # Get organizations user can manage
-        if hasattr(user, 'admin_profile') and user.admin_profile.role == AdminProfile.Role.SUPER_ADMIN:
-            organizations = Organization.objects.all()
-        else:
-            organizations = Organization.objects.filter(
-                userorganization__user=user,
-                userorganization__role__in=['admin', 'owner']
-            )
-
         # Course statistics
-        courses_qs = Course.objects.filter(org__in=organizations)
+        courses_qs = self.scope_to_tenant(Course.objects.all())
         total_courses = courses_qs.count()
         published_courses = courses_qs.filter(status='published').count()
         draft_courses = courses_qs.filter(status='draft').count()
 
         # Task statistics
-        tasks_qs = Task.objects.filter(org__in=organizations)
+        tasks_qs = self.scope_to_tenant(Task.objects.all())
         total_tasks = tasks_qs.count()
         tasks_by_type = dict(tasks_qs.values('type').annotate(
             count=Count('id')
         ).values_list('type', 'count'))
 
         # Recent content
-        recent_content = courses_qs.order_by('-created_at')[:5]
+        recent_content = CourseSerializer.setup_eager_loading(courses_qs).order_by('-created_at')[:5]
 
         summary_data = {
             'total_courses': total_courses,
@@ -462,28 +426,18 @@ class ContentManagementView(APIView):
         return Response(summary_data)
 
 
-class CourseManagementView(ModelViewSet):
+class CourseManagementView(TenantScopedMixin, EagerLoadingViewMixin, ModelViewSet):
     """Course CRUD operations"""
     serializer_class = CourseDetailSerializer
     permission_classes = [IsAdminUser, CanManageContent]
 
-    def get_queryset(self):
-        user = self.request.user
-        
-        if hasattr(user, 'admin_profile') and user.admin_profile.role == AdminProfile.Role.SUPER_ADMIN:
-            return Course.objects.all()
-        
-        organizations = Organization.objects.filter(
-            userorganization__user=user,
-            userorganization__role__in=['admin', 'owner']
-        )
-        return Course.objects.filter(org__in=organizations)
+    queryset = Course.objects.all()
 
     def perform_create(self, serializer):
         course = serializer.save(created_by=self.request.user)
         
         # Log action
-        AdminAction.objects.create(
+        record_action(
             admin=self.request.user,
             action_type=AdminAction.ActionType.CREATE,
             object_type='Course',
@@ -498,7 +452,7 @@ class CourseManagementView(ModelViewSet):
         course = serializer.save()
         
         # Log action
-        AdminAction.objects.create(
+        record_action(
             admin=self.request.user,
             action_type=AdminAction.ActionType.UPDATE,
             object_type='Course',
@@ -509,29 +463,59 @@ class CourseManagementView(ModelViewSet):
             ip_address=self.request.META.get('REMOTE_ADDR')
         )
 
+    @action(detail=True, methods=['post'])
+    def clone(self, request, pk=None):
+        """Deep-copy the course, optionally into another organization or for a cohort"""
+        course = self.get_object()
+        
+        org_id = str(request.data.get('organization') or course.org_id)
+        if not org_id.isdigit():
+            return Response({'error': 'organization must be an organization id'}, status=status.HTTP_400_BAD_REQUEST)
+        org_id = int(org_id)
+        if not self.in_tenant(org_id) or not Organization.objects.filter(pk=org_id).exists():
+            return Response({'error': 'Permission denied'}, status=status.HTTP_403_FORBIDDEN)
+        
+        cohort = None
+        cohort_id = request.data.get('cohort')
+        if cohort_id:
+            cohort = Cohort.objects.filter(pk=cohort_id, org_id=org_id).first()
+            if cohort is None:
+                return Response({'error': 'Cohort not found in the organization'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        # Fixed number of bulk inserts regardless of course size
+        graph = clone_course(course, org_id, created_by=request.user, name=request.data.get('name'), cohort=cohort)
+        
+        # Log action
+        record_action(
+            admin=request.user,
+            action_type=AdminAction.ActionType.CREATE,
+            object_type='Course',
+            object_id=graph.course.id,
+            object_name=graph.course.name,
+            organization_id=org_id,
+            description=f'Cloned course {course.name} as {graph.course.name}',
+            details=dict(graph.counts, source_course_id=course.id),
+            ip_address=request.META.get('REMOTE_ADDR')
+        )
+        
+        return Response(
+            dict(CourseDetailSerializer(graph.course).data, copied=graph.counts),
+            status=status.HTTP_201_CREATED
+        )
 
-class TaskManagementView(ModelViewSet):
+
+class TaskManagementView(TenantScopedMixin, EagerLoadingViewMixin, ModelViewSet):
     """Task CRUD operations"""
     serializer_class = TaskDetailSerializer
     permission_classes = [IsAdminUser, CanManageContent]
 
-    def get_queryset(self):
-        user = self.request.user
-        
-        if hasattr(user, 'admin_profile') and user.admin_profile.role == AdminProfile.Role.SUPER_ADMIN:
-            return Task.objects.all()
-        
-        organizations = Organization.objects.filter(
-            userorganization__user=user,
-            userorganization__role__in=['admin', 'owner']
-        )
-        return Task.objects.filter(org__in=organizations)
+    queryset = Task.objects.all()
 
     def perform_create(self, serializer):
         task = serializer.save(created_by=self.request.user)
         
         # Log action
-        AdminAction.objects.create(
+        record_action(
             admin=self.request.user,
             action_type=AdminAction.ActionType.CREATE,
             object_type='Task',
@@ -543,65 +527,136 @@ class TaskManagementView(ModelViewSet):
         )
 
 
+class ContentTemplateInstantiateView(TenantScopedMixin, APIView):
+    """Create a course or task from a content template"""
+    permission_classes = [IsAdminUser, CanManageContent]
+
+    def post(self, request, pk):
+        template = ContentTemplate.objects.filter(pk=pk, is_active=True).first()
+        if template is None or not (
+            template.is_global or template.organization_id is None or self.in_tenant(template.organization_id)
+        ):
+            return Response({'error': 'Template not found'}, status=status.HTTP_404_NOT_FOUND)
+        
+        org_id = str(request.data.get('organization') or template.organization_id or '')
+        if not org_id.isdigit():
+            return Response({'error': 'organization is required'}, status=status.HTTP_400_BAD_REQUEST)
+        org_id = int(org_id)
+        if not self.in_tenant(org_id) or not Organization.objects.filter(pk=org_id).exists():
+            return Response({'error': 'Permission denied'}, status=status.HTTP_403_FORBIDDEN)
+        
+        try:
+            graph = instantiate_template(template, org_id, created_by=request.user, name=request.data.get('name'))
+        except TemplateError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        
+        # Course templates create a course, the others a single task
+        created = graph.course or graph.tasks[0]
+        serializer_class = CourseDetailSerializer if graph.course else TaskDetailSerializer
+        data = serializer_class(created).data
+        
+        # Log action
+        record_action(
+            admin=request.user,
+            action_type=AdminAction.ActionType.CREATE,
+            object_type=type(created).__name__,
+            object_id=created.id,
+            object_name=str(created),
+            organization_id=org_id,
+            description=f'Created {created} from template {template.name}',
+            details=dict(graph.counts, template_id=template.id),
+            ip_address=request.META.get('REMOTE_ADDR')
+        )
+        
+        return Response(dict(data, copied=graph.counts), status=status.HTTP_201_CREATED)
+
+
+# =================== DRIP RELEASE ===================
+
+class UnlockedCourseContentView(APIView):
+    """Course milestones and tasks released so far to the requesting learner"""
+    permission_classes = [permissions.IsAuthenticated]
+    
+    def get(self, request, course_id):
+        if not CourseCohort.objects.filter(course_id=course_id, cohort__usercohort__user=request.user).exists():
+            return Response({'error': 'Permission denied'}, status=status.HTTP_403_FORBIDDEN)
+        
+        unlocked = unlocked_items(request.user, course_id)
+        milestones = CourseMilestone.objects.filter(
+            pk__in=unlocked['milestones']
+        ).select_related('milestone').order_by('ordering')
+        tasks = CourseTask.objects.filter(
+            pk__in=unlocked['tasks']
+        ).select_related('task', 'milestone').order_by('ordering')
+        return Response({
+            'milestones': CourseMilestoneSerializer(milestones, many=True).data,
+            'tasks': CourseTaskSerializer(tasks, many=True).data,
+        })
+
+
 # =================== ANALYTICS ===================
 
-class AnalyticsView(APIView):
+class AnalyticsView(TenantScopedMixin, APIView):
     """Analytics dashboard"""
     permission_classes = [IsAdminUser, CanViewAnalytics]
 
     def get(self, request):
-        """Get analytics data"""
-        user = request.user
-        
+        """Get analytics data at the coarsest granularity that fits the date range"""
         # Get date range
         end_date = timezone.now().date()
         start_date = end_date - timedelta(days=30)
         
-        date_from = request.query_params.get('date_from')
-        if date_from:
-            start_date = datetime.strptime(date_from, '%Y-%m-%d').date()
-        
-        date_to = request.query_params.get('date_to')
-        if date_to:
-            end_date = datetime.strptime(date_to, '%Y-%m-%d').date()
-
-        # Get organizations
-        if hasattr(user, 'admin_profile') and user.admin_profile.role == AdminProfile.Role.SUPER_ADMIN:
-            organizations = Organization.objects.all()
-        else:
-            organizations = Organization.objects.filter(
-                userorganization__user=user,
-                userorganization__role__in=['admin', 'owner']
-            )
-
-        # Get analytics data
-        analytics_qs = AdminAnalytics.objects.filter(
-            organization__in=organizations,
-            date__range=[start_date, end_date]
-        ).order_by('-date')
+        try:
+            date_from = request.query_params.get('date_from')
+            if date_from:
+                start_date = datetime.strptime(date_from, '%Y-%m-%d').date()
+            
+            date_to = request.query_params.get('date_to')
+            if date_to:
+                end_date = datetime.strptime(date_to, '%Y-%m-%d').date()
+        except ValueError:
+            return Response({'error': 'Dates must be YYYY-MM-DD'}, status=status.HTTP_400_BAD_REQUEST)
+        if start_date > end_date:
+            return Response({'error': 'date_from must not be after date_to'}, status=status.HTTP_400_BAD_REQUEST)
+
+        granularity = request.query_params.get('granularity') or choose_granularity(start_date, end_date)
+        if granularity not in GRANULARITIES:
+            return Response({'error': f'granularity must be one of {", ".join(GRANULARITIES)}'},
+                          status=status.HTTP_400_BAD_REQUEST)
+        if series_points(start_date, end_date, granularity) > MAX_SERIES_POINTS:
+            return Response({'error': 'Date range too long for this granularity'},
+                          status=status.HTTP_400_BAD_REQUEST)
 
-        org_id = request.query_params.get('organization')
-        if org_id:
-            analytics_qs = analytics_qs.filter(organization_id=org_id)
-
-        analytics_data = AdminAnalyticsSerializer(analytics_qs[:100], many=True).data
-
-        # Aggregate totals
-        totals = analytics_qs.aggregate(
-            total_users=Sum('total_users'),
-            total_courses=Sum('total_courses'),
-            total_tasks=Sum('total_tasks'),
-            total_sessions=Sum('total_sessions'),
-            avg_completion_rate=Avg('completion_rate'),
-            total_api_calls=Sum('api_calls'),
-            total_storage=Sum('storage_used_gb'),
-            total_errors=Sum('error_count'),
-            total_ai_cost=Sum('ai_cost_usd')
-        )
+        # Organizations to compare, limited to the ones the user manages
+        org_ids = self.get_tenant_org_ids()
+        requested = request.query_params.get('organization', '')
+        if requested:
+            requested_ids = requested.split(',')
+            if not all(org_id.isdigit() for org_id in requested_ids):
+                return Response({'error': 'organization must be a comma-separated list of organization ids'},
+                              status=status.HTTP_400_BAD_REQUEST)
+            requested_ids = {int(org_id) for org_id in requested_ids}
+            org_ids = requested_ids if org_ids is None else requested_ids & org_ids
+
+        # One query for every organization's series
+        granularity, rows = analytics_series(org_ids, start_date, end_date, granularity)
+        totals = summarize_series(rows)
 
         return Response({
-            'analytics': analytics_data,
-            'totals': totals,
+            'granularity': granularity,
+            'analytics': rows,
+            'totals': {
+                'total_users': totals['total_users'],
+                'total_courses': totals['total_courses'],
+                'total_tasks': totals['total_tasks'],
+                'total_sessions': totals['total_sessions'],
+                'avg_completion_rate': totals['completion_rate'],
+                'total_api_calls': totals['api_calls'],
+                'total_storage': totals['storage_used_gb'],
+                'total_errors': totals['error_count'],
+                'total_ai_cost': totals['ai_cost_usd']
+            },
+            'organizations': compare_organizations(rows),
             'date_range': {'start': start_date, 'end': end_date}
         })
 
@@ -683,7 +738,7 @@ class BulkEnrollmentView(APIView):
             operation.save()
 
             # Log action
-            AdminAction.objects.create(
+            record_action(
                 admin=request.user,
                 action_type=AdminAction.ActionType.BULK_OPERATION,
                 object_type='BulkEnrollment',
@@ -748,7 +803,7 @@ class DataExportView(APIView):
                 operation.save()
 
                 # Log action
-                AdminAction.objects.create(
+                record_action(
                     admin=request.user,
                     action_type=AdminAction.ActionType.DATA_EXPORT,
                     object_type='DataExport',
@@ -794,7 +849,7 @@ class DataExportView(APIView):
 
     def export_courses(self, organization, params):
         """Export courses data"""
-        courses = Course.objects.filter(org=organization)
+        courses = Course.objects.filter(org=organization).with_metrics()
         
         return [{
             'name': course.name,
@@ -878,7 +933,7 @@ class ContentGenerationView(APIView):
             # In a real implementation, this would trigger async processing
             
             # Log action
-            AdminAction.objects.create(
+            record_action(
                 admin=request.user,
                 action_type=AdminAction.ActionType.CONTENT_GENERATION,
                 object_type='ContentGenerationJob',
@@ -964,48 +1019,44 @@ def mark_all_notifications_read(request):
 
 # =================== SYSTEM CONFIGURATION ===================
 
-class SystemConfigurationView(ModelViewSet):
+class SystemConfigurationView(TenantScopedMixin, ModelViewSet):
     """System configuration management"""
     serializer_class = SystemConfigurationSerializer
     permission_classes = [IsAdminUser, CanManageSystemConfig]
-
-    def get_queryset(self):
-        user = self.request.user
+    # Org admins can only see their org's configs and global ones
+    queryset = SystemConfiguration.objects.all()
+    tenant_field = 'organization_id'
+    tenant_include_global = True
+
+    @action(detail=False, methods=['get'])
+    def resolved(self, request):
+        """Effective configuration for an organization, served from the config snapshot"""
+        org_id = request.query_params.get('organization', '')
+        if org_id and not org_id.isdigit():
+            return Response({'error': 'organization must be an organization id'}, status=status.HTTP_400_BAD_REQUEST)
+        org_id = int(org_id) if org_id else None
         
-        if hasattr(user, 'admin_profile') and user.admin_profile.role == AdminProfile.Role.SUPER_ADMIN:
-            return SystemConfiguration.objects.all()
+        if org_id is not None and not self.in_tenant(org_id):
+            return Response({'error': 'Permission denied'}, status=status.HTTP_403_FORBIDDEN)
         
-        # Org admins can only see their org's configs
-        organizations = Organization.objects.filter(
-            userorganization__user=user,
-            userorganization__role__in=['admin', 'owner']
-        )
-        return SystemConfiguration.objects.filter(
-            Q(organization__in=organizations) | Q(organization__isnull=True)
-        )
+        return Response({
+            'organization': org_id,
+            'settings': config_snapshot().resolved(org_id)
+        })
 
 
 # =================== ADMIN ACTIONS LOG ===================
 
-class AdminActionView(APIView):
+class AdminActionView(TenantScopedMixin, APIView):
     """Admin actions audit log"""
     permission_classes = [IsAdminUser]
 
     def get(self, request):
         """Get admin actions log"""
-        user = request.user
-        
         # Filter by user's organizations
-        if hasattr(user, 'admin_profile') and user.admin_profile.role == AdminProfile.Role.SUPER_ADMIN:
-            actions_qs = AdminAction.objects.all()
-        else:
-            organizations = Organization.objects.filter(
-                userorganization__user=user,
-                userorganization__role__in=['admin', 'owner']
-            )
-            actions_qs = AdminAction.objects.filter(
-                Q(organization__in=organizations) | Q(organization__isnull=True)
-            )
+        actions_qs = self.scope_to_tenant(
+            AdminAction.objects.all(), 'organization_id', include_global=True
+        )
 
         # Apply filters
         action_type = request.query_params.get('action_type')
@@ -1020,6 +1071,13 @@ class AdminActionView(APIView):
         if admin_id:
             actions_qs = actions_qs.filter(admin_id=admin_id)
 
+        # Served by the (organization, created_at) index
+        org_id = request.query_params.get('organization', '')
+        if org_id:
+            if not org_id.isdigit():
+                return Response({'error': 'organization must be an organization id'}, status=status.HTTP_400_BAD_REQUEST)
+            actions_qs = actions_qs.filter(organization_id=org_id)
+
         # Date range
         date_from = request.query_params.get('date_from')
         if date_from:
@@ -1029,21 +1087,22 @@ class AdminActionView(APIView):
         if date_to:
             actions_qs = actions_qs.filter(created_at__lte=date_to)
 
-        # Pagination
-        page_size = min(int(request.query_params.get('page_size', 50)), 100)
-        page = int(request.query_params.get('page', 1))
-        start = (page - 1) * page_size
-        end = start + page_size
-
-        actions = actions_qs[start:end]
-        total_count = actions_qs.count()
+        # Keyset pagination, newest first
+        page_size = min(int(request.query_params.get('page_size', 50)), MAX_PAGE_SIZE)
+        try:
+            actions, next_cursor = keyset_page(
+                actions_qs.select_related('admin', 'organization'),
+                request.query_params.get('cursor'),
+                page_size
+            )
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
         return Response({
             'actions': AdminActionSerializer(actions, many=True).data,
             'pagination': {
-                'page': page,
                 'page_size': page_size,
-                'total_count': total_count,
-                'total_pages': (total_count + page_size - 1) // page_size
+                'next_cursor': next_cursor,
+                'has_next': next_cursor is not None
             }
-        }) 
\ No newline at end of file
+        }) 
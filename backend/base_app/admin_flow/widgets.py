@@ -0,0 +1,258 @@
+"""
+Dashboard widget engine.
+
+Each ``AdminDashboardWidget.data_source`` names a provider registered with
+``@widget_provider``; a provider takes the widget's organization ids and
+configuration and returns JSON-ready data. Results are cached under the
+data source, organization set and configuration, not the admin, so every
+admin with an equivalent widget shares one computation. An entry is fresh
+for the widget's ``refresh_interval``; after that one request (holding a
+short cache lock) recomputes it while the others keep serving the stale
+value, and requests that find no value at all wait briefly for the lock
+holder; if it has not finished by then they report the widget unavailable
+rather than computing it again.
+
+``resolve_widgets`` serves a whole dashboard: one ``get_many`` for every
+cached entry, identical widgets deduplicated, and the remaining providers
+run concurrently on a small thread pool.
+"""
+import hashlib
+import json
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connections
+from django.db.models import Count, Q
+from django.utils import timezone
+
+from .analytics import analytics_series, summarize_series
+from .models import AdminAction, Course, Task, UserOrganization
+
+logger = logging.getLogger(__name__)
+
+WIDGET_MAX_WORKERS = 4
+WIDGET_STALE_GRACE = 300
+WIDGET_LOCK_TIMEOUT = 30
+WIDGET_LOCK_WAIT = 5
+WIDGET_LOCK_POLL = 0.1
+
+WIDGET_PROVIDERS = {}
+
+
+def widget_provider(data_source):
+    """Register ``provider(org_ids, configuration)`` for a data source"""
+    def register(provider):
+        WIDGET_PROVIDERS[data_source] = provider
+        return provider
+    return register
+
+
+# =================== CACHE ===================
+
+def widget_cache_key(data_source, org_ids, configuration):
+    scope = json.dumps([sorted(org_ids), configuration], sort_keys=True, cls=DjangoJSONEncoder)
+    digest = hashlib.md5(scope.encode()).hexdigest()
+    return f'admin_flow:widget:{data_source}:{digest}'
+
+
+def _is_fresh(entry, refresh_interval):
+    return entry is not None and time.time() - entry['computed_at'] < refresh_interval
+
+
+def _compute(job):
+    """Run a provider and cache its result; returns the cache entry"""
+    provider = WIDGET_PROVIDERS[job['data_source']]
+    entry = {
+        'data': provider(job['org_ids'], job['configuration']),
+        'computed_at': time.time(),
+    }
+    cache.set(job['key'], entry, job['refresh_interval'] + WIDGET_STALE_GRACE)
+    return entry
+
+
+class WidgetUnavailable(Exception):
+    """Raised when another request holds the lock and no value appeared in time"""
+
+
+def _refresh(job):
+    """Cache entry for a job, computed only by the request holding its lock"""
+    lock_key = f'{job["key"]}:lock'
+    if cache.add(lock_key, 1, WIDGET_LOCK_TIMEOUT):
+        try:
+            return _compute(job)
+        finally:
+            cache.delete(lock_key)
+
+    if job['entry'] is not None:
+        return job['entry']
+    # Another request is computing it; wait for its result
+    deadline = time.monotonic() + WIDGET_LOCK_WAIT
+    while time.monotonic() < deadline:
+        time.sleep(WIDGET_LOCK_POLL)
+        entry = cache.get(job['key'])
+        if entry is not None:
+            return entry
+    raise WidgetUnavailable(f'Timed out waiting for {job["data_source"]}')
+
+
+def _refresh_in_thread(job):
+    try:
+        return _refresh(job)
+    finally:
+        connections.close_all()
+
+
+# =================== RESOLUTION ===================
+
+def _widget_result(widget, entry=None, error=None):
+    result = {'id': widget.id, 'data': None, 'computed_at': None, 'error': error}
+    if entry is not None:
+        result['data'] = entry['data']
+        result['computed_at'] = datetime.fromtimestamp(entry['computed_at'], tz=dt_timezone.utc)
+    return result
+
+
+def resolve_widgets(widgets, org_ids, allowed=None):
+    """Data for every widget, keyed by widget id.
+
+    Widgets without an organization cover ``org_ids``. ``allowed(org_id)``
+    can reject widgets pinned to an organization the viewer may not see.
+    """
+    results = {}
+    jobs = {}
+    for widget in widgets:
+        if widget.organization_id is not None and allowed and not allowed(widget.organization_id):
+            results[widget.id] = _widget_result(widget, error='Permission denied')
+            continue
+        if widget.data_source not in WIDGET_PROVIDERS:
+            results[widget.id] = _widget_result(widget, error=f'Unknown data source: {widget.data_source}')
+            continue
+
+        scope = [widget.organization_id] if widget.organization_id is not None else sorted(org_ids)
+        key = widget_cache_key(widget.data_source, scope, widget.configuration)
+        job = jobs.setdefault(key, {
+            'key': key,
+            'data_source': widget.data_source,
+            'org_ids': scope,
+            'configuration': widget.configuration,
+            'refresh_interval': widget.refresh_interval,
+            'widgets': [],
+        })
+        # Identical widgets share the shortest refresh interval
+        job['refresh_interval'] = min(job['refresh_interval'], widget.refresh_interval)
+        job['widgets'].append(widget)
+
+    cached = cache.get_many(list(jobs))
+    stale = []
+    for key, job in jobs.items():
+        job['entry'] = cached.get(key)
+        if _is_fresh(job['entry'], job['refresh_interval']):
+            job['result'] = job['entry']
+        else:
+            stale.append(job)
+
+    if len(stale) > 1 and WIDGET_MAX_WORKERS > 1:
+        with ThreadPoolExecutor(max_workers=min(len(stale), WIDGET_MAX_WORKERS)) as executor:
+            futures = [(job, executor.submit(_refresh_in_thread, job)) for job in stale]
+            outcomes = [(job, future.exception() or future.result()) for job, future in futures]
+    else:
+        outcomes = []
+        for job in stale:
+            try:
+                outcomes.append((job, _refresh(job)))
+            except Exception as e:
+                outcomes.append((job, e))
+
+    for job, outcome in outcomes:
+        if isinstance(outcome, Exception):
+            logger.exception('Widget data source %s failed', job['data_source'], exc_info=outcome)
+            job['error'] = 'Widget data unavailable'
+            # Fall back to the stale value if there is one
+            job['result'] = job['entry']
+        else:
+            job['result'] = outcome
+
+    for job in jobs.values():
+        for widget in job['widgets']:
+            results[widget.id] = _widget_result(widget, job['result'], job.get('error'))
+    return results
+
+
+# =================== PROVIDERS ===================
+
+def _time_range(configuration, default_days=30):
+    """``(start, end)`` dates for a ``time_range`` such as ``'7d'``"""
+    value = str(configuration.get('time_range', f'{default_days}d'))
+    days = int(value[:-1]) if value.endswith('d') and value[:-1].isdigit() else default_days
+    end = timezone.now().date()
+    return end - timedelta(days=max(days, 1) - 1), end
+
+
+@widget_provider('user_analytics')
+def user_analytics(org_ids, configuration):
+    """Member counts; ``metric`` picks the headline value"""
+    today = timezone.now().date()
+    counts = UserOrganization.objects.filter(org_id__in=org_ids).aggregate(
+        total_users=Count('user_id', distinct=True),
+        new_users_today=Count('user_id', distinct=True, filter=Q(created_at__date=today)),
+        active_users=Count('user_id', distinct=True, filter=Q(
+            last_accessed__gte=timezone.now() - timedelta(days=30)
+        )),
+        members=Count('user_id', distinct=True, filter=Q(role=UserOrganization.Role.MEMBER)),
+    )
+    return dict(counts, value=counts.get(configuration.get('metric', 'total_users')))
+
+
+@widget_provider('completion_analytics')
+def completion_analytics(org_ids, configuration):
+    """Completion rate series over ``time_range``"""
+    start, end = _time_range(configuration)
+    granularity, rows = analytics_series(org_ids, start, end)
+    points = {}
+    for row in reversed(rows):
+        points.setdefault(row['period_start'], []).append(row)
+    return {
+        'granularity': granularity,
+        'points': [
+            {'period_start': period_start, 'completion_rate': summarize_series(period_rows)['completion_rate']}
+            for period_start, period_rows in points.items()
+        ],
+        'completion_rate': summarize_series(rows)['completion_rate'],
+    }
+
+
+@widget_provider('user_activity')
+def user_activity(org_ids, configuration):
+    """Latest admin actions in the organizations"""
+    limit = min(int(configuration.get('limit', 10)), 50)
+    actions = AdminAction.objects.filter(organization_id__in=org_ids).order_by('-created_at', '-id')
+    return [
+        {'user': email, 'action': action_type, 'object': object_name, 'timestamp': created_at}
+        for email, action_type, object_name, created_at in actions.values_list(
+            'admin__email', 'action_type', 'object_name', 'created_at'
+        )[:limit]
+    ]
+
+
+@widget_provider('content_overview')
+def content_overview(org_ids, configuration):
+    """Course counts by status and task counts by type"""
+    courses = Course.objects.filter(org_id__in=org_ids).aggregate(
+        total=Count('id'),
+        published=Count('id', filter=Q(status='published')),
+        draft=Count('id', filter=Q(status='draft')),
+    )
+    tasks_by_type = dict(
+        Task.objects.filter(org_id__in=org_ids).values('type').annotate(
+            count=Count('id')
+        ).values_list('type', 'count')
+    )
+    return {
+        'courses': courses,
+        'total_tasks': sum(tasks_by_type.values()),
+        'tasks_by_type': tasks_by_type,
+    }
@@ -1,10 +1,11 @@
 from django.db.models.signals import post_save, pre_save
 from django.dispatch import receiver
 from django.utils import timezone
-from django.core.mail import send_mail
 from django.template.loader import render_to_string
 from django.conf import settings
 
+from admin_flow.outbox import queue_email
+
 from .models import (
     MentorshipAssignment, MentorSession, MentorMessage, 
     MentorFeedback, MentorshipGoal, MentorNotification,
@@ -175,13 +176,12 @@ def send_assignment_emails(assignment):
             'assignment': assignment,
         })
         
-        send_mail(
+        queue_email(
             mentor_subject,
             '',
             settings.DEFAULT_FROM_EMAIL,
             [assignment.mentor.email],
-            html_message=mentor_message,
-            fail_silently=True
+            html_message=mentor_message
         )
         
         # Email to student
@@ -193,13 +193,12 @@ def send_assignment_emails(assignment):
             'assignment': assignment,
         })
         
-        send_mail(
+        queue_email(
             student_subject,
             '',
             settings.DEFAULT_FROM_EMAIL,
             [assignment.student.email],
-            html_message=student_message,
-            fail_silently=True
+            html_message=student_message
         )
         
     except Exception as e:
@@ -0,0 +1,363 @@
+"""
+Declarative achievement rules.
+
+Achievements are ``AchievementRule`` rows rather than code. Signals describe
+what happened as ``AchievementEvent``s carrying a dict of facts, and
+``evaluate_events`` matches a batch of events against the cached active
+rules, skips awards the students already hold (unique on student, rule and
+scope key) with a single lookup and inserts the rest with ``bulk_create``.
+
+Signal receivers do not evaluate their event on the spot: ``queue_events``
+holds it until its transaction commits, and inside ``batched_events`` (which
+``AchievementBatchMiddleware`` wraps around every request) committed events
+are collected and evaluated together when the block ends, so a request
+that saves many rows runs one evaluation.
+
+``backfill_rule`` replays history for a newly added rule in chunks over an
+optional ``[min_user_id, max_user_id)`` range, so the
+``evaluate_achievement_rule`` command can be run as parallel shards.
+"""
+import operator
+from collections import namedtuple
+from contextlib import contextmanager
+from datetime import date, datetime
+from decimal import Decimal
+from functools import partial
+from itertools import islice
+
+from asgiref.local import Local
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+
+from .leaderboards import award_achievement_points
+from .models import (
+    AchievementRule, AssignmentSubmission, LearningGoal, QuizAttempt,
+    StudentAchievement, StudentActivityCalendar, StudentEnrollment
+)
+from .stats import invalidate_student_stats
+
+BACKFILL_CHUNK_SIZE = 1000
+RULES_CACHE_TIMEOUT = 60 * 60
+
+AchievementEvent = namedtuple(
+    'AchievementEvent',
+    ['event', 'student_id', 'facts', 'course_id', 'task_id', 'object_id'],
+    defaults=(None, None, None)
+)
+
+OPERATORS = {
+    'eq': operator.eq,
+    'ne': operator.ne,
+    'gt': operator.gt,
+    'gte': operator.ge,
+    'lt': operator.lt,
+    'lte': operator.le,
+    'in': lambda value, options: value in options,
+}
+
+
+# =================== RULE CACHE ===================
+
+RULES_VERSION_KEY = 'students:achievement_rules_version'
+
+
+def bump_rules_version():
+    """Invalidate the cached active rules"""
+    cache.add(RULES_VERSION_KEY, 0, None)
+    try:
+        cache.incr(RULES_VERSION_KEY)
+    except ValueError:
+        cache.set(RULES_VERSION_KEY, 1, None)
+
+
+def active_rules():
+    """Cached ``{event: [rule, ...]}`` of active rules"""
+    key = f'students:achievement_rules:{cache.get(RULES_VERSION_KEY, 0)}'
+    rules = cache.get(key)
+    if rules is None:
+        rules = {}
+        for rule in AchievementRule.objects.filter(is_active=True):
+            rules.setdefault(rule.event, []).append(rule)
+        cache.set(key, rules, RULES_CACHE_TIMEOUT)
+    return rules
+
+
+# =================== MATCHING ===================
+
+def matches(criteria, facts):
+    """Check every ``{fact: {operator: value}}`` condition against ``facts``"""
+    for fact, conditions in criteria.items():
+        value = facts.get(fact)
+        if value is None:
+            return False
+        for name, expected in conditions.items():
+            if name not in OPERATORS or not OPERATORS[name](value, expected):
+                return False
+    return True
+
+
+def scope_key(rule, event):
+    """Dedup key of an award within its student and rule, or None if out of scope"""
+    if rule.scope == AchievementRule.Scope.STUDENT:
+        return ''
+    value = {
+        AchievementRule.Scope.COURSE: event.course_id,
+        AchievementRule.Scope.TASK: event.task_id,
+        AchievementRule.Scope.OBJECT: event.object_id,
+    }.get(rule.scope)
+    return None if value is None else str(value)
+
+
+class _Facts(dict):
+    def __missing__(self, key):
+        return ''
+
+
+def _format(template, facts):
+    try:
+        return template.format_map(_Facts(facts))
+    except (ValueError, IndexError, AttributeError):
+        return template
+
+
+def _json_facts(facts):
+    def convert(value):
+        if isinstance(value, Decimal):
+            return float(value)
+        if isinstance(value, (date, datetime)):
+            return value.isoformat()
+        return value
+    return {name: convert(value) for name, value in facts.items()}
+
+
+def _build_award(rule, event, key):
+    return StudentAchievement(
+        student_id=event.student_id,
+        rule=rule,
+        scope_key=key,
+        achievement_type=rule.achievement_type,
+        title=_format(rule.title, event.facts)[:255],
+        description=_format(rule.description, event.facts),
+        badge_icon=rule.badge_icon,
+        badge_color=rule.badge_color,
+        points_earned=rule.points,
+        criteria_met=_json_facts(event.facts),
+        course_id=event.course_id,
+        task_id=event.task_id
+    )
+
+
+def _insert_missing(awards):
+    """Insert awards one at a time, dropping those a concurrent writer inserted"""
+    inserted = []
+    for award in awards:
+        try:
+            with transaction.atomic():
+                StudentAchievement.objects.bulk_create([award])
+        except IntegrityError:
+            continue
+        inserted.append(award)
+    return inserted
+
+
+def evaluate_events(events, rules=None):
+    """Award every rule matched by ``events``; returns the new achievements"""
+    rules = active_rules() if rules is None else rules
+
+    candidates = {}
+    for event in events:
+        for rule in rules.get(event.event, ()):
+            key = scope_key(rule, event)
+            if key is not None and matches(rule.criteria, event.facts):
+                candidates.setdefault((event.student_id, rule.id, key), (rule, event))
+    if not candidates:
+        return []
+
+    held = set(StudentAchievement.objects.filter(
+        student_id__in={student_id for student_id, _, _ in candidates},
+        rule_id__in={rule_id for _, rule_id, _ in candidates}
+    ).values_list('student_id', 'rule_id', 'scope_key'))
+
+    awards = [
+        _build_award(rule, event, key[2])
+        for key, (rule, event) in candidates.items()
+        if key not in held
+    ]
+    if not awards:
+        return []
+
+    try:
+        with transaction.atomic():
+            StudentAchievement.objects.bulk_create(awards)
+    except IntegrityError:
+        awards = _insert_missing(awards)
+
+    # bulk_create skips post_save, so credit leaderboards and drop cached stats here
+    for award in awards:
+        award_achievement_points(award)
+    for student_id in {award.student_id for award in awards}:
+        invalidate_student_stats(student_id)
+    return awards
+
+
+# =================== BATCHING ===================
+
+_state = Local()
+
+
+def _collect(events):
+    batch = getattr(_state, 'events', None)
+    if batch is None:
+        evaluate_events(events)
+    else:
+        batch.extend(events)
+
+
+def queue_events(events):
+    """Evaluate ``events`` once their transaction commits, with the rest of the batch if one is open"""
+    transaction.on_commit(partial(_collect, list(events)))
+
+
+@contextmanager
+def batched_events():
+    """Evaluate the events committed in the block together at its end"""
+    previous = getattr(_state, 'events', None)
+    _state.events = []
+    try:
+        yield
+    finally:
+        events, _state.events = _state.events, previous
+        if events:
+            evaluate_events(events)
+
+
+class AchievementBatchMiddleware:
+    """Evaluate a request's achievement events in one pass once the view has returned"""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with batched_events():
+            return self.get_response(request)
+
+
+# =================== EVENTS ===================
+
+def streak_event(student_id, streak_days):
+    return AchievementEvent(
+        AchievementRule.Event.STREAK_UPDATED, student_id, {'streak_days': streak_days}
+    )
+
+
+def assignment_graded_event(student_id, submission_id, task_id, course_id, task_title, score, max_score):
+    percentage_score = (score / max_score) * 100 if score is not None and max_score else 0
+    return AchievementEvent(
+        AchievementRule.Event.ASSIGNMENT_GRADED, student_id,
+        {'assignment_id': submission_id, 'task_title': task_title, 'percentage_score': percentage_score},
+        course_id=course_id, task_id=task_id, object_id=submission_id
+    )
+
+
+def quiz_completed_event(student_id, attempt_id, task_id, course_id, task_title, percentage_score):
+    return AchievementEvent(
+        AchievementRule.Event.QUIZ_COMPLETED, student_id,
+        {'quiz_attempt_id': attempt_id, 'task_title': task_title, 'percentage_score': percentage_score},
+        course_id=course_id, task_id=task_id, object_id=attempt_id
+    )
+
+
+def goal_completed_event(student_id, goal_id, course_id, title, completed_at):
+    return AchievementEvent(
+        AchievementRule.Event.GOAL_COMPLETED, student_id,
+        {'goal_id': goal_id, 'title': title, 'completion_date': completed_at},
+        course_id=course_id, object_id=goal_id
+    )
+
+
+def course_completed_event(student_id, course_id, course_name, completed_at, grade):
+    return AchievementEvent(
+        AchievementRule.Event.COURSE_COMPLETED, student_id,
+        {
+            'course_id': course_id,
+            'course_name': course_name,
+            'completion_date': completed_at,
+            'final_grade': grade or 0
+        },
+        course_id=course_id, object_id=course_id
+    )
+
+
+# =================== HISTORY REPLAY ===================
+
+def _in_student_range(queryset, field, min_user_id=None, max_user_id=None):
+    if min_user_id is not None:
+        queryset = queryset.filter(**{f'{field}__gte': min_user_id})
+    if max_user_id is not None:
+        queryset = queryset.filter(**{f'{field}__lt': max_user_id})
+    return queryset.order_by(field)
+
+
+def _streak_history(min_user_id, max_user_id):
+    calendars = _in_student_range(
+        StudentActivityCalendar.objects.filter(longest_streak__gt=0), 'user_id', min_user_id, max_user_id
+    ).values_list('user_id', 'longest_streak')
+    for student_id, longest_streak in calendars.iterator(BACKFILL_CHUNK_SIZE):
+        yield streak_event(student_id, longest_streak)
+
+
+def _assignment_history(min_user_id, max_user_id):
+    submissions = _in_student_range(
+        AssignmentSubmission.objects.filter(status='graded', score__isnull=False),
+        'student_id', min_user_id, max_user_id
+    ).values_list('student_id', 'id', 'task_id', 'course_id', 'task__title', 'score', 'max_score')
+    for row in submissions.iterator(BACKFILL_CHUNK_SIZE):
+        yield assignment_graded_event(*row)
+
+
+def _quiz_history(min_user_id, max_user_id):
+    attempts = _in_student_range(
+        QuizAttempt.objects.filter(status='completed'), 'student_id', min_user_id, max_user_id
+    ).values_list('student_id', 'id', 'task_id', 'course_id', 'task__title', 'percentage_score')
+    for row in attempts.iterator(BACKFILL_CHUNK_SIZE):
+        yield quiz_completed_event(*row)
+
+
+def _goal_history(min_user_id, max_user_id):
+    goals = _in_student_range(
+        LearningGoal.objects.filter(status='completed', completed_at__isnull=False),
+        'student_id', min_user_id, max_user_id
+    ).values_list('student_id', 'id', 'course_id', 'title', 'completed_at')
+    for row in goals.iterator(BACKFILL_CHUNK_SIZE):
+        yield goal_completed_event(*row)
+
+
+def _course_history(min_user_id, max_user_id):
+    enrollments = _in_student_range(
+        StudentEnrollment.objects.filter(status='completed', completed_at__isnull=False),
+        'student_id', min_user_id, max_user_id
+    ).values_list('student_id', 'course_id', 'course__name', 'completed_at', 'grade')
+    for row in enrollments.iterator(BACKFILL_CHUNK_SIZE):
+        yield course_completed_event(*row)
+
+
+HISTORY = {
+    AchievementRule.Event.STREAK_UPDATED: _streak_history,
+    AchievementRule.Event.ASSIGNMENT_GRADED: _assignment_history,
+    AchievementRule.Event.QUIZ_COMPLETED: _quiz_history,
+    AchievementRule.Event.GOAL_COMPLETED: _goal_history,
+    AchievementRule.Event.COURSE_COMPLETED: _course_history,
+}
+
+
+def backfill_rule(rule, min_user_id=None, max_user_id=None, chunk_size=BACKFILL_CHUNK_SIZE):
+    """Evaluate ``rule`` over past events of students in range; returns awards made"""
+    events = HISTORY[rule.event](min_user_id, max_user_id)
+    rules = {rule.event: [rule]}
+    awarded = 0
+    while True:
+        chunk = list(islice(events, chunk_size))
+        if not chunk:
+            break
+        awarded += len(evaluate_events(chunk, rules=rules))
+    return awarded
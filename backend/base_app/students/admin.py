@@ -11,7 +11,8 @@ from .models import (
     StudentProfile, StudentEnrollment, LearningSession, AssignmentSubmission,
     StudyGroup, StudyGroupMembership, LearningResource, LearningGoal,
     QuizAttempt, StudentNotification, StudentAnalytics, StudentAchievement,
-    Organization, Cohort, Course, Task, TaskCompletion, User, UserCohort, UserOrganization
+    Organization, Cohort, Course, Task, TaskCompletion, User, UserCohort, UserOrganization,
+    AchievementRule
 )
 
 
@@ -744,7 +745,7 @@ class StudentAchievementAdmin(admin.ModelAdmin):
             'fields': ('course', 'task')
         }),
         ('Criteria', {
-            'fields': ('criteria_met',)
+            'fields': ('rule', 'scope_key', 'criteria_met')
         }),
         ('Visibility', {
             'fields': ('is_public', 'is_featured')
@@ -764,6 +765,36 @@ class StudentAchievementAdmin(admin.ModelAdmin):
         )
 
 
+@admin.register(AchievementRule)
+class AchievementRuleAdmin(admin.ModelAdmin):
+    list_display = ['key', 'event', 'scope', 'title', 'points', 'is_active', 'award_count']
+    list_filter = ['event', 'scope', 'achievement_type', 'is_active']
+    search_fields = ['key', 'title', 'description']
+    readonly_fields = ['created_at', 'updated_at']
+    
+    fieldsets = (
+        ('Rule', {
+            'fields': ('key', 'event', 'criteria', 'scope', 'is_active')
+        }),
+        ('Achievement', {
+            'fields': ('achievement_type', 'title', 'description', 'points')
+        }),
+        ('Badge', {
+            'fields': ('badge_icon', 'badge_color')
+        }),
+        ('Timestamps', {
+            'fields': ('created_at', 'updated_at')
+        }),
+    )
+    
+    def award_count(self, obj):
+        return obj.award_count
+    award_count.short_description = 'Awards'
+    
+    def get_queryset(self, request):
+        return super().get_queryset(request).annotate(award_count=Count('awards'))
+
+
 # =================== HIDE RELATED MODELS ===================
 # These models are typically managed via inlines or through the API
 
@@ -0,0 +1,90 @@
+"""
+Per-request authorization context for student permissions.
+
+Built on the admin_flow request context helper: a user's organization
+roles, cohort roles, student profile status and active enrollments are
+loaded once per request (four small queries) and kept on the request for
+every permission check.
+"""
+from admin_flow.authorization import request_context
+
+from .models import StudentEnrollment, StudentProfile, UserCohort, UserOrganization
+
+STUDENT_CONTEXT = 'students:auth'
+ADMIN_ROLES = ['admin', 'owner']
+ACTIVE_ENROLLMENT_STATUSES = ['enrolled', 'in_progress']
+
+
+class StudentAuthContext:
+    """Roles and enrollments of one user as seen by the students app"""
+
+    def __init__(self, org_roles, cohort_roles, profile_status=None, enrollments=()):
+        self.org_roles = dict(org_roles)
+        # (cohort_id, role, status)
+        self.cohort_roles = tuple(cohort_roles)
+        self.profile_status = profile_status
+        # {course_id: {status, ...}}
+        self.enrollments = {}
+        for course_id, status in enrollments:
+            self.enrollments.setdefault(course_id, set()).add(status)
+
+    @property
+    def has_student_profile(self):
+        return self.profile_status is not None
+
+    def cohort_ids(self, role, status=None):
+        return {
+            cohort_id for cohort_id, cohort_role, cohort_status in self.cohort_roles
+            if cohort_role == role and (status is None or cohort_status == status)
+        }
+
+    def has_cohort_role(self, cohort_id, role):
+        return cohort_id in self.cohort_ids(role)
+
+    @property
+    def is_learner(self):
+        return bool(self.cohort_ids('learner'))
+
+    @property
+    def is_mentor(self):
+        return bool(self.cohort_ids('mentor'))
+
+    @property
+    def is_student(self):
+        return self.has_student_profile or self.is_learner
+
+    @property
+    def managed_org_ids(self):
+        return {org_id for org_id, role in self.org_roles.items() if role in ADMIN_ROLES}
+
+    @property
+    def is_org_admin(self):
+        return bool(self.managed_org_ids)
+
+    def manages(self, org_id):
+        return org_id is not None and org_id in self.managed_org_ids
+
+    def is_member_of(self, org_id):
+        return org_id in self.org_roles
+
+    def is_enrolled(self, course_id, statuses=ACTIVE_ENROLLMENT_STATUSES):
+        """Enrolled in a course with one of ``statuses`` (any status if None)"""
+        course_statuses = self.enrollments.get(course_id, set())
+        if statuses is None:
+            return bool(course_statuses)
+        return not course_statuses.isdisjoint(statuses)
+
+
+def build_student_context(user_id):
+    return StudentAuthContext(
+        UserOrganization.objects.filter(user_id=user_id).values_list('org_id', 'role'),
+        UserCohort.objects.filter(user_id=user_id).values_list('cohort_id', 'role', 'status'),
+        StudentProfile.objects.filter(user_id=user_id).values_list('status', flat=True).first(),
+        StudentEnrollment.objects.filter(student_id=user_id).values_list('course_id', 'status')
+    )
+
+
+def student_context(request):
+    """The request user's ``StudentAuthContext``"""
+    return request_context(request, STUDENT_CONTEXT, build_student_context)
+
@@ -0,0 +1,107 @@
+"""
+Published course catalog cache.
+
+Each organization's published courses are cached pre-serialized under a
+per-organization version number. Saving or deleting a course (or renaming
+its organization) bumps the version, so stale catalogs are never read and
+simply expire; a course moved between organizations bumps both.
+
+The version key lives in the same cache as the catalog. Under the default
+per-process ``LocMemCache`` a bump only reaches the process that made it,
+so ``CATALOG_CACHE_TIMEOUT`` is the real bound on how stale another
+worker's catalog can be.
+
+``available_courses_for`` is then a set difference between the cached
+catalog and the student's enrolled course ids, with each course flagged
+locked or unlocked from the cached prerequisite closure.
+"""
+from django.core.cache import cache
+
+from .models import Course, StudentEnrollment
+from .prerequisites import prerequisite_closure, is_unlocked
+
+# Version bumps only reach other processes through a shared cache; with the
+# per-process default this bounds how stale another worker's catalog can be
+CATALOG_CACHE_TIMEOUT = 60 * 5
+
+
+def _version_key(org_id):
+    return f'students:catalog_version:{org_id}'
+
+
+def _catalog_key(org_id, version):
+    return f'students:catalog:{org_id}:{version}'
+
+
+def bump_catalog_version(org_id):
+    """Invalidate an organization's cached catalog"""
+    key = _version_key(org_id)
+    cache.add(key, 0, None)
+    try:
+        cache.incr(key)
+    except ValueError:
+        # Evicted between add and incr
+        cache.set(key, 1, None)
+
+
+def _catalog_versions(org_ids):
+    versions = cache.get_many([_version_key(org_id) for org_id in org_ids])
+    return {org_id: versions.get(_version_key(org_id), 0) for org_id in org_ids}
+
+
+def build_catalog(org_id):
+    """Serialize an organization's published courses"""
+    from .serializers import CourseBasicSerializer
+
+    courses = Course.objects.filter(
+        org_id=org_id,
+        status='published'
+    ).select_related('org').order_by('id')
+    return CourseBasicSerializer(courses, many=True).data
+
+
+def published_catalogs(org_ids):
+    """Cached serialized catalogs for several organizations, keyed by org id"""
+    versions = _catalog_versions(org_ids)
+    keys = {org_id: _catalog_key(org_id, version) for org_id, version in versions.items()}
+    cached = cache.get_many(list(keys.values()))
+
+    catalogs = {}
+    missing = {}
+    for org_id, key in keys.items():
+        if key in cached:
+            catalogs[org_id] = cached[key]
+        else:
+            catalogs[org_id] = missing[key] = [dict(course) for course in build_catalog(org_id)]
+    if missing:
+        cache.set_many(missing, CATALOG_CACHE_TIMEOUT)
+    return catalogs
+
+
+def available_courses_for(user):
+    """Published courses in the user's organizations they are not enrolled in.
+
+    Each course is flagged ``is_unlocked`` when the user has completed all of
+    its (transitive) prerequisites.
+    """
+    org_ids = list(user.userorganization_set.values_list('org_id', flat=True))
+    if not org_ids:
+        return []
+
+    enrolled = set()
+    completed = set()
+    for course_id, status in StudentEnrollment.objects.filter(
+        student=user
+    ).values_list('course_id', 'status'):
+        enrolled.add(course_id)
+        if status == 'completed':
+            completed.add(course_id)
+
+    catalogs = published_catalogs(org_ids)
+    available = []
+    for org_id in org_ids:
+        closure = prerequisite_closure(org_id)
+        for course in catalogs[org_id]:
+            if course['id'] not in enrolled:
+                available.append({**course, 'is_unlocked': is_unlocked(course['id'], closure, completed)})
+    return available
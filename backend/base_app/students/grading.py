@@ -0,0 +1,248 @@
+"""
+Quiz auto-grading engine.
+
+A task's answer key is built once from its ``Question`` rows and cached
+under the task's ``updated_at`` (question edits bump it, see
+``students.signals``), so grading an attempt needs no question queries.
+Multiple choice, true/false and short answer questions are graded
+automatically; long answer and code questions are left for manual review
+and do not count towards the automatic score.
+
+``regrade_task`` re-scores every finished attempt for a task in keyset
+batches with ``bulk_update`` and upserts the per-student ``TaskCompletion``
+rows, so fixing an answer key does not replay attempts one by one. Since
+neither sends ``post_save``, it evaluates score achievements, enrollment
+progress and leaderboard credit for the regraded rows itself.
+"""
+import json
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.db.models import Case, Max, When, IntegerField
+
+from .models import QuizAttempt, Question, TaskCompletion, StudentEnrollment
+from .achievements import evaluate_events, quiz_completed_event
+from .leaderboards import award_task_points
+from .progress import recalculate_enrollment_progress
+
+AUTO_GRADED_TYPES = ('multiple_choice', 'true_false', 'short_answer')
+FINISHED_STATUSES = ('completed', 'timed_out')
+PASSING_PERCENTAGE = 70
+ANSWER_KEY_CACHE_TIMEOUT = 60 * 60
+REGRADE_BATCH_SIZE = 1000
+
+GRADE_FIELDS = [
+    'score', 'max_score', 'percentage_score', 'is_passed',
+    'total_questions', 'questions_answered', 'correct_answers'
+]
+
+TRUE_VALUES = {'true', 't', 'yes', 'y', '1'}
+
+
+# =================== ANSWER KEY ===================
+
+def _normalize(value):
+    return ' '.join(str(value).split()).casefold()
+
+
+def _accepted_values(raw):
+    """Parse ``Question.correct_answer`` into a list of accepted values"""
+    raw = (raw or '').strip()
+    if raw.startswith('['):
+        try:
+            return json.loads(raw)
+        except ValueError:
+            pass
+    return [raw]
+
+
+def _expected(question_type, raw):
+    """Normalized form of the correct answer for a question type"""
+    if question_type == 'true_false':
+        return _normalize(raw) in TRUE_VALUES
+    return frozenset(_normalize(value) for value in _accepted_values(raw))
+
+
+def build_answer_key(task_id):
+    """Build the answer key for a task: ``(question_id, type, expected, points)`` tuples"""
+    questions = Question.objects.filter(
+        task_id=task_id,
+        type__in=AUTO_GRADED_TYPES
+    ).order_by('position', 'id').values_list('id', 'type', 'correct_answer', 'points')
+
+    return tuple(
+        (str(question_id), question_type, _expected(question_type, correct_answer), points)
+        for question_id, question_type, correct_answer, points in questions
+    )
+
+
+def answer_key_cache_key(task):
+    return f'students:answer_key:{task.pk}:{task.updated_at.timestamp()}'
+
+
+def answer_key(task):
+    """Cached answer key for the current version of ``task``"""
+    key_name = answer_key_cache_key(task)
+    key = cache.get(key_name)
+    if key is None:
+        key = build_answer_key(task.pk)
+        cache.set(key_name, key, ANSWER_KEY_CACHE_TIMEOUT)
+    return key
+
+
+# =================== SCORING ===================
+
+def _is_correct(question_type, expected, answer):
+    if question_type == 'true_false':
+        if isinstance(answer, bool):
+            return answer == expected
+        return (_normalize(answer) in TRUE_VALUES) == expected
+    if question_type == 'multiple_choice' and isinstance(answer, (list, tuple)):
+        # Multi-select: every correct option and nothing else
+        return frozenset(_normalize(option) for option in answer) == expected
+    return _normalize(answer) in expected
+
+
+def score_answers(key, answers):
+    """Score an answers dict against an answer key.
+
+    Returns ``(score, max_score, answered, correct)``.
+    """
+    score = max_score = answered = correct = 0
+    answers = answers or {}
+    for question_id, question_type, expected, points in key:
+        max_score += points
+        answer = answers.get(question_id)
+        if answer in (None, '', []):
+            continue
+        answered += 1
+        if _is_correct(question_type, expected, answer):
+            correct += 1
+            score += points
+    return score, max_score, answered, correct
+
+
+def apply_score(attempt, key):
+    """Fill an attempt's score fields from its answers (caller saves)"""
+    score, max_score, answered, correct = score_answers(key, attempt.answers)
+    percentage = round(score / max_score * 100, 2) if max_score else 0
+
+    attempt.score = Decimal(score)
+    attempt.max_score = Decimal(max_score)
+    attempt.percentage_score = Decimal(str(percentage))
+    attempt.is_passed = percentage >= PASSING_PERCENTAGE
+    attempt.total_questions = len(key)
+    attempt.questions_answered = answered
+    attempt.correct_answers = correct
+    return attempt
+
+
+# =================== TASK COMPLETIONS ===================
+
+def best_attempts(task_id, student_ids=None):
+    """Best finished attempt figures per student for a task"""
+    attempts = QuizAttempt.objects.filter(task_id=task_id, status__in=FINISHED_STATUSES)
+    if student_ids is not None:
+        attempts = attempts.filter(student_id__in=student_ids)
+
+    return attempts.order_by().values('student_id').annotate(
+        best_score=Max('score'),
+        best_max_score=Max('max_score'),
+        attempt_count=Max('attempt_number'),
+        passed=Max(Case(When(is_passed=True, then=1), default=0, output_field=IntegerField()))
+    )
+
+
+def _completion_fields(row):
+    return {
+        'score': row['best_score'],
+        'max_score': row['best_max_score'],
+        'attempts': row['attempt_count'],
+        'is_passed': bool(row['passed']),
+    }
+
+
+def record_task_completion(attempt):
+    """Create or update the student's ``TaskCompletion`` for a graded attempt"""
+    for row in best_attempts(attempt.task_id, [attempt.student_id]):
+        TaskCompletion.objects.update_or_create(
+            user_id=attempt.student_id,
+            task_id=attempt.task_id,
+            defaults=_completion_fields(row)
+        )
+
+
+def grade_attempt(attempt):
+    """Score an in-progress attempt, complete it and record the task completion"""
+    apply_score(attempt, answer_key(attempt.task))
+    attempt.complete()
+    record_task_completion(attempt)
+    return attempt
+
+
+# =================== BULK REGRADING ===================
+
+def regrade_task(task, batch_size=REGRADE_BATCH_SIZE):
+    """Re-score every finished attempt for ``task`` against its current key.
+
+    Returns the number of attempts regraded.
+    """
+    key = answer_key(task)
+    attempts = QuizAttempt.objects.filter(
+        task=task,
+        status__in=FINISHED_STATUSES
+    ).only('id', 'student_id', 'course_id', 'status', 'answers', *GRADE_FIELDS).order_by('pk')
+
+    regraded = 0
+    last_pk = 0
+    while True:
+        batch = list(attempts.filter(pk__gt=last_pk)[:batch_size])
+        if not batch:
+            break
+        for attempt in batch:
+            apply_score(attempt, key)
+        QuizAttempt.objects.bulk_update(batch, GRADE_FIELDS)
+        # bulk_update skips post_save; award score achievements the new scores earn
+        evaluate_events([
+            quiz_completed_event(
+                attempt.student_id, attempt.id, task.pk, attempt.course_id,
+                task.title, attempt.percentage_score
+            )
+            for attempt in batch if attempt.status == 'completed'
+        ])
+        regraded += len(batch)
+        last_pk = batch[-1].pk
+
+    previously_passed = set(TaskCompletion.objects.filter(
+        task=task, is_passed=True
+    ).values_list('user_id', flat=True))
+
+    completions = [
+        TaskCompletion(user_id=row['student_id'], task=task, **_completion_fields(row))
+        for row in best_attempts(task.pk)
+    ]
+    TaskCompletion.objects.bulk_create(
+        completions,
+        batch_size=batch_size,
+        update_conflicts=True,
+        unique_fields=['user', 'task'],
+        update_fields=['score', 'max_score', 'attempts', 'is_passed']
+    )
+
+    # bulk_create skips post_save, so refresh progress where the outcome flipped
+    now_passed = {completion.user_id for completion in completions if completion.is_passed}
+    changed = previously_passed ^ now_passed
+    if changed:
+        for enrollment in StudentEnrollment.objects.filter(
+            student_id__in=changed,
+            course__coursetask__task=task
+        ).select_related('course'):
+            recalculate_enrollment_progress(enrollment)
+
+    # and credit leaderboards for new passes; revoked passes are corrected by
+    # the rebuild_leaderboards command
+    for completion in completions:
+        if completion.user_id in now_passed - previously_passed:
+            award_task_points(completion)
+
+    return regraded
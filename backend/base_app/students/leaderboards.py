@@ -0,0 +1,178 @@
+"""
+Incremental leaderboards.
+
+Every student has one ``LeaderboardEntry`` per cohort and per course they
+score in. Achievement and task-pass signals add points with a single
+``UPDATE ... SET points = points + n`` (creating the row on first credit),
+so top-N and "my rank" are served from the indexed ``points`` column rather
+than summing achievements per request. ``rebuild_leaderboard`` recomputes a
+board from its sources to correct drift (e.g. revoked passes) and is run
+periodically by the ``rebuild_leaderboards`` management command.
+"""
+from collections import defaultdict
+
+from django.db import IntegrityError, transaction
+from django.db.models import F, Q, Sum
+from django.utils import timezone
+
+from .models import LeaderboardEntry, StudentAchievement, StudentEnrollment, TaskCompletion
+
+LEADERBOARD_SIZE = 10
+
+
+def _board(cohort_id=None, course_id=None):
+    if cohort_id is not None:
+        return {'cohort_id': cohort_id, 'course_id': None}
+    return {'cohort_id': None, 'course_id': course_id}
+
+
+# =================== INCREMENTAL UPDATES ===================
+
+def _credit(board, student_id, points):
+    entries = LeaderboardEntry.objects.filter(student_id=student_id, **board)
+    if entries.update(points=F('points') + points, updated_at=timezone.now()):
+        return
+    try:
+        with transaction.atomic():
+            LeaderboardEntry.objects.create(student_id=student_id, points=points, **board)
+    except IntegrityError:
+        # Created concurrently
+        entries.update(points=F('points') + points, updated_at=timezone.now())
+
+
+def _credit_enrollments(student_id, points, enrollments):
+    """Credit each course and cohort board of ``(course_id, cohort_id)`` pairs once"""
+    if not points:
+        return
+    course_ids = set()
+    cohort_ids = set()
+    for course_id, cohort_id in enrollments:
+        course_ids.add(course_id)
+        cohort_ids.add(cohort_id)
+
+    for course_id in course_ids:
+        _credit(_board(course_id=course_id), student_id, points)
+    for cohort_id in cohort_ids:
+        _credit(_board(cohort_id=cohort_id), student_id, points)
+
+
+def award_achievement_points(achievement):
+    """Credit an achievement to its course board and the student's cohorts.
+
+    Achievements without a course (e.g. streaks) count towards every cohort
+    the student is enrolled in, but no course board.
+    """
+    enrollments = StudentEnrollment.objects.filter(student_id=achievement.student_id)
+    if achievement.course_id:
+        enrollments = enrollments.filter(course_id=achievement.course_id)
+    pairs = list(enrollments.values_list('course_id', 'cohort_id'))
+
+    if achievement.course_id:
+        _credit_enrollments(achievement.student_id, achievement.points_earned, pairs)
+    else:
+        for cohort_id in {cohort_id for _, cohort_id in pairs}:
+            _credit(_board(cohort_id=cohort_id), achievement.student_id, achievement.points_earned)
+
+
+def award_task_points(completion):
+    """Credit a newly passed task to every enrolled course containing it"""
+    pairs = StudentEnrollment.objects.filter(
+        student_id=completion.user_id,
+        course__coursetask__task_id=completion.task_id
+    ).values_list('course_id', 'cohort_id').distinct()
+    _credit_enrollments(completion.user_id, completion.task.points, pairs)
+
+
+# =================== QUERIES ===================
+
+def top_students(cohort_id=None, course_id=None, limit=LEADERBOARD_SIZE):
+    """Top ``limit`` entries of a board with competition ranking (1, 2, 2, 4)"""
+    entries = LeaderboardEntry.objects.filter(
+        points__gt=0, **_board(cohort_id, course_id)
+    ).select_related('student').order_by('-points', 'updated_at', 'id')[:limit]
+
+    leaders = []
+    rank = 0
+    previous = None
+    for position, entry in enumerate(entries, start=1):
+        if entry.points != previous:
+            rank, previous = position, entry.points
+        leaders.append({
+            'rank': rank,
+            'student_id': entry.student_id,
+            'student_name': entry.student.get_full_name() or entry.student.email,
+            'points': entry.points,
+        })
+    return leaders
+
+
+def student_rank(student, cohort_id=None, course_id=None):
+    """A student's points and rank on a board; unranked students have 0 points"""
+    board = LeaderboardEntry.objects.filter(points__gt=0, **_board(cohort_id, course_id))
+    points = board.filter(student=student).values_list('points', flat=True).first() or 0
+    return {
+        'points': points,
+        'rank': board.filter(points__gt=points).count() + 1 if points else None,
+        'total_ranked': board.count(),
+    }
+
+
+# =================== REBUILDS ===================
+
+def _board_totals(pairs, include_unscoped):
+    """Point totals for students from ``(student_id, course_id)`` enrollments.
+
+    ``include_unscoped`` counts achievements without a course, as cohort
+    boards do.
+    """
+    student_ids = {student_id for student_id, _ in pairs}
+    course_ids = {course_id for _, course_id in pairs}
+    per_student_courses = defaultdict(set)
+    for student_id, course_id in pairs:
+        per_student_courses[student_id].add(course_id)
+
+    totals = defaultdict(int)
+    scope = Q(course_id__in=course_ids)
+    if include_unscoped:
+        scope |= Q(course__isnull=True)
+
+    for student_id, course_id, points in StudentAchievement.objects.filter(
+        scope,
+        student_id__in=student_ids
+    ).order_by().values('student_id', 'course_id').annotate(points=Sum('points_earned')).values_list(
+        'student_id', 'course_id', 'points'
+    ):
+        if course_id is None or course_id in per_student_courses[student_id]:
+            totals[student_id] += points or 0
+
+    passed = set()
+    for student_id, task_id, course_id, points in TaskCompletion.objects.filter(
+        user_id__in=student_ids,
+        task__coursetask__course_id__in=course_ids,
+        is_passed=True
+    ).values_list('user_id', 'task_id', 'task__coursetask__course_id', 'task__points').distinct():
+        if course_id in per_student_courses[student_id] and (student_id, task_id) not in passed:
+            passed.add((student_id, task_id))
+            totals[student_id] += points
+    return totals
+
+
+def rebuild_leaderboard(cohort_id=None, course_id=None):
+    """Recompute one board from achievements and passed tasks; returns entries written"""
+    board = _board(cohort_id, course_id)
+    if cohort_id is not None:
+        enrollments = StudentEnrollment.objects.filter(cohort_id=cohort_id)
+    else:
+        enrollments = StudentEnrollment.objects.filter(course_id=course_id)
+    pairs = list(enrollments.values_list('student_id', 'course_id'))
+
+    totals = _board_totals(pairs, include_unscoped=cohort_id is not None)
+
+    with transaction.atomic():
+        LeaderboardEntry.objects.filter(**board).delete()
+        LeaderboardEntry.objects.bulk_create([
+            LeaderboardEntry(student_id=student_id, points=points, **board)
+            for student_id, points in totals.items()
+            if points
+        ])
+    return sum(1 for points in totals.values() if points)
@@ -0,0 +1,41 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from students.achievements import backfill_rule, BACKFILL_CHUNK_SIZE
+from students.models import AchievementRule
+
+
+class Command(BaseCommand):
+    help = 'Retroactively award an achievement rule over past events, optionally for a user-id range shard'
+
+    def add_arguments(self, parser):
+        parser.add_argument('rule', help='Key of the achievement rule to evaluate')
+        parser.add_argument(
+            '--min-user-id',
+            type=int,
+            help='Lowest student user id in this shard (inclusive)',
+        )
+        parser.add_argument(
+            '--max-user-id',
+            type=int,
+            help='Highest student user id in this shard (exclusive)',
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=BACKFILL_CHUNK_SIZE,
+            help='Number of past events evaluated per batch',
+        )
+
+    def handle(self, *args, **options):
+        try:
+            rule = AchievementRule.objects.get(key=options['rule'])
+        except AchievementRule.DoesNotExist:
+            raise CommandError(f'Unknown achievement rule "{options["rule"]}"')
+
+        awarded = backfill_rule(
+            rule,
+            min_user_id=options['min_user_id'],
+            max_user_id=options['max_user_id'],
+            chunk_size=options['chunk_size']
+        )
+        self.stdout.write(self.style.SUCCESS(f'Awarded {rule.key} to {awarded} students'))
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from students.quiz_attempts import expire_stale_attempts
+
+
+class Command(BaseCommand):
+    help = 'Move in-progress quiz attempts past their time limit to timed_out'
+
+    def handle(self, *args, **options):
+        expired = expire_stale_attempts()
+        self.stdout.write(self.style.SUCCESS(f'Expired {expired} quiz attempts'))
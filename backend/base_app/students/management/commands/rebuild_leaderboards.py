@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+
+from students.leaderboards import rebuild_leaderboard
+from students.models import StudentEnrollment
+
+
+class Command(BaseCommand):
+    help = 'Recompute cohort and course leaderboards from achievements and passed tasks'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--cohort', type=int, help='Only rebuild this cohort leaderboard')
+        parser.add_argument('--course', type=int, help='Only rebuild this course leaderboard')
+
+    def handle(self, *args, **options):
+        if options['cohort'] or options['course']:
+            cohort_ids = [options['cohort']] if options['cohort'] else []
+            course_ids = [options['course']] if options['course'] else []
+        else:
+            cohort_ids = StudentEnrollment.objects.values_list('cohort_id', flat=True).distinct()
+            course_ids = StudentEnrollment.objects.values_list('course_id', flat=True).distinct()
+
+        entries = boards = 0
+        for cohort_id in cohort_ids:
+            entries += rebuild_leaderboard(cohort_id=cohort_id)
+            boards += 1
+        for course_id in course_ids:
+            entries += rebuild_leaderboard(course_id=course_id)
+            boards += 1
+
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt {boards} leaderboards ({entries} entries)'))
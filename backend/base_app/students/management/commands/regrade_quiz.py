@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from students.grading import regrade_task, REGRADE_BATCH_SIZE
+from students.models import Task
+
+
+class Command(BaseCommand):
+    help = (
+        'Regrade every finished quiz attempt for a task against its current answer key. '
+        'New passes and score achievements are credited; run rebuild_leaderboards afterwards '
+        'to remove points for passes the regrade revoked'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('task_id', type=int, help='ID of the quiz task to regrade')
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=REGRADE_BATCH_SIZE,
+            help='Number of attempts written per bulk update',
+        )
+
+    def handle(self, *args, **options):
+        try:
+            task = Task.objects.get(pk=options['task_id'])
+        except Task.DoesNotExist:
+            raise CommandError(f"Task {options['task_id']} does not exist")
+
+        regraded = regrade_task(task, batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Regraded {regraded} attempts for "{task.title}"'))
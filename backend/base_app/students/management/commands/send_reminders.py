@@ -0,0 +1,41 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand
+
+from students.reminders import SCHEDULERS
+
+
+class Command(BaseCommand):
+    help = 'Send goal and study reminders, optionally for a user-id range shard'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--kind',
+            choices=sorted(SCHEDULERS),
+            action='append',
+            help='Reminder kind to send (repeatable, defaults to all)',
+        )
+        parser.add_argument(
+            '--min-user-id',
+            type=int,
+            help='Lowest recipient user id in this shard (inclusive)',
+        )
+        parser.add_argument(
+            '--max-user-id',
+            type=int,
+            help='Highest recipient user id in this shard (exclusive)',
+        )
+        parser.add_argument(
+            '--date',
+            type=date.fromisoformat,
+            help='Day to schedule reminders for (YYYY-MM-DD, defaults to today)',
+        )
+
+    def handle(self, *args, **options):
+        for kind in options['kind'] or sorted(SCHEDULERS):
+            created = SCHEDULERS[kind](
+                day=options['date'],
+                min_user_id=options['min_user_id'],
+                max_user_id=options['max_user_id']
+            )
+            self.stdout.write(self.style.SUCCESS(f'Sent {created} {kind} reminders'))
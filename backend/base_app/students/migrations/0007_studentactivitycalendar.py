@@ -0,0 +1,32 @@
+# Generated by Django 4.2.23 on 2026-10-18 09:12
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('students', '0006_invitation_updated_at'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StudentActivityCalendar',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('anchor_date', models.DateField(help_text='Local date represented by bit 0 of the activity bitmap')),
+                ('activity_bits', models.BinaryField(default=bytes, help_text='Little-endian bitmap of active days')),
+                ('last_active_date', models.DateField(blank=True, null=True)),
+                ('current_streak', models.PositiveIntegerField(default=0, help_text='Run of active days ending on last_active_date')),
+                ('longest_streak', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='activity_calendar', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['last_active_date', 'current_streak'], name='students_st_last_ac_3b951b_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 4.2.23 on 2026-10-18 10:05
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('students', '0007_studentactivitycalendar'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='question',
+            name='max_attempts',
+            field=models.IntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='quizattempt',
+            name='expires_at',
+            field=models.DateTimeField(blank=True, help_text='Deadline derived from time_limit_minutes', null=True),
+        ),
+        migrations.AddIndex(
+            model_name='quizattempt',
+            index=models.Index(fields=['status', 'expires_at'], name='students_qu_status_5cb70f_idx'),
+        ),
+        migrations.CreateModel(
+            name='QuizAttemptCounter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('last_attempt_number', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('student', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='quiz_attempt_counters', to=settings.AUTH_USER_MODEL)),
+                ('task', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='attempt_counters', to='students.task')),
+            ],
+            options={
+                'unique_together': {('student', 'task')},
+            },
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 4.2.23 on 2026-10-18 11:20
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('students', '0008_quiz_attempt_lifecycle'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReminderLog',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('goal_due_tomorrow', 'Goal Due Tomorrow'), ('goal_due_next_week', 'Goal Due Next Week'), ('study_inactive', 'Inactive Study Reminder')], max_length=30)),
+                ('target', models.CharField(blank=True, help_text='Identifier of the reminded object, if any', max_length=64)),
+                ('scheduled_for', models.DateField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('recipient', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='reminder_logs', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'unique_together': {('recipient', 'kind', 'target', 'scheduled_for')},
+            },
+        ),
+    ]
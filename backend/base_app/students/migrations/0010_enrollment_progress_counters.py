@@ -0,0 +1,70 @@
+# Generated by Django 4.2.23 on 2026-10-18 12:40
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Q, Subquery, Sum, IntegerField, DecimalField
+from django.db.models.functions import Coalesce
+
+
+def backfill_counters(apps, schema_editor):
+    Course = apps.get_model('students', 'Course')
+    CourseTask = apps.get_model('students', 'CourseTask')
+    StudentEnrollment = apps.get_model('students', 'StudentEnrollment')
+    TaskCompletion = apps.get_model('students', 'TaskCompletion')
+
+    required = CourseTask.objects.filter(
+        course=OuterRef('pk'), is_required=True
+    ).order_by().values('course').annotate(total=Count('id')).values('total')
+    Course.objects.update(
+        required_task_count=Coalesce(Subquery(required, output_field=IntegerField()), 0)
+    )
+
+    passed = TaskCompletion.objects.filter(
+        user=OuterRef('student'),
+        task__coursetask__course=OuterRef('course'),
+        task__coursetask__is_required=True,
+        is_passed=True
+    ).order_by().values('user')
+    StudentEnrollment.objects.update(
+        passed_required_tasks=Coalesce(Subquery(
+            passed.annotate(total=Count('id')).values('total'), output_field=IntegerField()
+        ), 0),
+        score_sum=Coalesce(Subquery(
+            passed.annotate(total=Sum('score')).values('total'),
+            output_field=DecimalField(max_digits=10, decimal_places=2)
+        ), 0, output_field=DecimalField(max_digits=10, decimal_places=2)),
+        score_count=Coalesce(Subquery(
+            passed.annotate(total=Count('id', filter=Q(score__isnull=False))).values('total'),
+            output_field=IntegerField()
+        ), 0),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('students', '0009_reminderlog'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='course',
+            name='required_task_count',
+            field=models.PositiveIntegerField(default=0, help_text='Cached count of required course tasks'),
+        ),
+        migrations.AddField(
+            model_name='studentenrollment',
+            name='passed_required_tasks',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='studentenrollment',
+            name='score_sum',
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=10),
+        ),
+        migrations.AddField(
+            model_name='studentenrollment',
+            name='score_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_counters, migrations.RunPython.noop),
+    ]
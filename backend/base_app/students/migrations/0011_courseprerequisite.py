@@ -0,0 +1,50 @@
+# Generated by Django 4.2.23 on 2026-10-18 13:30
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def backfill_edges(apps, schema_editor):
+    Course = apps.get_model('students', 'Course')
+    CoursePrerequisite = apps.get_model('students', 'CoursePrerequisite')
+
+    org_courses = {}
+    for pk, org_id in Course.objects.values_list('pk', 'org_id'):
+        org_courses.setdefault(org_id, set()).add(pk)
+
+    edges = []
+    for course in Course.objects.exclude(prerequisites=[]).only('pk', 'org_id', 'prerequisites'):
+        for value in course.prerequisites or []:
+            try:
+                prerequisite_id = int(value)
+            except (TypeError, ValueError):
+                continue
+            if prerequisite_id != course.pk and prerequisite_id in org_courses.get(course.org_id, ()):
+                edges.append(CoursePrerequisite(
+                    org_id=course.org_id, course_id=course.pk, prerequisite_id=prerequisite_id
+                ))
+    CoursePrerequisite.objects.bulk_create(edges, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('students', '0010_enrollment_progress_counters'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CoursePrerequisite',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('course', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='prerequisite_edges', to='students.course')),
+                ('org', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='course_prerequisites', to='students.organization')),
+                ('prerequisite', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='dependent_edges', to='students.course')),
+            ],
+            options={
+                'unique_together': {('course', 'prerequisite')},
+            },
+        ),
+        migrations.RunPython(backfill_edges, migrations.RunPython.noop),
+    ]
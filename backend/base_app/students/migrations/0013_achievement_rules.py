@@ -0,0 +1,159 @@
+# Generated by Django 4.2.23 on 2026-10-18 23:20
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+STREAK_POINTS = {7: 10, 30: 40, 60: 80, 100: 140, 365: 520}
+
+SEED_RULES = [
+    {
+        'key': f'streak-{days}-days',
+        'event': 'streak_updated',
+        'criteria': {'streak_days': {'gte': days}},
+        'scope': 'student',
+        'achievement_type': 'streak',
+        'title': f'{days}-Day Study Streak',
+        'description': f'Maintained a {days}-day consecutive study streak',
+        'badge_icon': 'fire',
+        'badge_color': '#F59E0B',
+        'points': points,
+    }
+    for days, points in STREAK_POINTS.items()
+] + [
+    {
+        'key': 'assignment-excellence',
+        'event': 'assignment_graded',
+        'criteria': {'percentage_score': {'gte': 95}},
+        'scope': 'task',
+        'achievement_type': 'performance',
+        'title': 'Excellence in Assignment',
+        'description': 'Scored {percentage_score:.1f}% on {task_title}',
+        'badge_icon': 'star',
+        'badge_color': '#8B5CF6',
+        'points': 25,
+    },
+    {
+        'key': 'perfect-quiz-score',
+        'event': 'quiz_completed',
+        'criteria': {'percentage_score': {'gte': 100}},
+        'scope': 'task',
+        'achievement_type': 'performance',
+        'title': 'Perfect Score!',
+        'description': 'Scored 100% on {task_title}',
+        'badge_icon': 'trophy',
+        'badge_color': '#F59E0B',
+        'points': 20,
+    },
+    {
+        'key': 'goal-achieved',
+        'event': 'goal_completed',
+        'criteria': {},
+        'scope': 'object',
+        'achievement_type': 'milestone',
+        'title': 'Goal Achieved: {title}',
+        'description': 'Successfully completed learning goal: {title}',
+        'badge_icon': 'target',
+        'badge_color': '#06B6D4',
+        'points': 15,
+    },
+    {
+        'key': 'course-completed',
+        'event': 'course_completed',
+        'criteria': {},
+        'scope': 'course',
+        'achievement_type': 'completion',
+        'title': 'Course Completed: {course_name}',
+        'description': 'Successfully completed {course_name}',
+        'badge_icon': 'graduation-cap',
+        'badge_color': '#10B981',
+        'points': 100,
+    },
+]
+
+
+def _legacy_rule_and_scope(achievement, rules):
+    """Match an achievement awarded by the old hard-coded signals to its rule"""
+    criteria = achievement.criteria_met or {}
+    if achievement.achievement_type == 'streak':
+        rule = rules.get(f"streak-{criteria.get('streak_days')}-days")
+        return rule, ''
+    if achievement.title == 'Excellence in Assignment' and achievement.task_id:
+        return rules['assignment-excellence'], str(achievement.task_id)
+    if achievement.title == 'Perfect Score!' and achievement.task_id:
+        return rules['perfect-quiz-score'], str(achievement.task_id)
+    if achievement.achievement_type == 'milestone' and criteria.get('goal_id'):
+        return rules['goal-achieved'], str(criteria['goal_id'])
+    if achievement.achievement_type == 'completion' and achievement.course_id:
+        return rules['course-completed'], str(achievement.course_id)
+    return None, ''
+
+
+def seed_rules(apps, schema_editor):
+    AchievementRule = apps.get_model('students', 'AchievementRule')
+    StudentAchievement = apps.get_model('students', 'StudentAchievement')
+
+    rules = {}
+    for definition in SEED_RULES:
+        rules[definition['key']], _ = AchievementRule.objects.get_or_create(
+            key=definition['key'], defaults=definition
+        )
+
+    seen = set()
+    linked = []
+    for achievement in StudentAchievement.objects.filter(rule__isnull=True).order_by('earned_at', 'id').iterator():
+        rule, scope_key = _legacy_rule_and_scope(achievement, rules)
+        if rule is None or (achievement.student_id, rule.id, scope_key) in seen:
+            continue
+        seen.add((achievement.student_id, rule.id, scope_key))
+        achievement.rule = rule
+        achievement.scope_key = scope_key
+        linked.append(achievement)
+    StudentAchievement.objects.bulk_update(linked, ['rule', 'scope_key'], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('students', '0012_leaderboardentry'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AchievementRule',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.SlugField(max_length=100, unique=True)),
+                ('event', models.CharField(choices=[('streak_updated', 'Study Streak Updated'), ('assignment_graded', 'Assignment Graded'), ('quiz_completed', 'Quiz Completed'), ('goal_completed', 'Learning Goal Completed'), ('course_completed', 'Course Completed')], max_length=30)),
+                ('criteria', models.JSONField(default=dict, help_text='Map of fact name to {operator: value} conditions, e.g. {"percentage_score": {"gte": 95}}')),
+                ('scope', models.CharField(choices=[('student', 'Once per Student'), ('course', 'Once per Course'), ('task', 'Once per Task'), ('object', 'Once per Event Object')], default='student', max_length=20)),
+                ('achievement_type', models.CharField(default='special', max_length=20)),
+                ('title', models.CharField(max_length=255)),
+                ('description', models.TextField(blank=True)),
+                ('badge_icon', models.CharField(blank=True, max_length=100)),
+                ('badge_color', models.CharField(default='#6366f1', max_length=7)),
+                ('points', models.PositiveIntegerField(default=0)),
+                ('is_active', models.BooleanField(default=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'ordering': ['event', 'key'],
+            },
+        ),
+        migrations.AddField(
+            model_name='studentachievement',
+            name='rule',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='awards', to='students.achievementrule'),
+        ),
+        migrations.AddField(
+            model_name='studentachievement',
+            name='scope_key',
+            field=models.CharField(blank=True, default='', help_text='Course, task or object the rule was awarded for', max_length=64),
+        ),
+        migrations.RunPython(seed_rules, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='studentachievement',
+            constraint=models.UniqueConstraint(condition=models.Q(('rule__isnull', False)), fields=('student', 'rule', 'scope_key'), name='unique_rule_award'),
+        ),
+    ]
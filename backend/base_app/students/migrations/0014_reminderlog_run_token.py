@@ -0,0 +1,18 @@
+# Generated by Django 4.2.23 on 2026-10-18 23:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('students', '0013_achievement_rules'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='reminderlog',
+            name='run_token',
+            field=models.UUIDField(blank=True, db_index=True, editable=False, help_text='Scheduler batch that inserted this row', null=True),
+        ),
+    ]
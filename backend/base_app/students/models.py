@@ -119,6 +119,7 @@ class Course(models.Model):
     learning_objectives = models.JSONField(default=list)
     tags = models.JSONField(default=list)
     thumbnail_url = models.URLField(blank=True)
+    required_task_count = models.PositiveIntegerField(default=0, help_text="Cached count of required course tasks")
     created_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -126,6 +127,23 @@ class Course(models.Model):
     def __str__(self):
         return self.name
 
+    def clean(self):
+        from .prerequisites import validate_prerequisites
+        validate_prerequisites(self)
+
+class CoursePrerequisite(models.Model):
+    """Normalized prerequisite edge: ``course`` requires ``prerequisite``"""
+    org = models.ForeignKey(Organization, on_delete=models.CASCADE, related_name='course_prerequisites')
+    course = models.ForeignKey(Course, on_delete=models.CASCADE, related_name='prerequisite_edges')
+    prerequisite = models.ForeignKey(Course, on_delete=models.CASCADE, related_name='dependent_edges')
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        unique_together = ('course', 'prerequisite')
+
+    def __str__(self):
+        return f"{self.course.name} requires {self.prerequisite.name}"
+
 class Cohort(models.Model):
     name = models.CharField(max_length=255)
     course = models.ForeignKey(Course, on_delete=models.CASCADE, related_name='cohorts')
@@ -275,4 +293,148 @@ class StudyGroupMembership(models.Model):
     def full_name(self):
         """Return full name combining first, middle, and last names"""
         names = [self.first_name, self.middle_name, self.last_name]
-        return ' '.join(filter(None, names)) or self.email
\ No newline at end of file
+        return ' '.join(filter(None, names)) or self.email
+
+# =================== STREAK TRACKING ===================
+
+class StudentActivityCalendar(models.Model):
+    """Compact per-student record of active days used by the streak engine.
+
+    Bit ``i`` of ``activity_bits`` is set when the student was active on
+    ``anchor_date + i`` days, in the student's own timezone. See
+    ``students.streaks`` for the code that maintains it.
+    """
+    user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='activity_calendar')
+    anchor_date = models.DateField(help_text="Local date represented by bit 0 of the activity bitmap")
+    activity_bits = models.BinaryField(default=bytes, help_text="Little-endian bitmap of active days")
+    last_active_date = models.DateField(null=True, blank=True)
+    current_streak = models.PositiveIntegerField(default=0, help_text="Run of active days ending on last_active_date")
+    longest_streak = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['last_active_date', 'current_streak']),
+        ]
+
+    def __str__(self):
+        return f"{self.user.email} - {self.current_streak} day streak"
+
+
+# =================== QUIZ ATTEMPT TRACKING ===================
+
+class QuizAttemptCounter(models.Model):
+    """Per-student, per-task attempt sequence used to number quiz attempts"""
+    student = models.ForeignKey(User, on_delete=models.CASCADE, related_name='quiz_attempt_counters')
+    task = models.ForeignKey('Task', on_delete=models.CASCADE, related_name='attempt_counters')
+    last_attempt_number = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ('student', 'task')
+
+    def __str__(self):
+        return f"{self.student.email} - {self.task.title} ({self.last_attempt_number} attempts)"
+
+
+# =================== REMINDER SCHEDULING ===================
+
+class ReminderLog(models.Model):
+    """Dedup record for scheduled reminders: one row per recipient, kind, target and day"""
+    
+    class Kind(TextChoices):
+        GOAL_DUE_TOMORROW = 'goal_due_tomorrow', 'Goal Due Tomorrow'
+        GOAL_DUE_NEXT_WEEK = 'goal_due_next_week', 'Goal Due Next Week'
+        STUDY_INACTIVE = 'study_inactive', 'Inactive Study Reminder'
+    
+    recipient = models.ForeignKey(User, on_delete=models.CASCADE, related_name='reminder_logs')
+    kind = models.CharField(max_length=30, choices=Kind.choices)
+    target = models.CharField(max_length=64, blank=True, help_text="Identifier of the reminded object, if any")
+    scheduled_for = models.DateField()
+    run_token = models.UUIDField(null=True, blank=True, db_index=True, editable=False, help_text="Scheduler batch that inserted this row")
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        unique_together = ('recipient', 'kind', 'target', 'scheduled_for')
+
+    def __str__(self):
+        return f"{self.recipient.email} - {self.kind} ({self.scheduled_for})"
+
+
+# =================== LEADERBOARDS ===================
+
+class LeaderboardEntry(models.Model):
+    """A student's running point total on one cohort or course leaderboard"""
+    
+    student = models.ForeignKey(User, on_delete=models.CASCADE, related_name='leaderboard_entries')
+    cohort = models.ForeignKey(Cohort, on_delete=models.CASCADE, null=True, blank=True, related_name='leaderboard_entries')
+    course = models.ForeignKey(Course, on_delete=models.CASCADE, null=True, blank=True, related_name='leaderboard_entries')
+    points = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['cohort', 'student'],
+                condition=models.Q(course__isnull=True),
+                name='unique_cohort_leaderboard_entry'
+            ),
+            models.UniqueConstraint(
+                fields=['course', 'student'],
+                condition=models.Q(cohort__isnull=True),
+                name='unique_course_leaderboard_entry'
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['cohort', '-points']),
+            models.Index(fields=['course', '-points']),
+        ]
+
+    def __str__(self):
+        board = self.cohort or self.course
+        return f"{self.student.email} - {board} ({self.points} points)"
+
+
+# =================== ACHIEVEMENT RULES ===================
+
+class AchievementRule(models.Model):
+    """Declarative achievement awarded when an event's facts meet ``criteria``"""
+    
+    class Event(TextChoices):
+        STREAK_UPDATED = 'streak_updated', 'Study Streak Updated'
+        ASSIGNMENT_GRADED = 'assignment_graded', 'Assignment Graded'
+        QUIZ_COMPLETED = 'quiz_completed', 'Quiz Completed'
+        GOAL_COMPLETED = 'goal_completed', 'Learning Goal Completed'
+        COURSE_COMPLETED = 'course_completed', 'Course Completed'
+    
+    class Scope(TextChoices):
+        STUDENT = 'student', 'Once per Student'
+        COURSE = 'course', 'Once per Course'
+        TASK = 'task', 'Once per Task'
+        OBJECT = 'object', 'Once per Event Object'
+    
+    key = models.SlugField(max_length=100, unique=True)
+    event = models.CharField(max_length=30, choices=Event.choices)
+    criteria = models.JSONField(
+        default=dict,
+        help_text="Map of fact name to {operator: value} conditions, e.g. {\"percentage_score\": {\"gte\": 95}}"
+    )
+    scope = models.CharField(max_length=20, choices=Scope.choices, default=Scope.STUDENT)
+    
+    # Awarded achievement; title and description are formatted with the event facts
+    achievement_type = models.CharField(max_length=20, default='special')
+    title = models.CharField(max_length=255)
+    description = models.TextField(blank=True)
+    badge_icon = models.CharField(max_length=100, blank=True)
+    badge_color = models.CharField(max_length=7, default='#6366f1')
+    points = models.PositiveIntegerField(default=0)
+    
+    is_active = models.BooleanField(default=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['event', 'key']
+
+    def __str__(self):
+        return f"{self.key} ({self.event})"
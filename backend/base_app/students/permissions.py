@@ -1,9 +1,13 @@
 from rest_framework import permissions
 from django.db.models import Q
 from .models import (
-    StudentProfile, StudentEnrollment, StudyGroup, StudyGroupMembership,
-    LearningSession, AssignmentSubmission, UserCohort, UserOrganization
+    StudentProfile, StudyGroup, StudyGroupMembership,
+    LearningSession, AssignmentSubmission, UserOrganization
 )
+from .authorization import student_context
+
+# Role, cohort and enrollment checks read the request's StudentAuthContext,
+# loaded once per request.
 
 
 class IsStudent(permissions.BasePermission):
@@ -14,16 +18,14 @@ class IsStudent(permissions.BasePermission):
         if not request.user.is_authenticated:
             return False
         
+        context = student_context(request)
+        
         # Check if user has student profile
-        if hasattr(request.user, 'student_profile'):
-            return request.user.student_profile.status == 'active'
+        if context.has_student_profile:
+            return context.profile_status == 'active'
         
         # Check if user has learner role in any cohort
-        return UserCohort.objects.filter(
-            user=request.user, 
-            role='learner',
-            status='active'
-        ).exists()
+        return bool(context.cohort_ids('learner', status='active'))
 
 
 class IsStudentOwner(permissions.BasePermission):
@@ -55,11 +57,7 @@ class IsStudentOrReadOnly(permissions.BasePermission):
             return False
         
         # Check if user is a student
-        return (hasattr(request.user, 'student_profile') or 
-                UserCohort.objects.filter(
-                    user=request.user, 
-                    role='learner'
-                ).exists())
+        return student_context(request).is_student
 
 
 class CanAccessEnrollment(permissions.BasePermission):
@@ -73,23 +71,17 @@ class CanAccessEnrollment(permissions.BasePermission):
         user = request.user
         
         # Student can access their own enrollment
-        if obj.student == user:
+        if obj.student_id == user.pk:
             return True
         
+        context = student_context(request)
+        
         # Mentors can access their students' enrollments
-        if UserCohort.objects.filter(
-            user=user,
-            cohort=obj.cohort,
-            role='mentor'
-        ).exists():
+        if context.has_cohort_role(obj.cohort_id, 'mentor'):
             return True
         
         # Organization admins can access enrollments in their org
-        if UserOrganization.objects.filter(
-            user=user,
-            org=obj.course.org,
-            role__in=['admin', 'owner']
-        ).exists():
+        if context.manages(obj.course.org_id):
             return True
         
         return False
@@ -124,11 +116,7 @@ class CanAccessStudyGroup(permissions.BasePermission):
             return True
         
         # Organization admins can access groups in their org
-        if UserOrganization.objects.filter(
-            user=user,
-            org=obj.organization,
-            role__in=['admin', 'owner']
-        ).exists():
+        if student_context(request).manages(obj.organization_id):
             return True
         
         return False
@@ -152,30 +140,21 @@ class CanJoinStudyGroup(permissions.BasePermission):
         if obj.is_full:
             return False
         
+        context = student_context(request)
+        
         # Check if user is in the same organization
-        if not UserOrganization.objects.filter(
-            user=user,
-            org=obj.organization
-        ).exists():
+        if not context.is_member_of(obj.organization_id):
             return False
         
         # Check if group has course/cohort restrictions
-        if obj.course:
+        if obj.course_id:
             # User must be enrolled in the course
-            if not StudentEnrollment.objects.filter(
-                student=user,
-                course=obj.course,
-                status__in=['enrolled', 'in_progress']
-            ).exists():
+            if not context.is_enrolled(obj.course_id):
                 return False
         
-        if obj.cohort:
+        if obj.cohort_id:
             # User must be in the cohort
-            if not UserCohort.objects.filter(
-                user=user,
-                cohort=obj.cohort,
-                role='learner'
-            ).exists():
+            if not context.has_cohort_role(obj.cohort_id, 'learner'):
                 return False
         
         return True
@@ -196,11 +175,7 @@ class CanModerateStudyGroup(permissions.BasePermission):
             return True
         
         # Organization admins can moderate groups in their org
-        if UserOrganization.objects.filter(
-            user=user,
-            org=obj.organization,
-            role__in=['admin', 'owner']
-        ).exists():
+        if student_context(request).manages(obj.organization_id):
             return True
         
         return False
@@ -235,17 +210,13 @@ class CanViewStudentProgress(permissions.BasePermission):
                 return True
         
         # Organization admins can view progress in their org
-        org = None
+        org_id = None
         if hasattr(obj, 'course') and obj.course:
-            org = obj.course.org
-        elif hasattr(obj, 'organization'):
-            org = obj.organization
-        
-        if org and UserOrganization.objects.filter(
-            user=user,
-            org=org,
-            role__in=['admin', 'owner']
-        ).exists():
+            org_id = obj.course.org_id
+        elif hasattr(obj, 'organization_id'):
+            org_id = obj.organization_id
+        
+        if student_context(request).manages(org_id):
             return True
         
         return False
@@ -260,11 +231,7 @@ class CanSubmitAssignment(permissions.BasePermission):
             return False
         
         # Only students can submit assignments
-        return (hasattr(request.user, 'student_profile') or 
-                UserCohort.objects.filter(
-                    user=request.user, 
-                    role='learner'
-                ).exists())
+        return student_context(request).is_student
 
     def has_object_permission(self, request, view, obj):
         if not request.user.is_authenticated:
@@ -291,12 +258,10 @@ class CanGradeAssignment(permissions.BasePermission):
         
         user = request.user
         
+        context = student_context(request)
+        
         # Organization admins can grade
-        if UserOrganization.objects.filter(
-            user=user,
-            org=obj.course.org,
-            role__in=['admin', 'owner']
-        ).exists():
+        if context.manages(obj.course.org_id):
             return True
         
         # Mentors can grade their students' assignments
@@ -309,10 +274,9 @@ class CanGradeAssignment(permissions.BasePermission):
             return True
         
         # Course instructors can grade (if they have mentor role in cohort)
-        if UserCohort.objects.filter(
-            user=user,
-            cohort__coursecohort__course=obj.course,
-            role='mentor'
+        mentor_cohort_ids = context.cohort_ids('mentor')
+        if mentor_cohort_ids and obj.course.coursecohort_set.filter(
+            cohort_id__in=mentor_cohort_ids
         ).exists():
             return True
         
@@ -333,13 +297,12 @@ class CanAccessLearningResource(permissions.BasePermission):
         if obj.student == user:
             return True
         
+        context = student_context(request)
+        
         # Public resources can be viewed by students in same context
         if obj.is_public:
             # Same organization
-            if obj.course and StudentEnrollment.objects.filter(
-                student=user,
-                course=obj.course
-            ).exists():
+            if obj.course_id and context.is_enrolled(obj.course_id, statuses=None):
                 return True
             
             # Same study group
@@ -351,11 +314,7 @@ class CanAccessLearningResource(permissions.BasePermission):
                 return True
         
         # Organization admins can access resources in their org
-        if obj.course and UserOrganization.objects.filter(
-            user=user,
-            org=obj.course.org,
-            role__in=['admin', 'owner']
-        ).exists():
+        if obj.course and context.manages(obj.course.org_id):
             return True
         
         return False
@@ -427,21 +386,13 @@ class CanAccessAnalytics(permissions.BasePermission):
             return True
         
         # Organization admins can access analytics for students in their org
-        if UserOrganization.objects.filter(
-            user=user,
-            role__in=['admin', 'owner']
-        ).exists():
+        admin_org_ids = student_context(request).managed_org_ids
+        if admin_org_ids:
             # Check if student is in any of the admin's organizations
-            student_orgs = UserOrganization.objects.filter(
-                user=obj.student
-            ).values_list('org_id', flat=True)
-            
-            admin_orgs = UserOrganization.objects.filter(
-                user=user,
-                role__in=['admin', 'owner']
-            ).values_list('org_id', flat=True)
-            
-            return bool(set(student_orgs).intersection(set(admin_orgs)))
+            return UserOrganization.objects.filter(
+                user_id=obj.student_id,
+                org_id__in=admin_org_ids
+            ).exists()
         
         return False
 
@@ -457,19 +408,15 @@ class StudentInSameOrganization(permissions.BasePermission):
         if not request.user.is_authenticated:
             return False
         
-        user_orgs = UserOrganization.objects.filter(
-            user=request.user
-        ).values_list('org_id', flat=True)
-        
         obj_org = None
-        if hasattr(obj, 'organization'):
-            obj_org = obj.organization.id
+        if hasattr(obj, 'organization_id'):
+            obj_org = obj.organization_id
         elif hasattr(obj, 'course') and obj.course:
-            obj_org = obj.course.org.id
-        elif hasattr(obj, 'org'):
-            obj_org = obj.org.id
+            obj_org = obj.course.org_id
+        elif hasattr(obj, 'org_id'):
+            obj_org = obj.org_id
         
-        return obj_org in user_orgs if obj_org else False
+        return student_context(request).is_member_of(obj_org) if obj_org else False
 
 
 class StudentInSameCohort(permissions.BasePermission):
@@ -483,14 +430,11 @@ class StudentInSameCohort(permissions.BasePermission):
         if not request.user.is_authenticated:
             return False
         
-        user_cohorts = UserCohort.objects.filter(
-            user=request.user,
-            role='learner'
-        ).values_list('cohort_id', flat=True)
+        user_cohorts = student_context(request).cohort_ids('learner')
         
         obj_cohort = None
-        if hasattr(obj, 'cohort'):
-            obj_cohort = obj.cohort.id
+        if hasattr(obj, 'cohort_id'):
+            obj_cohort = obj.cohort_id
         elif hasattr(obj, 'course') and obj.course:
             # Get cohorts for this course
             course_cohorts = obj.course.coursecohort_set.values_list('cohort_id', flat=True)
@@ -508,18 +452,10 @@ class StudentOrMentor(permissions.BasePermission):
         if not request.user.is_authenticated:
             return False
         
-        user = request.user
-        
-        # Check if user is a student
-        if (hasattr(user, 'student_profile') or 
-            UserCohort.objects.filter(user=user, role='learner').exists()):
-            return True
-        
-        # Check if user is a mentor
-        if UserCohort.objects.filter(user=user, role='mentor').exists():
-            return True
+        context = student_context(request)
         
-        return False
+        # Students or mentors
+        return context.is_student or context.is_mentor
 
 
 class StudentOrAdminReadOnly(permissions.BasePermission):
@@ -542,10 +478,7 @@ class StudentOrAdminReadOnly(permissions.BasePermission):
         
         # Admins have read-only access
         if request.method in permissions.SAFE_METHODS:
-            return UserOrganization.objects.filter(
-                user=user,
-                role__in=['admin', 'owner']
-            ).exists()
+            return student_context(request).is_org_admin
         
         return False
 
@@ -559,11 +492,7 @@ class EnrolledStudentOnly(permissions.BasePermission):
             return False
         
         # Check if user is a student
-        return (hasattr(request.user, 'student_profile') or 
-                UserCohort.objects.filter(
-                    user=request.user, 
-                    role='learner'
-                ).exists())
+        return student_context(request).is_student
 
     def has_object_permission(self, request, view, obj):
         if not request.user.is_authenticated:
@@ -586,11 +515,7 @@ class EnrolledStudentOnly(permissions.BasePermission):
             return False
         
         # Check if user is enrolled in the course
-        return StudentEnrollment.objects.filter(
-            student=user,
-            course=course,
-            status__in=['enrolled', 'in_progress']
-        ).exists()
+        return student_context(request).is_enrolled(course.pk)
 
 
 class ActiveStudentOnly(permissions.BasePermission):
@@ -601,14 +526,11 @@ class ActiveStudentOnly(permissions.BasePermission):
         if not request.user.is_authenticated:
             return False
         
+        context = student_context(request)
+        
         # Check if user has active student profile
-        try:
-            profile = request.user.student_profile
-            return profile.status == 'active'
-        except:
-            # Fallback to checking active learner role
-            return UserCohort.objects.filter(
-                user=request.user,
-                role='learner',
-                status='active'
-            ).exists() 
\ No newline at end of file
+        if context.has_student_profile:
+            return context.profile_status == 'active'
+        
+        # Fallback to checking active learner role
+        return bool(context.cohort_ids('learner', status='active')) 
\ No newline at end of file
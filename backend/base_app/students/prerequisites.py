@@ -0,0 +1,190 @@
+"""
+Course prerequisite graph.
+
+``Course.prerequisites`` (a JSON list of course ids) is normalized into
+``CoursePrerequisite`` edges whenever a course is saved. Each organization's
+graph and its transitive closure are cached under a version number that is
+bumped on every edit, so "which courses can this student take now" is a
+subset test of each course's closure against the student's completed
+courses. ``Course.clean()`` rejects unknown ids and edits that would
+introduce a cycle. Saves that skip ``clean()``, such as plain ORM and
+serializer saves, still never store an edge that closes a cycle: the edge
+sync leaves it out. Deleting a course removes it from its dependents' lists.
+"""
+import logging
+
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+
+from .models import Course, CoursePrerequisite, StudentEnrollment
+
+logger = logging.getLogger(__name__)
+
+GRAPH_CACHE_TIMEOUT = 60 * 60 * 24
+
+
+# =================== GRAPH CACHE ===================
+
+def _version_key(org_id):
+    return f'students:prerequisite_version:{org_id}'
+
+
+def bump_graph_version(org_id):
+    """Invalidate an organization's cached prerequisite graph"""
+    key = _version_key(org_id)
+    cache.add(key, 0, None)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, 1, None)
+
+
+def _transitive_closure(graph):
+    """Map each course to every course it transitively requires"""
+    closure = {}
+    for start in graph:
+        seen = set()
+        stack = list(graph[start])
+        while stack:
+            node = stack.pop()
+            if node in seen:
+                continue
+            seen.add(node)
+            if node in closure:
+                seen |= closure[node]
+            else:
+                stack.extend(graph.get(node, ()))
+        closure[start] = frozenset(seen)
+    return closure
+
+
+def prerequisite_closure(org_id):
+    """Cached ``{course_id: frozenset(required course ids)}`` for an organization"""
+    key = f'students:prerequisite_closure:{org_id}:{cache.get(_version_key(org_id), 0)}'
+    closure = cache.get(key)
+    if closure is None:
+        graph = {}
+        for course_id, prerequisite_id in CoursePrerequisite.objects.filter(
+            org_id=org_id
+        ).values_list('course_id', 'prerequisite_id'):
+            graph.setdefault(course_id, set()).add(prerequisite_id)
+        closure = _transitive_closure(graph)
+        cache.set(key, closure, GRAPH_CACHE_TIMEOUT)
+    return closure
+
+
+# =================== EDITS ===================
+
+def validate_prerequisites(course):
+    """Validate ``course.prerequisites``; called from ``Course.clean()``.
+
+    Raises ``ValidationError`` for unknown ids, courses from another
+    organization, or edits that would create a cycle.
+    """
+    try:
+        prerequisite_ids = {int(value) for value in course.prerequisites or []}
+    except (TypeError, ValueError):
+        raise ValidationError({'prerequisites': 'Prerequisites must be a list of course IDs.'})
+
+    if not prerequisite_ids:
+        return
+
+    if course.pk in prerequisite_ids:
+        raise ValidationError({'prerequisites': 'A course cannot be its own prerequisite.'})
+
+    found = set(Course.objects.filter(
+        org_id=course.org_id,
+        pk__in=prerequisite_ids
+    ).values_list('pk', flat=True))
+    if found != prerequisite_ids:
+        missing = ', '.join(str(pk) for pk in sorted(prerequisite_ids - found))
+        raise ValidationError({'prerequisites': f'Unknown prerequisite courses: {missing}.'})
+
+    if course.pk:
+        closure = prerequisite_closure(course.org_id)
+        if any(course.pk in closure.get(pk, ()) for pk in prerequisite_ids):
+            raise ValidationError({'prerequisites': 'Prerequisites cannot form a cycle.'})
+
+
+def prerequisite_ids(course):
+    """Ids in ``course.prerequisites`` naming another course of its organization.
+
+    Saving never fails on prerequisites: entries that do not resolve are
+    left out of the edges rather than raising.
+    """
+    ids = set()
+    for value in course.prerequisites or []:
+        try:
+            ids.add(int(value))
+        except (TypeError, ValueError):
+            continue
+    ids.discard(course.pk)
+    if not ids:
+        return ids
+    return set(Course.objects.filter(
+        org_id=course.org_id,
+        pk__in=ids
+    ).values_list('pk', flat=True))
+
+
+def sync_prerequisite_edges(course, prerequisite_ids):
+    """Replace a course's edges with ``prerequisite_ids``.
+
+    An added edge to a course that already requires ``course`` would close
+    a cycle and lock both courses for good, so it is left out and logged.
+    """
+    existing = set(CoursePrerequisite.objects.filter(
+        course=course
+    ).values_list('prerequisite_id', flat=True))
+
+    removed = existing - prerequisite_ids
+    added = prerequisite_ids - existing
+    if added:
+        closure = prerequisite_closure(course.org_id)
+        cyclic = {pk for pk in added if course.pk in closure.get(pk, ())}
+        if cyclic:
+            logger.warning(
+                'Refusing prerequisite edges of course %s that form a cycle: %s',
+                course.pk, sorted(cyclic)
+            )
+            added -= cyclic
+    if not removed and not added:
+        return
+
+    if removed:
+        CoursePrerequisite.objects.filter(course=course, prerequisite_id__in=removed).delete()
+    CoursePrerequisite.objects.bulk_create([
+        CoursePrerequisite(course=course, prerequisite_id=pk, org_id=course.org_id)
+        for pk in added
+    ])
+    bump_graph_version(course.org_id)
+
+
+def remove_prerequisite(course_ids, prerequisite_id):
+    """Drop a deleted course from the ``prerequisites`` lists of its dependents"""
+    for course in Course.objects.filter(pk__in=course_ids).only('pk', 'prerequisites'):
+        remaining = [value for value in course.prerequisites if str(value) != str(prerequisite_id)]
+        # Edges to the deleted course are already gone, so no signals are needed
+        Course.objects.filter(pk=course.pk).update(prerequisites=remaining)
+
+
+# =================== UNLOCK EVALUATION ===================
+
+def completed_course_ids(user):
+    return set(StudentEnrollment.objects.filter(
+        student=user,
+        status='completed'
+    ).values_list('course_id', flat=True))
+
+
+def is_unlocked(course_id, closure, completed):
+    """Check whether every transitive prerequisite of a course is completed"""
+    return closure.get(course_id, frozenset()) <= completed
+
+
+def missing_prerequisites(course, user):
+    """Ids of prerequisite courses ``user`` still has to complete"""
+    required = prerequisite_closure(course.org_id).get(course.pk, frozenset())
+    if not required:
+        return set()
+    return set(required - completed_course_ids(user))
@@ -0,0 +1,134 @@
+"""
+Enrollment progress counters.
+
+``Course.required_task_count`` caches the number of required ``CourseTask``
+rows and is refreshed when those rows change. Each ``StudentEnrollment``
+keeps ``passed_required_tasks`` plus a running score sum/count, incremented
+with a single UPDATE when a required task is first passed, so progress and
+final grade are computed without counting completions.
+
+``recalculate_enrollment_progress`` rebuilds the counters from
+``TaskCompletion`` rows; it is used when a pass is revoked (e.g. a regrade)
+and to reconcile drift. ``recalculate_course_progress`` does the same for
+every enrollment of a course when its required tasks change.
+"""
+from decimal import Decimal
+
+from django.db.models import Count, F, OuterRef, Subquery, Sum, Q, IntegerField, DecimalField
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .models import Course, CourseTask, StudentEnrollment, TaskCompletion
+
+
+# =================== COURSE TASK COUNTS ===================
+
+def refresh_required_task_count(course_id):
+    """Recount a course's required tasks into ``Course.required_task_count``"""
+    required = CourseTask.objects.filter(
+        course=OuterRef('pk'),
+        is_required=True
+    ).order_by().values('course').annotate(total=Count('id')).values('total')
+
+    Course.objects.filter(pk=course_id).update(
+        required_task_count=Coalesce(Subquery(required, output_field=IntegerField()), 0)
+    )
+
+
+# =================== ENROLLMENT PROGRESS ===================
+
+def apply_progress(enrollment):
+    """Derive progress, completion and grade from the enrollment counters and save"""
+    total = enrollment.course.required_task_count
+    if total == 0:
+        return enrollment
+
+    progress = min(Decimal(enrollment.passed_required_tasks * 100) / total, Decimal(100))
+    enrollment.progress_percentage = round(progress, 2)
+    update_fields = ['progress_percentage', 'updated_at']
+
+    if progress >= 100 and enrollment.status != 'completed':
+        enrollment.status = 'completed'
+        enrollment.completed_at = timezone.now()
+        update_fields += ['status', 'completed_at']
+
+        if enrollment.score_count:
+            enrollment.grade = round(enrollment.score_sum / enrollment.score_count, 2)
+            update_fields.append('grade')
+
+    enrollment.save(update_fields=update_fields)
+    return enrollment
+
+
+def _enrollments_requiring(user_id, task_id):
+    return StudentEnrollment.objects.filter(
+        student_id=user_id,
+        course__coursetask__task_id=task_id,
+        course__coursetask__is_required=True
+    )
+
+
+def record_task_pass(completion):
+    """Count a newly passed task towards every enrollment that requires it"""
+    enrollments = _enrollments_requiring(completion.user_id, completion.task_id)
+    scored = completion.score is not None
+
+    updated = enrollments.update(
+        passed_required_tasks=F('passed_required_tasks') + 1,
+        score_sum=F('score_sum') + (completion.score if scored else 0),
+        score_count=F('score_count') + (1 if scored else 0)
+    )
+    if updated:
+        for enrollment in enrollments.select_related('course'):
+            apply_progress(enrollment)
+
+
+def recalculate_enrollment_progress(enrollment):
+    """Rebuild an enrollment's counters from its task completions"""
+    totals = TaskCompletion.objects.filter(
+        user_id=enrollment.student_id,
+        task__coursetask__course_id=enrollment.course_id,
+        task__coursetask__is_required=True,
+        is_passed=True
+    ).aggregate(
+        passed=Count('id'),
+        score_sum=Sum('score'),
+        score_count=Count('id', filter=Q(score__isnull=False))
+    )
+
+    enrollment.passed_required_tasks = totals['passed']
+    enrollment.score_sum = totals['score_sum'] or 0
+    enrollment.score_count = totals['score_count']
+    enrollment.save(update_fields=['passed_required_tasks', 'score_sum', 'score_count'])
+    return apply_progress(enrollment)
+
+
+def recalculate_course_progress(course_id):
+    """Rebuild the counters of every enrollment in a course with one UPDATE.
+
+    Used when the course's required tasks change, which changes what each
+    enrollment's existing passes count towards.
+    """
+    passed = TaskCompletion.objects.filter(
+        user_id=OuterRef('student_id'),
+        task__coursetask__course_id=OuterRef('course_id'),
+        task__coursetask__is_required=True,
+        is_passed=True
+    ).order_by().values('user_id')
+    score = DecimalField(max_digits=10, decimal_places=2)
+
+    enrollments = StudentEnrollment.objects.filter(course_id=course_id)
+    enrollments.update(
+        passed_required_tasks=Coalesce(Subquery(
+            passed.annotate(total=Count('id')).values('total'), output_field=IntegerField()
+        ), 0),
+        score_sum=Coalesce(Subquery(
+            passed.annotate(total=Sum('score')).values('total'), output_field=score
+        ), 0, output_field=score),
+        score_count=Coalesce(Subquery(
+            passed.annotate(total=Count('id', filter=Q(score__isnull=False))).values('total'),
+            output_field=IntegerField()
+        ), 0)
+    )
+    for enrollment in enrollments.select_related('course').iterator():
+        apply_progress(enrollment)
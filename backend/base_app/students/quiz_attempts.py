@@ -0,0 +1,145 @@
+"""
+Quiz attempt lifecycle.
+
+Attempt numbers are handed out from a per-(student, task) counter row that is
+locked with ``SELECT ... FOR UPDATE``, so concurrent starts for the same task
+serialize on that row instead of racing on ``MAX(attempt_number) + 1``. The
+same lock is where ``Question.max_attempts`` is enforced.
+
+Timed attempts take ``Task.time_limit_minutes`` and get an ``expires_at``
+deadline when they start; the client never chooses its own limit. Answers
+can only be saved before the deadline (``accepts_answers``), so completing
+an attempt late grades just the answers saved in time and records it as
+``timed_out``. ``expire_stale_attempts`` moves abandoned timed attempts to
+``timed_out`` in a single indexed UPDATE.
+"""
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import F, Max, Min
+from django.utils import timezone
+
+from .models import QuizAttempt, QuizAttemptCounter, Question, Task
+from .grading import GRADE_FIELDS, answer_key, apply_score, grade_attempt, record_task_completion
+
+# Allowance for network latency between the client's timer and the server
+DEADLINE_GRACE_SECONDS = 30
+
+
+class AttemptLimitReached(Exception):
+    """Raised when a student has used every attempt allowed for a task"""
+
+
+# =================== ATTEMPT ALLOCATION ===================
+
+def attempt_limit(task_id):
+    """Strictest ``max_attempts`` across the task's questions (``None`` = unlimited)"""
+    return Question.objects.filter(
+        task_id=task_id,
+        max_attempts__isnull=False
+    ).aggregate(limit=Min('max_attempts'))['limit']
+
+
+def allocate_attempt_number(student, task_id):
+    """Reserve the next attempt number for ``student`` on ``task_id``.
+
+    Must run inside a transaction: the counter row stays locked until it
+    commits, so the attempt should be created in the same transaction.
+    """
+    counter, created = QuizAttemptCounter.objects.select_for_update().get_or_create(
+        student=student,
+        task_id=task_id,
+        defaults={
+            # Seed from attempts made before the counter existed
+            'last_attempt_number': lambda: QuizAttempt.objects.filter(
+                student=student, task_id=task_id
+            ).aggregate(last=Max('attempt_number'))['last'] or 0
+        }
+    )
+
+    limit = attempt_limit(task_id)
+    if limit is not None and counter.last_attempt_number >= limit:
+        raise AttemptLimitReached(f"Maximum of {limit} attempts reached for this quiz")
+
+    counter.last_attempt_number += 1
+    counter.save(update_fields=['last_attempt_number', 'updated_at'])
+    return counter.last_attempt_number
+
+
+def attempt_deadline(time_limit_minutes, started_at=None):
+    """Deadline for an attempt with the given time limit (``None`` if untimed)"""
+    if not time_limit_minutes:
+        return None
+    started_at = started_at or timezone.now()
+    return started_at + timedelta(minutes=time_limit_minutes)
+
+
+def task_time_limit(task_id):
+    """The task's attempt time limit in minutes (``None`` if untimed)"""
+    return Task.objects.filter(pk=task_id).values_list('time_limit_minutes', flat=True).first()
+
+
+def start_attempt(serializer, student):
+    """Save a new attempt from a validated ``QuizAttemptCreateSerializer``"""
+    data = serializer.validated_data
+    time_limit = task_time_limit(data['task_id'])
+    with transaction.atomic():
+        attempt_number = allocate_attempt_number(student, data['task_id'])
+        return serializer.save(
+            student=student,
+            attempt_number=attempt_number,
+            time_limit_minutes=time_limit,
+            expires_at=attempt_deadline(time_limit)
+        )
+
+
+# =================== COMPLETION AND EXPIRY ===================
+
+def is_expired(attempt, now=None):
+    """Check whether a timed attempt is past its deadline (plus grace)"""
+    if attempt.expires_at is None:
+        return False
+    now = now or timezone.now()
+    return now > attempt.expires_at + timedelta(seconds=DEADLINE_GRACE_SECONDS)
+
+
+def accepts_answers(attempt, now=None):
+    """Check whether answers may still be saved on an attempt"""
+    return attempt.status == 'in_progress' and not is_expired(attempt, now)
+
+
+def complete_attempt(attempt, now=None):
+    """Grade and complete an attempt, recording it as timed out if submitted late.
+
+    Answer writes are refused once the deadline passes, so a late completion
+    grades only the answers saved in time.
+    """
+    if is_expired(attempt, now):
+        apply_score(attempt, answer_key(attempt.task))
+        attempt.status = 'timed_out'
+        attempt.completed_at = attempt.expires_at
+        attempt.time_spent_minutes = attempt.time_limit_minutes
+        attempt.save(update_fields=GRADE_FIELDS + ['status', 'completed_at', 'time_spent_minutes', 'updated_at'])
+        record_task_completion(attempt)
+        return attempt
+
+    return grade_attempt(attempt)
+
+
+def expire_stale_attempts(now=None):
+    """Move every in-progress attempt past its deadline to ``timed_out``.
+
+    Runs as one UPDATE over the ``(status, expires_at)`` index and returns the
+    number of attempts expired.
+    """
+    now = now or timezone.now()
+    cutoff = now - timedelta(seconds=DEADLINE_GRACE_SECONDS)
+    return QuizAttempt.objects.filter(
+        status='in_progress',
+        expires_at__lt=cutoff
+    ).update(
+        status='timed_out',
+        completed_at=F('expires_at'),
+        time_spent_minutes=F('time_limit_minutes'),
+        updated_at=now
+    )
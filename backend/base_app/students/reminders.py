@@ -0,0 +1,194 @@
+"""
+Batched reminder scheduler.
+
+Due reminders are selected with set-based queries, deduplicated against
+``ReminderLog`` (unique on recipient, kind, target and day) and inserted with
+``bulk_create`` in batches. A notification is only created for log rows the
+batch itself inserted, so overlapping runs cannot both send one. Every entry point takes an optional
+``[min_user_id, max_user_id)`` range so the ``send_reminders`` management
+command can be sharded across processes without overlapping recipients.
+"""
+import uuid
+from datetime import timedelta
+from itertools import groupby, islice
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .models import (
+    Course, LearningGoal, ReminderLog, StudentEnrollment, StudentNotification,
+    User
+)
+from .signals import send_notification_emails
+
+REMINDER_BATCH_SIZE = 500
+INACTIVE_DAYS = 3
+MAX_REMINDER_COURSES = 3
+OPEN_GOAL_STATUSES = ['not_started', 'in_progress']
+
+GOAL_REMINDERS = [
+    (
+        ReminderLog.Kind.GOAL_DUE_TOMORROW, 1, StudentNotification.Priority.URGENT,
+        'Goal Due Tomorrow!', 'Your goal "{title}" is due tomorrow. Don\'t forget to complete it!'
+    ),
+    (
+        ReminderLog.Kind.GOAL_DUE_NEXT_WEEK, 7, StudentNotification.Priority.MEDIUM,
+        'Goal Due Next Week', 'Reminder: Your goal "{title}" is due next week.'
+    ),
+]
+
+
+# =================== DELIVERY ===================
+
+def _in_user_range(queryset, field, min_user_id=None, max_user_id=None):
+    if min_user_id is not None:
+        queryset = queryset.filter(**{f'{field}__gte': min_user_id})
+    if max_user_id is not None:
+        queryset = queryset.filter(**{f'{field}__lt': max_user_id})
+    return queryset
+
+
+def _send_priority_emails(notifications):
+    """Email high priority notifications, as the post_save handler would"""
+    if not getattr(settings, 'SEND_STUDENT_EMAILS', True):
+        return
+
+    priority = [n for n in notifications if n.priority in ['high', 'urgent']]
+    if not priority:
+        return
+
+    recipients = User.objects.filter(
+        id__in={n.recipient_id for n in priority},
+        student_profile__email_notifications=True
+    ).in_bulk()
+    courses = Course.objects.in_bulk({n.course_id for n in priority if n.course_id})
+
+    opted_in = []
+    for notification in priority:
+        if notification.recipient_id in recipients:
+            notification.recipient = recipients[notification.recipient_id]
+            notification.course = courses.get(notification.course_id)
+            opted_in.append(notification)
+
+    send_notification_emails(opted_in)
+
+
+def _deliver_batch(kind, day, batch):
+    """Insert notifications for ``(recipient_id, target, notification)`` entries not yet sent.
+
+    Log rows are inserted first under a batch token; a row that conflicts
+    with one inserted by an overlapping run is skipped, so only entries whose
+    row this batch actually inserted get a notification.
+    """
+    run_token = uuid.uuid4()
+    with transaction.atomic():
+        ReminderLog.objects.bulk_create([
+            ReminderLog(
+                recipient_id=recipient_id, kind=kind, target=target,
+                scheduled_for=day, run_token=run_token
+            )
+            for recipient_id, target, _ in batch
+        ], ignore_conflicts=True)
+
+        inserted = set(ReminderLog.objects.filter(run_token=run_token).values_list('recipient_id', 'target'))
+        fresh = [entry for entry in batch if (entry[0], entry[1]) in inserted]
+        if not fresh:
+            return []
+
+        notifications = StudentNotification.objects.bulk_create(
+            [notification for _, _, notification in fresh]
+        )
+
+    return notifications
+
+
+def deliver_reminders(kind, day, reminders, batch_size=REMINDER_BATCH_SIZE):
+    """Deliver an iterable of reminders in batches; returns the number created"""
+    reminders = iter(reminders)
+    created = 0
+    while True:
+        batch = list(islice(reminders, batch_size))
+        if not batch:
+            break
+        notifications = _deliver_batch(kind, day, batch)
+        _send_priority_emails(notifications)
+        created += len(notifications)
+    return created
+
+
+# =================== SCHEDULERS ===================
+
+def schedule_goal_reminders(day=None, min_user_id=None, max_user_id=None):
+    """Remind students of goals due tomorrow and next week"""
+    day = day or timezone.now().date()
+    created = 0
+
+    for kind, days_ahead, priority, title, message in GOAL_REMINDERS:
+        goals = _in_user_range(
+            LearningGoal.objects.filter(
+                target_date=day + timedelta(days=days_ahead),
+                status__in=OPEN_GOAL_STATUSES
+            ),
+            'student_id', min_user_id, max_user_id
+        ).order_by('student_id').values_list('student_id', 'uuid', 'title', 'course_id')
+
+        reminders = (
+            (student_id, str(goal_uuid), StudentNotification(
+                recipient_id=student_id,
+                notification_type=StudentNotification.Type.GOAL_REMINDER,
+                priority=priority,
+                title=title,
+                message=message.format(title=goal_title),
+                course_id=course_id,
+                action_url=f'/goals/{goal_uuid}/',
+                action_text='Work on Goal',
+                metadata={'goal_id': str(goal_uuid)}
+            ))
+            for student_id, goal_uuid, goal_title, course_id in goals.iterator()
+        )
+        created += deliver_reminders(kind, day, reminders)
+
+    return created
+
+
+def schedule_study_reminders(day=None, min_user_id=None, max_user_id=None):
+    """Nudge active students who have not studied recently"""
+    now = timezone.now()
+    day = day or now.date()
+
+    inactive_students = _in_user_range(
+        User.objects.filter(
+            student_profile__status='active',
+            student_profile__email_notifications=True
+        ).exclude(
+            learning_sessions__started_at__gte=now - timedelta(days=INACTIVE_DAYS)
+        ),
+        'id', min_user_id, max_user_id
+    ).values('id')
+
+    enrollments = StudentEnrollment.objects.filter(
+        student_id__in=inactive_students,
+        status='in_progress'
+    ).order_by('student_id', 'id').values_list('student_id', 'course__name')
+
+    def reminders():
+        for student_id, rows in groupby(enrollments.iterator(), key=lambda row: row[0]):
+            course_names = ', '.join(name for _, name in islice(rows, MAX_REMINDER_COURSES))
+            yield student_id, '', StudentNotification(
+                recipient_id=student_id,
+                notification_type=StudentNotification.Type.STUDY_REMINDER,
+                priority=StudentNotification.Priority.LOW,
+                title='Time to Study!',
+                message=f'You haven\'t studied in a while. Continue with: {course_names}',
+                action_url='/dashboard/',
+                action_text='Start Learning'
+            )
+
+    return deliver_reminders(ReminderLog.Kind.STUDY_INACTIVE, day, reminders())
+
+
+SCHEDULERS = {
+    'goals': schedule_goal_reminders,
+    'study': schedule_study_reminders,
+}
@@ -6,6 +6,8 @@ from .models import (
     QuizAttempt, StudentNotification, StudentAnalytics, StudentAchievement,
     Organization, Cohort, Course, Task, Question, TaskCompletion
 )
+from .prerequisites import missing_prerequisites
+from .quiz_attempts import accepts_answers
 
 User = get_user_model()
 
@@ -141,6 +143,29 @@ class StudentEnrollmentSerializer(serializers.ModelSerializer):
             'id', 'uuid', 'enrolled_at', 'certificate_issued', 'certificate_url',
             'is_overdue', 'days_since_enrollment', 'created_at', 'updated_at'
         ]
+    
+    def validate(self, attrs):
+        """Require the course's prerequisites to be completed before enrolling"""
+        course_id = attrs.get('course_id')
+        if course_id is None:
+            return attrs
+        
+        course = Course.objects.filter(pk=course_id).first()
+        if course is None:
+            raise serializers.ValidationError({'course_id': 'Course not found.'})
+        
+        if 'student_id' in attrs:
+            student = User.objects.filter(pk=attrs['student_id']).first()
+        else:
+            student = self.context['request'].user
+        
+        missing = missing_prerequisites(course, student) if student else set()
+        if missing:
+            names = Course.objects.filter(pk__in=missing).values_list('name', flat=True)
+            raise serializers.ValidationError({
+                'course_id': f"Complete the prerequisite courses first: {', '.join(sorted(names))}."
+            })
+        return attrs
 
 
 # =================== LEARNING SESSIONS ===================
@@ -351,26 +376,30 @@ class QuizAttemptSerializer(serializers.ModelSerializer):
     course = CourseBasicSerializer(read_only=True)
     accuracy_rate = serializers.ReadOnlyField()
     
-    # Write-only fields
-    task_id = serializers.IntegerField(write_only=True)
-    course_id = serializers.IntegerField(write_only=True)
-    
     class Meta:
         model = QuizAttempt
         fields = [
             'id', 'uuid', 'student', 'task', 'course', 'attempt_number',
             'status', 'started_at', 'completed_at', 'time_limit_minutes',
-            'time_spent_minutes', 'score', 'max_score', 'percentage_score',
+            'expires_at', 'time_spent_minutes', 'score', 'max_score', 'percentage_score',
             'is_passed', 'total_questions', 'questions_answered', 'correct_answers',
             'answers', 'question_order', 'feedback_shown', 'can_retake',
-            'review_mode', 'accuracy_rate', 'created_at', 'updated_at',
-            'task_id', 'course_id'
+            'review_mode', 'accuracy_rate', 'created_at', 'updated_at'
         ]
+        # Grading, status and timing are set by the server only
         read_only_fields = [
-            'id', 'uuid', 'student', 'attempt_number', 'started_at',
-            'completed_at', 'time_spent_minutes', 'percentage_score',
-            'accuracy_rate', 'created_at', 'updated_at'
+            'id', 'uuid', 'student', 'attempt_number', 'status', 'started_at',
+            'completed_at', 'time_limit_minutes', 'expires_at', 'time_spent_minutes',
+            'score', 'max_score', 'percentage_score', 'is_passed', 'total_questions',
+            'questions_answered', 'correct_answers', 'can_retake', 'accuracy_rate',
+            'created_at', 'updated_at'
         ]
+    
+    def validate(self, attrs):
+        """Refuse answers once the attempt is completed or past its deadline"""
+        if 'answers' in attrs and self.instance is not None and not accepts_answers(self.instance):
+            raise serializers.ValidationError({'answers': 'This attempt no longer accepts answers.'})
+        return attrs
 
 
 class QuizAttemptCreateSerializer(serializers.ModelSerializer):
@@ -380,7 +409,7 @@ class QuizAttemptCreateSerializer(serializers.ModelSerializer):
     
     class Meta:
         model = QuizAttempt
-        fields = ['task_id', 'course_id', 'time_limit_minutes']
+        fields = ['task_id', 'course_id']
 
 
 # =================== NOTIFICATIONS ===================
@@ -1,17 +1,32 @@
-from django.db.models.signals import post_save, post_delete, pre_save
+from django.db.models.signals import post_save, post_delete, pre_delete, pre_save
 from django.dispatch import receiver
 from django.utils import timezone
-from django.core.mail import send_mail
-from django.template.loader import render_to_string
 from django.conf import settings
 from datetime import timedelta, datetime
 import logging
 
+from admin_flow.email_rendering import render_email, render_email_batch
+from admin_flow.outbox import queue_email, queue_emails
+from admin_flow.cloning import course_graph_created
+
 from .models import (
     StudentProfile, StudentEnrollment, LearningSession, AssignmentSubmission,
     StudyGroup, StudyGroupMembership, LearningGoal, QuizAttempt,
     StudentNotification, StudentAnalytics, StudentAchievement,
-    TaskCompletion, User, Course, Task
+    TaskCompletion, User, Course, Task, Question, CourseTask, Organization,
+    AchievementRule, CoursePrerequisite
+)
+from .streaks import record_activity, sync_profile
+from .stats import invalidate_student_stats
+from .progress import record_task_pass, recalculate_course_progress, refresh_required_task_count
+from .catalog import bump_catalog_version
+from .prerequisites import (
+    bump_graph_version, prerequisite_ids, remove_prerequisite, sync_prerequisite_edges
+)
+from .leaderboards import award_achievement_points, award_task_points
+from .achievements import (
+    queue_events, bump_rules_version, streak_event, assignment_graded_event,
+    quiz_completed_event, goal_completed_event, course_completed_event
 )
 
 logger = logging.getLogger(__name__)
@@ -22,6 +37,9 @@ logger = logging.getLogger(__name__)
 @receiver(post_save, sender=StudentEnrollment)
 def handle_enrollment_created(sender, instance, created, **kwargs):
     """Handle new student enrollment"""
+    # Enrollment counts and statuses feed the cached stats
+    invalidate_student_stats(instance.student_id)
+    
     if created:
         # Send welcome notification
         StudentNotification.objects.create(
@@ -59,24 +77,11 @@ def handle_enrollment_created(sender, instance, created, **kwargs):
 def handle_enrollment_completion(sender, instance, **kwargs):
     """Handle course completion"""
     if instance.status == 'completed' and instance.completed_at:
-        # Create achievement
-        StudentAchievement.objects.get_or_create(
-            student=instance.student,
-            course=instance.course,
-            achievement_type=StudentAchievement.Type.COMPLETION,
-            defaults={
-                'title': f'Course Completed: {instance.course.name}',
-                'description': f'Successfully completed {instance.course.name}',
-                'badge_icon': 'graduation-cap',
-                'badge_color': '#10B981',
-                'points_earned': 100,
-                'criteria_met': {
-                    'course_id': instance.course.id,
-                    'completion_date': instance.completed_at.isoformat(),
-                    'final_grade': float(instance.grade) if instance.grade else 0
-                }
-            }
-        )
+        # Award completion achievements
+        queue_events([course_completed_event(
+            instance.student_id, instance.course_id, instance.course.name,
+            instance.completed_at, instance.grade
+        )])
         
         # Update student profile
         if hasattr(instance.student, 'student_profile'):
@@ -103,36 +108,22 @@ def handle_enrollment_completion(sender, instance, **kwargs):
 def handle_session_completed(sender, instance, **kwargs):
     """Handle completed learning session"""
     if instance.status == 'completed' and instance.ended_at:
-        # Update student profile activity
+        # Update student profile activity and streak in a single save
         if hasattr(instance.student, 'student_profile'):
             profile = instance.student.student_profile
+            previous_streak, calendar = record_activity(instance.student, instance.ended_at)
             profile.total_study_hours += (instance.total_duration_minutes // 60)
-            profile.update_streak()
+            sync_profile(profile, calendar)
             profile.save()
-        
-        # Check for study streak achievements
-        if hasattr(instance.student, 'student_profile'):
-            streak_days = instance.student.student_profile.streak_days
             
-            # Achievement milestones
-            milestones = [7, 30, 60, 100, 365]
-            for milestone in milestones:
-                if streak_days == milestone:
-                    StudentAchievement.objects.get_or_create(
-                        student=instance.student,
-                        achievement_type=StudentAchievement.Type.STREAK,
-                        title=f'{milestone}-Day Study Streak',
-                        defaults={
-                            'description': f'Maintained a {milestone}-day consecutive study streak',
-                            'badge_icon': 'fire',
-                            'badge_color': '#F59E0B',
-                            'points_earned': milestone // 7 * 10,
-                            'criteria_met': {'streak_days': milestone}
-                        }
-                    )
+            # Award streak achievements when the streak grows
+            if calendar.current_streak > previous_streak:
+                queue_events([streak_event(instance.student_id, calendar.current_streak)])
         
         # Update daily analytics
         update_daily_student_analytics(instance.student, timezone.now().date())
+        
+        invalidate_student_stats(instance.student_id)
 
 
 # =================== ASSIGNMENT SIGNALS ===================
@@ -156,6 +147,8 @@ def handle_assignment_submitted(sender, instance, created, **kwargs):
             action_url=f'/assignments/{instance.uuid}/',
             action_text='View Submission'
         )
+        
+        invalidate_student_stats(instance.student_id)
 
 
 @receiver(post_save, sender=AssignmentSubmission)
@@ -179,24 +172,13 @@ def handle_assignment_graded(sender, instance, **kwargs):
             action_text='View Feedback'
         )
         
-        # Check for high performance achievement
-        if instance.percentage_score >= 95:
-            StudentAchievement.objects.get_or_create(
-                student=instance.student,
-                task=instance.task,
-                achievement_type=StudentAchievement.Type.PERFORMANCE,
-                title='Excellence in Assignment',
-                defaults={
-                    'description': f'Scored {instance.percentage_score:.1f}% on {instance.task.title}',
-                    'badge_icon': 'star',
-                    'badge_color': '#8B5CF6',
-                    'points_earned': 25,
-                    'criteria_met': {
-                        'assignment_id': instance.id,
-                        'score': float(instance.percentage_score)
-                    }
-                }
-            )
+        # Award performance achievements
+        queue_events([assignment_graded_event(
+            instance.student_id, instance.id, instance.task_id, instance.course_id,
+            instance.task.title, instance.score, instance.max_score
+        )])
+        
+        invalidate_student_stats(instance.student_id)
 
 
 # =================== STUDY GROUP SIGNALS ===================
@@ -238,22 +220,11 @@ def handle_study_group_membership(sender, instance, created, **kwargs):
 def handle_goal_completion(sender, instance, **kwargs):
     """Handle learning goal completion"""
     if instance.status == 'completed' and instance.completed_at:
-        # Create achievement
-        StudentAchievement.objects.get_or_create(
-            student=instance.student,
-            achievement_type=StudentAchievement.Type.MILESTONE,
-            title=f'Goal Achieved: {instance.title}',
-            defaults={
-                'description': f'Successfully completed learning goal: {instance.title}',
-                'badge_icon': 'target',
-                'badge_color': '#06B6D4',
-                'points_earned': 15,
-                'criteria_met': {
-                    'goal_id': instance.id,
-                    'completion_date': instance.completed_at.isoformat()
-                }
-            }
-        )
+        # Award goal achievements
+        queue_events([goal_completed_event(
+            instance.student_id, instance.id, instance.course_id,
+            instance.title, instance.completed_at
+        )])
         
         # Send congratulations
         StudentNotification.objects.create(
@@ -274,49 +245,153 @@ def handle_goal_completion(sender, instance, **kwargs):
 def handle_quiz_completion(sender, instance, **kwargs):
     """Handle quiz attempt completion"""
     if instance.status == 'completed' and instance.completed_at:
-        # Check for perfect score achievement
-        if instance.percentage_score == 100:
-            StudentAchievement.objects.get_or_create(
-                student=instance.student,
-                task=instance.task,
-                achievement_type=StudentAchievement.Type.PERFORMANCE,
-                title='Perfect Score!',
-                defaults={
-                    'description': f'Scored 100% on {instance.task.title}',
-                    'badge_icon': 'trophy',
-                    'badge_color': '#F59E0B',
-                    'points_earned': 20,
-                    'criteria_met': {
-                        'quiz_attempt_id': instance.id,
-                        'score': 100.0
-                    }
-                }
-            )
+        # Award score achievements
+        queue_events([quiz_completed_event(
+            instance.student_id, instance.id, instance.task_id, instance.course_id,
+            instance.task.title, instance.percentage_score
+        )])
         
         # Update daily analytics
         update_daily_student_analytics(instance.student, timezone.now().date())
+        
+        invalidate_student_stats(instance.student_id)
 
 
 # =================== TASK COMPLETION SIGNALS ===================
 
+@receiver(pre_save, sender=TaskCompletion)
+def track_task_completion_pass(sender, instance, **kwargs):
+    """Remember whether an existing completion was already passed"""
+    instance._was_passed = bool(instance.pk) and TaskCompletion.objects.filter(
+        pk=instance.pk, is_passed=True
+    ).exists()
+
+
 @receiver(post_save, sender=TaskCompletion)
 def handle_task_completion(sender, instance, created, **kwargs):
     """Handle task completion"""
-    if created and instance.is_passed:
-        # Update enrollment progress
-        if instance.task:
-            enrollments = StudentEnrollment.objects.filter(
-                student=instance.user,
-                course__coursetask__task=instance.task
-            )
-            
-            for enrollment in enrollments:
-                update_enrollment_progress(enrollment)
+    if instance.is_passed and not getattr(instance, '_was_passed', False):
+        # Update enrollment progress counters and leaderboards
+        if instance.task_id:
+            record_task_pass(instance)
+            award_task_points(instance)
         
         # Update daily analytics
         update_daily_student_analytics(instance.user, timezone.now().date())
 
 
+@receiver(pre_save, sender=CourseTask)
+def track_course_task_requirement(sender, instance, **kwargs):
+    """Remember the course, task and requirement an existing row had"""
+    instance._previous_requirement = CourseTask.objects.filter(
+        pk=instance.pk
+    ).values_list('course_id', 'task_id', 'is_required').first() if instance.pk else None
+
+
+@receiver(post_save, sender=CourseTask)
+@receiver(post_delete, sender=CourseTask)
+def handle_course_task_changed(sender, instance, **kwargs):
+    """Keep required task counts and enrollment progress in sync"""
+    current = (instance.course_id, instance.task_id, instance.is_required)
+    previous = getattr(instance, '_previous_requirement', None)
+    saved = kwargs.get('signal') is post_save
+    if saved and previous == current:
+        # Only ordering, milestone or similar changed
+        return
+
+    course_ids = {instance.course_id}
+    if saved and previous is not None:
+        course_ids.add(previous[0])
+    for course_id in course_ids:
+        refresh_required_task_count(course_id)
+        recalculate_course_progress(course_id)
+
+
+# =================== QUESTION SIGNALS ===================
+
+@receiver(post_save, sender=Question)
+@receiver(post_delete, sender=Question)
+def handle_question_changed(sender, instance, **kwargs):
+    """Bump the task version so cached answer keys are rebuilt"""
+    Task.objects.filter(pk=instance.task_id).update(updated_at=timezone.now())
+
+
+# =================== CATALOG SIGNALS ===================
+
+@receiver(pre_save, sender=Course)
+def track_course_organization(sender, instance, **kwargs):
+    """Remember the organization an existing course belonged to"""
+    instance._previous_org_id = Course.objects.filter(
+        pk=instance.pk
+    ).values_list('org_id', flat=True).first() if instance.pk else None
+
+
+@receiver(post_save, sender=Course)
+def handle_course_saved(sender, instance, **kwargs):
+    """Sync prerequisite edges and invalidate the cached catalog"""
+    sync_prerequisite_edges(instance, prerequisite_ids(instance))
+    bump_catalog_version(instance.org_id)
+    previous_org_id = getattr(instance, '_previous_org_id', None)
+    if previous_org_id is not None and previous_org_id != instance.org_id:
+        # The course also leaves its old organization's catalog
+        bump_catalog_version(previous_org_id)
+
+
+@receiver(course_graph_created)
+def handle_course_cloned(sender, course, **kwargs):
+    """Cloned courses are bulk-created and skip post_save; sync their edges and catalog"""
+    if course is None:
+        return
+    prerequisites = prerequisite_ids(course)
+    if prerequisites:
+        # A new course has no edges to compare against
+        sync_prerequisite_edges(course, prerequisites)
+    bump_catalog_version(course.org_id)
+
+
+@receiver(pre_delete, sender=Course)
+def track_course_dependents(sender, instance, **kwargs):
+    """Remember the courses that require this one before their edges cascade"""
+    instance._dependent_ids = list(CoursePrerequisite.objects.filter(
+        prerequisite=instance
+    ).values_list('course_id', flat=True))
+
+
+@receiver(post_delete, sender=Course)
+def handle_course_deleted(sender, instance, **kwargs):
+    """Drop the course from dependents and invalidate the catalog and prerequisite graph"""
+    dependent_ids = getattr(instance, '_dependent_ids', None)
+    if dependent_ids:
+        remove_prerequisite(dependent_ids, instance.pk)
+    bump_catalog_version(instance.org_id)
+    bump_graph_version(instance.org_id)
+
+
+@receiver(post_save, sender=Organization)
+def handle_organization_changed(sender, instance, created, **kwargs):
+    """Cached catalogs embed organization details"""
+    if not created:
+        bump_catalog_version(instance.pk)
+
+
+# =================== ACHIEVEMENT SIGNALS ===================
+
+@receiver(post_save, sender=StudentAchievement)
+def handle_achievement_earned(sender, instance, created, **kwargs):
+    """Add achievement points to the student's leaderboards"""
+    if created:
+        if instance.points_earned:
+            award_achievement_points(instance)
+        invalidate_student_stats(instance.student_id)
+
+
+@receiver(post_save, sender=AchievementRule)
+@receiver(post_delete, sender=AchievementRule)
+def handle_achievement_rule_changed(sender, instance, **kwargs):
+    """Reload the rule set on the next evaluation"""
+    bump_rules_version()
+
+
 # =================== NOTIFICATION SIGNALS ===================
 
 @receiver(post_save, sender=StudentNotification)
@@ -345,16 +420,14 @@ def send_enrollment_email(enrollment):
             'organization': enrollment.course.org.name
         }
         
-        html_message = render_to_string('student/emails/enrollment_welcome.html', context)
-        plain_message = render_to_string('student/emails/enrollment_welcome.txt', context)
+        plain_message, html_message = render_email('student/emails/enrollment_welcome', context)
         
-        send_mail(
+        queue_email(
             subject=subject,
             message=plain_message,
             html_message=html_message,
             from_email=getattr(settings, 'DEFAULT_FROM_EMAIL', 'no-reply@example.com'),
-            recipient_list=[enrollment.student.email],
-            fail_silently=True
+            recipient_list=[enrollment.student.email]
         )
         
         # Mark as sent
@@ -373,29 +446,32 @@ def send_enrollment_email(enrollment):
         logger.error(f'Failed to send enrollment email: {e}')
 
 
+def notification_email_context(notification):
+    """Template context for a notification email"""
+    return {
+        'student_name': notification.recipient.first_name,
+        'title': notification.title,
+        'message': notification.message,
+        'action_url': notification.action_url,
+        'action_text': notification.action_text,
+        'course_name': notification.course.name if notification.course else None
+    }
+
+
 def send_notification_email(notification):
     """Send email for high priority notifications"""
     try:
-        subject = notification.title
-        context = {
-            'student_name': notification.recipient.first_name,
-            'title': notification.title,
-            'message': notification.message,
-            'action_url': notification.action_url,
-            'action_text': notification.action_text,
-            'course_name': notification.course.name if notification.course else None
-        }
-        
-        html_message = render_to_string('student/emails/notification.html', context)
-        plain_message = render_to_string('student/emails/notification.txt', context)
+        plain_message, html_message = render_email(
+            'student/emails/notification',
+            notification_email_context(notification)
+        )
         
-        send_mail(
-            subject=subject,
+        queue_email(
+            subject=notification.title,
             message=plain_message,
             html_message=html_message,
             from_email=getattr(settings, 'DEFAULT_FROM_EMAIL', 'no-reply@example.com'),
-            recipient_list=[notification.recipient.email],
-            fail_silently=True
+            recipient_list=[notification.recipient.email]
         )
         
         # Mark as sent
@@ -407,6 +483,34 @@ def send_notification_email(notification):
         logger.error(f'Failed to send notification email: {e}')
 
 
+def send_notification_emails(notifications):
+    """Send emails for many notifications, rendering the template in one pass"""
+    if not notifications:
+        return
+    
+    try:
+        bodies = render_email_batch(
+            'student/emails/notification',
+            [notification_email_context(notification) for notification in notifications]
+        )
+        
+        queue_emails(
+            [
+                (notification.title, plain_message, [notification.recipient.email], html_message)
+                for notification, (plain_message, html_message) in zip(notifications, bodies)
+            ],
+            from_email=getattr(settings, 'DEFAULT_FROM_EMAIL', 'no-reply@example.com')
+        )
+        
+        # Mark as sent
+        StudentNotification.objects.filter(
+            pk__in=[notification.pk for notification in notifications]
+        ).update(sent_via_email=True, email_sent_at=timezone.now())
+        
+    except Exception as e:
+        logger.error(f'Failed to send notification emails: {e}')
+
+
 def notify_assignment_submitted(assignment):
     """Notify instructors about assignment submission"""
     # Get instructors/mentors for this course
@@ -429,45 +533,6 @@ def notify_assignment_submitted(assignment):
         )
 
 
-def update_enrollment_progress(enrollment):
-    """Update enrollment progress based on completed tasks"""
-    course = enrollment.course
-    
-    # Get all tasks for the course
-    total_tasks = course.coursetask_set.count()
-    
-    if total_tasks == 0:
-        return
-    
-    # Get completed tasks
-    completed_tasks = TaskCompletion.objects.filter(
-        user=enrollment.student,
-        task__coursetask__course=course,
-        is_passed=True
-    ).count()
-    
-    # Update progress
-    new_progress = (completed_tasks / total_tasks) * 100
-    enrollment.progress_percentage = new_progress
-    
-    # Check if course is completed
-    if new_progress >= 100 and enrollment.status != 'completed':
-        enrollment.status = 'completed'
-        enrollment.completed_at = timezone.now()
-        
-        # Calculate final grade
-        avg_score = TaskCompletion.objects.filter(
-            user=enrollment.student,
-            task__coursetask__course=course,
-            score__isnull=False
-        ).aggregate(avg=models.Avg('score'))['avg']
-        
-        if avg_score:
-            enrollment.grade = avg_score
-    
-    enrollment.save()
-
-
 def update_daily_student_analytics(student, date):
     """Update daily analytics for a student"""
     try:
@@ -578,84 +643,3 @@ def update_daily_student_analytics(student, date):
     except Exception as e:
         logger.error(f'Failed to update student analytics: {e}')
 
-
-# =================== PERIODIC TASKS ===================
-
-def send_goal_reminders():
-    """Send reminders for upcoming goal deadlines (called by management command)"""
-    tomorrow = timezone.now().date() + timedelta(days=1)
-    next_week = timezone.now().date() + timedelta(days=7)
-    
-    # Goals due tomorrow
-    urgent_goals = LearningGoal.objects.filter(
-        target_date=tomorrow,
-        status__in=['not_started', 'in_progress']
-    ).select_related('student')
-    
-    for goal in urgent_goals:
-        StudentNotification.objects.get_or_create(
-            recipient=goal.student,
-            notification_type=StudentNotification.Type.GOAL_REMINDER,
-            priority=StudentNotification.Priority.URGENT,
-            title='Goal Due Tomorrow!',
-            message=f'Your goal "{goal.title}" is due tomorrow. Don\'t forget to complete it!',
-            course=goal.course,
-            action_url=f'/goals/{goal.uuid}/',
-            action_text='Work on Goal',
-            defaults={
-                'metadata': {'goal_id': str(goal.uuid)}
-            }
-        )
-    
-    # Goals due next week
-    weekly_goals = LearningGoal.objects.filter(
-        target_date=next_week,
-        status__in=['not_started', 'in_progress']
-    ).select_related('student')
-    
-    for goal in weekly_goals:
-        StudentNotification.objects.get_or_create(
-            recipient=goal.student,
-            notification_type=StudentNotification.Type.GOAL_REMINDER,
-            priority=StudentNotification.Priority.MEDIUM,
-            title='Goal Due Next Week',
-            message=f'Reminder: Your goal "{goal.title}" is due next week.',
-            course=goal.course,
-            action_url=f'/goals/{goal.uuid}/',
-            action_text='Work on Goal',
-            defaults={
-                'metadata': {'goal_id': str(goal.uuid)}
-            }
-        )
-
-
-def send_study_reminders():
-    """Send study reminders to inactive students (called by management command)"""
-    # Students who haven't studied in 3 days
-    three_days_ago = timezone.now() - timedelta(days=3)
-    
-    inactive_students = User.objects.filter(
-        student_profile__status='active',
-        student_profile__email_notifications=True
-    ).exclude(
-        learning_sessions__started_at__gte=three_days_ago
-    ).distinct()
-    
-    for student in inactive_students:
-        # Get their current enrollments
-        current_courses = StudentEnrollment.objects.filter(
-            student=student,
-            status='in_progress'
-        ).select_related('course')[:3]
-        
-        if current_courses:
-            course_names = ', '.join([e.course.name for e in current_courses])
-            StudentNotification.objects.create(
-                recipient=student,
-                notification_type=StudentNotification.Type.STUDY_REMINDER,
-                priority=StudentNotification.Priority.LOW,
-                title='Time to Study!',
-                message=f'You haven\'t studied in a while. Continue with: {course_names}',
-                action_url='/dashboard/',
-                action_text='Start Learning'
-            ) 
\ No newline at end of file
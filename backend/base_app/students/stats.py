@@ -0,0 +1,145 @@
+"""
+Student statistics engine behind ``StudentStatsView``.
+
+All per-student counters are read in one query (a correlated subquery per
+table on the user row), study habits are binned by hour of day and weekday
+in the student's own timezone with portable ``Extract*`` functions, and the
+result is cached per student until the next completed learning session.
+"""
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.db.models import Avg, Count, Sum, OuterRef, Subquery
+from django.db.models.functions import ExtractHour, ExtractIsoWeekDay
+from django.utils import timezone
+
+from .models import (
+    StudentEnrollment, LearningSession, QuizAttempt, AssignmentSubmission,
+    StudentAchievement, User
+)
+from .streaks import student_timezone
+
+STATS_CACHE_TIMEOUT = 60 * 15
+STUDY_HABITS_DAYS = 30
+
+
+# =================== CACHE ===================
+
+def stats_cache_key(user_id):
+    return f'students:stats:{user_id}'
+
+
+def invalidate_student_stats(user_id):
+    """Drop the cached stats for a student"""
+    cache.delete(stats_cache_key(user_id))
+
+
+def student_stats(user):
+    """Cached stats payload for ``user``"""
+    key = stats_cache_key(user.pk)
+    stats = cache.get(key)
+    if stats is None:
+        stats = compute_student_stats(user)
+        cache.set(key, stats, STATS_CACHE_TIMEOUT)
+    return stats
+
+
+# =================== QUERIES ===================
+
+def _per_student(model, aggregate, **filters):
+    """Scalar subquery aggregating ``model`` rows for the outer user"""
+    return Subquery(
+        model.objects.filter(student=OuterRef('pk'), **filters)
+        .order_by()
+        .values('student')
+        .annotate(value=aggregate)
+        .values('value')[:1]
+    )
+
+
+def student_counters(user):
+    """Every scalar counter for ``user`` from a single combined query"""
+    return User.objects.filter(pk=user.pk).annotate(
+        total_enrollments=_per_student(StudentEnrollment, Count('id')),
+        completed_courses=_per_student(StudentEnrollment, Count('id'), status='completed'),
+        total_study_minutes=_per_student(LearningSession, Sum('total_duration_minutes'), status='completed'),
+        total_achievements=_per_student(StudentAchievement, Count('id')),
+        average_quiz_score=_per_student(QuizAttempt, Avg('percentage_score'), status='completed'),
+        total_assignments=_per_student(AssignmentSubmission, Count('id')),
+        passed_assignments=_per_student(AssignmentSubmission, Count('id'), is_passed=True),
+    ).values(
+        'total_enrollments', 'completed_courses', 'total_study_minutes',
+        'total_achievements', 'average_quiz_score', 'total_assignments',
+        'passed_assignments'
+    ).get()
+
+
+def study_habits(user, days=STUDY_HABITS_DAYS):
+    """Hour-of-day and weekday session histograms in the student's timezone"""
+    tz = student_timezone(user)
+    buckets = LearningSession.objects.filter(
+        student=user,
+        started_at__gte=timezone.now() - timedelta(days=days),
+        status='completed'
+    ).annotate(
+        hour=ExtractHour('started_at', tzinfo=tz),
+        weekday=ExtractIsoWeekDay('started_at', tzinfo=tz)
+    ).values('hour', 'weekday').annotate(sessions=Count('id')).order_by()
+
+    by_hour = [0] * 24
+    by_weekday = [0] * 7
+    for bucket in buckets:
+        by_hour[bucket['hour']] += bucket['sessions']
+        by_weekday[bucket['weekday'] - 1] += bucket['sessions']
+
+    return {
+        'by_hour': [
+            {'hour': hour, 'sessions': sessions}
+            for hour, sessions in enumerate(by_hour) if sessions
+        ],
+        # ISO weekdays: 1 = Monday ... 7 = Sunday
+        'by_weekday': [
+            {'weekday': day + 1, 'sessions': sessions}
+            for day, sessions in enumerate(by_weekday) if sessions
+        ],
+        'timezone': str(tz),
+    }
+
+
+def top_subjects(user, limit=5):
+    """Courses the student has spent the most completed session time on"""
+    return list(LearningSession.objects.filter(
+        student=user,
+        status='completed',
+        course__isnull=False
+    ).values('course__name').annotate(
+        time_spent=Sum('total_duration_minutes'),
+        sessions=Count('id')
+    ).order_by('-time_spent')[:limit])
+
+
+def compute_student_stats(user):
+    """Build the full stats payload for ``user`` (uncached)"""
+    counters = student_counters(user)
+    total_assignments = counters['total_assignments'] or 0
+    passed_assignments = counters['passed_assignments'] or 0
+
+    current_streak = 0
+    if hasattr(user, 'student_profile'):
+        current_streak = user.student_profile.streak_days
+
+    habits = study_habits(user)
+
+    return {
+        'total_enrollments': counters['total_enrollments'] or 0,
+        'completed_courses': counters['completed_courses'] or 0,
+        'total_study_time_hours': (counters['total_study_minutes'] or 0) // 60,
+        'total_achievements': counters['total_achievements'] or 0,
+        'average_quiz_score': round(float(counters['average_quiz_score'] or 0), 2),
+        'assignment_pass_rate': (passed_assignments / total_assignments * 100) if total_assignments > 0 else 0,
+        'current_streak_days': current_streak,
+        'study_habits': habits['by_hour'],
+        'study_habits_by_weekday': habits['by_weekday'],
+        'study_habits_timezone': habits['timezone'],
+        'top_subjects': top_subjects(user)
+    }
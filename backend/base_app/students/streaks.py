@@ -0,0 +1,199 @@
+"""
+Study streak engine.
+
+Each student's active days are stored as a bitmap on
+``StudentActivityCalendar`` (one bit per local calendar day), together with
+the current and longest streak. Recording activity for today or the day
+after the last active day only touches the counters, so the common path is
+O(1); out-of-order backfills rescan the bitmap, which is rare.
+
+Days are always resolved in ``StudentProfile.timezone`` so a session that
+ends at 23:30 local time counts for that local day, not the UTC one. Cohort
+queries do the same: whether a learner's streak is still live is judged
+against "today" in that learner's timezone.
+"""
+from datetime import timedelta
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+from django.db import transaction
+from django.db.models import Case, When, F, Value, IntegerField, Count, Avg, Max, Q
+from django.utils import timezone
+
+from .models import StudentActivityCalendar
+
+
+# =================== TIMEZONE HELPERS ===================
+
+def zone_named(name):
+    """Return the ``ZoneInfo`` for a timezone name (UTC fallback)"""
+    try:
+        return ZoneInfo(name or 'UTC')
+    except (ZoneInfoNotFoundError, ValueError):
+        return ZoneInfo('UTC')
+
+
+def student_timezone(user):
+    """Return the ``ZoneInfo`` for a student's profile timezone (UTC fallback)"""
+    profile = getattr(user, 'student_profile', None)
+    return zone_named(getattr(profile, 'timezone', None))
+
+
+def local_date(user, when=None):
+    """Return the student's local calendar date for ``when`` (default: now)"""
+    when = when or timezone.now()
+    return timezone.localtime(when, student_timezone(user)).date()
+
+
+# =================== BITMAP HELPERS ===================
+
+def _bits_from_bytes(raw):
+    return int.from_bytes(bytes(raw or b''), 'little')
+
+
+def _bits_to_bytes(bits):
+    return bits.to_bytes((bits.bit_length() + 7) // 8, 'little')
+
+
+def _run_ending_at(bits, index):
+    """Length of the run of set bits that ends at ``index``"""
+    if index < 0 or not (bits >> index) & 1:
+        return 0
+    gaps = ~bits & ((1 << (index + 1)) - 1)
+    if not gaps:
+        return index + 1
+    return index - gaps.bit_length() + 1
+
+
+def _longest_run(bits):
+    """Length of the longest run of set bits"""
+    longest = 0
+    while bits:
+        bits &= bits << 1
+        longest += 1
+    return longest
+
+
+def apply_activity(calendar, day):
+    """Set ``day`` on ``calendar`` and update its streak counters in place.
+
+    Returns ``False`` when the day was already recorded.
+    """
+    bits = _bits_from_bytes(calendar.activity_bits)
+
+    if calendar.anchor_date is None:
+        calendar.anchor_date = day
+    elif day < calendar.anchor_date:
+        bits <<= (calendar.anchor_date - day).days
+        calendar.anchor_date = day
+
+    index = (day - calendar.anchor_date).days
+    if (bits >> index) & 1:
+        return False
+    bits |= 1 << index
+
+    last = calendar.last_active_date
+    if last is None or day > last:
+        if last is not None and day == last + timedelta(days=1):
+            calendar.current_streak += 1
+        else:
+            calendar.current_streak = 1
+        calendar.last_active_date = day
+        calendar.longest_streak = max(calendar.longest_streak, calendar.current_streak)
+    else:
+        # Backfilled day: it may join two runs, so rescan
+        last_index = (last - calendar.anchor_date).days
+        calendar.current_streak = _run_ending_at(bits, last_index)
+        calendar.longest_streak = max(calendar.longest_streak, _longest_run(bits))
+
+    calendar.activity_bits = _bits_to_bytes(bits)
+    return True
+
+
+def was_active(calendar, day):
+    """Check whether the student was active on a local ``day``"""
+    if calendar.anchor_date is None or day < calendar.anchor_date:
+        return False
+    bits = _bits_from_bytes(calendar.activity_bits)
+    return bool((bits >> (day - calendar.anchor_date).days) & 1)
+
+
+# =================== STREAK API ===================
+
+def streak_as_of(calendar, day):
+    """Current streak as seen on ``day``; a missed day resets it to zero"""
+    if calendar.last_active_date is None:
+        return 0
+    if calendar.last_active_date < day - timedelta(days=1):
+        return 0
+    return calendar.current_streak
+
+
+def record_activity(user, when=None):
+    """Mark ``user`` active on the local day containing ``when``.
+
+    Returns ``(previous_streak, calendar)`` where ``previous_streak`` is the
+    live streak before this activity was recorded.
+    """
+    day = local_date(user, when)
+
+    with transaction.atomic():
+        calendar, created = StudentActivityCalendar.objects.select_for_update().get_or_create(
+            user=user,
+            defaults={'anchor_date': day}
+        )
+        previous_streak = streak_as_of(calendar, day)
+        if apply_activity(calendar, day):
+            calendar.save()
+
+    return previous_streak, calendar
+
+
+def sync_profile(profile, calendar):
+    """Copy streak counters onto the ``StudentProfile`` (caller saves)"""
+    profile.streak_days = calendar.current_streak
+    profile.last_activity_date = calendar.last_active_date
+
+
+# =================== COHORT QUERIES ===================
+
+def cohort_streaks(cohort, now=None):
+    """Learner calendars in a cohort annotated with ``live_streak``.
+
+    A streak is live when the learner was active today or yesterday in their
+    own timezone. The cohort's distinct timezones are read first, then each
+    gets its own ``When``, so the rest stays one query over the calendar
+    table; learning sessions are not read.
+    """
+    now = now or timezone.now()
+    calendars = StudentActivityCalendar.objects.filter(
+        user__usercohort__cohort=cohort,
+        user__usercohort__role='learner'
+    )
+    names = set(calendars.values_list('user__student_profile__timezone', flat=True))
+    live = [
+        When(
+            Q(user__student_profile__timezone=name) if name is not None
+            else Q(user__student_profile__isnull=True),
+            last_active_date__gte=timezone.localtime(now, zone_named(name)).date() - timedelta(days=1),
+            then=F('current_streak')
+        )
+        for name in names
+    ]
+    return calendars.annotate(
+        live_streak=Case(*live, default=Value(0), output_field=IntegerField())
+    )
+
+
+def cohort_streak_summary(cohort, now=None):
+    """Aggregate streak figures for a cohort"""
+    summary = cohort_streaks(cohort, now).aggregate(
+        learners_tracked=Count('id'),
+        learners_on_streak=Count('id', filter=Q(live_streak__gt=0)),
+        average_streak=Avg('live_streak'),
+        best_current_streak=Max('live_streak'),
+        best_longest_streak=Max('longest_streak')
+    )
+    summary['average_streak'] = round(summary['average_streak'] or 0, 2)
+    summary['best_current_streak'] = summary['best_current_streak'] or 0
+    summary['best_longest_streak'] = summary['best_longest_streak'] or 0
+    return summary
@@ -1,17 +1,45 @@
 from django.test import TestCase
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
 from django.utils import timezone
 from datetime import datetime, timedelta
+from decimal import Decimal
+from zoneinfo import ZoneInfo
 from rest_framework.test import APITestCase, APIClient
 from rest_framework import status
 from django.urls import reverse
 from unittest.mock import patch, MagicMock
 
+from admin_flow.cloning import clone_course
+
 from .models import (
     StudentProfile, StudentEnrollment, LearningSession, AssignmentSubmission,
     StudyGroup, StudyGroupMembership, LearningResource, LearningGoal,
     QuizAttempt, StudentNotification, StudentAnalytics, StudentAchievement,
-    Organization, Cohort, Course, Task, TaskCompletion, UserCohort, UserOrganization
+    Organization, Cohort, Course, Task, TaskCompletion, UserCohort, UserOrganization,
+    AchievementRule, CoursePrerequisite, CourseTask, LeaderboardEntry, Question,
+    ReminderLog, StudentActivityCalendar
+)
+from .achievements import (
+    backfill_rule, batched_events, evaluate_events, matches, queue_events,
+    quiz_completed_event, streak_event
+)
+from .catalog import available_courses_for, published_catalogs
+from .grading import answer_key, grade_attempt, regrade_task, score_answers
+from .leaderboards import rebuild_leaderboard, student_rank, top_students
+from .prerequisites import missing_prerequisites, prerequisite_closure
+from .progress import recalculate_enrollment_progress
+from .quiz_attempts import (
+    AttemptLimitReached, allocate_attempt_number, complete_attempt,
+    expire_stale_attempts, start_attempt
+)
+from .reminders import schedule_goal_reminders, schedule_study_reminders
+from .serializers import QuizAttemptCreateSerializer, QuizAttemptSerializer
+from .stats import compute_student_stats, stats_cache_key, student_stats, study_habits
+from .streaks import (
+    apply_activity, cohort_streak_summary, cohort_streaks, local_date,
+    record_activity, streak_as_of, was_active
 )
 
 User = get_user_model()
@@ -114,6 +142,14 @@ class StudentFlowTestCase(TestCase):
         )
 
 
+class CachedStudentFlowTestCase(StudentFlowTestCase):
+    """Student flow test case that starts every test with an empty cache"""
+    
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+
+
 class StudentProfileTests(StudentFlowTestCase):
     """Test StudentProfile model and functionality"""
     
@@ -857,8 +893,8 @@ class StudentSignalTests(StudentFlowTestCase):
         self.student_profile.refresh_from_db()
         self.assertGreaterEqual(self.student_profile.total_study_hours, initial_hours)
     
-    @patch('student.signals.send_mail')
-    def test_enrollment_email_sent(self, mock_send_mail):
+    @patch('student.signals.queue_email')
+    def test_enrollment_email_sent(self, mock_queue_email):
         """Test enrollment email is sent"""
         # Enable email notifications
         self.student_profile.email_notifications = True
@@ -877,7 +913,7 @@ class StudentSignalTests(StudentFlowTestCase):
         )
         
         # Check if email was attempted
-        self.assertTrue(mock_send_mail.called)
+        self.assertTrue(mock_queue_email.called)
 
 
 class StudentUtilityTests(StudentFlowTestCase):
@@ -935,4 +971,832 @@ class StudentAnalyticsUpdateTests(StudentFlowTestCase):
         
         self.assertIsNotNone(analytics)
         self.assertEqual(analytics.study_time_minutes, 60)
-        self.assertEqual(analytics.sessions_count, 1) 
\ No newline at end of file
+        self.assertEqual(analytics.sessions_count, 1) 
+
+# =================== STREAK ENGINE TESTS ===================
+
+class StreakEngineTests(StudentFlowTestCase):
+    """Test the activity bitmap streak engine"""
+    
+    def setUp(self):
+        super().setUp()
+        self.calendar = StudentActivityCalendar(user=self.student_user, anchor_date=None)
+        self.day = timezone.now().date()
+    
+    def test_consecutive_days_extend_streak(self):
+        """Test consecutive active days build a streak"""
+        for offset in range(3):
+            apply_activity(self.calendar, self.day + timedelta(days=offset))
+        
+        self.assertEqual(self.calendar.current_streak, 3)
+        self.assertEqual(self.calendar.longest_streak, 3)
+    
+    def test_same_day_is_idempotent(self):
+        """Test recording the same day twice does not extend the streak"""
+        self.assertTrue(apply_activity(self.calendar, self.day))
+        self.assertFalse(apply_activity(self.calendar, self.day))
+        self.assertEqual(self.calendar.current_streak, 1)
+    
+    def test_gap_resets_streak_but_keeps_longest(self):
+        """Test a missed day restarts the current streak"""
+        apply_activity(self.calendar, self.day)
+        apply_activity(self.calendar, self.day + timedelta(days=1))
+        apply_activity(self.calendar, self.day + timedelta(days=4))
+        
+        self.assertEqual(self.calendar.current_streak, 1)
+        self.assertEqual(self.calendar.longest_streak, 2)
+        self.assertEqual(streak_as_of(self.calendar, self.day + timedelta(days=7)), 0)
+    
+    def test_backfill_joins_runs(self):
+        """Test backfilling a missed day merges the surrounding runs"""
+        apply_activity(self.calendar, self.day)
+        apply_activity(self.calendar, self.day + timedelta(days=2))
+        apply_activity(self.calendar, self.day + timedelta(days=1))
+        apply_activity(self.calendar, self.day - timedelta(days=1))
+        
+        self.assertEqual(self.calendar.current_streak, 4)
+        self.assertEqual(self.calendar.longest_streak, 4)
+        self.assertTrue(was_active(self.calendar, self.day - timedelta(days=1)))
+    
+    def test_local_date_uses_profile_timezone(self):
+        """Test activity is bucketed by the student's local day"""
+        self.student_profile.timezone = 'Asia/Kolkata'
+        self.student_profile.save()
+        late_utc = datetime(2024, 3, 1, 20, 0, tzinfo=ZoneInfo('UTC'))
+        
+        self.assertEqual(local_date(self.student_user, late_utc), datetime(2024, 3, 2).date())
+    
+    def test_cohort_streaks_use_each_learners_day(self):
+        """Test a cohort streak is live or broken by the learner's own local day"""
+        west = User.objects.create(email="west@test.com")
+        StudentProfile.objects.create(user=west, timezone='America/Los_Angeles')
+        UserCohort.objects.create(user=west, cohort=self.cohort, role='learner')
+        self.student_profile.timezone = 'Asia/Kolkata'
+        self.student_profile.save()
+        for user in (self.student_user, west):
+            StudentActivityCalendar.objects.create(
+                user=user, anchor_date=datetime(2024, 2, 27).date(),
+                last_active_date=datetime(2024, 3, 1).date(), current_streak=3, longest_streak=3
+            )
+        # 2 March in UTC and Los Angeles, already 3 March in Kolkata
+        now = datetime(2024, 3, 2, 20, 0, tzinfo=ZoneInfo('UTC'))
+        
+        live = dict(cohort_streaks(self.cohort, now).values_list('user_id', 'live_streak'))
+        
+        self.assertEqual(live, {self.student_user.id: 0, west.id: 3})
+        self.assertEqual(cohort_streak_summary(self.cohort, now)['learners_on_streak'], 1)
+    
+    def test_record_activity_persists_calendar(self):
+        """Test record_activity creates and updates the calendar row"""
+        previous, calendar = record_activity(self.student_user)
+        
+        self.assertEqual(previous, 0)
+        self.assertEqual(calendar.current_streak, 1)
+        self.assertEqual(self.student_user.activity_calendar.pk, calendar.pk)
+
+
+# =================== QUIZ ATTEMPT LIFECYCLE TESTS ===================
+
+class QuizAttemptLifecycleTests(StudentFlowTestCase):
+    """Test attempt numbering, limits and expiry"""
+    
+    def test_attempt_numbers_are_sequential(self):
+        """Test allocated attempt numbers follow existing attempts"""
+        QuizAttempt.objects.create(
+            student=self.student_user,
+            task=self.task,
+            course=self.course,
+            attempt_number=2
+        )
+        
+        self.assertEqual(allocate_attempt_number(self.student_user, self.task.id), 3)
+        self.assertEqual(allocate_attempt_number(self.student_user, self.task.id), 4)
+    
+    def test_max_attempts_enforced(self):
+        """Test the strictest question limit caps attempts"""
+        Question.objects.create(task=self.task, type='true_false', title='Q1', max_attempts=2)
+        Question.objects.create(task=self.task, type='true_false', title='Q2', max_attempts=5)
+        
+        allocate_attempt_number(self.student_user, self.task.id)
+        allocate_attempt_number(self.student_user, self.task.id)
+        
+        with self.assertRaises(AttemptLimitReached):
+            allocate_attempt_number(self.student_user, self.task.id)
+    
+    def test_late_completion_times_out(self):
+        """Test completing after the deadline records a timeout"""
+        attempt = QuizAttempt.objects.create(
+            student=self.student_user,
+            task=self.task,
+            course=self.course,
+            time_limit_minutes=10,
+            expires_at=timezone.now() - timedelta(minutes=5)
+        )
+        
+        complete_attempt(attempt)
+        
+        self.assertEqual(attempt.status, 'timed_out')
+        self.assertEqual(attempt.time_spent_minutes, 10)
+    
+    def test_time_limit_comes_from_task(self):
+        """Test a new attempt takes the task's limit, not the client's"""
+        Task.objects.filter(pk=self.task.pk).update(time_limit_minutes=20)
+        serializer = QuizAttemptCreateSerializer(data={
+            'task_id': self.task.id, 'course_id': self.course.id, 'time_limit_minutes': 600
+        })
+        serializer.is_valid(raise_exception=True)
+        
+        attempt = start_attempt(serializer, self.student_user)
+        
+        self.assertEqual(attempt.time_limit_minutes, 20)
+        self.assertAlmostEqual(
+            (attempt.expires_at - timezone.now()).total_seconds(), 20 * 60, delta=5
+        )
+    
+    def test_answers_refused_after_deadline(self):
+        """Test answers cannot be saved late and grading fields are read-only"""
+        attempt = QuizAttempt.objects.create(
+            student=self.student_user,
+            task=self.task,
+            course=self.course,
+            time_limit_minutes=10,
+            expires_at=timezone.now() + timedelta(minutes=5)
+        )
+        serializer = QuizAttemptSerializer(attempt, data={
+            'answers': {'1': 'a'}, 'score': 100, 'is_passed': True, 'status': 'completed'
+        }, partial=True)
+        serializer.is_valid(raise_exception=True)
+        serializer.save()
+        attempt.refresh_from_db()
+        self.assertEqual(attempt.answers, {'1': 'a'})
+        self.assertFalse(attempt.is_passed)
+        self.assertEqual(attempt.status, 'in_progress')
+        
+        QuizAttempt.objects.filter(pk=attempt.pk).update(expires_at=timezone.now() - timedelta(minutes=5))
+        attempt.refresh_from_db()
+        serializer = QuizAttemptSerializer(attempt, data={'answers': {'1': 'b'}}, partial=True)
+        self.assertFalse(serializer.is_valid())
+        self.assertIn('answers', serializer.errors)
+    
+    def test_sweeper_expires_stale_attempts(self):
+        """Test stale attempts are expired in bulk and fresh ones are kept"""
+        now = timezone.now()
+        stale = QuizAttempt.objects.create(
+            student=self.student_user, task=self.task, course=self.course,
+            time_limit_minutes=15, expires_at=now - timedelta(minutes=1)
+        )
+        fresh = QuizAttempt.objects.create(
+            student=self.student_user, task=self.task, course=self.course,
+            time_limit_minutes=15, expires_at=now + timedelta(minutes=10)
+        )
+        untimed = QuizAttempt.objects.create(
+            student=self.student_user, task=self.task, course=self.course
+        )
+        
+        self.assertEqual(expire_stale_attempts(now), 1)
+        
+        stale.refresh_from_db()
+        fresh.refresh_from_db()
+        untimed.refresh_from_db()
+        self.assertEqual(stale.status, 'timed_out')
+        self.assertEqual(stale.completed_at, stale.expires_at)
+        self.assertEqual(fresh.status, 'in_progress')
+        self.assertEqual(untimed.status, 'in_progress')
+
+
+# =================== STUDENT STATS TESTS ===================
+
+class StudentStatsEngineTests(CachedStudentFlowTestCase):
+    """Test the cached student stats engine"""
+    
+    def test_counters_from_combined_query(self):
+        """Test counters are computed and pass rate derived"""
+        stats = compute_student_stats(self.student_user)
+        
+        self.assertEqual(stats['total_enrollments'], 1)
+        self.assertEqual(stats['completed_courses'], 0)
+        self.assertEqual(stats['assignment_pass_rate'], 0)
+    
+    def test_habits_use_student_timezone(self):
+        """Test sessions are binned by the student's local hour and weekday"""
+        self.student_profile.timezone = 'Asia/Kolkata'
+        self.student_profile.save()
+        session = LearningSession.objects.create(
+            student=self.student_user,
+            course=self.course,
+            session_type='learning_material'
+        )
+        # Sunday 20:00 UTC is Monday 01:30 in Kolkata
+        started = timezone.now().replace(hour=20, minute=0, second=0, microsecond=0)
+        started -= timedelta(days=(started.weekday() - 6) % 7)
+        LearningSession.objects.filter(pk=session.pk).update(status='completed', started_at=started)
+        
+        habits = study_habits(self.student_user)
+        
+        self.assertEqual(habits['by_hour'], [{'hour': 1, 'sessions': 1}])
+        self.assertEqual(habits['by_weekday'], [{'weekday': 1, 'sessions': 1}])
+        self.assertEqual(habits['timezone'], str(ZoneInfo('Asia/Kolkata')))
+    
+    def test_stats_are_cached_until_session_completes(self):
+        """Test cached stats are reused and dropped on session completion"""
+        student_stats(self.student_user)
+        with self.assertNumQueries(0):
+            student_stats(self.student_user)
+        
+        session = LearningSession.objects.create(
+            student=self.student_user,
+            course=self.course,
+            session_type='learning_material'
+        )
+        session.end_session()
+        
+        self.assertIsNone(cache.get(stats_cache_key(self.student_user.pk)))
+    
+    def test_enrollment_change_drops_cached_stats(self):
+        """Test cached stats are dropped when an enrollment changes"""
+        student_stats(self.student_user)
+        self.enrollment.status = 'completed'
+        self.enrollment.save()
+        
+        self.assertIsNone(cache.get(stats_cache_key(self.student_user.pk)))
+
+
+# =================== AUTO-GRADING TESTS ===================
+
+class AutoGradingTests(CachedStudentFlowTestCase):
+    """Test the quiz auto-grading engine"""
+    
+    def setUp(self):
+        super().setUp()
+        
+        self.task.type = 'quiz'
+        self.task.save()
+        self.q_choice = Question.objects.create(
+            task=self.task, type='multiple_choice', title='Pick', correct_answer='B', points=2, position=1
+        )
+        self.q_bool = Question.objects.create(
+            task=self.task, type='true_false', title='True?', correct_answer='true', points=1, position=2
+        )
+        self.q_text = Question.objects.create(
+            task=self.task, type='short_answer', title='Name', correct_answer='["list", "a list"]', points=1, position=3
+        )
+        Question.objects.create(
+            task=self.task, type='long_answer', title='Essay', position=4
+        )
+        self.task.refresh_from_db()
+    
+    def _attempt(self, answers, **kwargs):
+        return QuizAttempt.objects.create(
+            student=self.student_user,
+            task=self.task,
+            course=self.course,
+            answers=answers,
+            **kwargs
+        )
+    
+    def test_score_answers(self):
+        """Test answers are normalized and only auto-graded types count"""
+        key = answer_key(self.task)
+        answers = {
+            str(self.q_choice.id): ' b ',
+            str(self.q_bool.id): True,
+            str(self.q_text.id): 'A  List',
+        }
+        
+        self.assertEqual(len(key), 3)
+        self.assertEqual(score_answers(key, answers), (4, 4, 3, 3))
+        self.assertEqual(score_answers(key, {str(self.q_bool.id): 'false'}), (0, 4, 1, 0))
+    
+    def test_answer_key_cached_per_task_version(self):
+        """Test the cached key is reused and rebuilt after a question edit"""
+        answer_key(self.task)
+        with self.assertNumQueries(0):
+            answer_key(self.task)
+        
+        self.q_choice.correct_answer = 'C'
+        self.q_choice.save()
+        self.task.refresh_from_db()
+        
+        key = dict((qid, expected) for qid, _, expected, _ in answer_key(self.task))
+        self.assertEqual(key[str(self.q_choice.id)], frozenset({'c'}))
+    
+    def test_grade_attempt_records_completion(self):
+        """Test grading completes the attempt and writes the task completion"""
+        attempt = self._attempt({str(self.q_choice.id): 'B', str(self.q_bool.id): 'yes'})
+        
+        grade_attempt(attempt)
+        
+        self.assertEqual(attempt.status, 'completed')
+        self.assertEqual(attempt.correct_answers, 2)
+        completion = TaskCompletion.objects.get(user=self.student_user, task=self.task)
+        self.assertEqual(completion.score, 3)
+        self.assertTrue(completion.is_passed)
+    
+    def test_regrade_task_in_bulk(self):
+        """Test regrading rescores finished attempts after a key fix"""
+        attempt = self._attempt({str(self.q_choice.id): 'C'})
+        grade_attempt(attempt)
+        self.assertEqual(attempt.score, 0)
+        
+        self.q_choice.correct_answer = 'C'
+        self.q_choice.save()
+        self.task.refresh_from_db()
+        
+        self.assertEqual(regrade_task(self.task), 1)
+        
+        attempt.refresh_from_db()
+        self.assertEqual(attempt.score, 2)
+        completion = TaskCompletion.objects.get(user=self.student_user, task=self.task)
+        self.assertEqual(completion.score, 2)
+
+    
+    def test_regrade_credits_new_passes(self):
+        """Test passes created by a regrade reach leaderboards and progress"""
+        CourseTask.objects.create(course=self.course, task=self.task, ordering=1)
+        attempt = self._attempt({str(self.q_choice.id): 'C', str(self.q_bool.id): 'true'})
+        grade_attempt(attempt)
+        self.assertFalse(attempt.is_passed)
+        
+        self.q_choice.correct_answer = 'C'
+        self.q_choice.save()
+        self.task.refresh_from_db()
+        regrade_task(self.task)
+        
+        self.assertEqual(
+            LeaderboardEntry.objects.get(student=self.student_user, course=self.course).points,
+            self.task.points
+        )
+        self.enrollment.refresh_from_db()
+        self.assertEqual(self.enrollment.passed_required_tasks, 1)
+
+# =================== REMINDER SCHEDULER TESTS ===================
+
+@patch('students.reminders.send_notification_emails')
+class ReminderSchedulerTests(StudentFlowTestCase):
+    """Test the batched reminder scheduler"""
+    
+    def setUp(self):
+        super().setUp()
+        self.today = timezone.now().date()
+        self.goal = LearningGoal.objects.create(
+            student=self.student_user,
+            title="Finish Chapter 3",
+            category="academic",
+            target_date=self.today + timedelta(days=1),
+            course=self.course
+        )
+    
+    def test_goal_reminders_are_deduplicated(self, mock_email):
+        """Test running the scheduler twice only notifies once"""
+        self.assertEqual(schedule_goal_reminders(self.today), 1)
+        self.assertEqual(schedule_goal_reminders(self.today), 0)
+        
+        notification = StudentNotification.objects.get(
+            recipient=self.student_user,
+            notification_type='goal_reminder'
+        )
+        self.assertEqual(notification.priority, 'urgent')
+        self.assertEqual(notification.metadata, {'goal_id': str(self.goal.uuid)})
+        mock_email.assert_called_once()
+        self.assertEqual(mock_email.call_args[0][0], [notification])
+    
+    def test_conflicting_log_row_skips_notification(self, mock_email):
+        """Test a log row inserted by an overlapping run suppresses the notification"""
+        ReminderLog.objects.create(
+            recipient=self.student_user,
+            kind=ReminderLog.Kind.GOAL_DUE_TOMORROW,
+            target=str(self.goal.uuid),
+            scheduled_for=self.today
+        )
+        
+        self.assertEqual(schedule_goal_reminders(self.today), 0)
+        self.assertFalse(StudentNotification.objects.filter(recipient=self.student_user).exists())
+        mock_email.assert_not_called()
+    
+    def test_user_range_shards_recipients(self, mock_email):
+        """Test recipients outside the shard range are skipped"""
+        created = schedule_goal_reminders(
+            self.today,
+            min_user_id=self.student_user.id + 1
+        )
+        
+        self.assertEqual(created, 0)
+        self.assertEqual(
+            schedule_goal_reminders(self.today, max_user_id=self.student_user.id + 1),
+            1
+        )
+    
+    def test_study_reminders_list_current_courses(self, mock_email):
+        """Test inactive students get one reminder naming their courses"""
+        self.assertEqual(schedule_study_reminders(self.today), 1)
+        self.assertEqual(schedule_study_reminders(self.today), 0)
+        
+        notification = StudentNotification.objects.get(
+            recipient=self.student_user,
+            notification_type='study_reminder'
+        )
+        self.assertIn(self.course.name, notification.message)
+        mock_email.assert_not_called()
+
+
+# =================== ENROLLMENT PROGRESS TESTS ===================
+
+class EnrollmentProgressCounterTests(StudentFlowTestCase):
+    """Test incremental enrollment progress counters"""
+    
+    def setUp(self):
+        super().setUp()
+        
+        self.second_task = Task.objects.create(
+            title="Functions",
+            org=self.org,
+            type="quiz",
+            status="published"
+        )
+        CourseTask.objects.create(course=self.course, task=self.task, ordering=1)
+        CourseTask.objects.create(course=self.course, task=self.second_task, ordering=2)
+        CourseTask.objects.create(
+            course=self.course,
+            task=Task.objects.create(title="Extra", org=self.org, type="learning_material"),
+            ordering=3,
+            is_required=False
+        )
+    
+    def test_required_task_count_cached(self):
+        """Test the course caches its required task count"""
+        self.course.refresh_from_db()
+        self.assertEqual(self.course.required_task_count, 2)
+        
+        CourseTask.objects.get(course=self.course, task=self.second_task).delete()
+        self.course.refresh_from_db()
+        self.assertEqual(self.course.required_task_count, 1)
+    
+    def test_passing_tasks_updates_progress_and_grade(self):
+        """Test passes increment progress and complete the enrollment"""
+        completion = TaskCompletion.objects.create(
+            user=self.student_user, task=self.task, score=80, is_passed=True
+        )
+        self.enrollment.refresh_from_db()
+        self.assertEqual(self.enrollment.passed_required_tasks, 1)
+        self.assertEqual(self.enrollment.progress_percentage, 50)
+        
+        # Saving an already passed completion does not count twice
+        completion.score = 85
+        completion.save()
+        self.enrollment.refresh_from_db()
+        self.assertEqual(self.enrollment.passed_required_tasks, 1)
+        
+        TaskCompletion.objects.create(
+            user=self.student_user, task=self.second_task, score=90, is_passed=True
+        )
+        self.enrollment.refresh_from_db()
+        self.assertEqual(self.enrollment.status, 'completed')
+        self.assertEqual(self.enrollment.progress_percentage, 100)
+        self.assertEqual(self.enrollment.grade, 85)
+    
+    def test_failed_then_passed_completion_counts_once(self):
+        """Test a completion that later passes is counted on the transition"""
+        completion = TaskCompletion.objects.create(
+            user=self.student_user, task=self.task, score=40, is_passed=False
+        )
+        self.enrollment.refresh_from_db()
+        self.assertEqual(self.enrollment.passed_required_tasks, 0)
+        
+        completion.score = 75
+        completion.is_passed = True
+        completion.save()
+        self.enrollment.refresh_from_db()
+        self.assertEqual(self.enrollment.passed_required_tasks, 1)
+    
+    def test_required_task_changes_recount_enrollments(self):
+        """Test existing passes follow tasks becoming required or being removed"""
+        extra = CourseTask.objects.get(course=self.course, is_required=False)
+        TaskCompletion.objects.create(
+            user=self.student_user, task=extra.task, score=60, is_passed=True
+        )
+        TaskCompletion.objects.create(
+            user=self.student_user, task=self.task, score=80, is_passed=True
+        )
+        self.enrollment.refresh_from_db()
+        self.assertEqual(self.enrollment.passed_required_tasks, 1)
+        
+        extra.is_required = True
+        extra.save()
+        self.enrollment.refresh_from_db()
+        self.assertEqual(self.enrollment.passed_required_tasks, 2)
+        self.assertEqual(self.enrollment.score_sum, 140)
+        self.assertEqual(self.enrollment.progress_percentage, Decimal('66.67'))
+        
+        CourseTask.objects.get(course=self.course, task=self.task).delete()
+        self.enrollment.refresh_from_db()
+        self.assertEqual(self.enrollment.passed_required_tasks, 1)
+        self.assertEqual(self.enrollment.score_count, 1)
+        self.assertEqual(self.enrollment.progress_percentage, 50)
+    
+    def test_recalculate_rebuilds_counters(self):
+        """Test counters can be rebuilt from task completions"""
+        TaskCompletion.objects.create(
+            user=self.student_user, task=self.task, score=70, is_passed=True
+        )
+        StudentEnrollment.objects.filter(pk=self.enrollment.pk).update(
+            passed_required_tasks=0, score_sum=0, score_count=0
+        )
+        self.enrollment.refresh_from_db()
+        
+        recalculate_enrollment_progress(self.enrollment)
+        
+        self.assertEqual(self.enrollment.passed_required_tasks, 1)
+        self.assertEqual(self.enrollment.score_count, 1)
+        self.assertEqual(self.enrollment.progress_percentage, 50)
+
+
+# =================== COURSE CATALOG TESTS ===================
+
+class CourseCatalogCacheTests(CachedStudentFlowTestCase):
+    """Test the cached published course catalog"""
+    
+    def setUp(self):
+        super().setUp()
+        
+        self.open_course = Course.objects.create(
+            name="Data Science",
+            org=self.org,
+            status="published"
+        )
+        Course.objects.create(name="Drafted", org=self.org, status="draft")
+    
+    def test_available_courses_excludes_enrollments(self):
+        """Test the catalog minus enrolled courses is returned"""
+        courses = available_courses_for(self.student_user)
+        
+        self.assertEqual([course['id'] for course in courses], [self.open_course.id])
+        self.assertEqual(courses[0]['organization']['id'], self.org.id)
+    
+    def test_catalog_served_from_cache(self):
+        """Test repeat calls only query the student's orgs and enrollments"""
+        available_courses_for(self.student_user)
+        with self.assertNumQueries(2):
+            available_courses_for(self.student_user)
+    
+    def test_moving_course_invalidates_both_catalogs(self):
+        """Test a course moved to another organization leaves the old catalog"""
+        other_org = Organization.objects.create(name="Other Org", slug="other-catalog-org")
+        published_catalogs([self.org.id, other_org.id])
+        self.open_course.org = other_org
+        self.open_course.save()
+        
+        catalogs = published_catalogs([self.org.id, other_org.id])
+        self.assertNotIn(self.open_course.id, [course['id'] for course in catalogs[self.org.id]])
+        self.assertIn(self.open_course.id, [course['id'] for course in catalogs[other_org.id]])
+    
+    def test_course_save_invalidates_catalog(self):
+        """Test publishing a course shows up immediately"""
+        available_courses_for(self.student_user)
+        new_course = Course.objects.create(name="Go", org=self.org, status="draft")
+        new_course.status = 'published'
+        new_course.save()
+        
+        ids = [course['id'] for course in available_courses_for(self.student_user)]
+        self.assertIn(new_course.id, ids)
+
+
+# =================== PREREQUISITE GRAPH TESTS ===================
+
+class PrerequisiteGraphTests(CachedStudentFlowTestCase):
+    """Test the course prerequisite graph"""
+    
+    def setUp(self):
+        super().setUp()
+        
+        self.basics = Course.objects.create(name="Basics", org=self.org, status="published")
+        self.intermediate = Course.objects.create(
+            name="Intermediate", org=self.org, status="published", prerequisites=[self.basics.id]
+        )
+        self.advanced = Course.objects.create(
+            name="Advanced", org=self.org, status="published", prerequisites=[self.intermediate.id]
+        )
+    
+    def test_edges_and_transitive_closure(self):
+        """Test JSON prerequisites are normalized and closed transitively"""
+        self.assertEqual(CoursePrerequisite.objects.filter(org=self.org).count(), 2)
+        closure = prerequisite_closure(self.org.id)
+        self.assertEqual(closure[self.advanced.id], {self.basics.id, self.intermediate.id})
+    
+    def test_cyclic_edit_rejected(self):
+        """Test an edit that closes a cycle is rejected"""
+        self.basics.prerequisites = [self.advanced.id]
+        with self.assertRaises(ValidationError):
+            self.basics.clean()
+        
+        self.basics.prerequisites = [self.basics.id]
+        with self.assertRaises(ValidationError):
+            self.basics.clean()
+    
+    def test_cyclic_save_stores_no_edge(self):
+        """Test a save that skips clean() never stores an edge closing a cycle"""
+        self.basics.prerequisites = [self.advanced.id]
+        self.basics.save()
+        
+        self.assertFalse(CoursePrerequisite.objects.filter(course=self.basics).exists())
+        closure = prerequisite_closure(self.org.id)
+        self.assertNotIn(self.basics.id, closure.get(self.basics.id, ()))
+        self.assertEqual(closure[self.advanced.id], {self.basics.id, self.intermediate.id})
+    
+    def test_cloned_course_enforces_prerequisites(self):
+        """Test a same-organization clone gets its prerequisite edges without a re-save"""
+        graph = clone_course(self.advanced, created_by=self.admin_user)
+        clone = Course.objects.get(pk=graph.course.pk)
+        
+        self.assertEqual(
+            missing_prerequisites(clone, self.student_user),
+            {self.basics.id, self.intermediate.id}
+        )
+    
+    def test_deleting_prerequisite_cleans_dependents(self):
+        """Test a deleted course is dropped from dependents, which still validate"""
+        self.intermediate.delete()
+        self.advanced.refresh_from_db()
+        
+        self.assertEqual(self.advanced.prerequisites, [])
+        self.advanced.description = "Updated"
+        self.advanced.clean()
+        self.advanced.save()
+        self.assertNotIn(self.advanced.id, prerequisite_closure(self.org.id))
+    
+    def test_removing_prerequisite_updates_closure(self):
+        """Test edits replace edges and refresh the cached closure"""
+        prerequisite_closure(self.org.id)
+        self.advanced.prerequisites = []
+        self.advanced.save()
+        
+        self.assertNotIn(self.advanced.id, prerequisite_closure(self.org.id))
+    
+    def test_catalog_flags_unlocked_courses(self):
+        """Test the catalog marks courses whose prerequisites are completed"""
+        StudentEnrollment.objects.create(
+            student=self.student_user, course=self.basics, cohort=self.cohort, status='completed'
+        )
+        
+        flags = {course['id']: course['is_unlocked'] for course in available_courses_for(self.student_user)}
+        
+        self.assertTrue(flags[self.intermediate.id])
+        self.assertFalse(flags[self.advanced.id])
+    
+    def test_missing_prerequisites(self):
+        """Test enrollment checks report every unmet prerequisite"""
+        self.assertEqual(
+            missing_prerequisites(self.advanced, self.student_user),
+            {self.basics.id, self.intermediate.id}
+        )
+
+
+# =================== LEADERBOARD TESTS ===================
+
+class LeaderboardTests(StudentFlowTestCase):
+    """Test incrementally maintained leaderboards"""
+    
+    def setUp(self):
+        super().setUp()
+        
+        CourseTask.objects.create(course=self.course, task=self.task, ordering=1)
+        self.rival = User.objects.create(email="rival@test.com", first_name="Rita", last_name="Rival")
+        StudentEnrollment.objects.create(
+            student=self.rival, course=self.course, cohort=self.cohort, status='in_progress'
+        )
+    
+    def _award(self, student, points, course=None):
+        return StudentAchievement.objects.create(
+            student=student,
+            achievement_type=StudentAchievement.Type.PERFORMANCE,
+            title="Award",
+            description="Award",
+            course=course,
+            points_earned=points
+        )
+    
+    def test_signals_credit_boards(self):
+        """Test achievements and task passes add to cohort and course boards"""
+        self._award(self.student_user, 25, course=self.course)
+        self._award(self.student_user, 10)
+        TaskCompletion.objects.create(user=self.student_user, task=self.task, score=90, is_passed=True)
+        
+        entries = LeaderboardEntry.objects.filter(student=self.student_user)
+        self.assertEqual(entries.get(cohort=self.cohort).points, 25 + 10 + self.task.points)
+        self.assertEqual(entries.get(course=self.course).points, 25 + self.task.points)
+    
+    def test_top_students_and_rank(self):
+        """Test top-N uses competition ranking and rank counts higher scores"""
+        self._award(self.student_user, 30, course=self.course)
+        self._award(self.rival, 50, course=self.course)
+        
+        leaders = top_students(course_id=self.course.id)
+        self.assertEqual([leader['student_id'] for leader in leaders], [self.rival.id, self.student_user.id])
+        self.assertEqual([leader['rank'] for leader in leaders], [1, 2])
+        
+        self._award(self.student_user, 20, course=self.course)
+        self.assertEqual([leader['rank'] for leader in top_students(course_id=self.course.id)], [1, 1])
+        
+        self.assertEqual(
+            student_rank(self.student_user, cohort_id=self.cohort.id),
+            {'points': 50, 'rank': 1, 'total_ranked': 2}
+        )
+    
+    def test_rebuild_matches_incremental(self):
+        """Test a rebuild reproduces incrementally maintained totals and fixes drift"""
+        self._award(self.student_user, 25, course=self.course)
+        self._award(self.rival, 10)
+        TaskCompletion.objects.create(user=self.rival, task=self.task, score=90, is_passed=True)
+        expected = dict(LeaderboardEntry.objects.values_list('id', 'points'))
+        
+        LeaderboardEntry.objects.update(points=999)
+        rebuild_leaderboard(cohort_id=self.cohort.id)
+        rebuild_leaderboard(course_id=self.course.id)
+        
+        self.assertEqual(
+            sorted(LeaderboardEntry.objects.values_list('points', flat=True)),
+            sorted(expected.values())
+        )
+
+
+# =================== ACHIEVEMENT RULE TESTS ===================
+
+class AchievementRuleEngineTests(CachedStudentFlowTestCase):
+    """Test declarative, batch-evaluated achievement rules"""
+    
+    def test_criteria_matching(self):
+        """Test every condition must hold and missing facts never match"""
+        criteria = {'percentage_score': {'gte': 95, 'lte': 100}}
+        self.assertTrue(matches(criteria, {'percentage_score': 97}))
+        self.assertFalse(matches(criteria, {'percentage_score': 90}))
+        self.assertFalse(matches(criteria, {}))
+        self.assertTrue(matches({}, {}))
+    
+    def test_seeded_streak_rules_award_once(self):
+        """Test a batch awards every crossed streak rule once per student"""
+        awards = evaluate_events([
+            streak_event(self.student_user.id, 30),
+            streak_event(self.student_user.id, 31),
+        ])
+        
+        self.assertEqual(sorted(award.title for award in awards), ['30-Day Study Streak', '7-Day Study Streak'])
+        self.assertEqual(evaluate_events([streak_event(self.student_user.id, 32)]), [])
+        self.assertEqual(StudentAchievement.objects.filter(student=self.student_user).count(), 2)
+    
+    def test_task_scoped_rule_formats_facts(self):
+        """Test task-scoped rules dedup per task and format titles from facts"""
+        event = quiz_completed_event(self.student_user.id, 1, self.task.id, self.course.id, self.task.title, 100)
+        
+        awards = evaluate_events([event, event._replace(object_id=2)])
+        
+        self.assertEqual(len(awards), 1)
+        self.assertEqual(awards[0].description, f'Scored 100% on {self.task.title}')
+        self.assertEqual(awards[0].scope_key, str(self.task.id))
+    
+    def test_batched_events_evaluated_once(self):
+        """Test events committed inside a batch are evaluated together at its end"""
+        with patch('students.achievements.evaluate_events', wraps=evaluate_events) as evaluate:
+            with batched_events():
+                with self.captureOnCommitCallbacks(execute=True):
+                    queue_events([streak_event(self.student_user.id, 7)])
+                    queue_events([streak_event(self.student_user.id, 30)])
+                evaluate.assert_not_called()
+        
+        evaluate.assert_called_once()
+        self.assertEqual(StudentAchievement.objects.filter(student=self.student_user).count(), 2)
+    
+    def test_rule_edits_invalidate_cache(self):
+        """Test new rules are picked up without a restart"""
+        evaluate_events([streak_event(self.student_user.id, 3)])
+        AchievementRule.objects.create(
+            key='streak-3-days',
+            event=AchievementRule.Event.STREAK_UPDATED,
+            criteria={'streak_days': {'gte': 3}},
+            title='3-Day Study Streak',
+            points=5
+        )
+        
+        awards = evaluate_events([streak_event(self.student_user.id, 3)])
+        self.assertEqual([award.title for award in awards], ['3-Day Study Streak'])
+    
+    def test_backfill_new_rule(self):
+        """Test a new rule is evaluated retroactively over history in shards"""
+        self.enrollment.status = 'completed'
+        self.enrollment.completed_at = timezone.now()
+        self.enrollment.grade = 98
+        self.enrollment.save()
+        
+        rule = AchievementRule.objects.create(
+            key='honours',
+            event=AchievementRule.Event.COURSE_COMPLETED,
+            criteria={'final_grade': {'gte': 95}},
+            scope=AchievementRule.Scope.COURSE,
+            title='Honours: {course_name}',
+            points=50
+        )
+        
+        self.assertEqual(backfill_rule(rule, max_user_id=self.student_user.id), 0)
+        self.assertEqual(backfill_rule(rule, min_user_id=self.student_user.id, chunk_size=1), 1)
+        self.assertEqual(backfill_rule(rule), 0)
+        self.assertTrue(StudentAchievement.objects.filter(
+            student=self.student_user, rule=rule, title='Honours: Python Programming'
+        ).exists())
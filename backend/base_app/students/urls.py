@@ -67,6 +67,11 @@ urlpatterns = [
     # Achievement URLs
     path('api/achievements/', views.StudentAchievementListView.as_view(), name='achievement-list'),
     
+    # Leaderboard URLs
+    path('api/leaderboards/cohorts/<int:cohort_id>/', views.CohortLeaderboardView.as_view(), name='cohort-leaderboard'),
+    path('api/leaderboards/courses/<int:course_id>/', views.CourseLeaderboardView.as_view(), name='course-leaderboard'),
+    path('api/cohorts/<int:cohort_id>/streaks/', views.CohortStreakSummaryView.as_view(), name='cohort-streaks'),
+    
     # Task Completion URLs
     path('api/completions/', views.TaskCompletionListView.as_view(), name='completion-list'),
     
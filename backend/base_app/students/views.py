@@ -6,6 +6,7 @@ from datetime import datetime, timedelta
 from rest_framework import generics, permissions, status, views
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
+from rest_framework.exceptions import ValidationError, PermissionDenied
 from rest_framework.views import APIView
 from django.contrib.auth import get_user_model
 
@@ -13,7 +14,7 @@ from .models import (
     StudentProfile, StudentEnrollment, LearningSession, AssignmentSubmission,
     StudyGroup, StudyGroupMembership, LearningResource, LearningGoal,
     QuizAttempt, StudentNotification, StudentAnalytics, StudentAchievement,
-    Organization, Cohort, Course, Task, Question, TaskCompletion, UserCohort
+    Organization, Cohort, Task, Question, TaskCompletion, UserCohort
 )
 from .serializers import (
     StudentProfileSerializer, StudentProfileUpdateSerializer, StudentEnrollmentSerializer,
@@ -31,6 +32,11 @@ from .permissions import (
     CanManageGoals, CanAccessNotifications, CanAccessAnalytics,
     StudentInSameOrganization, EnrolledStudentOnly, ActiveStudentOnly
 )
+from .quiz_attempts import AttemptLimitReached, start_attempt, complete_attempt
+from .stats import student_stats
+from .catalog import available_courses_for
+from .leaderboards import top_students, student_rank
+from .streaks import cohort_streak_summary
 
 User = get_user_model()
 
@@ -384,12 +390,9 @@ class EndLearningSessionView(APIView):
             status='active'
         )
         
+        # Streak and profile activity are updated by the session signal
         session.end_session()
         
-        # Update student profile activity
-        if hasattr(request.user, 'student_profile'):
-            request.user.student_profile.update_streak()
-        
         return Response(LearningSessionSerializer(session).data)
 
 
@@ -701,19 +704,10 @@ class QuizAttemptListView(generics.ListCreateAPIView):
         return QuizAttemptSerializer
     
     def perform_create(self, serializer):
-        # Get the latest attempt number
-        task_id = serializer.validated_data['task_id']
-        latest_attempt = QuizAttempt.objects.filter(
-            student=self.request.user,
-            task_id=task_id
-        ).order_by('-attempt_number').first()
-        
-        attempt_number = (latest_attempt.attempt_number + 1) if latest_attempt else 1
-        
-        serializer.save(
-            student=self.request.user,
-            attempt_number=attempt_number
-        )
+        try:
+            start_attempt(serializer, self.request.user)
+        except AttemptLimitReached as exc:
+            raise ValidationError({'detail': str(exc)})
 
 
 class QuizAttemptDetailView(generics.RetrieveUpdateAPIView):
@@ -722,9 +716,17 @@ class QuizAttemptDetailView(generics.RetrieveUpdateAPIView):
     permission_classes = [permissions.IsAuthenticated, IsStudentOwner]
     
     def get_queryset(self):
-        return QuizAttempt.objects.filter(
+        queryset = QuizAttempt.objects.filter(
             student=self.request.user
         ).select_related('task', 'course')
+        if self.request.method in ('PUT', 'PATCH'):
+            # Hold the row so completion cannot land between the deadline check and the write
+            queryset = queryset.select_for_update(of=('self',))
+        return queryset
+    
+    @transaction.atomic
+    def update(self, request, *args, **kwargs):
+        return super().update(request, *args, **kwargs)
 
 
 class CompleteQuizAttemptView(APIView):
@@ -732,14 +734,15 @@ class CompleteQuizAttemptView(APIView):
     permission_classes = [permissions.IsAuthenticated, IsStudentOwner]
     
     def put(self, request, attempt_id):
-        attempt = get_object_or_404(
-            QuizAttempt,
-            uuid=attempt_id,
-            student=request.user,
-            status='in_progress'
-        )
-        
-        attempt.complete()
+        with transaction.atomic():
+            attempt = get_object_or_404(
+                QuizAttempt.objects.select_for_update(),
+                uuid=attempt_id,
+                student=request.user,
+                status='in_progress'
+            )
+            
+            complete_attempt(attempt)
         
         return Response(QuizAttemptSerializer(attempt).data)
 
@@ -823,74 +826,45 @@ class StudentStatsView(APIView):
     permission_classes = [permissions.IsAuthenticated, IsStudent]
     
     def get(self, request):
-        user = request.user
-        
-        # Basic stats
-        total_enrollments = StudentEnrollment.objects.filter(student=user).count()
-        completed_courses = StudentEnrollment.objects.filter(
-            student=user, 
-            status='completed'
-        ).count()
-        
-        total_study_time = LearningSession.objects.filter(
-            student=user,
-            status='completed'
-        ).aggregate(total=Sum('total_duration_minutes'))['total'] or 0
-        
-        total_achievements = StudentAchievement.objects.filter(student=user).count()
-        
-        # Performance stats
-        avg_quiz_score = QuizAttempt.objects.filter(
-            student=user,
-            status='completed'
-        ).aggregate(avg=Avg('percentage_score'))['avg'] or 0
-        
-        total_assignments = AssignmentSubmission.objects.filter(student=user).count()
-        passed_assignments = AssignmentSubmission.objects.filter(
-            student=user,
-            is_passed=True
-        ).count()
-        
-        # Learning streaks
-        current_streak = 0
-        if hasattr(user, 'student_profile'):
-            current_streak = user.student_profile.streak_days
-        
-        # Study habits (last 30 days)
-        thirty_days_ago = timezone.now() - timedelta(days=30)
-        study_habits = LearningSession.objects.filter(
-            student=user,
-            started_at__gte=thirty_days_ago,
-            status='completed'
-        ).extra(
-            select={'hour': 'EXTRACT(hour FROM started_at)'}
-        ).values('hour').annotate(
-            sessions=Count('id')
-        ).order_by('hour')
-        
-        # Subject preferences
-        subject_time = LearningSession.objects.filter(
-            student=user,
-            status='completed',
-            course__isnull=False
-        ).values('course__name').annotate(
-            time_spent=Sum('total_duration_minutes'),
-            sessions=Count('id')
-        ).order_by('-time_spent')[:5]
-        
-        stats = {
-            'total_enrollments': total_enrollments,
-            'completed_courses': completed_courses,
-            'total_study_time_hours': total_study_time // 60,
-            'total_achievements': total_achievements,
-            'average_quiz_score': round(avg_quiz_score, 2),
-            'assignment_pass_rate': (passed_assignments / total_assignments * 100) if total_assignments > 0 else 0,
-            'current_streak_days': current_streak,
-            'study_habits': list(study_habits),
-            'top_subjects': list(subject_time)
-        }
-        
-        return Response(stats)
+        return Response(student_stats(request.user))
+
+
+# =================== LEADERBOARDS ===================
+
+class CohortLeaderboardView(APIView):
+    """Top students and the requesting student's rank in a cohort"""
+    permission_classes = [permissions.IsAuthenticated, IsStudent]
+    
+    def get(self, request, cohort_id):
+        if not StudentEnrollment.objects.filter(student=request.user, cohort_id=cohort_id).exists():
+            raise PermissionDenied('You are not enrolled in this cohort.')
+        return Response({
+            'leaders': top_students(cohort_id=cohort_id),
+            'me': student_rank(request.user, cohort_id=cohort_id),
+        })
+
+
+class CohortStreakSummaryView(APIView):
+    """Streak figures for a cohort the requesting student is enrolled in"""
+    permission_classes = [permissions.IsAuthenticated, IsStudent]
+    
+    def get(self, request, cohort_id):
+        if not StudentEnrollment.objects.filter(student=request.user, cohort_id=cohort_id).exists():
+            raise PermissionDenied('You are not enrolled in this cohort.')
+        return Response(cohort_streak_summary(cohort_id))
+
+
+class CourseLeaderboardView(APIView):
+    """Top students and the requesting student's rank in a course"""
+    permission_classes = [permissions.IsAuthenticated, IsStudent]
+    
+    def get(self, request, course_id):
+        if not StudentEnrollment.objects.filter(student=request.user, course_id=course_id).exists():
+            raise PermissionDenied('You are not enrolled in this course.')
+        return Response({
+            'leaders': top_students(course_id=course_id),
+            'me': student_rank(request.user, course_id=course_id),
+        })
 
 
 # =================== ACHIEVEMENTS ===================
@@ -928,25 +902,7 @@ class TaskCompletionListView(generics.ListCreateAPIView):
 @permission_classes([permissions.IsAuthenticated, IsStudent])
 def available_courses(request):
     """Get available courses for enrollment"""
-    user = request.user
-    
-    # Get user's organizations
-    user_orgs = user.userorganization_set.values_list('org_id', flat=True)
-    
-    # Get courses not already enrolled in
-    enrolled_courses = StudentEnrollment.objects.filter(
-        student=user
-    ).values_list('course_id', flat=True)
-    
-    available = Course.objects.filter(
-        org_id__in=user_orgs,
-        status='published'
-    ).exclude(
-        id__in=enrolled_courses
-    ).select_related('org')
-    
-    from .serializers import CourseBasicSerializer
-    return Response(CourseBasicSerializer(available, many=True).data)
+    return Response(available_courses_for(request.user))
 
 
 @api_view(['GET'])